@@ -0,0 +1,167 @@
+import asyncio
+import concurrent.futures
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import pandas as pd
+
+from config import BotConfig
+import metrics
+
+
+logger = logging.getLogger("AnalysisWorker")
+
+
+@dataclass
+class _Job:
+    key: str
+    bar_epoch: int
+    df: pd.DataFrame
+    future: asyncio.Future
+    deadline: float  # loop.time()
+    blocked: float = 0.0
+
+
+class AnalysisWorker:
+    """Runs the indicator computation for each closed bar off the event loop.
+
+    analyze() puts a job on a bounded queue and awaits it; one consumer task hands the
+    jobs to a single worker thread in order. A job resolves to None instead of a frame
+    when a newer bar for the same key was submitted before its result came back
+    (superseded), when its deadline passes first, or when the queue was full and it was
+    the oldest job waiting. A computation that overruns its deadline cannot be
+    interrupted; it finishes in the background and its result is discarded. close()
+    cancels the running job and every job still queued, so their callers see
+    CancelledError instead of waiting forever.
+
+    The time each job spends running on the loop thread (queueing, handing off,
+    collecting) is recorded as its loop-blocked time. With ANALYSIS_EXECUTOR=inline
+    the computation runs on the loop and all of it counts.
+    """
+
+    def __init__(self, compute: Callable[[pd.DataFrame], pd.DataFrame], executor: Optional[str] = None,
+                 queue_size: Optional[int] = None, deadline: Optional[float] = None):
+        self.compute = compute
+        self.executor_kind = executor or BotConfig.ANALYSIS_EXECUTOR
+        self.queue_size = queue_size or BotConfig.ANALYSIS_QUEUE_SIZE
+        self.deadline = deadline or BotConfig.ANALYSIS_DEADLINE_SECONDS
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        if self.executor_kind != 'inline':
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis")
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self._latest_bar: dict[str, int] = {}
+        self.completed = 0
+        self.dropped = {'superseded': 0, 'deadline': 0, 'queue_full': 0}
+        self.last_blocked = 0.0
+        self.max_blocked = 0.0
+        self.last_duration = 0.0
+
+    async def analyze(self, key: str, bar_epoch: int, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """compute(df) for the bar closing at bar_epoch, or None if it was dropped"""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        if self._consumer is None or self._consumer.done():
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._consumer = asyncio.create_task(self._consume(), name="analysis-worker")
+
+        latest = self._latest_bar.get(key)
+        if latest is not None and bar_epoch < latest:
+            self._count_drop('superseded')
+            return None
+        self._latest_bar[key] = bar_epoch
+
+        job = _Job(key, bar_epoch, df, loop.create_future(), loop.time() + self.deadline)
+        if self._queue.full():
+            self._drop(self._queue.get_nowait(), 'queue_full')
+        self._queue.put_nowait(job)
+        job.blocked += time.perf_counter() - started
+
+        result = await job.future
+        self.last_duration = time.perf_counter() - started
+        self.last_blocked = job.blocked
+        self.max_blocked = max(self.max_blocked, job.blocked)
+        metrics.ANALYSIS_LOOP_BLOCKED_SECONDS.observe(job.blocked)
+        return result
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            if job.future.done():
+                continue  # the caller was cancelled
+            if self._is_superseded(job):
+                self._drop(job, 'superseded')
+                continue
+            remaining = job.deadline - loop.time()
+            if remaining <= 0:
+                self._drop(job, 'deadline')
+                continue
+
+            handoff = time.perf_counter()
+            try:
+                if self._executor is None:
+                    result = self.compute(job.df)
+                    job.blocked += time.perf_counter() - handoff
+                else:
+                    work = loop.run_in_executor(self._executor, self.compute, job.df)
+                    job.blocked += time.perf_counter() - handoff
+                    result = await asyncio.wait_for(work, remaining)
+            except asyncio.CancelledError:
+                job.future.cancel()  # close()
+                raise
+            except asyncio.TimeoutError:
+                logger.warning(f"Analysis of {job.key} bar {job.bar_epoch} missed its {self.deadline}s deadline")
+                self._drop(job, 'deadline')
+                continue
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+                continue
+
+            collected = time.perf_counter()
+            if self._is_superseded(job):
+                self._drop(job, 'superseded')
+            elif not job.future.done():
+                self.completed += 1
+                job.future.set_result(result)
+            job.blocked += time.perf_counter() - collected
+
+    def _is_superseded(self, job: _Job) -> bool:
+        return self._latest_bar.get(job.key, job.bar_epoch) > job.bar_epoch
+
+    def _drop(self, job: _Job, reason: str) -> None:
+        self._count_drop(reason)
+        if not job.future.done():
+            job.future.set_result(None)
+
+    def _count_drop(self, reason: str) -> None:
+        self.dropped[reason] += 1
+        metrics.ANALYSIS_DROPPED.labels(reason).inc()
+
+    async def close(self) -> None:
+        if self._consumer:
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+        while self._queue and not self._queue.empty():
+            self._queue.get_nowait().future.cancel()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "deadline_seconds": self.deadline,
+            "queue_size": self.queue_size,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "completed": self.completed,
+            "dropped": dict(self.dropped),
+            "last_duration_ms": round(self.last_duration * 1000, 2),
+            "last_loop_blocked_ms": round(self.last_blocked * 1000, 3),
+            "max_loop_blocked_ms": round(self.max_blocked * 1000, 3),
+        }
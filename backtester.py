@@ -0,0 +1,395 @@
+import argparse
+import logging
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+import numpy as np
+
+import indicators
+from config import BotConfig
+from strategies import StrategyParams
+from market_calendar import MarketCalendar
+
+
+logger = logging.getLogger("Backtester")
+
+RESULT_WIN = 'WIN'
+RESULT_LOSS = 'LOSS'
+RESULT_BREAK_EVEN = 'BREAK_EVEN'
+RESULT_OPEN = 'OPEN'
+
+CONTRACT_SIZE = 100  # troy ounces per 1.0 lot of XAU/USD
+
+
+@dataclass
+class Bars:
+    epoch: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    granularity: int = 60
+
+    @classmethod
+    def from_columns(cls, columns: dict, granularity: int = 60) -> 'Bars':
+        return cls(
+            np.asarray(columns['epoch'], dtype=np.int64),
+            np.asarray(columns['open'], dtype=np.float64),
+            np.asarray(columns['high'], dtype=np.float64),
+            np.asarray(columns['low'], dtype=np.float64),
+            np.asarray(columns['close'], dtype=np.float64),
+            granularity,
+        )
+
+    def __len__(self) -> int:
+        return len(self.epoch)
+
+
+@dataclass
+class IndicatorSet:
+    ema: np.ndarray
+    rsi: np.ndarray
+    adx: np.ndarray
+
+
+@dataclass
+class Trade:
+    direction: str
+    entry_index: int
+    entry_epoch: int
+    entry_price: float
+    exit_epoch: Optional[int]
+    exit_price: Optional[float]
+    result: str
+    tp1_hit: bool
+    pnl_usd: float
+
+
+@dataclass
+class BacktestResult:
+    params: StrategyParams
+    trades: list[Trade] = field(default_factory=list)
+    bars: int = 0
+    elapsed_seconds: float = 0.0
+
+    def _pnl(self) -> np.ndarray:
+        return np.array([t.pnl_usd for t in self.trades if t.result != RESULT_OPEN], dtype=np.float64)
+
+    def summary(self) -> dict:
+        wins = sum(1 for t in self.trades if t.result == RESULT_WIN)
+        losses = sum(1 for t in self.trades if t.result == RESULT_LOSS)
+        break_evens = sum(1 for t in self.trades if t.result == RESULT_BREAK_EVEN)
+        pnl = self._pnl()
+        equity = np.cumsum(pnl)
+        drawdown = np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:] - equity if len(pnl) else pnl
+        gross_win = pnl[pnl > 0].sum()
+        gross_loss = -pnl[pnl < 0].sum()
+        return {
+            'bars': self.bars,
+            'trades': len(pnl),
+            'wins': wins,
+            'losses': losses,
+            'break_evens': break_evens,
+            'open': len(self.trades) - len(pnl),
+            'win_rate': round(wins / (wins + losses) * 100, 1) if (wins + losses) else 0.0,
+            'expectancy_usd': round(float(pnl.mean()), 4) if len(pnl) else 0.0,
+            'total_pnl_usd': round(float(pnl.sum()), 2),
+            'max_drawdown_usd': round(float(drawdown.max()), 2) if len(pnl) else 0.0,
+            'profit_factor': round(float(gross_win / gross_loss), 3) if gross_loss else None,
+            'elapsed_seconds': round(self.elapsed_seconds, 3),
+        }
+
+    def format_report(self) -> str:
+        s = self.summary()
+        return (
+            f"Bars: {s['bars']} | Trades: {s['trades']} (open: {s['open']})\n"
+            f"WIN: {s['wins']} | LOSS: {s['losses']} | BE: {s['break_evens']} | Win rate: {s['win_rate']:.1f}%\n"
+            f"Expectancy: ${s['expectancy_usd']:.2f}/trade | Total: ${s['total_pnl_usd']:.2f} | "
+            f"Max drawdown: ${s['max_drawdown_usd']:.2f} | Profit factor: {s['profit_factor']}\n"
+            f"Elapsed: {s['elapsed_seconds']:.3f}s"
+        )
+
+
+def compute_indicators(bars: Bars, params: StrategyParams) -> IndicatorSet:
+    return IndicatorSet(
+        ema=indicators.ema(bars.close, params.ema_period),
+        rsi=indicators.rsi(bars.close, params.rsi_period),
+        adx=indicators.adx(bars.high, bars.low, bars.close, params.adx_period),
+    )
+
+
+def find_entries(close: np.ndarray, ind: IndicatorSet, params: StrategyParams) -> tuple[np.ndarray, np.ndarray]:
+    """Boolean BUY/SELL masks using the same rules as SignalEngine.run on each closed bar"""
+    prev_rsi = np.empty_like(ind.rsi)
+    prev_rsi[0] = np.nan
+    prev_rsi[1:] = ind.rsi[:-1]
+    valid = ~(np.isnan(ind.ema) | np.isnan(ind.rsi) | np.isnan(ind.adx) | np.isnan(prev_rsi))
+    trending = valid & (ind.adx >= params.adx_threshold)
+    buy = (trending & (close > ind.ema) & (prev_rsi < params.rsi_oversold)
+           & (ind.rsi >= params.rsi_exit_oversold) & (ind.rsi > prev_rsi))
+    sell = (trending & (close < ind.ema) & (prev_rsi > params.rsi_overbought)
+            & (ind.rsi <= params.rsi_exit_overbought) & (ind.rsi < prev_rsi))
+    return buy, sell
+
+
+def _first(mask: np.ndarray) -> int:
+    if not len(mask):
+        return -1
+    idx = int(np.argmax(mask))
+    return idx if mask[idx] else -1
+
+
+def resolve_exit(favorable: np.ndarray, adverse: np.ndarray, params: StrategyParams,
+                 pessimistic: bool = True) -> tuple[str, int, bool]:
+    """Walk a price path after entry and return (result, exit offset, tp1 hit).
+
+    `favorable`/`adverse` are the per-step best and worst excursions from entry
+    (intrabar high/low for bars, the same price twice for ticks). When SL and a
+    target fall inside the same bar, `pessimistic` resolves the tie against the trade.
+    """
+    tp1 = params.tp_usd
+    tp2 = params.tp_usd * params.tp2_multiplier
+    t1 = _first(favorable >= tp1)
+    ts = _first(adverse >= params.sl_usd)
+    if t1 < 0 and ts < 0:
+        return RESULT_OPEN, -1, False
+    if t1 < 0 or (0 <= ts < t1) or (ts == t1 and pessimistic):
+        return RESULT_LOSS, ts, False
+    if favorable[t1] >= tp2:
+        return RESULT_WIN, t1, True
+
+    # TP1 hit: SL moves to entry, the trade is now either TP2 or break-even
+    return _resolve_after_tp1(favorable, adverse, tp2, t1 if pessimistic else t1 + 1, pessimistic)
+
+
+def _resolve_after_tp1(favorable: np.ndarray, adverse: np.ndarray, tp2: float, start: int,
+                       pessimistic: bool) -> tuple[str, int, bool]:
+    t2 = _first(favorable[start:] >= tp2)
+    tb = _first(adverse[start:] >= 0.0)
+    if t2 < 0 and tb < 0:
+        return RESULT_OPEN, -1, True
+    if t2 < 0 or (0 <= tb < t2) or (tb == t2 and pessimistic):
+        return RESULT_BREAK_EVEN, start + tb, True
+    return RESULT_WIN, start + t2, True
+
+
+def resolve_open_trade(trade: dict, high: np.ndarray, low: np.ndarray,
+                       pessimistic: bool = True) -> tuple[str, int, bool]:
+    """resolve_exit() for a trade already in progress, from its signal_info levels.
+
+    `high`/`low` are the path since the trade was last checked (pass the tick prices
+    as both, with pessimistic=False). A trade whose status is 'tp1_hit' only has
+    TP2 or break-even left.
+    """
+    entry = trade['entry_price']
+    if trade['direction'] == 'BUY':
+        favorable, adverse = high - entry, entry - low
+    else:
+        favorable, adverse = entry - low, high - entry
+    tp2 = abs(trade['tp2_level'] - entry)
+    if trade.get('status') == 'tp1_hit':
+        return _resolve_after_tp1(favorable, adverse, tp2, 0, pessimistic)
+    tp1 = abs(trade['tp1_level'] - entry)
+    params = StrategyParams(sl_usd=abs(entry - trade['sl_level']), tp_usd=tp1, tp2_multiplier=tp2 / tp1)
+    return resolve_exit(favorable, adverse, params, pessimistic)
+
+
+def trade_pnl(result: str, params: StrategyParams, partial_close: float,
+              contract_size: float = CONTRACT_SIZE) -> float:
+    """P&L in USD at BotConfig.LOT_SIZE; `partial_close` is the fraction closed at TP1"""
+    tp1 = params.tp_usd
+    tp2 = params.tp_usd * params.tp2_multiplier
+    if result == RESULT_LOSS:
+        distance = -params.sl_usd
+    elif result == RESULT_BREAK_EVEN:
+        distance = partial_close * tp1
+    elif result == RESULT_WIN:
+        distance = partial_close * tp1 + (1 - partial_close) * tp2
+    else:
+        distance = 0.0
+    return distance * BotConfig.LOT_SIZE * contract_size
+
+
+class Backtester:
+    """Replay the EMA + RSI + ADX scalping rules over a bar archive.
+
+    Indicators are computed once over the whole array. Entry candidates are found
+    with vectorized masks; only the candidates are walked in order to apply the
+    cooldown and one-open-trade gating and to resolve exits. Note that the live engine
+    recomputes indicators on a 100-bar window, so warm-up-sensitive values such as
+    ADX(55) can differ slightly from the full-history values used here. With a
+    `calendar`, entries whose bar closes inside a closed session are dropped in one
+    vectorised pass, as the live engine does not analyse while the market is closed.
+    """
+
+    def __init__(self, params: Optional[StrategyParams] = None, partial_close: float = 0.5,
+                 pessimistic: bool = True, window: int = 256, calendar: Optional[MarketCalendar] = None):
+        self.params = params or StrategyParams()
+        self.partial_close = partial_close
+        self.pessimistic = pessimistic
+        self.window = window
+        self.calendar = calendar
+
+    def _scan_bars(self, bars: Bars, start: int, direction: str, entry: float) -> tuple[str, int, bool]:
+        offset = start
+        size = self.window
+        tp1_hit = False
+        while offset < len(bars):
+            stop = min(offset + size, len(bars))
+            # Re-resolve from `start` so a TP1 hit in an earlier window is not lost
+            high = bars.high[start:stop]
+            low = bars.low[start:stop]
+            if direction == 'BUY':
+                favorable, adverse = high - entry, entry - low
+            else:
+                favorable, adverse = entry - low, high - entry
+            result, exit_offset, tp1_hit = resolve_exit(favorable, adverse, self.params, self.pessimistic)
+            if result != RESULT_OPEN:
+                return result, start + exit_offset, tp1_hit
+            if stop == len(bars):
+                return RESULT_OPEN, -1, tp1_hit
+            offset = stop
+            size *= 4
+        return RESULT_OPEN, -1, tp1_hit
+
+    def _scan_ticks(self, tick_epochs: np.ndarray, tick_prices: np.ndarray, after_epoch: int,
+                    direction: str, entry: float) -> tuple[str, int, bool]:
+        start = int(np.searchsorted(tick_epochs, after_epoch, side='left'))
+        size = self.window * 16
+        stop = start
+        tp1_hit = False
+        while stop < len(tick_prices):
+            stop = min(stop + size, len(tick_prices))
+            prices = tick_prices[start:stop]
+            move = prices - entry if direction == 'BUY' else entry - prices
+            result, exit_offset, tp1_hit = resolve_exit(move, -move, self.params, pessimistic=False)
+            if result != RESULT_OPEN:
+                return result, start + exit_offset, tp1_hit
+            size *= 4
+        return RESULT_OPEN, -1, tp1_hit
+
+    def run(self, bars: Bars, ticks: Optional[tuple[np.ndarray, np.ndarray]] = None,
+            ind: Optional[IndicatorSet] = None) -> BacktestResult:
+        """Backtest over `bars`; pass `ticks` as (epochs, prices) to resolve exits on the tick path"""
+        started = time.perf_counter()
+        params = self.params
+        if ind is None:
+            ind = compute_indicators(bars, params)
+        buy, sell = find_entries(bars.close, ind, params)
+        candidates = np.flatnonzero(buy | sell)
+        if self.calendar is not None:
+            candidates = candidates[self.calendar.open_mask(bars.epoch[candidates] + bars.granularity)]
+
+        result = BacktestResult(params=params, bars=len(bars))
+        next_allowed_index = 0
+        next_allowed_epoch = -1
+        last_entry_epoch: Optional[int] = None
+
+        for i in candidates:
+            i = int(i)
+            close_epoch = int(bars.epoch[i]) + bars.granularity
+            if i < next_allowed_index or close_epoch < next_allowed_epoch:
+                continue
+            if last_entry_epoch is not None and close_epoch - last_entry_epoch < params.cooldown_seconds:
+                continue
+
+            direction = 'BUY' if buy[i] else 'SELL'
+            entry = float(bars.close[i])
+            exit_epoch = None
+            exit_price = None
+
+            if ticks is not None:
+                outcome, exit_idx, tp1_hit = self._scan_ticks(ticks[0], ticks[1], close_epoch, direction, entry)
+                if outcome != RESULT_OPEN:
+                    exit_epoch = int(ticks[0][exit_idx])
+                    exit_price = float(ticks[1][exit_idx])
+                    next_allowed_epoch = exit_epoch
+                    next_allowed_index = i + 1
+            else:
+                outcome, exit_idx, tp1_hit = self._scan_bars(bars, i + 1, direction, entry)
+                if outcome != RESULT_OPEN:
+                    exit_epoch = int(bars.epoch[exit_idx])
+                    sign = 1 if direction == 'BUY' else -1
+                    tp2_distance = params.tp_usd * params.tp2_multiplier
+                    exit_price = {
+                        RESULT_WIN: entry + sign * tp2_distance,
+                        RESULT_LOSS: entry - sign * params.sl_usd,
+                        RESULT_BREAK_EVEN: entry,
+                    }[outcome]
+                    # The exit bar closes after the exit, so it may carry the next signal
+                    next_allowed_index = exit_idx
+
+            result.trades.append(Trade(
+                direction=direction,
+                entry_index=i,
+                entry_epoch=close_epoch,
+                entry_price=entry,
+                exit_epoch=exit_epoch,
+                exit_price=exit_price,
+                result=outcome,
+                tp1_hit=tp1_hit,
+                pnl_usd=trade_pnl(outcome, params, self.partial_close),
+            ))
+            last_entry_epoch = close_epoch
+            if outcome == RESULT_OPEN:
+                break
+
+        result.elapsed_seconds = time.perf_counter() - started
+        return result
+
+
+def synthetic_bars(n: int, seed: int = 7, granularity: int = 60, start_price: float = 2650.0) -> Bars:
+    """Random-walk OHLC bars for benchmarks and smoke tests"""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.35, size=n)
+    close = start_price + np.cumsum(steps)
+    open_ = np.empty(n)
+    open_[0] = start_price
+    open_[1:] = close[:-1]
+    wick = np.abs(rng.normal(0, 0.25, size=(2, n)))
+    high = np.maximum(open_, close) + wick[0]
+    low = np.minimum(open_, close) - wick[1]
+    epoch = 1735689600 + np.arange(n, dtype=np.int64) * granularity
+    return Bars(epoch, open_, high, low, close, granularity)
+
+
+if __name__ == "__main__":
+    from deriv_ws import XAUUSD_SYMBOL
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Backtest the EMA + RSI + ADX scalping strategy")
+    parser.add_argument("--symbol", default=XAUUSD_SYMBOL)
+    parser.add_argument("--granularity", type=int, default=60)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--ticks", action="store_true", help="Resolve exits on the recorded tick path")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N random-walk bars instead of the archive")
+    parser.add_argument("--optimistic", action="store_true", help="Resolve same-bar SL/TP ties in favor of the trade")
+    parser.add_argument("--partial-close", type=float, default=0.5)
+    parser.add_argument("--calendar", action="store_true", help="Skip entries in closed sessions (weekends, holidays)")
+    args = parser.parse_args()
+
+    ticks = None
+    if args.synthetic:
+        bars = synthetic_bars(args.synthetic, granularity=args.granularity)
+    else:
+        from candle_archive import CandleArchive
+
+        end = int(time.time())
+        start = end - args.days * 86400
+        bars = Bars.from_columns(CandleArchive().load(args.symbol, args.granularity, start, end), args.granularity)
+        if args.ticks:
+            from tick_store import TickStore
+
+            recorded = TickStore().query(args.symbol, start, end)
+            ticks = (recorded['epoch'], recorded['quote'])
+
+    if len(bars) == 0:
+        print("No bars available - run `python candle_archive.py backfill` first")
+    else:
+        backtester = Backtester(partial_close=args.partial_close, pessimistic=not args.optimistic,
+                                calendar=MarketCalendar() if args.calendar else None)
+        result = backtester.run(bars, ticks=ticks)
+        print(result.format_report())
+        print(asdict(result.params))
@@ -0,0 +1,160 @@
+import logging
+from typing import Optional
+
+import numpy as np
+
+from config import BotConfig
+from candle_frame import PRICE_COLUMNS
+from indicators import streaming_indicator
+
+
+logger = logging.getLogger("BarCache")
+
+
+class TimeframeSeries:
+    """Closed bars of one (symbol, timeframe) and their indicator values.
+
+    add() takes closed 1m bars in order and rolls them into buckets of `minutes`
+    aligned to UTC midnight. A bucket closes with its last minute (or, across a gap,
+    when a bar of a later bucket arrives); only then are the indicators advanced, one
+    O(1) step each. The newest `depth` closed bars are kept in a ring, prices and
+    indicator values side by side, so any value is a single array read.
+    """
+
+    __slots__ = ('minutes', 'seconds', 'depth', 'columns', '_column_index', '_states',
+                 '_epochs', '_values', '_count', '_forming')
+
+    def __init__(self, minutes: int, indicators: list[str], depth: int):
+        self.minutes = minutes
+        self.seconds = minutes * 60
+        self.depth = depth
+        self.columns = tuple(PRICE_COLUMNS) + tuple(indicators)
+        self._column_index = {name: i for i, name in enumerate(self.columns)}
+        self._states = [streaming_indicator(name) for name in indicators]
+        self._epochs = np.zeros(depth, dtype=np.int64)
+        self._values = np.full((depth, len(self.columns)), np.nan)
+        self._count = 0
+        self._forming: Optional[list] = None  # [bucket, open, high, low, close]
+
+    def __len__(self) -> int:
+        return min(self._count, self.depth)
+
+    @property
+    def last_epoch(self) -> Optional[int]:
+        """Open time of the newest closed bar"""
+        return int(self._epochs[(self._count - 1) % self.depth]) if self._count else None
+
+    @property
+    def nbytes(self) -> int:
+        return self._epochs.nbytes + self._values.nbytes
+
+    def add(self, epoch: int, open_: float, high: float, low: float, close: float) -> None:
+        bucket = epoch - epoch % self.seconds
+        forming = self._forming
+        if forming is not None and forming[0] != bucket:
+            self._close_bar()
+            forming = None
+        if forming is None:
+            self._forming = [bucket, open_, high, low, close]
+        else:
+            if high > forming[2]:
+                forming[2] = high
+            if low < forming[3]:
+                forming[3] = low
+            forming[4] = close
+        if epoch + 60 >= bucket + self.seconds:
+            self._close_bar()
+
+    def _close_bar(self) -> None:
+        bucket, open_, high, low, close = self._forming
+        self._forming = None
+        row = self._values[self._count % self.depth]
+        self._epochs[self._count % self.depth] = bucket
+        values = [open_, high, low, close]
+        for state in self._states:
+            values.append(state.update(high, low, close))
+        row[:] = values
+        self._count += 1
+
+    def value(self, column: str, ago: int = 0) -> float:
+        """`column` of the closed bar `ago` bars back (0 = newest); NaN if not kept yet"""
+        if ago >= len(self):
+            return np.nan
+        return float(self._values[(self._count - 1 - ago) % self.depth, self._column_index[column]])
+
+
+class BarCache:
+    """Multi-timeframe bars for every symbol, rolled up in memory from closed 1m bars.
+
+    The 1m candles the engines already fetch are fed to update(); every configured
+    timeframe is built from them, so a 5m or 15m view costs no extra request.
+    get(symbol, timeframe, column) reads a price or indicator column of the last
+    closed bar in O(1). Column names follow calculate_indicators() ('EMA_50',
+    'RSI_3', 'ADX_55', 'ATRr_14') plus 'Open'/'High'/'Low'/'Close'.
+    """
+
+    def __init__(self, timeframes: Optional[list[int]] = None, indicators: Optional[list[str]] = None,
+                 depth: Optional[int] = None):
+        timeframes = set(timeframes or BotConfig.MTF_TIMEFRAMES)
+        if BotConfig.MTF_TREND_TIMEFRAME:
+            timeframes.add(BotConfig.MTF_TREND_TIMEFRAME)
+        self.timeframes = sorted(timeframes | {1})
+        self.indicators = list(indicators or BotConfig.MTF_INDICATORS)
+        self.depth = depth or BotConfig.MTF_DEPTH
+        self._series: dict[tuple[str, int], TimeframeSeries] = {}
+        self._last_epoch: dict[str, int] = {}
+
+    @property
+    def warmup_bars(self) -> int:
+        """1m bars needed before every indicator on the slowest timeframe has a value"""
+        longest = max((int(name.rpartition('_')[2]) for name in self.indicators), default=1)
+        # ADX smooths twice, so it needs about 2x its length before the first value
+        return self.timeframes[-1] * (2 * longest + 1)
+
+    def last_epoch(self, symbol: str) -> Optional[int]:
+        """Open time of the newest 1m bar fed for `symbol`"""
+        return self._last_epoch.get(symbol)
+
+    def update(self, symbol: str, columns: dict[str, np.ndarray]) -> int:
+        """Feed closed 1m bars (candles_to_columns layout); returns how many were new.
+
+        Bars at or before the newest one already fed are skipped, so overlapping
+        payloads can be passed as they come.
+        """
+        epochs = columns['epoch']
+        last = self._last_epoch.get(symbol)
+        start = 0 if last is None else int(np.searchsorted(epochs, last, side='right'))
+        if start >= len(epochs):
+            return 0
+        series = [self._get_series(symbol, timeframe) for timeframe in self.timeframes]
+        rows = zip(epochs[start:].tolist(), columns['open'][start:].tolist(), columns['high'][start:].tolist(),
+                   columns['low'][start:].tolist(), columns['close'][start:].tolist())
+        for epoch, open_, high, low, close in rows:
+            for timeframe_series in series:
+                timeframe_series.add(epoch, open_, high, low, close)
+        self._last_epoch[symbol] = int(epochs[-1])
+        return len(epochs) - start
+
+    def _get_series(self, symbol: str, timeframe: int) -> TimeframeSeries:
+        series = self._series.get((symbol, timeframe))
+        if series is None:
+            series = self._series[(symbol, timeframe)] = TimeframeSeries(timeframe, self.indicators, self.depth)
+        return series
+
+    def series(self, symbol: str, timeframe: int) -> Optional[TimeframeSeries]:
+        return self._series.get((symbol, timeframe))
+
+    def get(self, symbol: str, timeframe: int, column: str, ago: int = 0) -> float:
+        series = self._series.get((symbol, timeframe))
+        return series.value(column, ago) if series is not None else np.nan
+
+    @property
+    def nbytes(self) -> int:
+        return sum(series.nbytes for series in self._series.values())
+
+    def get_stats(self) -> dict:
+        return {
+            "timeframes": self.timeframes,
+            "symbols": sorted(self._last_epoch),
+            "bars": {f"{symbol}@{timeframe}m": len(series) for (symbol, timeframe), series in self._series.items()},
+        }
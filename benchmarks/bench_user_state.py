@@ -0,0 +1,171 @@
+"""Benchmark: dict-of-dicts user states vs the compact UserState model at 50k users.
+
+Measures retained memory (tracemalloc) and the save_user_states / load_user_states
+file round trip for the same population, old code path vs new; the JSON written by
+the compact model must parse to exactly what the old code wrote.
+Run from the repo root:
+    python benchmarks/bench_user_state.py
+    python benchmarks/bench_user_state.py --users 50000 --history 100
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from user_state import UserState
+
+
+BASE_TIME = datetime.datetime(2025, 12, 24, 13, 0, tzinfo=datetime.timezone.utc)
+
+
+def make_legacy_states(users: int, history: int) -> dict[str, dict]:
+    """Same shape the old StateManager kept in memory (ISO strings, copied trade dicts)"""
+    states = {}
+    for u in range(users):
+        entries = []
+        for i in range(history):
+            entry = 4480.0 + (u + i) % 500 * 0.01
+            entries.append({
+                'id': i + 1,
+                'direction': 'BUY' if i % 2 else 'SELL',
+                'entry_price': entry,
+                'tp1': entry + 3.0,
+                'tp2': entry + 4.5,
+                'sl': entry - 3.0,
+                'timestamp': (BASE_TIME + datetime.timedelta(minutes=i)).isoformat(),
+                'result': ('WIN', 'LOSS', 'BREAK_EVEN')[i % 3] if i < history - 1 else 'PENDING',
+            })
+        active_trade = {}
+        if history:
+            last = entries[-1]
+            active_trade = {
+                'direction': last['direction'],
+                'entry_price': last['entry_price'],
+                'tp1_level': last['tp1'],
+                'tp2_level': last['tp2'],
+                'sl_level': last['sl'],
+                'start_time_utc': BASE_TIME + datetime.timedelta(minutes=history - 1),
+                'status': 'active',
+            }
+        states[str(1_000_000_000 + u)] = {
+            'win_count': history // 3,
+            'loss_count': history // 3,
+            'be_count': history // 3,
+            'active_trade': active_trade,
+            'tracking_message_id': 1000 + u,
+            'last_signal_time': None,
+            'signal_history': entries,
+        }
+    return states
+
+
+def legacy_save(states: dict[str, dict], path: str) -> None:
+    """The pre-UserState save_user_states body"""
+    states_to_save = {}
+    for chat_id, state in states.items():
+        state_copy = state.copy()
+        if state_copy.get('active_trade') and 'start_time_utc' in state_copy['active_trade']:
+            trade = state_copy['active_trade'].copy()
+            if isinstance(trade.get('start_time_utc'), datetime.datetime):
+                trade['start_time_utc'] = trade['start_time_utc'].isoformat()
+            state_copy['active_trade'] = trade
+        if state_copy.get('signal_history'):
+            state_copy['signal_history'] = [sig.copy() for sig in state_copy['signal_history']]
+        states_to_save[chat_id] = state_copy
+    with open(path, 'w') as f:
+        json.dump(states_to_save, f, indent=2)
+
+
+def legacy_load(path: str) -> dict[str, dict]:
+    with open(path, 'r') as f:
+        loaded = json.load(f)
+    for state in loaded.values():
+        if state.get('active_trade') and 'start_time_utc' in state['active_trade']:
+            state['active_trade']['start_time_utc'] = datetime.datetime.fromisoformat(
+                state['active_trade']['start_time_utc']
+            )
+    return loaded
+
+
+def compact_save(states: dict[str, UserState], path: str) -> None:
+    history_memo = {}
+    with open(path, 'w') as f:
+        f.write(json.dumps({chat_id: state.to_dict(history_memo) for chat_id, state in states.items()}))
+
+
+def compact_load(path: str) -> dict[str, UserState]:
+    with open(path, 'r') as f:
+        return {chat_id: UserState.from_dict(state) for chat_id, state in json.load(f).items()}
+
+
+def retained_bytes(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, obj
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(users: int, history: int, workdir: str) -> dict:
+    legacy_path = os.path.join(workdir, "user_states_legacy.json")
+    compact_path = os.path.join(workdir, "user_states_compact.json")
+
+    # One population in memory at a time; 50k legacy users are several hundred MiB
+    legacy_bytes, legacy = retained_bytes(lambda: make_legacy_states(users, history))
+    legacy_save_s = timed(lambda: legacy_save(legacy, legacy_path))
+    del legacy
+    legacy_load_s = timed(lambda: legacy_load(legacy_path))
+    gc.collect()
+
+    compact_bytes, compact = retained_bytes(lambda: compact_load(legacy_path))
+    compact_save_s = timed(lambda: compact_save(compact, compact_path))
+    del compact
+    compact_load_s = timed(lambda: compact_load(compact_path))
+
+    with open(legacy_path, 'r') as f:
+        legacy_json = json.load(f)
+    with open(compact_path, 'r') as f:
+        lossless = json.load(f) == legacy_json
+    del legacy_json
+
+    return {
+        "users": users,
+        "history_per_user": history,
+        "lossless": lossless,
+        "memory_mb": {"before": round(legacy_bytes / 2**20, 1), "after": round(compact_bytes / 2**20, 1)},
+        "save_seconds": {"before": round(legacy_save_s, 3), "after": round(compact_save_s, 3)},
+        "load_seconds": {"before": round(legacy_load_s, 3), "after": round(compact_load_s, 3)},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--history", type=int, default=20, help="signal_history entries per user")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        result = run(args.users, args.history, workdir)
+    print(f"{result['users']} users x {result['history_per_user']} history entries "
+          f"(saved JSON identical: {result['lossless']})")
+    for key, label, unit in (("memory_mb", "Retained memory", "MiB"),
+                             ("save_seconds", "save_user_states", "s"),
+                             ("load_seconds", "load_user_states", "s")):
+        before, after = result[key]["before"], result[key]["after"]
+        ratio = f"({before / after:.2f}x)" if after else ""
+        print(f"{label:<17} before {before:>8} {unit} | after {after:>8} {unit} {ratio}")
@@ -0,0 +1,162 @@
+"""Command latency under load: webhook -> update processor -> fake Bot API server.
+
+Run from the repo root:
+    python benchmarks/bench_webhook.py
+    python benchmarks/bench_webhook.py --chats 200 --commands 5 --slow-ms 1500 --workers 1 8 32
+
+A local aiohttp server plays the Bot API (getMe, sendMessage, setWebhook) and records
+when each reply arrives. Every chat POSTs its commands to the webhook one after another;
+--slow-share of the chats start with a /slow command that sleeps --slow-ms (a /signal
+candle fetch) before replying. Reported: latency of the /fast commands from POST to
+reply, and whether every chat's replies arrived in the order its commands were sent.
+workers=1 is PTB's default sequential processing.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from aiohttp import ClientSession, web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.ext import Application, CommandHandler
+
+from telegram_webhook import SECRET_HEADER, ChatOrderedUpdateProcessor, TelegramWebhook
+
+
+TOKEN = "123456:bench"
+SECRET = "bench-secret"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+
+
+class FakeBotApi:
+    def __init__(self):
+        self.replies: dict[int, list[tuple[int, float]]] = {}  # chat_id -> [(seq, perf_counter)]
+        self.message_id = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        data = dict(await request.post()) if request.content_type != 'application/json' else await request.json()
+        if method == 'getMe':
+            return web.json_response({"ok": True, "result": BOT_USER})
+        if method == 'sendMessage':
+            chat_id = int(data['chat_id'])
+            self.replies.setdefault(chat_id, []).append((int(str(data['text']).split()[-1]), time.perf_counter()))
+            self.message_id += 1
+            return web.json_response({"ok": True, "result": {
+                "message_id": self.message_id, "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"}, "from": BOT_USER, "text": data['text']}})
+        return web.json_response({"ok": True, "result": True})
+
+
+def make_update(update_id: int, chat_id: int, command: str, seq: int) -> dict:
+    text = f"/{command} {seq}"
+    return {"update_id": update_id, "message": {
+        "message_id": update_id, "date": int(time.time()), "text": text,
+        "chat": {"id": chat_id, "type": "private"},
+        "from": {"id": chat_id, "is_bot": False, "first_name": f"user{chat_id}"},
+        "entities": [{"type": "bot_command", "offset": 0, "length": len(command) + 1}]}}
+
+
+async def start_site(app: web.Application) -> tuple[web.AppRunner, int]:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, runner.addresses[0][1]
+
+
+async def run_case(workers: int, args) -> dict:
+    api = FakeBotApi()
+    api_app = web.Application()
+    api_app.router.add_route('*', '/bot{token}/{method}', api.handle)
+    api_runner, api_port = await start_site(api_app)
+
+    builder = Application.builder().token(TOKEN).base_url(f"http://127.0.0.1:{api_port}/bot")
+    if workers > 1:
+        builder = builder.concurrent_updates(ChatOrderedUpdateProcessor(workers, 4096))
+    application = builder.build()
+
+    async def fast(update, context):
+        await update.message.reply_text(f"ack {context.args[0]}")
+
+    async def slow(update, context):
+        await asyncio.sleep(args.slow_ms / 1000)
+        await update.message.reply_text(f"ack {context.args[0]}")
+
+    application.add_handler(CommandHandler("fast", fast))
+    application.add_handler(CommandHandler("slow", slow))
+    webhook = TelegramWebhook(application, SECRET, path="/telegram/webhook")
+    hook_app = web.Application()
+    webhook.add_routes(hook_app)
+    hook_runner, hook_port = await start_site(hook_app)
+
+    sent: dict[tuple[int, int], float] = {}
+    fast_keys = []
+    slow_chats = int(args.chats * args.slow_share)
+    url = f"http://127.0.0.1:{hook_port}/telegram/webhook"
+
+    async with application:
+        await application.start()
+        async with ClientSession() as session:
+            async with session.post(url, json=make_update(1, 1, "fast", 0)) as resp:
+                assert resp.status == 403, f"update without the secret token got {resp.status}"
+        async with ClientSession(headers={SECRET_HEADER: SECRET}) as session:
+            async def chat(index: int) -> None:
+                chat_id = 1000 + index
+                for seq in range(args.commands):
+                    command = "slow" if seq == 0 and index < slow_chats else "fast"
+                    sent[(chat_id, seq)] = time.perf_counter()
+                    if command == "fast":
+                        fast_keys.append((chat_id, seq))
+                    async with session.post(url, json=make_update(chat_id * 100 + seq, chat_id, command, seq)) as resp:
+                        assert resp.status == 200, resp.status
+
+            started = time.perf_counter()
+            await asyncio.gather(*(chat(i) for i in range(args.chats)))
+            expected = args.chats * args.commands
+            deadline = time.perf_counter() + 120
+            while sum(len(r) for r in api.replies.values()) < expected and time.perf_counter() < deadline:
+                await asyncio.sleep(0.01)
+            elapsed = time.perf_counter() - started
+        await application.stop()
+    await hook_runner.cleanup()
+    await api_runner.cleanup()
+
+    received = {(chat_id, seq): at for chat_id, replies in api.replies.items() for seq, at in replies}
+    latencies = sorted(received[key] - sent[key] for key in fast_keys if key in received)
+    in_order = all([seq for seq, _ in replies] == sorted(seq for seq, _ in replies) for replies in api.replies.values())
+    return {
+        'workers': workers,
+        'replies': f"{len(received)}/{args.chats * args.commands}",
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else float('nan'),
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else float('nan'),
+        'max_ms': latencies[-1] * 1000 if latencies else float('nan'),
+        'total_s': elapsed,
+        'in_order': in_order,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chats', type=int, default=50)
+    parser.add_argument('--commands', type=int, default=4, help="commands per chat")
+    parser.add_argument('--slow-share', type=float, default=0.2)
+    parser.add_argument('--slow-ms', type=float, default=500)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32])
+    args = parser.parse_args()
+
+    print(f"{args.chats} chats x {args.commands} commands, {args.slow_share:.0%} of chats start with "
+          f"a {args.slow_ms:.0f} ms /slow\n")
+    print(f"{'workers':>8} {'replies':>10} {'fast p50':>10} {'fast p95':>10} {'fast max':>10} {'total':>8}  order")
+    for workers in args.workers:
+        r = await run_case(workers, args)
+        print(f"{r['workers']:>8} {r['replies']:>10} {r['p50_ms']:>8.1f}ms {r['p95_ms']:>8.1f}ms "
+              f"{r['max_ms']:>8.1f}ms {r['total_s']:>7.2f}s  {'ok' if r['in_order'] else 'BROKEN'}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""Microbenchmark: Deriv tick message parsing and tick storage, before vs after.
+
+Run from the repo root:
+    python benchmarks/bench_ws_parse.py
+    JSON_DECODER=orjson python benchmarks/bench_ws_parse.py
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tick_buffer import TickRingBuffer
+from ws_codec import decode_message, JSON_BACKEND
+
+
+N_MESSAGES = 100_000
+N_TICKS_MEMORY = 10_000
+
+
+def make_tick_messages(n: int) -> list[str]:
+    base_epoch = 1766610000
+    messages = []
+    for i in range(n):
+        quote = round(4480.0 + (i % 500) * 0.01, 2)
+        messages.append(json.dumps({
+            "echo_req": {"subscribe": 1, "ticks": "frxXAUUSD"},
+            "msg_type": "tick",
+            "subscription": {"id": "c2a7f4e5-2b41-5d0b-9ef1-3c0d1e8f0a11"},
+            "tick": {
+                "ask": quote + 0.2,
+                "bid": quote - 0.2,
+                "epoch": base_epoch + i,
+                "id": "c2a7f4e5-2b41-5d0b-9ef1-3c0d1e8f0a11",
+                "pip_size": 2,
+                "quote": quote,
+                "symbol": "frxXAUUSD"
+            }
+        }))
+    return messages
+
+
+def parse_baseline(messages: list[str], history: deque) -> None:
+    for message in messages:
+        data = json.loads(message)
+        if "tick" in data:
+            tick = data["tick"]
+            price = float(tick["quote"])
+            history.append({
+                "price": price,
+                "epoch": tick["epoch"],
+                "symbol": tick.get("symbol", "frxXAUUSD")
+            })
+
+
+def parse_fast(messages: list[str], history: TickRingBuffer) -> None:
+    for message in messages:
+        msg = decode_message(message)
+        tick = msg.tick
+        if tick is not None:
+            history.append(tick.epoch, tick.quote)
+
+
+def time_per_message(fn, messages, make_history, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        history = make_history()
+        start = time.perf_counter()
+        fn(messages, history)
+        best = min(best, time.perf_counter() - start)
+    return best / len(messages) * 1e9
+
+
+def memory_for_ticks(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    history = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del history
+    return size
+
+
+def build_baseline_history() -> deque:
+    history = deque(maxlen=N_TICKS_MEMORY)
+    for i in range(N_TICKS_MEMORY):
+        history.append({"price": 4480.0 + i * 0.01, "epoch": 1766610000 + i, "symbol": "frxXAUUSD"})
+    return history
+
+
+def build_ring_history() -> TickRingBuffer:
+    history = TickRingBuffer(N_TICKS_MEMORY)
+    for i in range(N_TICKS_MEMORY):
+        history.append(1766610000 + i, 4480.0 + i * 0.01)
+    return history
+
+
+def run() -> dict:
+    messages = make_tick_messages(N_MESSAGES)
+    baseline_ns = time_per_message(parse_baseline, messages, lambda: deque(maxlen=200))
+    fast_ns = time_per_message(parse_fast, messages, lambda: TickRingBuffer(200))
+    return {
+        "json_backend": JSON_BACKEND,
+        "messages": N_MESSAGES,
+        "parse_ns_per_message": {"before": round(baseline_ns, 1), "after": round(fast_ns, 1)},
+        "bytes_per_10k_ticks": {
+            "before": memory_for_ticks(build_baseline_history),
+            "after": memory_for_ticks(build_ring_history),
+        },
+    }
+
+
+if __name__ == "__main__":
+    result = run()
+    print(f"JSON backend: {result['json_backend']} ({result['messages']} messages)")
+    parse = result["parse_ns_per_message"]
+    print(f"Parse cost per message: before {parse['before']:.0f} ns | after {parse['after']:.0f} ns "
+          f"({parse['before'] / parse['after']:.2f}x)")
+    mem = result["bytes_per_10k_ticks"]
+    print(f"Memory per 10k ticks:   before {mem['before'] / 1024:.0f} KiB | after {mem['after'] / 1024:.0f} KiB")
@@ -0,0 +1,228 @@
+"""Run the benchmark suite and compare results between commits.
+
+    python benchmarks/run.py                        # everything -> benchmarks/results/<commit>.json
+    python benchmarks/run.py -b UserStates -b Listen --quick
+    python benchmarks/run.py compare benchmarks/results/1f3523c.json benchmarks/results/587a194.json
+
+Timings are seconds per call. Each benchmark is calibrated so one sample takes at
+least --min-sample seconds, then sampled `repeat` times; `min` is the number to
+compare, `median` shows the noise. compare exits with status 1 when any benchmark
+got slower by more than --factor, so it can gate CI.
+"""
+import argparse
+import asyncio
+import datetime
+import inspect
+import itertools
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import traceback
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_REPEAT = 5
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=REPO_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def environment() -> dict:
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def discover(module) -> list[tuple[type, str]]:
+    found = []
+    for _, cls in inspect.getmembers(module, inspect.isclass):
+        if cls.__module__ != module.__name__ or cls.__name__.startswith('_'):
+            continue
+        for name in sorted(vars(cls)):
+            if name.startswith("time_"):
+                found.append((cls, name))
+    return found
+
+
+def param_grid(cls) -> list[tuple]:
+    params = getattr(cls, "params", None)
+    if params is None:
+        return [()]
+    if len(getattr(cls, "param_names", ())) > 1:
+        return list(itertools.product(*params))
+    return [(p,) for p in params]
+
+
+def bench_key(cls, method: str, params: tuple) -> str:
+    args = ", ".join(repr(p) for p in params)
+    return f"{cls.__name__}.{method}({args})"
+
+
+class Runner:
+    def __init__(self, repeat: int, min_sample: float, quick: bool):
+        self.repeat = repeat
+        self.min_sample = min_sample
+        self.quick = quick
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def _sample(self, fn, number: int) -> float:
+        if inspect.iscoroutinefunction(fn):
+            async def batch():
+                for _ in range(number):
+                    await fn()
+            start = time.perf_counter()
+            self.loop.run_until_complete(batch())
+        else:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+        return (time.perf_counter() - start) / number
+
+    def measure(self, cls, fn) -> dict:
+        first = self._sample(fn, 1)  # also the warm-up
+        if self.quick:
+            return {"min": first, "median": first, "number": 1, "repeat": 1}
+        number = getattr(cls, "number", 0) or max(1, min(100_000, int(self.min_sample / max(first, 1e-9))))
+        repeat = min(getattr(cls, "repeat", self.repeat), self.repeat)
+        samples = [self._sample(fn, number) for _ in range(repeat)]
+        return {"min": min(samples), "median": statistics.median(samples), "number": number, "repeat": repeat}
+
+    def run_suite(self, cls, methods: list[str]) -> dict:
+        results = {}
+        for params in param_grid(cls):
+            instance = cls()
+            keys = [bench_key(cls, m, params) for m in methods]
+            try:
+                if hasattr(instance, "setup"):
+                    instance.setup(*params)
+            except NotImplementedError as e:
+                for key in keys:
+                    results[key] = {"skipped": str(e)}
+                    print(f"{key:<64} skipped ({e})")
+                continue
+            try:
+                for method, key in zip(methods, keys):
+                    bound = getattr(instance, method)
+                    if inspect.iscoroutinefunction(bound):
+                        async def call(b=bound):
+                            await b(*params)
+                    else:
+                        def call(b=bound):
+                            b(*params)
+                    try:
+                        results[key] = {"unit": "seconds", **self.measure(cls, call)}
+                        print(f"{key:<64} {format_seconds(results[key]['min']):>10}")
+                    except Exception as e:
+                        results[key] = {"failed": f"{type(e).__name__}: {e}"}
+                        print(f"{key:<64} FAILED")
+                        traceback.print_exc()
+            finally:
+                if hasattr(instance, "teardown"):
+                    instance.teardown(*params)
+        return results
+
+
+def format_seconds(value: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if value >= scale:
+            return f"{value / scale:.3f}{unit}"
+    return f"{value / 1e-9:.1f}ns"
+
+
+def run(args) -> int:
+    import suite
+    selected = [re.compile(pattern) for pattern in args.bench]
+    by_class: dict[type, list[str]] = {}
+    for cls, method in discover(suite):
+        name = f"{cls.__name__}.{method}"
+        if not selected or any(p.search(name) for p in selected):
+            by_class.setdefault(cls, []).append(method)
+    if not by_class:
+        print("No benchmarks matched")
+        return 1
+
+    env = environment()
+    print(f"commit {env['commit']}{' (dirty)' if env['dirty'] else ''} | python {env['python']} | {env['platform']}")
+    runner = Runner(args.repeat, args.min_sample, args.quick)
+    results = {}
+    for cls, methods in by_class.items():
+        results.update(runner.run_suite(cls, methods))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{env['commit']}{'-dirty' if env['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({**env, "quick": args.quick, "benchmarks": results}, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+def compare(args) -> int:
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"{old.get('commit', args.old)} -> {new.get('commit', args.new)} (x = new/old, min of samples)")
+    regressions = 0
+    for key in sorted(set(old["benchmarks"]) | set(new["benchmarks"])):
+        before = old["benchmarks"].get(key, {}).get("min")
+        after = new["benchmarks"].get(key, {}).get("min")
+        if before is None or after is None:
+            shown = format_seconds(before) if before is not None else "n/a"
+            print(f"  {key:<64} {shown:>10} -> {format_seconds(after) if after is not None else 'n/a':>10}")
+            continue
+        ratio = after / before
+        mark = " "
+        if ratio > args.factor:
+            mark = "+"
+            regressions += 1
+        elif ratio < 1 / args.factor:
+            mark = "-"
+        print(f"{mark} {key:<64} {format_seconds(before):>10} -> {format_seconds(after):>10}  x{ratio:.2f}")
+    if regressions:
+        print(f"{regressions} benchmark(s) slower by more than x{args.factor}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Hot-path benchmark suite")
+    sub = parser.add_subparsers(dest="command")
+    run_parser = sub.add_parser("run", help="Run benchmarks (default)")
+    compare_parser = sub.add_parser("compare", help="Compare two result files")
+    for p in (parser, run_parser):
+        p.add_argument("-b", "--bench", action="append", default=[], help="Regex on Suite.method (repeatable)")
+        p.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+        p.add_argument("--min-sample", type=float, default=0.1, help="Minimum seconds per sample")
+        p.add_argument("--quick", action="store_true", help="One call per benchmark, no calibration")
+        p.add_argument("-o", "--output", help="Result file (default benchmarks/results/<commit>.json)")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--factor", type=float, default=1.1, help="Regression threshold (new/old)")
+    args = parser.parse_args()
+    if args.command == "compare":
+        return compare(args)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
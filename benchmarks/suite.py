@@ -0,0 +1,425 @@
+"""Hot-path benchmark suite, asv style.
+
+Each class is one suite: `params`/`param_names` give the parameter grid, `setup()`
+builds a fixed synthetic dataset (seeded, so every commit measures the same input)
+and every `time_*` method is timed by benchmarks/run.py. A setup that raises
+NotImplementedError skips its benchmarks, e.g. when pandas_ta is not installed.
+Async `time_*` methods are awaited on the runner's event loop.
+"""
+import datetime
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from config import BotConfig
+from user_state import UserState, SignalHistory, Result
+from bench_ws_parse import make_tick_messages
+
+
+BASE_EPOCH = 1766570400  # 2025-12-24 10:00 UTC
+SEED = 20251224
+
+
+def make_bars(n: int) -> pd.DataFrame:
+    """1-minute OHLC random walk around $4480 with the columns get_historical_data builds"""
+    rng = np.random.default_rng(SEED)
+    close = 4480.0 + np.cumsum(rng.normal(0.0, 0.35, n))
+    open_ = np.empty(n)
+    open_[0] = close[0]
+    open_[1:] = close[:-1]
+    wick = np.abs(rng.normal(0.0, 0.25, (2, n)))
+    index = pd.to_datetime(BASE_EPOCH + np.arange(n) * 60, unit='s', utc=True)
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + wick[0],
+        'Low': np.minimum(open_, close) - wick[1],
+        'Close': close,
+    }, index=pd.Index(index, name='date'))
+
+
+def make_candles(n: int) -> list[dict]:
+    """The same bars as Deriv's ticks_history (style=candles) returns them"""
+    bars = make_bars(n)
+    return [
+        {'epoch': BASE_EPOCH + i * 60, 'open': open_, 'high': high, 'low': low, 'close': close}
+        for i, (open_, high, low, close) in enumerate(bars[['Open', 'High', 'Low', 'Close']].itertuples(index=False))
+    ]
+
+
+def make_history(entries: int, start: float, step: float = 60.0) -> SignalHistory:
+    history = SignalHistory()
+    results = (Result.WIN, Result.LOSS, Result.BREAK_EVEN)
+    for i in range(entries):
+        entry = 4480.0 + (i % 500) * 0.01
+        direction = 'BUY' if i % 2 else 'SELL'
+        result = results[i % 3] if i < entries - 1 else Result.PENDING
+        closed_at = start + i * step + 30 if result != Result.PENDING else None
+        history.append(direction, entry, entry + 3.0, entry + 4.5, entry - 3.0,
+                       timestamp=start + i * step, result=result, closed_at=closed_at)
+    return history
+
+
+def make_trade_info(direction: str = 'BUY', entry: float = 4480.0) -> dict:
+    sign = 1 if direction == 'BUY' else -1
+    return {
+        'direction': direction,
+        'entry_price': entry,
+        'tp1_level': entry + sign * 3.0,
+        'tp2_level': entry + sign * 4.5,
+        'sl_level': entry - sign * 3.0,
+        'start_time_utc': datetime.datetime.fromtimestamp(BASE_EPOCH, datetime.timezone.utc),
+        'status': 'active',
+    }
+
+
+class _IsolatedFiles:
+    """Point the StateManager's JSON files at a temp dir for the lifetime of a suite"""
+
+    _NAMES = ('USER_STATES_FILENAME', 'SUBSCRIBERS_FILENAME', 'SIGNAL_HISTORY_FILENAME')
+
+    def setup_files(self) -> None:
+        self._tmpdir = tempfile.mkdtemp(prefix="xau-bench-")
+        self._saved_names = {name: getattr(BotConfig, name) for name in self._NAMES}
+        for name in self._NAMES:
+            setattr(BotConfig, name, os.path.join(self._tmpdir, self._saved_names[name]))
+
+    def teardown_files(self) -> None:
+        for name, value in self._saved_names.items():
+            setattr(BotConfig, name, value)
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+
+def _require(module: str):
+    try:
+        return __import__(module)
+    except ImportError as e:
+        raise NotImplementedError(f"{module} unavailable: {e}")
+
+
+class IndicatorsSuite:
+    """utils.calculate_indicators (pandas_ta EMA/RSI/ADX/ATR) over N bars"""
+
+    params = [100, 10_000, 1_000_000]
+    param_names = ['bars']
+    repeat = 3
+
+    def setup(self, bars):
+        self.utils = _require('utils')
+        self.bars = make_bars(bars)
+
+    def time_calculate_indicators(self, bars):
+        # calculate_indicators appends columns in place, so each call gets a fresh copy
+        self.utils.calculate_indicators(self.bars.copy())
+
+
+class HistoricalDataSuite(_IsolatedFiles):
+    """SignalEngine.get_historical_data: candle list -> indexed DataFrame.
+
+    time_get_historical_data converts a full window every call (cold start, reload
+    after a gap); time_incremental_update is the steady state, where the payload is
+    only the re-sent forming bar plus the new one.
+    """
+
+    params = [100, 5000]
+    param_names = ['candles']
+
+    def setup(self, candles):
+        signal_engine = _require('signal_engine')
+        from state_manager import StateManager
+        from candle_frame import CandleFrame
+        self.setup_files()
+        self._market_status = BotConfig.__dict__['get_market_status']
+        BotConfig.get_market_status = classmethod(lambda cls: {'is_open': True, 'status': 'OPEN', 'message': ''})
+        data = make_candles(candles)
+
+        class FakeDerivWS:
+            connected = True
+            max_count = None
+
+            async def get_candles(self, symbol, count, granularity):
+                return data[-min(count, self.max_count or count):]
+
+        self.engine = signal_engine.SignalEngine(StateManager())
+        self.engine.deriv_ws = FakeDerivWS()
+        self.engine.candle_archive = None
+        self.engine.candle_frame = CandleFrame(candles)
+
+    def teardown(self, candles):
+        BotConfig.get_market_status = self._market_status
+        self.teardown_files()
+
+    async def time_get_historical_data(self, candles):
+        self.engine.deriv_ws.max_count = None
+        await self.engine.get_historical_data()
+
+    async def time_incremental_update(self, candles):
+        self.engine.deriv_ws.max_count = 2
+        await self.engine.get_historical_data()
+
+
+class BarCacheSuite:
+    """BarCache: one new closed 1m bar rolled into 1m/5m/15m, and an O(1) column read"""
+
+    params = [3, 6]
+    param_names = ['timeframes']
+
+    def setup(self, timeframes):
+        from bar_cache import BarCache
+        from candle_archive import candles_to_columns
+        self.columns = candles_to_columns(make_candles(2000))
+        self.cache = BarCache([5, 15, 30, 60, 240][:timeframes - 1])
+        self.cache.update('frxXAUUSD', self.columns)
+        self.next_epoch = int(self.columns['epoch'][-1]) + 60
+
+    def time_update_one_bar(self, timeframes):
+        i = self.next_epoch // 60 % 2000
+        bar = {name: col[i:i + 1] for name, col in self.columns.items()}
+        bar['epoch'] = np.array([self.next_epoch], dtype=np.int64)
+        self.next_epoch += 60
+        self.cache.update('frxXAUUSD', bar)
+
+    def time_get(self, timeframes):
+        self.cache.get('frxXAUUSD', 15, 'EMA_50')
+
+
+class ShadowBookSuite:
+    """ShadowBook.on_tick with every variant holding a virtual trade: a tick inside the
+    trigger band, and one that reaches a TP1 level and rebuilds the band"""
+
+    params = [4, 32, 64]
+    param_names = ['variants']
+
+    def setup(self, variants):
+        from shadow import ShadowBook, build_variants
+        spec = BotConfig.get_symbol_spec('frxXAUUSD')
+        overrides = {f'adx{i}': {'adx_threshold': 10 + i * 0.5} for i in range(variants - 1)}
+        self.book = ShadowBook('frxXAUUSD', build_variants(spec, overrides))
+        self.book.direction[:] = 1
+        self.book.entry[:] = 2000.0
+        self.book.sl_dist[:] = self.book.sl_base
+        self.book._rebuild_band()
+        self.tp1_price = 2000.0 + float(self.book.tp1_dist.min())
+
+    def time_tick_inside_band(self, variants):
+        self.book.on_tick(0, 2000.01)
+
+    def time_tick_at_level(self, variants):
+        self.book.on_tick(0, self.tp1_price)
+        self.book.tp1_hit[:] = False
+        self.book.sl_dist[:] = self.book.sl_base
+        self.book._rebuild_band()
+
+
+class EventBusSuite:
+    """EventBus.publish_nowait of a TickEvent (the per-tick cost on the feed listener) to
+    drop-oldest consumers whose queues stay full, i.e. the overflow path"""
+
+    params = [1, 4]
+    param_names = ['consumers']
+
+    def setup(self, consumers):
+        from event_bus import DROP_OLDEST, EventBus, TickEvent
+        self.bus = EventBus()
+        for i in range(consumers):
+            self.bus.subscribe(f'bench{i}', (TickEvent,), lambda event: None, maxsize=1, overflow=DROP_OLDEST,
+                               symbol='frxXAUUSD')
+        self.event = TickEvent('frxXAUUSD', BASE_EPOCH, 2000.0)
+        self.bus.publish_nowait(self.event)
+
+    def time_publish_tick(self, consumers):
+        self.bus.publish_nowait(self.event)
+
+
+class UserStatesSuite(_IsolatedFiles):
+    """StateManager.save_user_states / load_user_states with 20 history entries per user"""
+
+    params = [1_000, 10_000, 100_000]
+    param_names = ['users']
+    repeat = 3
+    history = 20
+
+    def setup(self, users):
+        from state_manager import StateManager
+        self.setup_files()
+        self.manager = StateManager()
+        start = BASE_EPOCH - self.history * 60
+        # Broadcast signals give every user the same timestamps; build one history and copy it
+        template = make_history(self.history, start)
+        trade = make_trade_info()
+        for i in range(users):
+            state = UserState(win_count=6, loss_count=6, be_count=6,
+                              signal_history=SignalHistory(template._data[:]))
+            state.start_trade(trade, record_history=False)
+            self.manager.user_states[str(1_000_000_000 + i)] = state
+        self.manager.save_user_states()
+        self.loader = StateManager()
+
+    def teardown(self, users):
+        self.teardown_files()
+
+    def time_save_user_states(self, users):
+        self.manager.save_user_states()
+
+    def time_load_user_states(self, users):
+        self.loader.user_states = {}
+        self.loader.load_user_states()
+
+
+class TodayStatsSuite(_IsolatedFiles):
+    """StateManager.get_today_stats for one user's history and for the global history"""
+
+    params = [50, 500]
+    param_names = ['history']
+
+    def setup(self, history):
+        from state_manager import StateManager
+        self.setup_files()
+        self.manager = StateManager()
+        # Spread the history over the last ~2 days so roughly half of it falls on today
+        now = datetime.datetime.now(datetime.timezone.utc).timestamp()
+        step = 2 * 86400 / history
+        start = now - history * step
+        self.manager.user_states['1000000000'] = UserState(signal_history=make_history(history, start, step))
+        self.manager.signal_history = self.manager.get_user_state('1000000000').signal_history.to_list()
+
+    def teardown(self, history):
+        self.teardown_files()
+
+    def time_user_today_stats(self, history):
+        self.manager.get_today_stats('1000000000')
+
+    def time_global_today_stats(self, history):
+        self.manager.get_today_stats()
+
+
+class TrackingUpdateSuite(_IsolatedFiles):
+    """TelegramService.send_tracking_update to N users through a fake Bot.
+
+    The rate-limit delay is zeroed so this measures the bot's own per-user cost
+    (message formatting, debounce, bookkeeping), not the deliberate sleeps.
+    Every user already has a tracking message, so each call edits N messages.
+    """
+
+    params = [100, 1_000, 10_000]
+    param_names = ['users']
+
+    def setup(self, users):
+        telegram_service = _require('telegram_service')
+        from state_manager import StateManager
+        self.setup_files()
+        self._rate_limit = BotConfig.TELEGRAM_RATE_LIMIT_DELAY
+        BotConfig.TELEGRAM_RATE_LIMIT_DELAY = 0
+
+        class FakeBot:
+            def __init__(self):
+                self.calls = 0
+
+            async def send_message(self, chat_id, text, parse_mode=None):
+                self.calls += 1
+                return SimpleNamespace(message_id=self.calls)
+
+            async def edit_message_text(self, chat_id, message_id, text, parse_mode=None):
+                self.calls += 1
+                return True
+
+        manager = StateManager()
+        trade = make_trade_info()
+        for i in range(users):
+            chat_id = str(1_000_000_000 + i)
+            manager.subscribers.add(chat_id)
+            state = manager.get_user_state(chat_id)
+            state.start_trade(trade, record_history=False)
+            state.tracking_message_id = i + 1
+        self.bot = FakeBot()
+        self.service = telegram_service.TelegramService(manager, lambda: None, lambda: "frxXAUUSD")
+        self.price = 4481.0
+
+    def teardown(self, users):
+        BotConfig.TELEGRAM_RATE_LIMIT_DELAY = self._rate_limit
+        self.teardown_files()
+
+    async def time_send_tracking_update(self, users):
+        # Move the price past TRACKING_PRICE_DELTA every call so no user is debounced
+        self.price = 4481.0 if self.price > 4481.5 else 4482.0
+        await self.service.send_tracking_update(self.bot, self.price, {})
+
+
+class DashboardSuite(_IsolatedFiles):
+    """/dashboard and /info text for N users, each with an active trade and 100 signals of history.
+
+    `warm` renders inside the snapshot TTL (shared header and user fragments cached, as for
+    a burst of Refresh presses); `cold` drops the cache first, which is the per-request
+    cost from before the cache.
+    """
+
+    params = [100, 1_000]
+    param_names = ['users']
+
+    def setup(self, users):
+        telegram_service = _require('telegram_service')
+        from state_manager import StateManager
+        self.setup_files()
+        manager = StateManager()
+        now = datetime.datetime.now(datetime.timezone.utc).timestamp()
+        template = make_history(100, now - 100 * 1800, 1800)
+        trade = make_trade_info()
+        self.chat_ids = [str(1_000_000_000 + i) for i in range(users)]
+        for chat_id in self.chat_ids:
+            manager.subscribers.add(chat_id)
+            state = UserState(win_count=6, loss_count=6, be_count=6, signal_history=SignalHistory(template._data[:]))
+            state.start_trade(trade, record_history=False)
+            manager.user_states[chat_id] = state
+        manager.strategy_status = {'emoji': '🟢', 'status': 'BUY SETUP', 'description': 'Uptrend',
+                                   'rsi': 21.0, 'ema': 4478.2, 'adx': 31.0}
+        manager.current_indicators = {'rsi': 21.0, 'ema': 4478.2, 'adx': 31.0}
+        deriv_ws = SimpleNamespace(connected=True, get_current_price=lambda: 4481.25)
+        self.service = telegram_service.TelegramService(manager, lambda: deriv_ws, lambda: "frxXAUUSD")
+        self.service.views.ttl = 3600.0
+        self._render_all()
+
+    def teardown(self, users):
+        self.teardown_files()
+
+    def _render_all(self):
+        for chat_id in self.chat_ids:
+            self.service.render_dashboard(chat_id)
+            self.service.render_info(chat_id)
+
+    def time_render_warm(self, users):
+        self._render_all()
+
+    def time_render_cold(self, users):
+        for chat_id in self.chat_ids:
+            self.service.views.invalidate()
+            self.service.render_dashboard(chat_id)
+            self.service.views.invalidate()
+            self.service.render_info(chat_id)
+
+
+class ListenSuite:
+    """DerivWebSocket.listen() over a canned stream of N tick messages"""
+
+    params = [10_000, 100_000]
+    param_names = ['messages']
+
+    def setup(self, messages):
+        from deriv_ws import DerivWebSocket
+        self.messages = make_tick_messages(messages)
+        self.deriv_ws = DerivWebSocket()
+
+    async def time_listen(self, messages):
+        self.deriv_ws.ws = _CannedStream(self.messages)
+        await self.deriv_ws.listen()
+
+
+class _CannedStream:
+    def __init__(self, messages: list[str]):
+        self._messages = messages
+
+    async def __aiter__(self):
+        for message in self._messages:
+            yield message
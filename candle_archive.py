@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import datetime
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import BotConfig
+
+
+logger = logging.getLogger("CandleArchive")
+
+CANDLE_COLUMNS = ('epoch', 'open', 'high', 'low', 'close')
+DERIV_MAX_CANDLES = 5000
+
+
+def _month_key(epoch: int) -> str:
+    return datetime.datetime.fromtimestamp(int(epoch), tz=datetime.timezone.utc).strftime('%Y-%m')
+
+
+def _empty_columns() -> dict[str, np.ndarray]:
+    columns = {name: np.empty(0, dtype=np.float64) for name in CANDLE_COLUMNS}
+    columns['epoch'] = np.empty(0, dtype=np.int64)
+    return columns
+
+
+def _dedupe(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Sort by epoch and keep the last occurrence of each epoch"""
+    epochs = columns['epoch']
+    if len(epochs) == 0:
+        return columns
+    _, first_in_reversed = np.unique(epochs[::-1], return_index=True)
+    keep = len(epochs) - 1 - first_in_reversed
+    return {name: col[keep] for name, col in columns.items()}
+
+
+def candles_to_columns(candles: Iterable[dict]) -> dict[str, np.ndarray]:
+    """Convert a Deriv `candles` payload (list of dicts) into typed NumPy columns"""
+    candles = list(candles)
+    n = len(candles)
+    columns = {
+        'epoch': np.fromiter((c['epoch'] for c in candles), dtype=np.int64, count=n),
+    }
+    for name in CANDLE_COLUMNS[1:]:
+        columns[name] = np.fromiter((c[name] for c in candles), dtype=np.float64, count=n)
+    return columns
+
+
+class CandleArchive:
+    """Columnar on-disk archive of closed candles, one NPZ partition per symbol/granularity/month.
+
+    New bars are buffered in memory and merged into their monthly partition on flush();
+    every merge de-duplicates on epoch, keeping the most recent value. A merge rewrites
+    the month's whole file, so the engines call append_columns() and load() through
+    asyncio.to_thread; one lock serialises them across the engines sharing the archive.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None, flush_bars: Optional[int] = None):
+        self.base_dir = base_dir or BotConfig.CANDLE_ARCHIVE_DIR
+        self.flush_bars = flush_bars or BotConfig.CANDLE_ARCHIVE_FLUSH_BARS
+        self._pending: dict[tuple[str, int], list[dict[str, np.ndarray]]] = {}
+        self._pending_count: dict[tuple[str, int], int] = {}
+        self._last_epoch: dict[tuple[str, int], int] = {}
+        self._lock = threading.RLock()
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def _series_dir(self, symbol: str, granularity: int) -> str:
+        return os.path.join(self.base_dir, symbol, str(granularity))
+
+    def _partition_path(self, symbol: str, granularity: int, month: str) -> str:
+        return os.path.join(self._series_dir(symbol, granularity), f"{month}.npz")
+
+    def _read_partition(self, path: str) -> dict[str, np.ndarray]:
+        if not os.path.exists(path):
+            return _empty_columns()
+        with np.load(path) as data:
+            return {name: data[name] for name in CANDLE_COLUMNS}
+
+    def _write_partition(self, path: str, columns: dict[str, np.ndarray]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_file = f"{path}.tmp.npz"
+        np.savez(temp_file, **columns)
+        os.replace(temp_file, path)
+
+    def append_columns(self, symbol: str, granularity: int, columns: dict[str, np.ndarray]) -> int:
+        """Buffer closed bars for the archive; returns the number of bars newer than the last append"""
+        if len(columns['epoch']) == 0:
+            return 0
+        with self._lock:
+            return self._append(symbol, granularity, columns)
+
+    def _append(self, symbol: str, granularity: int, columns: dict[str, np.ndarray]) -> int:
+        key = (symbol, granularity)
+        last = self._last_epoch.get(key)
+        if last is not None:
+            fresh = columns['epoch'] > last
+            if not fresh.any():
+                return 0
+            columns = {name: col[fresh] for name, col in columns.items()}
+        self._pending.setdefault(key, []).append(columns)
+        added = len(columns['epoch'])
+        self._pending_count[key] = self._pending_count.get(key, 0) + added
+        self._last_epoch[key] = int(columns['epoch'].max())
+        if self._pending_count[key] >= self.flush_bars:
+            self.flush(symbol, granularity)
+        return added
+
+    def append_candles(self, symbol: str, granularity: int, candles: list[dict]) -> int:
+        return self.append_columns(symbol, granularity, candles_to_columns(candles))
+
+    def flush(self, symbol: Optional[str] = None, granularity: Optional[int] = None) -> None:
+        with self._lock:
+            keys = [k for k in self._pending if symbol is None or k == (symbol, granularity)]
+            for key in keys:
+                chunks = self._pending.pop(key)
+                self._pending_count.pop(key, None)
+                merged = {name: np.concatenate([c[name] for c in chunks]) for name in CANDLE_COLUMNS}
+                self.merge(key[0], key[1], merged)
+
+    def merge(self, symbol: str, granularity: int, columns: dict[str, np.ndarray]) -> None:
+        """Merge bars straight into their monthly partitions (de-duplicated on epoch)"""
+        if len(columns['epoch']) == 0:
+            return
+        months = columns['epoch'].astype('datetime64[s]').astype('datetime64[M]')
+        with self._lock:
+            for month in np.unique(months):
+                mask = months == month
+                path = self._partition_path(symbol, granularity, str(month))
+                existing = self._read_partition(path)
+                combined = {name: np.concatenate([existing[name], columns[name][mask]]) for name in CANDLE_COLUMNS}
+                try:
+                    self._write_partition(path, _dedupe(combined))
+                except OSError as e:
+                    logger.error(f"Failed to write candle partition {path}: {e}")
+
+    def months(self, symbol: str, granularity: int) -> list[str]:
+        try:
+            names = os.listdir(self._series_dir(symbol, granularity))
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-4] for name in names if name.endswith('.npz') and '.tmp' not in name)
+
+    def load(self, symbol: str, granularity: int, start_epoch: Optional[int] = None,
+             end_epoch: Optional[int] = None) -> dict[str, np.ndarray]:
+        """Load bars with start_epoch <= epoch <= end_epoch as NumPy columns, sorted by epoch"""
+        self.flush(symbol, granularity)
+        start_month = _month_key(start_epoch) if start_epoch is not None else None
+        end_month = _month_key(end_epoch) if end_epoch is not None else None
+        parts = []
+        for month in self.months(symbol, granularity):
+            if (start_month and month < start_month) or (end_month and month > end_month):
+                continue
+            parts.append(self._read_partition(self._partition_path(symbol, granularity, month)))
+        if not parts:
+            return _empty_columns()
+        if len(parts) == 1:
+            columns = parts[0]
+        else:
+            columns = {name: np.concatenate([p[name] for p in parts]) for name in CANDLE_COLUMNS}
+        epochs = columns['epoch']
+        lo = np.searchsorted(epochs, start_epoch, side='left') if start_epoch is not None else 0
+        hi = np.searchsorted(epochs, end_epoch, side='right') if end_epoch is not None else len(epochs)
+        return {name: col[lo:hi] for name, col in columns.items()}
+
+    def load_frame(self, symbol: str, granularity: int, start_epoch: Optional[int] = None,
+                   end_epoch: Optional[int] = None) -> pd.DataFrame:
+        """Same layout as SignalEngine.get_historical_data: UTC 'date' index, Open/High/Low/Close"""
+        columns = self.load(symbol, granularity, start_epoch, end_epoch)
+        index = pd.DatetimeIndex(pd.to_datetime(columns['epoch'], unit='s', utc=True), name='date')
+        return pd.DataFrame({
+            'Open': columns['open'],
+            'High': columns['high'],
+            'Low': columns['low'],
+            'Close': columns['close'],
+        }, index=index)
+
+    async def backfill(self, deriv_ws, symbol: str, granularity: int, start_epoch: int,
+                       end_epoch: Optional[int] = None, batch_size: int = DERIV_MAX_CANDLES,
+                       delay: Optional[float] = None) -> int:
+        """Page backwards through ticks_history from end_epoch to start_epoch and archive every bar"""
+        delay = BotConfig.CANDLE_BACKFILL_DELAY if delay is None else delay
+        cursor = int(end_epoch if end_epoch is not None else time.time())
+        total = 0
+        while cursor > start_epoch:
+            candles = await deriv_ws.get_candles(symbol=symbol, count=min(batch_size, DERIV_MAX_CANDLES),
+                                                 granularity=granularity, end=cursor)
+            if not candles:
+                logger.warning(f"Backfill stopped at {cursor}: no candles returned")
+                break
+            columns = candles_to_columns(candles)
+            keep = columns['epoch'] >= start_epoch
+            columns = {name: col[keep] for name, col in columns.items()}
+            self.merge(symbol, granularity, columns)
+            total += len(columns['epoch'])
+            first_epoch = int(candles[0]['epoch'])
+            logger.info(f"Backfilled {len(columns['epoch'])} {symbol} bars up to "
+                        f"{datetime.datetime.fromtimestamp(cursor, tz=datetime.timezone.utc):%Y-%m-%d %H:%M}")
+            if first_epoch >= cursor:
+                break
+            cursor = first_epoch - 1
+            if delay:
+                await asyncio.sleep(delay)
+        return total
+
+    def close(self) -> None:
+        self.flush()
+
+
+if __name__ == "__main__":
+    from deriv_ws import DerivWebSocket, XAUUSD_SYMBOL
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Candle archive maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = sub.add_parser("backfill", help="Download history from Deriv into the archive")
+    backfill_parser.add_argument("--symbol", default=XAUUSD_SYMBOL)
+    backfill_parser.add_argument("--granularity", type=int, default=60)
+    backfill_parser.add_argument("--days", type=int, default=30)
+    info_parser = sub.add_parser("info", help="Show archived months and bar counts")
+    info_parser.add_argument("--symbol", default=XAUUSD_SYMBOL)
+    info_parser.add_argument("--granularity", type=int, default=60)
+    args = parser.parse_args()
+
+    archive = CandleArchive()
+
+    if args.command == "info":
+        for month in archive.months(args.symbol, args.granularity):
+            columns = archive._read_partition(archive._partition_path(args.symbol, args.granularity, month))
+            print(f"{month}: {len(columns['epoch'])} bars")
+    else:
+        async def run_backfill():
+            ws = DerivWebSocket()
+            if not await ws.connect():
+                return
+            listen_task = asyncio.create_task(ws.listen())
+            try:
+                end = int(time.time())
+                total = await archive.backfill(ws, args.symbol, args.granularity, end - args.days * 86400, end)
+                print(f"Backfilled {total} bars")
+            finally:
+                listen_task.cancel()
+                await ws.close()
+
+        asyncio.run(run_backfill())
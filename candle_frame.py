@@ -0,0 +1,92 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+
+
+class CandleFrame:
+    """Rolling window of the last `window` bars in preallocated NumPy storage.
+
+    update() takes the typed columns of a candles payload (see
+    candle_archive.candles_to_columns) and writes them over the stored bars from the
+    first overlapping epoch on: the bar that was still forming at the previous fetch
+    gets its final values, newer bars are appended, nothing else is touched. Storage
+    holds 2x the window, so old bars are shifted out only once per `window` appends.
+    """
+
+    def __init__(self, window: int = 100):
+        self.window = window
+        self.capacity = 2 * window
+        self._epochs = np.zeros(self.capacity, dtype=np.int64)
+        self._prices = np.zeros((self.capacity, len(PRICE_COLUMNS)), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def last_epoch(self) -> Optional[int]:
+        return int(self._epochs[self._end - 1]) if self._end > self._start else None
+
+    @property
+    def nbytes(self) -> int:
+        return self._epochs.nbytes + self._prices.nbytes
+
+    def fetch_count(self, now_epoch: float, granularity: int = 60) -> int:
+        """How many candles to request so the payload overlaps the newest stored bar"""
+        last = self.last_epoch
+        if last is None or len(self) < self.window:
+            return self.window
+        # +2: the stored (possibly still forming) last bar plus the bar forming now
+        missing = int((now_epoch - last) // granularity) + 2
+        return max(2, min(self.window, missing))
+
+    def update(self, columns: dict[str, np.ndarray]) -> bool:
+        """Merge a payload; False if it neither overlaps the stored bars nor fills a window"""
+        epochs = columns['epoch']
+        n = len(epochs)
+        if n == 0:
+            return False
+        stored = self._epochs[self._start:self._end]
+        pos = self._start + int(np.searchsorted(stored, epochs[0])) if len(stored) else self._end
+        if pos == self._end and (not len(stored) or epochs[0] > stored[-1]):
+            if n < self.window and len(stored):
+                # A gap we cannot see across; the caller refetches a full window
+                return False
+            if n >= self.window:
+                pos = self._start = self._end = 0
+        if pos + n > self.capacity:
+            # Keep the bars the payload does not overwrite, move them to the front
+            keep = max(0, min(pos - self._start, self.window))
+            tail = pos - keep
+            self._epochs[:keep] = self._epochs[tail:pos]
+            self._prices[:keep] = self._prices[tail:pos]
+            self._start, pos = 0, keep
+            if n > self.capacity - pos:
+                epochs = epochs[-(self.capacity - pos):]
+                columns = {name: col[-(self.capacity - pos):] for name, col in columns.items()}
+                n = len(epochs)
+        end = pos + n
+        self._epochs[pos:end] = epochs
+        for i, name in enumerate(PRICE_COLUMNS):
+            self._prices[pos:end, i] = columns[name.lower()]
+        self._end = end
+        self._start = max(self._start, end - self.window)
+        return True
+
+    def to_frame(self) -> pd.DataFrame:
+        """The current window as a DataFrame indexed by UTC bar open time.
+
+        The prices are copied out of the ring storage, so callers may add indicator
+        columns or hold on to the frame across later updates.
+        """
+        start, end = self._start, self._end
+        index = pd.DatetimeIndex(
+            self._epochs[start:end].astype('datetime64[s]').astype('datetime64[ns]'),
+            tz='UTC', name='date'
+        )
+        return pd.DataFrame(self._prices[start:end].copy(), index=index, columns=list(PRICE_COLUMNS))
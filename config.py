@@ -1,8 +1,18 @@
 import os
+import re
+import json
 import datetime
 import pytz
 
 
+def _json_env(name: str, default: str):
+    """json.loads of an environment variable; None if it is not valid JSON (validate_config reports it)"""
+    try:
+        return json.loads(os.environ.get(name, default))
+    except json.JSONDecodeError:
+        return None
+
+
 class BotConfig:
     TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', 'YOUR_BOT_TOKEN')
     ADMIN_CHAT_ID = os.environ.get('ADMIN_CHAT_ID', '')
@@ -19,7 +29,7 @@ class BotConfig:
     RSI_EXIT_OVERBOUGHT = 77
     
     ADX_FILTER_PERIOD = 55
-    ADX_FILTER_THRESHOLD = 25  # Better accuracy with steady trend (65-75% win rate)
+    ADX_FILTER_THRESHOLD = 25  # Trend filter; validate changes with optimizer.py --walk-forward
     
     FIXED_SL_USD = 3.0
     FIXED_TP_USD = 3.0
@@ -30,21 +40,41 @@ class BotConfig:
     
     ANALYSIS_INTERVAL = 30
     ANALYSIS_JITTER = 5
+    ANALYSIS_EXECUTOR = os.environ.get('ANALYSIS_EXECUTOR', 'thread')  # thread, inline (on the event loop)
+    ANALYSIS_QUEUE_SIZE = 4
+    ANALYSIS_DEADLINE_SECONDS = float(os.environ.get('ANALYSIS_DEADLINE_SECONDS', 10.0))
     
     TRACKING_UPDATE_INTERVAL = 5  # Real-time price tracking every 5 seconds
     TRACKING_PRICE_DELTA = 0.50  # Only update if price changes by $0.50
     
     UNLIMITED_SIGNALS = True
     SIGNAL_COOLDOWN_SECONDS = 120
+    # /send and the Send Signal button: per-user cooldown, and how long a finished manual
+    # fetch may be reused (the analyzer's last closed bar is reused until the next one closes)
+    MANUAL_SIGNAL_USER_COOLDOWN = int(os.environ.get('MANUAL_SIGNAL_USER_COOLDOWN', 30))
+    MANUAL_SIGNAL_SHARE_SECONDS = 5.0
     
     USER_STATES_FILENAME = 'user_states.json'
     SUBSCRIBERS_FILENAME = 'subscribers.json'
     SIGNAL_HISTORY_FILENAME = 'signal_history.json'
-    LOG_FILENAME = 'bot_scalping.log'
+    SHADOW_STATS_FILENAME = 'shadow_stats.json'
+    CURRENT_SIGNAL_FILENAME = 'current_signal.json'
+    LOG_FILENAME = os.environ.get('LOG_FILENAME', 'bot_scalping.log')
     
     WIB_TZ = pytz.timezone('Asia/Jakarta')
     
+    # Updates by long polling, or by webhook on the health server (TELEGRAM_WEBHOOK_URL is the
+    # public base URL; Telegram must echo TELEGRAM_WEBHOOK_SECRET back on every POST)
+    TELEGRAM_MODE = os.environ.get('TELEGRAM_MODE', 'polling').lower()  # polling, webhook
+    TELEGRAM_WEBHOOK_URL = os.environ.get('TELEGRAM_WEBHOOK_URL', '')
+    TELEGRAM_WEBHOOK_PATH = os.environ.get('TELEGRAM_WEBHOOK_PATH', '/telegram/webhook')
+    TELEGRAM_WEBHOOK_SECRET = os.environ.get('TELEGRAM_WEBHOOK_SECRET', '')
+    # Handlers run concurrently across chats, in order within a chat; 1 = one update at a time
+    TELEGRAM_CONCURRENT_UPDATES = int(os.environ.get('TELEGRAM_CONCURRENT_UPDATES', 8))
+    TELEGRAM_MAX_PENDING_UPDATES = 256
+    
     TELEGRAM_RATE_LIMIT_DELAY = 0.05
+    DASHBOARD_SNAPSHOT_TTL = 1.0  # seconds a market snapshot serves /dashboard, /info and Refresh
     TELEGRAM_BATCH_SIZE = 25
     MAX_RETRIES = 3
     RETRY_DELAY = 1.0
@@ -52,6 +82,70 @@ class BotConfig:
     DAILY_SUMMARY_HOUR = 21
     DAILY_SUMMARY_MINUTE = 0
     
+    JSON_DECODER = os.environ.get('JSON_DECODER', 'auto')  # auto, msgspec, orjson, json
+    TICK_BUFFER_SIZE = int(os.environ.get('TICK_BUFFER_SIZE', 200))
+    
+    TICK_STORE_ENABLED = os.environ.get('TICK_STORE_ENABLED', 'false').lower() == 'true'
+    TICK_STORE_DIR = os.environ.get('TICK_STORE_DIR', 'data/ticks')
+    TICK_STORE_FLUSH_EVERY = 256  # ticks buffered before a write
+    TICK_STORE_FLUSH_SECONDS = 5.0
+    TICK_STORE_COMPRESS_AFTER_DAYS = int(os.environ.get('TICK_STORE_COMPRESS_AFTER_DAYS', 2))
+    
+    CANDLE_ARCHIVE_ENABLED = os.environ.get('CANDLE_ARCHIVE_ENABLED', 'false').lower() == 'true'
+    CANDLE_ARCHIVE_DIR = os.environ.get('CANDLE_ARCHIVE_DIR', 'data/candles')
+    CANDLE_ARCHIVE_FLUSH_BARS = 60  # closed bars buffered before merging into the monthly partition
+    CANDLE_BACKFILL_DELAY = 0.5  # seconds between paginated ticks_history requests
+    CANDLE_WINDOW = int(os.environ.get('CANDLE_WINDOW', 100))  # 1m bars kept for the indicators
+    
+    # Higher timeframes (minutes) rolled up in memory from the fetched 1m bars
+    MTF_TIMEFRAMES = [int(m) for m in os.environ.get('MTF_TIMEFRAMES', '5,15').split(',') if m.strip()]
+    MTF_INDICATORS = [f'EMA_{MA_MEDIUM_PERIOD}', f'RSI_{RSI_PERIOD}', f'ADX_{ADX_FILTER_PERIOD}', f'ATRr_{ATR_PERIOD}']
+    MTF_DEPTH = 200  # closed bars kept per symbol and timeframe
+    MTF_TREND_TIMEFRAME = int(os.environ.get('MTF_TREND_TIMEFRAME', 0))  # e.g. 15: entries must agree with the 15m EMA trend; 0 = off
+    
+    # Warm restart: resume the persisted open signal, resolving the price path missed while down
+    WARM_RESTART = os.environ.get('WARM_RESTART', 'true').lower() == 'true'
+    WARM_RESTART_TICK_SECONDS = int(os.environ.get('WARM_RESTART_TICK_SECONDS', 3600))  # longer gaps replay 1m candles
+    RESTART_NOTICE = os.environ.get('RESTART_NOTICE', 'admin').lower()  # admin (ADMIN_CHAT_ID), off
+    
+    # Strategy plugins (strategies.STRATEGY_REGISTRY) run on every bar; only the active one is broadcast
+    STRATEGIES = [s.strip() for s in os.environ.get('STRATEGIES', 'ema_rsi_adx').split(',') if s.strip()]
+    ACTIVE_STRATEGY = os.environ.get('ACTIVE_STRATEGY', '')  # default: the first of STRATEGIES
+    # Shadow variants: {name: StrategyParams overrides}; each trades virtually next to the live
+    # parameters ('baseline') and only its stats are kept. '{}' leaves just the baseline.
+    SHADOW_ENABLED = os.environ.get('SHADOW_ENABLED', 'false').lower() == 'true'
+    SHADOW_VARIANTS = _json_env(
+        'SHADOW_VARIANTS',
+        '{"adx20": {"adx_threshold": 20}, "rsi_exit_20_80": {"rsi_exit_oversold": 20, "rsi_exit_overbought": 80},'
+        ' "tp2_2x": {"tp2_multiplier": 2.0}}'
+    )
+    
+    # One SignalEngine per symbol over a single Deriv connection; the first one is the primary
+    # (commands, dashboard, daily summary). Users opt into the others with /symbols.
+    SYMBOLS = [s.strip() for s in os.environ.get('SYMBOLS', 'frxXAUUSD').split(',') if s.strip()]
+    # Display name, fixed SL/TP distance and tracking debounce, all in price units, and the
+    # contract size (units per 1.0 lot) that turns a price distance into P&L
+    SYMBOL_SPECS = {
+        'frxXAUUSD': {'name': 'XAU/USD', 'sl': FIXED_SL_USD, 'tp': FIXED_TP_USD, 'tracking_delta': TRACKING_PRICE_DELTA,
+                      'contract_size': 100},
+        'frxXAGUSD': {'name': 'XAG/USD', 'sl': 0.15, 'tp': 0.15, 'tracking_delta': 0.025, 'contract_size': 5000},
+        'frxEURUSD': {'name': 'EUR/USD', 'sl': 0.0015, 'tp': 0.0015, 'tracking_delta': 0.0003, 'contract_size': 100000},
+        'frxGBPUSD': {'name': 'GBP/USD', 'sl': 0.0020, 'tp': 0.0020, 'tracking_delta': 0.0004, 'contract_size': 100000},
+        'OTC_NDX': {'name': 'US Tech 100', 'sl': 30.0, 'tp': 30.0, 'tracking_delta': 5.0, 'contract_size': 1},
+        'OTC_SPC': {'name': 'US 500', 'sl': 8.0, 'tp': 8.0, 'tracking_delta': 1.5, 'contract_size': 1},
+    }
+    
+    LOOP_LAG_INTERVAL = 0.5  # seconds between event-loop lag samples
+    LOOP_LAG_MAX_WINDOW = 60.0  # seconds covered by the xauusd_event_loop_lag_max_seconds gauge
+    SLOW_CALLBACK_THRESHOLD = float(os.environ.get('SLOW_CALLBACK_THRESHOLD', 0.25))
+    ASYNCIO_DEBUG = os.environ.get('ASYNCIO_DEBUG', 'false').lower() == 'true'
+    ADMIN_API_TOKEN = os.environ.get('ADMIN_API_TOKEN', '')  # enables /debug/* routes on the health server
+    
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'false').lower() == 'true'
+    TRACE_FILE = os.environ.get('TRACE_FILE', 'data/traces.jsonl')
+    
+    MEMORY_STATS_TTL = int(os.environ.get('MEMORY_STATS_TTL', 300))  # seconds between /health memory breakdowns
+    
     @classmethod
     def get_ema_medium_col(cls) -> str:
         return f'EMA_{cls.MA_MEDIUM_PERIOD}'
@@ -68,12 +162,25 @@ class BotConfig:
     def get_atr_col(cls) -> str:
         return f'ATRr_{cls.ATR_PERIOD}'
     
+    @classmethod
+    def get_symbol_spec(cls, symbol: str) -> dict:
+        return cls.SYMBOL_SPECS.get(symbol) or {
+            'name': symbol.removeprefix('frx'),
+            'sl': cls.FIXED_SL_USD,
+            'tp': cls.FIXED_TP_USD,
+            'tracking_delta': cls.TRACKING_PRICE_DELTA,
+            'contract_size': 1,
+        }
+    
     NY_TZ = pytz.timezone('America/New_York')
     MARKET_CLOSE_DAY = 4
     MARKET_CLOSE_HOUR = 17
     MARKET_OPEN_DAY = 6
     MARKET_OPEN_HOUR = 17
-    MARKET_CHECK_INTERVAL = 300
+    # NY dates whose session is cancelled (closed from 17:00 the day before), e.g. 2026-12-25,2027-01-01
+    MARKET_HOLIDAYS = [d.strip() for d in os.environ.get('MARKET_HOLIDAYS', '').split(',') if d.strip()]
+    # 'YYYY-MM-DD HH:MM' NY times the market closes early until the 17:00 roll, e.g. 2026-11-27 13:45
+    MARKET_EARLY_CLOSES = [d.strip() for d in os.environ.get('MARKET_EARLY_CLOSES', '').split(',') if d.strip()]
     
     @classmethod
     def validate_config(cls) -> tuple[bool, list[str]]:
@@ -88,52 +195,47 @@ class BotConfig:
             errors.append("FIXED_SL_USD harus > 0")
         if cls.FIXED_TP_USD <= 0:
             errors.append("FIXED_TP_USD harus > 0")
+        for minutes in cls.MTF_TIMEFRAMES + ([cls.MTF_TREND_TIMEFRAME] if cls.MTF_TREND_TIMEFRAME else []):
+            if minutes < 1 or 1440 % minutes:
+                errors.append(f"Timeframe {minutes}m harus membagi habis 1 hari")
+        if not isinstance(cls.SHADOW_VARIANTS, dict) or not all(isinstance(v, dict) for v in cls.SHADOW_VARIANTS.values()):
+            errors.append("SHADOW_VARIANTS harus berupa objek JSON {nama: {parameter: nilai}}")
+        for day in cls.MARKET_HOLIDAYS:
+            try:
+                datetime.date.fromisoformat(day)
+            except ValueError:
+                errors.append(f"MARKET_HOLIDAYS: '{day}' bukan tanggal YYYY-MM-DD")
+        for value in cls.MARKET_EARLY_CLOSES:
+            try:
+                datetime.datetime.strptime(value, '%Y-%m-%d %H:%M')
+            except ValueError:
+                errors.append(f"MARKET_EARLY_CLOSES: '{value}' bukan format YYYY-MM-DD HH:MM")
+        if cls.TELEGRAM_MODE not in ('polling', 'webhook'):
+            errors.append("TELEGRAM_MODE harus 'polling' atau 'webhook'")
+        if cls.TELEGRAM_MODE == 'webhook':
+            if not cls.TELEGRAM_WEBHOOK_URL.startswith('https://'):
+                errors.append("TELEGRAM_WEBHOOK_URL harus URL https:// untuk mode webhook")
+            if not re.fullmatch(r'[A-Za-z0-9_-]{1,256}', cls.TELEGRAM_WEBHOOK_SECRET):
+                errors.append("TELEGRAM_WEBHOOK_SECRET wajib (1-256 karakter A-Z, a-z, 0-9, _ atau -)")
+            if not cls.TELEGRAM_WEBHOOK_PATH.startswith('/'):
+                errors.append("TELEGRAM_WEBHOOK_PATH harus diawali '/'")
+        if cls.TELEGRAM_CONCURRENT_UPDATES < 1:
+            errors.append("TELEGRAM_CONCURRENT_UPDATES harus >= 1")
+        if cls.RESTART_NOTICE not in ('admin', 'off'):
+            errors.append("RESTART_NOTICE harus 'admin' atau 'off'")
+        if not cls.SYMBOLS:
+            errors.append("SYMBOLS kosong")
+        for symbol in cls.SYMBOLS:
+            if symbol not in cls.SYMBOL_SPECS:
+                errors.append(f"SYMBOL_SPECS tidak punya entri untuk {symbol}")
         return len(errors) == 0, errors
     
     @classmethod
     def is_market_open(cls) -> bool:
-        now_ny = datetime.datetime.now(cls.NY_TZ)
-        weekday = now_ny.weekday()
-        hour = now_ny.hour
-        
-        if weekday == cls.MARKET_CLOSE_DAY and hour >= cls.MARKET_CLOSE_HOUR:
-            return False
-        if weekday == 5:
-            return False
-        if weekday == cls.MARKET_OPEN_DAY and hour < cls.MARKET_OPEN_HOUR:
-            return False
-        
-        return True
+        from market_calendar import get_calendar
+        return get_calendar().is_open()
     
     @classmethod
     def get_market_status(cls) -> dict:
-        now_ny = datetime.datetime.now(cls.NY_TZ)
-        weekday = now_ny.weekday()
-        hour = now_ny.hour
-        
-        if cls.is_market_open():
-            return {
-                'is_open': True,
-                'status': '🟢 BUKA',
-                'message': 'Market XAU/USD sedang aktif',
-                'next_change': None
-            }
-        
-        days_until_open = (cls.MARKET_OPEN_DAY - weekday) % 7
-        if days_until_open == 0 and hour >= cls.MARKET_OPEN_HOUR:
-            days_until_open = 7
-        
-        open_time = now_ny.replace(hour=cls.MARKET_OPEN_HOUR, minute=0, second=0, microsecond=0)
-        open_time += datetime.timedelta(days=days_until_open)
-        
-        time_until = open_time - now_ny
-        hours_left = int(time_until.total_seconds() // 3600)
-        mins_left = int((time_until.total_seconds() % 3600) // 60)
-        
-        return {
-            'is_open': False,
-            'status': '🔴 TUTUP',
-            'message': f'Market tutup (Weekend). Buka dalam ~{hours_left}j {mins_left}m',
-            'next_open': open_time.strftime('%A %H:%M NY'),
-            'hours_left': hours_left
-        }
+        from market_calendar import get_calendar
+        return get_calendar().status()
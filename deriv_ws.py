@@ -4,9 +4,13 @@ import logging
 import random
 import time
 from typing import Callable, Optional, Any
+import numpy as np
 import websockets
-from collections import deque
 from config import BotConfig
+from tick_buffer import TickRingBuffer
+from tick_store import TickStore
+from ws_codec import decode_message, DecodeError, JSON_BACKEND
+import metrics
 
 logger = logging.getLogger("DerivWS")
 
@@ -14,21 +18,59 @@ DERIV_WS_URL = "wss://ws.derivws.com/websockets/v3?app_id=1089"
 XAUUSD_SYMBOL = "frxXAUUSD"
 
 
+class SymbolFeed:
+    """Tick state of one subscribed symbol; `listeners` are called with (epoch, quote) per tick"""
+
+    __slots__ = ('symbol', 'current_price', 'last_tick_time', 'last_tick_received', 'bar_close_tick',
+                 '_last_tick_minute', 'price_history', 'listeners')
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.current_price: Optional[float] = None
+        self.last_tick_time: Optional[int] = None
+        self.last_tick_received: Optional[float] = None
+        self.bar_close_tick: Optional[tuple[int, float]] = None  # (epoch, received_at) of the first tick of the current minute
+        self._last_tick_minute: Optional[int] = None
+        self.price_history: TickRingBuffer = TickRingBuffer(BotConfig.TICK_BUFFER_SIZE)
+        self.listeners: list[Callable[[int, float], None]] = []
+
+    def on_tick(self, epoch: int, quote: float, received_at: float) -> None:
+        self.current_price = quote
+        self.last_tick_time = epoch
+        self.last_tick_received = received_at
+        minute = epoch // 60
+        if minute != self._last_tick_minute:
+            # First tick of a new minute: the tick that closed the previous 1m candle
+            self._last_tick_minute = minute
+            self.bar_close_tick = (epoch, received_at)
+        self.price_history.append(epoch, quote)
+        for listener in self.listeners:
+            listener(epoch, quote)
+
+
 class DerivWebSocket:
-    def __init__(self, on_tick_callback: Optional[Callable] = None):
+    """One Deriv connection multiplexing any number of tick streams.
+
+    Every subscribed symbol gets its own SymbolFeed and ticks are routed by
+    tick.symbol. The first subscribed symbol is the primary one: current_price,
+    price_history, bar_close_tick and last_tick_time refer to it. Request/response
+    calls (ticks_history) are matched to their caller by req_id, so several
+    engines can fetch candles over the same connection at once.
+    """
+
+    def __init__(self, on_tick_callback: Optional[Callable] = None, tick_store: Optional[TickStore] = None):
         self.ws: Optional[Any] = None
         self.on_tick_callback = on_tick_callback
+        self.tick_store = tick_store
         self.connected: bool = False
-        self.current_price: Optional[float] = None
-        self.price_history: deque = deque(maxlen=200)
-        self.last_tick_time: Optional[int] = None
+        self.current_symbol: str = XAUUSD_SYMBOL
+        self.feeds: dict[str, SymbolFeed] = {XAUUSD_SYMBOL: SymbolFeed(XAUUSD_SYMBOL)}
+        self.subscribed_symbols: list[str] = []
         self.last_tick_received: Optional[float] = None
         self.reconnect_attempts: int = 0
         self.max_reconnect_attempts: int = 15
         self.base_reconnect_delay: float = 2
         self.max_reconnect_delay: float = 60
-        self.candles_response: Optional[dict] = None
-        self.candles_event: asyncio.Event = asyncio.Event()
         self.listening: bool = False
         self.watchdog_timeout: int = 30
         self.total_reconnects: int = 0
@@ -37,7 +79,30 @@ class DerivWebSocket:
         self._closing: bool = False
         self.force_reconnect_after: int = 600
         self._request_id_counter: int = 0
-        self._pending_requests: dict = {}
+        self._pending_requests: dict[int, asyncio.Future] = {}
+    
+    @property
+    def primary_feed(self) -> SymbolFeed:
+        return self.feeds[self.current_symbol]
+    
+    @property
+    def current_price(self) -> Optional[float]:
+        return self.primary_feed.current_price
+    
+    @property
+    def price_history(self) -> TickRingBuffer:
+        return self.primary_feed.price_history
+    
+    @property
+    def bar_close_tick(self) -> Optional[tuple[int, float]]:
+        return self.primary_feed.bar_close_tick
+    
+    @property
+    def last_tick_time(self) -> Optional[int]:
+        return self.primary_feed.last_tick_time
+    
+    def get_feed(self, symbol: Optional[str] = None) -> Optional[SymbolFeed]:
+        return self.feeds.get(symbol or self.current_symbol)
         
     def _get_jittered_delay(self, attempt: int) -> float:
         base_delay = min(self.base_reconnect_delay * (2 ** attempt), self.max_reconnect_delay)
@@ -122,10 +187,26 @@ class DerivWebSocket:
         return False
 
     async def subscribe_ticks(self, symbol: str = XAUUSD_SYMBOL) -> bool:
+        """Add a tick stream; the first symbol subscribed becomes the primary feed"""
         if not self.connected or not self.ws:
             logger.error("Not connected to WebSocket")
             return False
         
+        if not self.subscribed_symbols and symbol != self.current_symbol:
+            self.feeds.pop(self.current_symbol, None)
+            self.current_symbol = symbol
+        if symbol not in self.feeds:
+            self.feeds[symbol] = SymbolFeed(symbol)
+        if symbol not in self.subscribed_symbols:
+            self.subscribed_symbols.append(symbol)
+        return await self._send_subscribe(symbol)
+    
+    async def resubscribe(self) -> bool:
+        """Subscribe every known tick stream again, e.g. after a reconnect"""
+        results = [await self._send_subscribe(symbol) for symbol in self.subscribed_symbols]
+        return all(results)
+    
+    async def _send_subscribe(self, symbol: str) -> bool:
         try:
             request = {
                 "ticks": symbol,
@@ -135,20 +216,34 @@ class DerivWebSocket:
             logger.info(f"Subscribed to {symbol} ticks")
             return True
         except Exception as e:
-            logger.error(f"Failed to subscribe: {e}")
+            logger.error(f"Failed to subscribe to {symbol}: {e}")
             return False
 
-    async def get_candles(self, symbol: str = XAUUSD_SYMBOL, count: int = 200, granularity: int = 60, max_retries: int = 3) -> Optional[list]:
+    async def get_candles(self, symbol: str = XAUUSD_SYMBOL, count: int = 200, granularity: int = 60, max_retries: int = 3,
+                          end: int | str = "latest", start: Optional[int] = None) -> Optional[list]:
+        started = time.perf_counter()
+        candles = await self._get_candles(symbol, count, granularity, max_retries, end, start)
+        metrics.CANDLE_FETCH_SECONDS.labels("candles", "ok" if candles else "failed").observe(time.perf_counter() - started)
+        return candles
+    
+    async def get_tick_history(self, symbol: str, start: int, end: int | str = "latest", count: int = 5000,
+                               max_retries: int = 2) -> Optional[dict]:
+        """Recorded ticks of `symbol` from `start`: {'times': [...], 'prices': [...]}, at most `count`"""
+        started = time.perf_counter()
+        history = await self._get_candles(symbol, count, 0, max_retries, end, start, style="ticks")
+        metrics.CANDLE_FETCH_SECONDS.labels("ticks", "ok" if history else "failed").observe(time.perf_counter() - started)
+        return history
+    
+    async def _get_candles(self, symbol: str, count: int, granularity: int, max_retries: int,
+                           end: int | str, start: Optional[int], style: str = "candles") -> Optional[list | dict]:
         if not self.connected or not self.ws:
             logger.error("Not connected to WebSocket")
             return None
         
+        loop = asyncio.get_running_loop()
         for attempt in range(max_retries):
             request_id = None
             try:
-                self.candles_event.clear()
-                self.candles_response = None
-                
                 self._request_id_counter += 1
                 request_id = self._request_id_counter
                 
@@ -156,12 +251,16 @@ class DerivWebSocket:
                     "ticks_history": symbol,
                     "adjust_start_time": 1,
                     "count": count,
-                    "end": "latest",
-                    "granularity": granularity,
-                    "style": "candles",
+                    "end": end,
+                    "style": style,
                     "req_id": request_id
                 }
-                self._pending_requests[request_id] = {'type': 'candles', 'symbol': symbol}
+                if style == "candles":
+                    request["granularity"] = granularity
+                if start is not None:
+                    request["start"] = start
+                response_future = loop.create_future()
+                self._pending_requests[request_id] = response_future
                 
                 try:
                     await self.ws.send(json.dumps(request))
@@ -175,7 +274,7 @@ class DerivWebSocket:
                 
                 timeout = 20 if attempt == 0 else 15
                 try:
-                    await asyncio.wait_for(self.candles_event.wait(), timeout=timeout)
+                    response = await asyncio.wait_for(response_future, timeout=timeout)
                 except asyncio.TimeoutError:
                     logger.warning(f"Candles timeout (attempt {attempt + 1}/{max_retries}), retrying...")
                     self._pending_requests.pop(request_id, None)
@@ -188,17 +287,21 @@ class DerivWebSocket:
                         logger.error("Max retries exceeded for candles")
                         return None
                 
-                if self.candles_response and "candles" in self.candles_response:
-                    candles = self.candles_response["candles"]
+                if "candles" in response:
+                    candles = response["candles"]
                     if isinstance(candles, list) and len(candles) > 0:
-                        logger.debug(f"Got {len(candles)} candles on attempt {attempt + 1}")
-                        self._pending_requests.pop(request_id, None)
+                        logger.debug(f"Got {len(candles)} {symbol} candles on attempt {attempt + 1}")
                         return candles
                 
-                if self.candles_response and "error" in self.candles_response:
-                    error_msg = self.candles_response['error'].get('message', 'Unknown error')
+                if "history" in response:
+                    history = response["history"]
+                    if isinstance(history, dict) and history.get("times"):
+                        logger.debug(f"Got {len(history['times'])} {symbol} ticks on attempt {attempt + 1}")
+                        return history
+                
+                if "error" in response:
+                    error_msg = response['error'].get('message', 'Unknown error')
                     logger.debug(f"Candles error: {error_msg} (attempt {attempt + 1}/{max_retries})")
-                    self._pending_requests.pop(request_id, None)
                     if attempt < max_retries - 1:
                         delay = 5 + (5 * (2 ** attempt))
                         await asyncio.sleep(delay)
@@ -206,12 +309,8 @@ class DerivWebSocket:
                     logger.warning(f"Candles failed after {max_retries} attempts: {error_msg}")
                     return None
                 
-                if self.candles_response is None:
-                    logger.warning(f"No candles response received (attempt {attempt + 1}/{max_retries})")
-                else:
-                    logger.warning(f"Unexpected candles response format (attempt {attempt + 1}/{max_retries}): {list(self.candles_response.keys())}")
+                logger.warning(f"Unexpected candles response format (attempt {attempt + 1}/{max_retries}): {list(response.keys())}")
                 
-                self._pending_requests.pop(request_id, None)
                 if attempt < max_retries - 1:
                     delay = 5 + (5 * (2 ** attempt))
                     logger.info(f"Waiting {delay}s before retry...")
@@ -326,9 +425,9 @@ class DerivWebSocket:
                 message_count += 1
                     
                 try:
-                    data = json.loads(message)
+                    msg = decode_message(message)
                     no_message_count = 0
-                except json.JSONDecodeError as jde:
+                except DecodeError:
                     logger.warning(f"Invalid JSON received (attempt {no_message_count + 1}): {message[:100]}")
                     no_message_count += 1
                     if no_message_count > 10:
@@ -340,59 +439,49 @@ class DerivWebSocket:
                     logger.error(f"JSON parsing error: {je}")
                     continue
                 
-                if "tick" in data:
+                tick = msg.tick
+                if tick is not None:
+                    metrics.TICKS_RECEIVED.inc()
                     try:
-                        tick = data["tick"]
-                        self.current_price = float(tick["quote"])
-                        self.last_tick_time = tick["epoch"]
-                        self.last_tick_received = time.time()
-                        
-                        tick_data = {
-                            "price": self.current_price,
-                            "epoch": self.last_tick_time,
-                            "symbol": tick.get("symbol", XAUUSD_SYMBOL)
-                        }
-                        self.price_history.append(tick_data)
+                        feed = self.feeds.get(tick.symbol or self.current_symbol)
+                        if feed is None:
+                            logger.debug(f"Tick for unsubscribed symbol {tick.symbol}, ignored")
+                            continue
+                        self.last_tick_received = current_time
+                        feed.on_tick(tick.epoch, tick.quote, current_time)
+                        if self.tick_store is not None:
+                            self.tick_store.append(feed.symbol, tick.epoch, tick.bid, tick.quote, current_time)
                         
                         if self.on_tick_callback:
                             try:
-                                await self.on_tick_callback(tick_data)
+                                await self.on_tick_callback(tick)
                             except Exception as e:
                                 logger.error(f"Tick callback error: {e}")
                     except Exception as e:
                         logger.error(f"Error processing tick: {e}")
                 
-                elif "candles" in data:
-                    req_id = data.get("req_id")
-                    if req_id and req_id in self._pending_requests:
-                        self._pending_requests.pop(req_id, None)
-                    self.candles_response = data
-                    self.candles_event.set()
+                elif msg.candles is not None:
+                    if not self._resolve_request(msg.req_id, {"candles": msg.candles, "req_id": msg.req_id}):
+                        logger.debug(f"Candles for unknown or expired request {msg.req_id}, dropped")
+                
+                elif msg.history is not None:
+                    if not self._resolve_request(msg.req_id, {"history": msg.history, "req_id": msg.req_id}):
+                        logger.debug(f"Tick history for unknown or expired request {msg.req_id}, dropped")
                 
-                elif "error" in data:
-                    echo_req = data.get("echo_req", {})
-                    req_id = data.get("req_id")
+                elif msg.error is not None:
+                    echo_req = msg.echo_req or {}
+                    req_id = msg.req_id
+                    error_msg = msg.error.get('message', 'Unknown error')
                     
-                    # Handle error response for candles request
-                    if isinstance(echo_req, dict) and "ticks_history" in echo_req:
-                        if req_id and req_id in self._pending_requests:
-                            self._pending_requests.pop(req_id, None)
-                        self.candles_response = data
-                        self.candles_event.set()
-                        error_msg = data.get('error', {}).get('message', 'Unknown error')
-                        logger.warning(f"Candles error: {error_msg}")
-                    # Handle error response for other requests with req_id
-                    elif req_id and req_id in self._pending_requests:
-                        self._pending_requests.pop(req_id, None)
-                        self.candles_response = data
-                        self.candles_event.set()
-                        error_msg = data.get('error', {}).get('message', 'Unknown error')
-                        logger.warning(f"Request error (ID {req_id}): {error_msg}")
+                    if self._resolve_request(req_id, {"error": msg.error, "echo_req": echo_req, "req_id": req_id}):
+                        if "ticks_history" in echo_req:
+                            logger.warning(f"Candles error ({echo_req.get('ticks_history')}): {error_msg}")
+                        else:
+                            logger.warning(f"Request error (ID {req_id}): {error_msg}")
                     else:
-                        error_msg = data.get('error', {}).get('message', 'Unknown error')
                         logger.warning(f"WebSocket error: {error_msg}")
                 
-                elif "pong" in data:
+                elif msg.msg_type == "ping":
                     logger.debug("Pong received from server")
                     
         except websockets.ConnectionClosed as e:
@@ -407,6 +496,14 @@ class DerivWebSocket:
             self.listening = False
             self.stop_watchdog()
 
+    def _resolve_request(self, req_id: Optional[int], response: dict) -> bool:
+        future = self._pending_requests.pop(req_id, None) if req_id else None
+        if future is None:
+            return False
+        if not future.done():
+            future.set_result(response)
+        return True
+
     async def send_ping(self) -> bool:
         if self.ws and self.connected:
             try:
@@ -438,11 +535,20 @@ class DerivWebSocket:
                 self.listening = False
                 logger.info("WebSocket connection closed")
 
-    def get_current_price(self) -> Optional[float]:
-        return self.current_price
+    def get_current_price(self, symbol: Optional[str] = None) -> Optional[float]:
+        feed = self.get_feed(symbol)
+        return feed.current_price if feed else None
 
-    def get_price_history(self) -> list:
-        return list(self.price_history)
+    def get_price_history(self, symbol: Optional[str] = None) -> list:
+        feed = self.get_feed(symbol)
+        return feed.price_history.to_dicts(feed.symbol) if feed else []
+    
+    def get_price_arrays(self, symbol: Optional[str] = None) -> tuple:
+        """Return (epochs, prices) NumPy arrays, oldest tick first; empty for an unknown symbol"""
+        feed = self.get_feed(symbol)
+        if feed is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        return feed.price_history.arrays()
 
     def get_connection_stats(self) -> dict:
         uptime = 0
@@ -455,7 +561,12 @@ class DerivWebSocket:
             "total_reconnects": self.total_reconnects,
             "current_price": self.current_price,
             "last_tick_time": self.last_tick_time,
-            "price_history_size": len(self.price_history)
+            "price_history_size": len(self.price_history),
+            "symbols": {
+                symbol: {"current_price": feed.current_price, "last_tick_time": feed.last_tick_time}
+                for symbol, feed in self.feeds.items()
+            },
+            "json_backend": JSON_BACKEND
         }
 
 
@@ -489,8 +600,8 @@ if __name__ == "__main__":
     async def test():
         print("Testing XAU/USD connection...")
         
-        async def on_tick(data):
-            print(f"Tick: {data['price']}")
+        async def on_tick(tick):
+            print(f"Tick: {tick.quote}")
         
         ws = DerivWebSocket(on_tick_callback=on_tick)
         if await ws.connect():
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+from typing import Optional, TYPE_CHECKING
+
+from config import BotConfig
+from deriv_ws import DerivWebSocket
+from tick_store import TickStore
+from candle_archive import CandleArchive
+from analysis_worker import AnalysisWorker
+from bar_cache import BarCache
+from event_bus import EventBus
+from signal_engine import SignalEngine
+from state_manager import StateManager
+from utils import calculate_indicators
+
+if TYPE_CHECKING:
+    from telegram_service import TelegramService
+
+
+logger = logging.getLogger("EngineGroup")
+
+
+def _normalize_symbol(name: str) -> str:
+    name = name.upper().replace('/', '')
+    return name[3:] if name.startswith('FRX') else name
+
+
+class EngineGroup:
+    """One SignalEngine per configured symbol, all fed by a single Deriv connection.
+
+    The group owns what the symbols share: the multiplexed DerivWebSocket (one socket,
+    one listen loop, ticks routed by symbol), the tick store, the candle archive, the
+    multi-timeframe bar cache, the analysis worker thread and the event bus. Each engine
+    keeps its own state. The primary symbol uses the StateManager and TelegramService the
+    bot was started with; every other symbol gets a
+    StateManager with its own files (its subscribers are the users who opted in with
+    /symbols) and a TelegramService sharing the primary's send pacing. Adding a symbol
+    therefore adds its state and one tick subscription, not a connection or a thread.
+    """
+
+    def __init__(self, state_manager: StateManager, symbols: Optional[list[str]] = None):
+        self.symbols = list(symbols or BotConfig.SYMBOLS)
+        self.tick_store: Optional[TickStore] = TickStore() if BotConfig.TICK_STORE_ENABLED else None
+        self.candle_archive: Optional[CandleArchive] = CandleArchive() if BotConfig.CANDLE_ARCHIVE_ENABLED else None
+        self.analysis_worker = AnalysisWorker(calculate_indicators)
+        self.bar_cache = BarCache()
+        self.event_bus = EventBus()
+        self.deriv_ws = DerivWebSocket(tick_store=self.tick_store)
+        self.engines: dict[str, SignalEngine] = {}
+        for symbol in self.symbols:
+            is_primary = not self.engines
+            if is_primary:
+                manager = state_manager
+            else:
+                manager = StateManager(file_suffix=symbol)
+                manager.load_subscribers()
+                manager.load_user_states()
+            self.engines[symbol] = SignalEngine(
+                manager, None, symbol=symbol, deriv_ws=self.deriv_ws, candle_archive=self.candle_archive,
+                analysis_worker=self.analysis_worker, bar_cache=self.bar_cache, event_bus=self.event_bus,
+                is_primary=is_primary
+            )
+        self.primary: SignalEngine = self.engines[self.symbols[0]]
+        self._running = False
+        self._shutdown_event = asyncio.Event()
+        self._listen_task: Optional[asyncio.Task] = None
+
+    def attach_telegram(self, telegram_service: 'TelegramService') -> None:
+        from telegram_service import TelegramService
+        self.primary.telegram_service = telegram_service
+        for engine in self.engines.values():
+            if engine is self.primary:
+                continue
+            service = TelegramService(engine.state_manager, self.get_deriv_ws, engine.get_symbol,
+                                      pacer=telegram_service.pacer)
+            service.tracking_price_delta = engine.spec['tracking_delta']
+            service.title_suffix = engine.title_suffix
+            engine.telegram_service = service
+
+    def get_deriv_ws(self) -> DerivWebSocket:
+        return self.deriv_ws
+
+    def find_engine(self, name: str) -> Optional[SignalEngine]:
+        """Look an engine up by Deriv symbol or display name (frxXAGUSD, XAGUSD, XAG/USD)"""
+        wanted = _normalize_symbol(name)
+        for symbol, engine in self.engines.items():
+            if wanted in (_normalize_symbol(symbol), _normalize_symbol(engine.display_name)):
+                return engine
+        return None
+
+    def toggle_subscription(self, symbol: str, chat_id: str | int) -> bool:
+        """Opt a user in or out of one symbol; returns True if now subscribed"""
+        manager = self.engines[symbol].state_manager
+        chat_id = str(chat_id)
+        if manager.is_subscriber(chat_id):
+            manager.remove_subscriber(chat_id)
+            return False
+        manager.add_subscriber(chat_id)
+        if manager.current_signal:
+            manager.get_user_state(chat_id).start_trade(manager.current_signal, record_history=False)
+            manager.save_user_states()
+        return True
+
+    def request_shutdown(self) -> None:
+        self._running = False
+        self._shutdown_event.set()
+        for engine in self.engines.values():
+            engine.request_shutdown()
+
+    async def _connect(self) -> bool:
+        max_connect_attempts = 3
+        for attempt in range(max_connect_attempts):
+            try:
+                if await self.deriv_ws.connect():
+                    break
+                if attempt < max_connect_attempts - 1:
+                    logger.warning(f"Connection attempt {attempt + 1} failed, retrying...")
+                    await asyncio.sleep(3)
+            except Exception as e:
+                logger.error(f"Connection attempt {attempt + 1} error: {e}")
+                if attempt < max_connect_attempts - 1:
+                    await asyncio.sleep(3)
+
+        if not self.deriv_ws.connected:
+            return False
+        for symbol in self.symbols:
+            await self.deriv_ws.subscribe_ticks(symbol)
+        self._listen_task = asyncio.create_task(self.deriv_ws.listen(), name="deriv-listen")
+        return True
+
+    async def _reconnect(self) -> None:
+        logger.warning("⚠️ WebSocket disconnected, reconnecting...")
+        await self._stop_listening()
+        if await self.deriv_ws.connect():
+            await self.deriv_ws.resubscribe()
+            self._listen_task = asyncio.create_task(self.deriv_ws.listen(), name="deriv-listen")
+            logger.info(f"✅ Reconnected to WebSocket ({len(self.symbols)} symbols)")
+        else:
+            await asyncio.sleep(10)
+
+    async def _stop_listening(self) -> None:
+        if self._listen_task:
+            self._listen_task.cancel()
+            try:
+                await self._listen_task
+            except asyncio.CancelledError:
+                pass
+            self._listen_task = None
+
+    async def run(self, bot) -> None:
+        self._running = True
+        self._shutdown_event.clear()
+        logger.info(f"Starting signal engines for {', '.join(self.symbols)}")
+
+        if not await self._connect():
+            logger.critical("Failed to connect to Deriv WebSocket after max attempts!")
+            return
+
+        await asyncio.sleep(3)
+        self.event_bus.start()
+        engine_tasks = [asyncio.create_task(engine.run(bot), name=f"signal-engine-{symbol}")
+                        for symbol, engine in self.engines.items()]
+        stop_waiter = asyncio.create_task(self._shutdown_event.wait())
+        try:
+            while self._running and not all(task.done() for task in engine_tasks):
+                if not self.deriv_ws.connected or self._listen_task is None or self._listen_task.done():
+                    await self._reconnect()
+                    continue
+                await asyncio.wait([self._listen_task, stop_waiter], timeout=5,
+                                   return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stop_waiter.cancel()
+            for engine in self.engines.values():
+                engine.request_shutdown()
+            # Engines cancel their supervised tasks on shutdown; don't wait on a stuck one
+            done, pending = await asyncio.wait(engine_tasks, timeout=5)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*engine_tasks, return_exceptions=True)
+            await self.close()
+
+    async def close(self) -> None:
+        await self._stop_listening()
+        await self.deriv_ws.close()
+        if self.tick_store:
+            self.tick_store.close()
+        if self.candle_archive:
+            await asyncio.to_thread(self.candle_archive.close)
+        await self.analysis_worker.close()
+        # Drain the consumers fully first so pending trade messages and state writes are not lost
+        await self.event_bus.close()
+        for engine in self.engines.values():
+            if engine.shadow:
+                engine.shadow.save()
+            if engine.state_manager.current_signal:
+                engine.state_manager.save_current_signal()
+            if engine is not self.primary:
+                engine.state_manager.save_user_states()
+                engine.state_manager.save_subscribers()
+        logger.info("Signal engines stopped")
+
+    def get_shadow_stats(self) -> dict:
+        return {symbol: engine.shadow.get_stats() for symbol, engine in self.engines.items() if engine.shadow}
+
+    def get_stats(self) -> dict:
+        stats = {}
+        for symbol, engine in self.engines.items():
+            manager = engine.state_manager
+            stats[symbol] = {
+                "name": engine.display_name,
+                "price": self.deriv_ws.get_current_price(symbol),
+                "subscribers": len(manager.subscribers),
+                "active_signal": bool(manager.current_signal),
+                "signals_generated": engine.total_signals_generated,
+                "tasks_healthy": engine.supervisor.healthy,
+            }
+        return stats
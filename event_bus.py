@@ -0,0 +1,243 @@
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, Union
+
+import metrics
+
+
+logger = logging.getLogger("EventBus")
+
+DROP_OLDEST = 'drop_oldest'  # a full queue discards its oldest event (ticks, bars)
+BLOCK = 'block'  # publish() waits for room (trade results must not be lost)
+OVERFLOW_POLICIES = (DROP_OLDEST, BLOCK)
+
+
+@dataclass(frozen=True, slots=True)
+class TickEvent:
+    symbol: str
+    epoch: int
+    price: float
+
+
+@dataclass(frozen=True, slots=True)
+class BarClosed:
+    """A 1m bar closed. `frame` is the analysed window (its second-to-last row is the bar);
+    the engine never modifies it after publishing, so a late consumer still sees this bar."""
+    symbol: str
+    bar_epoch: int
+    frame: Any  # pd.DataFrame
+
+
+@dataclass(frozen=True, slots=True)
+class SignalOpened:
+    symbol: str
+    signal: dict  # trade info as stored in StateManager.current_signal
+    indicators: dict  # ema/rsi/adx at the signal bar
+    decided_at: float  # time.perf_counter() of the decision, for the delivery histograms
+    chat_id: Optional[str] = None  # None: broadcast to the symbol's subscribers
+    trace: Any = None  # root span of the analysis cycle; the Telegram consumer ends it after the broadcast
+
+
+@dataclass(frozen=True, slots=True)
+class TP1Hit:
+    symbol: str
+    price: float
+    tp1_level: float
+    chat_id: Optional[str] = None  # None: the broadcast signal; else one user's manual trade
+
+
+@dataclass(frozen=True, slots=True)
+class TradeClosed:
+    symbol: str
+    result: str  # backtester.RESULT_WIN / RESULT_LOSS / RESULT_BREAK_EVEN
+    entry_price: float
+    exit_price: float
+    duration_minutes: float
+    chat_id: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class TrackingUpdate:
+    """Live tracking messages are due. Queued behind the trade messages published before
+    it, so nobody sees tracking for a signal whose broadcast has not reached them."""
+    symbol: str
+    price: float
+
+
+Event = Union[TickEvent, BarClosed, SignalOpened, TP1Hit, TradeClosed, TrackingUpdate]
+Handler = Callable[[Any], Optional[Awaitable[None]]]
+
+
+class Subscription:
+    """One consumer: a bounded queue and the task draining it into `handler`"""
+
+    def __init__(self, name: str, event_types: tuple[type, ...], handler: Handler,
+                 maxsize: int, overflow: str, symbol: Optional[str], batch: bool = False):
+        self.name = name
+        self.event_types = event_types
+        self.handler = handler
+        self.overflow = overflow
+        self.symbol = symbol
+        self.batch = batch
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.task: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._lag_metric = metrics.EVENT_BUS_LAG_SECONDS.labels(name)
+        self._dropped_metric = metrics.EVENT_BUS_DROPPED.labels(name)
+        metrics.EVENT_BUS_QUEUE_DEPTH.labels(name).function = self.queue.qsize
+
+    def wants(self, event) -> bool:
+        return isinstance(event, self.event_types) and (self.symbol is None or event.symbol == self.symbol)
+
+    def offer(self, item: tuple) -> None:
+        """Enqueue without waiting; a full queue loses its oldest item (or, for BLOCK, this one)"""
+        if self.queue.full():
+            self.dropped += 1
+            self._dropped_metric.inc()
+            if self.overflow == BLOCK:
+                logger.warning(f"Consumer {self.name} full, dropped {type(item[0]).__name__} from a sync publisher")
+                return
+            self.queue.get_nowait()
+            self.queue.task_done()
+        self.queue.put_nowait(item)
+
+    async def consume(self) -> None:
+        while True:
+            items = [await self.queue.get()]
+            if self.batch:
+                # Everything that queued up while the previous batch was handled
+                while not self.queue.empty():
+                    items.append(self.queue.get_nowait())
+            now = time.perf_counter()
+            for _, published_at in items:
+                lag = now - published_at
+                self.last_lag = lag
+                if lag > self.max_lag:
+                    self.max_lag = lag
+                self._lag_metric.observe(lag)
+            events = [event for event, _ in items]
+            try:
+                result = self.handler(events if self.batch else events[0])
+                if inspect.isawaitable(result):
+                    await result
+                self.delivered += len(events)
+            except Exception as e:
+                self.errors += 1
+                names = ', '.join(type(event).__name__ for event in events)
+                logger.error(f"Consumer {self.name} failed on {names}: {e}", exc_info=True)
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+
+    def get_stats(self) -> dict:
+        return {
+            'events': [event_type.__name__ for event_type in self.event_types],
+            'overflow': self.overflow,
+            'queued': self.queue.qsize(),
+            'maxsize': self.queue.maxsize,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'last_lag_ms': round(self.last_lag * 1000, 2),
+            'max_lag_ms': round(self.max_lag * 1000, 2),
+        }
+
+
+class EventBus:
+    """In-process pub/sub between the engine and its consumers.
+
+    Every subscriber gets its own bounded queue and task, so a slow consumer (a Telegram
+    broadcast, a state file write) only delays itself. When a queue is full, DROP_OLDEST
+    consumers lose their oldest event and BLOCK consumers make publish() wait; the sync
+    publish_nowait() used on the tick path never waits. Lag is the time from publish to
+    the start of handling, per consumer.
+    """
+
+    def __init__(self):
+        self._subscriptions: dict[str, Subscription] = {}
+        self._routes: dict[type, list[Subscription]] = {}
+        self._running = False
+
+    def subscribe(self, name: str, event_types: tuple[type, ...], handler: Handler, maxsize: int = 256,
+                  overflow: str = BLOCK, symbol: Optional[str] = None, batch: bool = False) -> Subscription:
+        """Deliver `event_types` (only those of `symbol`, if given) to `handler`, sync or async.
+        With `batch`, the handler gets a list: every event queued by the time it is called"""
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if name in self._subscriptions:
+            raise ValueError(f"Duplicate consumer: {name}")
+        subscription = Subscription(name, tuple(event_types), handler, maxsize, overflow, symbol, batch)
+        self._subscriptions[name] = subscription
+        for event_type in subscription.event_types:
+            self._routes.setdefault(event_type, []).append(subscription)
+        if self._running:
+            self._start(subscription)
+        return subscription
+
+    def has_subscribers(self, event_type: type, symbol: Optional[str] = None) -> bool:
+        return any(sub.symbol is None or sub.symbol == symbol for sub in self._routes.get(event_type, ()))
+
+    async def publish(self, event: Event) -> None:
+        item = (event, time.perf_counter())
+        for subscription in self._routes.get(type(event), ()):
+            if not subscription.wants(event):
+                continue
+            if subscription.overflow == BLOCK:
+                await subscription.queue.put(item)
+            else:
+                subscription.offer(item)
+
+    def publish_nowait(self, event: Event) -> None:
+        item = (event, time.perf_counter())
+        for subscription in self._routes.get(type(event), ()):
+            if subscription.wants(event):
+                subscription.offer(item)
+
+    def _start(self, subscription: Subscription) -> None:
+        subscription.task = asyncio.create_task(subscription.consume(), name=f"bus-{subscription.name}")
+
+    def start(self) -> None:
+        """Start the consumer tasks (idempotent); needs a running event loop"""
+        self._running = True
+        for subscription in self._subscriptions.values():
+            if subscription.task is None or subscription.task.done():
+                self._start(subscription)
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        """Let the consumers drain their queues (for at most `timeout` seconds, if given), then stop them"""
+        self._running = False
+        tasks = [sub.task for sub in self._subscriptions.values() if sub.task is not None]
+        if not tasks:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*(sub.queue.join() for sub in self._subscriptions.values()
+                                                    if sub.task is not None)), timeout)
+        except asyncio.TimeoutError:
+            for subscription in self._subscriptions.values():
+                if subscription.queue.qsize():
+                    pending = [type(event).__name__ for event, _ in subscription.queue._queue]
+                    logger.error(f"Consumer {subscription.name} closed with {len(pending)} undelivered "
+                                 f"events: {', '.join(pending)}")
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for subscription in self._subscriptions.values():
+            subscription.task = None
+
+    def get_stats(self) -> dict:
+        return {name: subscription.get_stats() for name, subscription in self._subscriptions.items()}
+
+
+def record_metrics(event: Event) -> None:
+    """Consumer for the trade counters"""
+    if isinstance(event, SignalOpened):
+        metrics.SIGNALS_GENERATED.labels(event.signal['direction']).inc()
+    elif isinstance(event, TradeClosed):
+        metrics.TRADES_CLOSED.labels(event.result).inc()
@@ -6,17 +6,31 @@ from typing import Optional, Callable, TYPE_CHECKING
 from aiohttp import web, ClientSession, ClientTimeout
 
 from config import BotConfig
+import metrics
+from profiling import Profiler
+from memory_stats import MemoryAccountant, current_rss_mb, peak_rss_mb
 
 if TYPE_CHECKING:
     from state_manager import StateManager
+    from loop_monitor import LoopMonitor
+    from telegram_webhook import TelegramWebhook
 
 
 logger = logging.getLogger("HealthServer")
 
 
 class HealthServer:
-    def __init__(self, state_manager: 'StateManager', deriv_ws_getter: Callable, signal_engine_getter: Optional[Callable] = None):
+    def __init__(self, state_manager: 'StateManager', deriv_ws_getter: Callable, signal_engine_getter: Optional[Callable] = None,
+                 loop_monitor: Optional['LoopMonitor'] = None, telegram_service_getter: Optional[Callable] = None,
+                 shadow_stats_getter: Optional[Callable] = None, telegram_webhook: Optional['TelegramWebhook'] = None):
         self.state_manager = state_manager
+        self.telegram_webhook = telegram_webhook
+        self.shadow_stats_getter = shadow_stats_getter
+        self.telegram_service_getter = telegram_service_getter
+        self.loop_monitor = loop_monitor
+        self.profiler = Profiler()
+        self.memory_accountant = MemoryAccountant(state_manager, deriv_ws_getter, signal_engine_getter,
+                                                  telegram_service_getter, ttl=BotConfig.MEMORY_STATS_TTL)
         self.deriv_ws_getter = deriv_ws_getter
         self.signal_engine_getter = signal_engine_getter
         self.runner: Optional[web.AppRunner] = None
@@ -46,25 +60,13 @@ class HealthServer:
                     'total_generated': signal_engine.total_signals_generated,
                     'history_count': len(signal_engine.signal_history),
                     'cooldown_seconds': signal_engine.signal_cooldown_seconds,
+                    'analysis': signal_engine.analysis_worker.get_stats(),
+                    'bar_cache': signal_engine.bar_cache.get_stats(),
+                    'tasks': signal_engine.supervisor.get_stats(),
+                    'event_bus': signal_engine.event_bus.get_stats(),
                 }
         
-        memory_mb = 0
-        try:
-            import resource
-            usage = resource.getrusage(resource.RUSAGE_SELF)
-            memory_mb = round(usage.ru_maxrss / 1024, 1)
-        except ImportError:
-            try:
-                import os
-                with open('/proc/self/status', 'r') as f:
-                    for line in f:
-                        if line.startswith('VmRSS:'):
-                            memory_mb = round(int(line.split()[1]) / 1024, 1)
-                            break
-            except (OSError, IOError):
-                pass
-        except (OSError, IOError):
-            pass
+        telegram_service = self.telegram_service_getter() if self.telegram_service_getter else None
         
         return web.json_response({
             "status": "ok",
@@ -72,7 +74,9 @@ class HealthServer:
             "uptime_seconds": round(uptime, 0),
             "uptime_human": self._format_uptime(uptime),
             "subscribers": len(self.state_manager.subscribers),
-            "memory_mb": memory_mb,
+            "memory_mb": current_rss_mb(),
+            "peak_memory_mb": peak_rss_mb(),
+            "memory": self.memory_accountant.breakdown(),
             "websocket": {
                 "connected": deriv_ws.connected if deriv_ws else False,
                 "current_price": deriv_ws.get_current_price() if deriv_ws and deriv_ws.connected else None,
@@ -93,6 +97,9 @@ class HealthServer:
                 "win_rate": today_stats.get('win_rate', 0),
             },
             "signals": signal_stats,
+            "event_loop": self.loop_monitor.get_stats() if self.loop_monitor else None,
+            "telegram_webhook": self.telegram_webhook.get_stats() if self.telegram_webhook else None,
+            "dashboard_cache": telegram_service.views.get_stats() if telegram_service else None,
             "strategy": {
                 "type": "scalping",
                 "indicators": ["EMA50", "RSI3", "ADX55"],
@@ -106,6 +113,27 @@ class HealthServer:
             }
         })
     
+    async def metrics_handler(self, request: web.Request) -> web.Response:
+        """Prometheus text exposition; only O(1) reads, never walks user state or history"""
+        deriv_ws = self.deriv_ws_getter()
+        connected = bool(deriv_ws and deriv_ws.connected)
+        metrics.WEBSOCKET_CONNECTED.set(1 if connected else 0)
+        last_tick = getattr(deriv_ws, 'last_tick_received', None) if deriv_ws else None
+        if last_tick:
+            metrics.TICK_AGE_SECONDS.set(round(time.time() - last_tick, 3))
+        metrics.SUBSCRIBERS.set(len(self.state_manager.subscribers))
+        metrics.ACTIVE_SIGNAL.set(1 if self.state_manager.current_signal else 0)
+        metrics.UPTIME_SECONDS.set(round(time.time() - self.start_time, 0))
+        return web.Response(
+            body=metrics.render_latest().encode('utf-8'),
+            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+        )
+    
+    async def shadow_handler(self, request: web.Request) -> web.Response:
+        """GET /debug/shadow: virtual win/loss/break-even stats of every shadow variant per symbol"""
+        self.profiler.require_admin(request)
+        return web.json_response(self.shadow_stats_getter())
+    
     def _format_uptime(self, seconds: float) -> str:
         days = int(seconds // 86400)
         hours = int((seconds % 86400) // 3600)
@@ -120,7 +148,13 @@ class HealthServer:
     async def start(self) -> Optional[web.AppRunner]:
         app = web.Application()
         app.router.add_get('/health', self.health_handler)
+        app.router.add_get('/metrics', self.metrics_handler)
         app.router.add_get('/', self.health_handler)
+        self.profiler.add_routes(app)
+        if self.profiler.enabled and self.shadow_stats_getter:
+            app.router.add_get('/debug/shadow', self.shadow_handler)
+        if self.telegram_webhook:
+            self.telegram_webhook.add_routes(app)
         
         self.runner = web.AppRunner(app)
         await self.runner.setup()
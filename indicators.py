@@ -0,0 +1,229 @@
+"""NumPy implementations of the strategy indicators.
+
+The formulas follow pandas_ta's defaults (EMA seeded with an SMA, Wilder/RMA smoothing
+for RSI, ATR and ADX) so that values computed over whole arrays line up with
+calculate_indicators(). The recursive smoothing runs through pandas' compiled ewm.
+The Streaming* classes compute the same series one bar at a time in O(1) per bar, for
+the multi-timeframe bar cache.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _as_float(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+
+def ema(close, length: int) -> np.ndarray:
+    close = _as_float(close)
+    out = np.full(len(close), np.nan)
+    if len(close) < length:
+        return out
+    seeded = close.copy()
+    seeded[:length - 1] = np.nan
+    seeded[length - 1] = close[:length].mean()
+    return pd.Series(seeded).ewm(span=length, adjust=False).mean().to_numpy()
+
+
+def rma(values, length: int) -> np.ndarray:
+    alpha = (1.0 / length) if length > 0 else 0.5
+    return pd.Series(_as_float(values)).ewm(alpha=alpha, min_periods=length).mean().to_numpy()
+
+
+def rsi(close, length: int) -> np.ndarray:
+    close = _as_float(close)
+    change = np.empty(len(close))
+    change[0] = np.nan
+    change[1:] = np.diff(close)
+    positive = np.where(change > 0, change, 0.0)
+    negative = np.where(change < 0, change, 0.0)
+    positive[0] = negative[0] = np.nan
+    positive_avg = rma(positive, length)
+    negative_avg = rma(negative, length)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 * positive_avg / (positive_avg + np.abs(negative_avg))
+
+
+def true_range(high, low, close) -> np.ndarray:
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    prev_close = np.empty(len(close))
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(prev_close - low)))
+    if len(tr):
+        tr[0] = np.nan
+    return tr
+
+
+def atr(high, low, close, length: int) -> np.ndarray:
+    return rma(true_range(high, low, close), length)
+
+
+def adx(high, low, close, length: int) -> np.ndarray:
+    high, low = _as_float(high), _as_float(low)
+    up = np.empty(len(high))
+    dn = np.empty(len(low))
+    up[0] = dn[0] = np.nan
+    up[1:] = high[1:] - high[:-1]
+    dn[1:] = low[:-1] - low[1:]
+    pos = np.where((up > dn) & (up > 0), up, 0.0)
+    neg = np.where((dn > up) & (dn > 0), dn, 0.0)
+    pos[0] = neg[0] = np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = 100.0 / atr(high, low, close, length)
+        dmp = k * rma(pos, length)
+        dmn = k * rma(neg, length)
+        dx = 100.0 * np.abs(dmp - dmn) / (dmp + dmn)
+    return rma(dx, length)
+
+
+class StreamingRMA:
+    """rma() one value at a time: the same adjusted EWM, kept as a running ratio"""
+
+    __slots__ = ('decay', 'min_periods', '_num', '_den', '_count')
+
+    def __init__(self, length: int):
+        alpha = (1.0 / length) if length > 0 else 0.5
+        self.decay = 1.0 - alpha
+        self.min_periods = length
+        self._num = 0.0
+        self._den = 0.0
+        self._count = 0
+
+    def update(self, value: float) -> float:
+        if value != value:
+            # A missing value still ages the earlier ones, as pandas does with ignore_na=False
+            self._num *= self.decay
+            self._den *= self.decay
+        else:
+            self._num = value + self.decay * self._num
+            self._den = 1.0 + self.decay * self._den
+            self._count += 1
+        if self._count < self.min_periods or self._den == 0.0:
+            return np.nan
+        return self._num / self._den
+
+
+class StreamingEMA:
+    """ema(): SMA of the first `length` closes, then the recursive EMA"""
+
+    __slots__ = ('length', 'alpha', '_seed', '_value')
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self._seed: list[float] = []
+        self._value = np.nan
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self._value == self._value:
+            self._value = self.alpha * close + (1.0 - self.alpha) * self._value
+        else:
+            self._seed.append(close)
+            if len(self._seed) == self.length:
+                self._value = sum(self._seed) / self.length
+                self._seed = []
+        return self._value
+
+
+class StreamingRSI:
+    """rsi() over closes fed one bar at a time"""
+
+    __slots__ = ('_prev_close', '_positive', '_negative')
+
+    def __init__(self, length: int):
+        self._prev_close = np.nan
+        self._positive = StreamingRMA(length)
+        self._negative = StreamingRMA(length)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        change = close - self._prev_close
+        self._prev_close = close
+        if change != change:
+            positive = negative = np.nan
+        else:
+            positive, negative = max(change, 0.0), min(change, 0.0)
+        positive_avg = self._positive.update(positive)
+        negative_avg = self._negative.update(negative)
+        total = positive_avg + abs(negative_avg)
+        return 100.0 * positive_avg / total if total else np.nan
+
+
+class StreamingATR:
+    """atr() over bars fed one at a time"""
+
+    __slots__ = ('_prev_close', '_rma')
+
+    def __init__(self, length: int):
+        self._prev_close = np.nan
+        self._rma = StreamingRMA(length)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        prev_close = self._prev_close
+        self._prev_close = close
+        if prev_close != prev_close:
+            return self._rma.update(np.nan)
+        return self._rma.update(max(high - low, abs(high - prev_close), abs(prev_close - low)))
+
+
+class StreamingADX:
+    """adx() over bars fed one at a time"""
+
+    __slots__ = ('_prev_high', '_prev_low', '_atr', '_pos', '_neg', '_adx')
+
+    def __init__(self, length: int):
+        self._prev_high = np.nan
+        self._prev_low = np.nan
+        self._atr = StreamingATR(length)
+        self._pos = StreamingRMA(length)
+        self._neg = StreamingRMA(length)
+        self._adx = StreamingRMA(length)
+
+    def update(self, high: float, low: float, close: float) -> float:
+        up = high - self._prev_high
+        dn = self._prev_low - low
+        self._prev_high, self._prev_low = high, low
+        atr_value = self._atr.update(high, low, close)
+        if up != up:
+            pos = neg = np.nan
+        else:
+            pos = up if up > dn and up > 0 else 0.0
+            neg = dn if dn > up and dn > 0 else 0.0
+        pos_avg = self._pos.update(pos)
+        neg_avg = self._neg.update(neg)
+        k = 100.0 / atr_value if atr_value else np.nan
+        dmp, dmn = k * pos_avg, k * neg_avg
+        dx = 100.0 * abs(dmp - dmn) / (dmp + dmn) if dmp + dmn else np.nan
+        return self._adx.update(dx)
+
+
+STREAMING_INDICATORS = {
+    'EMA': StreamingEMA,
+    'RSI': StreamingRSI,
+    'ATRr': StreamingATR,
+    'ADX': StreamingADX,
+}
+
+
+def streaming_indicator(column: str):
+    """A streaming state for a pandas_ta style column name such as 'EMA_50' or 'RSI_3'"""
+    kind, _, length = column.rpartition('_')
+    if kind not in STREAMING_INDICATORS or not length.isdigit():
+        raise ValueError(f"Unknown indicator column: {column}")
+    return STREAMING_INDICATORS[kind](int(length))
+
+
+ARRAY_INDICATORS = {
+    'EMA': lambda high, low, close, length: ema(close, length),
+    'RSI': lambda high, low, close, length: rsi(close, length),
+    'ATRr': atr,
+    'ADX': adx,
+}
+
+
+def compute_column(column: str, high, low, close) -> np.ndarray:
+    """The whole series for a pandas_ta style column name such as 'EMA_50' or 'RSI_3'"""
+    kind, _, length = column.rpartition('_')
+    if kind not in ARRAY_INDICATORS or not length.isdigit():
+        raise ValueError(f"Unknown indicator column: {column}")
+    return ARRAY_INDICATORS[kind](high, low, close, int(length))
@@ -0,0 +1,191 @@
+import asyncio
+import collections
+import logging
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+
+from config import BotConfig
+import metrics
+
+
+logger = logging.getLogger("LoopMonitor")
+
+
+@dataclass
+class SlowEvent:
+    timestamp: float
+    duration: float
+    task: Optional[str]
+    stack: list[str] = field(default_factory=list)
+
+
+class LoopMonitor:
+    """Event-loop lag sampler plus a watchdog thread for blocking calls.
+
+    The sampler coroutine sleeps for `interval` and records how late it woke up. The
+    watchdog thread checks the sampler's heartbeat; once the loop has been stuck for
+    longer than `threshold` it captures the loop thread's stack with sys._current_frames()
+    and the running task's name, i.e. the code that is blocking, while it still blocks.
+    """
+
+    def __init__(self, interval: Optional[float] = None, threshold: Optional[float] = None,
+                 history: int = 50, stack_limit: int = 25, max_window: Optional[float] = None):
+        self.interval = interval or BotConfig.LOOP_LAG_INTERVAL
+        self.threshold = threshold or BotConfig.SLOW_CALLBACK_THRESHOLD
+        self.max_window = max_window or BotConfig.LOOP_LAG_MAX_WINDOW
+        self.stack_limit = stack_limit
+        self.events: collections.deque[SlowEvent] = collections.deque(maxlen=history)
+        self.recent_lags: collections.deque[float] = collections.deque(maxlen=240)
+        self.max_lag = 0.0
+        # (monotonic time, lag) with strictly decreasing lags: the first entry inside the
+        # window is the window's maximum
+        self._window_lags: collections.deque[tuple[float, float]] = collections.deque()
+        self.total_slow = 0
+        self.debug_mode = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._pending: Optional[SlowEvent] = None
+        self._sampler: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._events_lock = threading.Lock()
+        # Held by the sampler to beat and take the pending event, by the watchdog to check the
+        # beat and publish one; otherwise a capture could land just after the loop recovered
+        # and be pinned on the next, unrelated lag sample
+        self._pending_lock = threading.Lock()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if BotConfig.ASYNCIO_DEBUG:
+            # Staging only: asyncio debug mode logs every callback slower than the threshold
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.threshold
+            self.debug_mode = True
+            logger.warning(f"asyncio debug mode enabled (slow_callback_duration={self.threshold}s)")
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        metrics.EVENT_LOOP_LAG_MAX_SECONDS.set_function(self.window_max_lag)
+        self._sampler = asyncio.create_task(self._sample(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Loop monitor started (interval={self.interval}s, threshold={self.threshold}s)")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._sampler:
+            self._sampler.cancel()
+            try:
+                await self._sampler
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog:
+            self._watchdog.join(timeout=2)
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            with self._pending_lock:
+                self._heartbeat = time.monotonic()
+                event, self._pending = self._pending, None
+            self._record_lag(lag, event)
+
+    def _record_lag(self, lag: float, event: Optional[SlowEvent] = None) -> None:
+        self.recent_lags.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        metrics.EVENT_LOOP_LAG_SECONDS.observe(lag)
+        now = time.monotonic()
+        window = self._window_lags
+        while window and window[-1][1] <= lag:
+            window.pop()
+        window.append((now, lag))
+        while window[0][0] < now - self.max_window:
+            window.popleft()
+        if lag < self.threshold and event is None:
+            return
+        if event is None:
+            # Blocked for less than the watchdog could see; no stack, only the size of the stall
+            event = SlowEvent(timestamp=time.time(), duration=lag, task=None)
+            with self._events_lock:
+                self.events.append(event)
+        event.duration = max(event.duration, lag)
+        self.total_slow += 1
+        metrics.SLOW_CALLBACKS.inc()
+        where = f" in task {event.task}" if event.task else ""
+        stack = ("\n" + "".join(event.stack)) if event.stack else ""
+        logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms{where}{stack}")
+
+    def window_max_lag(self) -> float:
+        """Largest lag sampled in the last `max_window` seconds; read-only, for the scrape"""
+        cutoff = time.monotonic() - self.max_window
+        for sampled_at, lag in self._window_lags:
+            if sampled_at >= cutoff:
+                return lag
+        return 0.0
+
+    def _watch(self) -> None:
+        check_every = max(0.02, self.threshold / 4)
+        while not self._stop.wait(check_every):
+            beat = self._heartbeat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled < self.threshold or self._pending is not None:
+                continue
+            event = SlowEvent(timestamp=time.time(), duration=stalled,
+                              task=self._current_task_name(), stack=self._capture_stack())
+            with self._pending_lock:
+                if self._heartbeat != beat:
+                    continue  # the loop recovered while we were capturing; the sampler logged it
+                with self._events_lock:
+                    self.events.append(event)
+                self._pending = event
+
+    def _capture_stack(self) -> list[str]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return []
+        return traceback.format_stack(frame, limit=self.stack_limit)
+
+    def _current_task_name(self) -> Optional[str]:
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            return None
+        if task is None:
+            return None
+        coro = task.get_coro()
+        qualname = getattr(coro, '__qualname__', None)
+        return f"{task.get_name()} ({qualname})" if qualname else task.get_name()
+
+    def get_stats(self, recent_events: int = 5) -> dict:
+        lags = sorted(self.recent_lags)
+        with self._events_lock:
+            events = list(self.events)[-recent_events:]
+
+        def percentile(q: float) -> Optional[float]:
+            if not lags:
+                return None
+            return round(lags[min(len(lags) - 1, int(q * len(lags)))] * 1000, 2)
+        return {
+            "interval_seconds": self.interval,
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "debug_mode": self.debug_mode,
+            "lag_ms": {
+                "last": round(self.recent_lags[-1] * 1000, 2) if self.recent_lags else None,
+                "p50": percentile(0.50),
+                "p99": percentile(0.99),
+                "max": round(self.max_lag * 1000, 2),
+            },
+            "slow_events": self.total_slow,
+            "recent_slow_events": [
+                {**asdict(e), "duration": round(e.duration, 3), "stack": e.stack[-6:]}
+                for e in events
+            ],
+        }
@@ -9,8 +9,10 @@ from telegram.error import Conflict
 from config import BotConfig
 from state_manager import StateManager
 from telegram_service import TelegramService
-from signal_engine import SignalEngine
+from telegram_webhook import ChatOrderedUpdateProcessor, TelegramWebhook
+from engine_group import EngineGroup
 from health_server import HealthServer, self_ping_loop
+from loop_monitor import LoopMonitor
 from utils import bot_logger, cleanup_logging
 
 
@@ -68,36 +70,55 @@ async def main():
     state_manager.load_subscribers()
     state_manager.load_user_states()
     
-    signal_engine = SignalEngine(state_manager, None)
-    shutdown_handler.register_signal_engine(signal_engine)
+    engine_group = EngineGroup(state_manager)
+    signal_engine = engine_group.primary
+    shutdown_handler.register_signal_engine(engine_group)
     
     telegram_service = TelegramService(
         state_manager,
-        lambda: signal_engine.get_deriv_ws(),
-        lambda: signal_engine.get_gold_symbol()
+        lambda: engine_group.get_deriv_ws(),
+        lambda: signal_engine.get_symbol()
     )
     
-    signal_engine.telegram_service = telegram_service
+    engine_group.attach_telegram(telegram_service)
+    
+    loop_monitor = LoopMonitor()
+    loop_monitor.start()
+    
+    builder = Application.builder().token(BotConfig.TELEGRAM_BOT_TOKEN)
+    if BotConfig.TELEGRAM_CONCURRENT_UPDATES > 1:
+        builder = builder.concurrent_updates(ChatOrderedUpdateProcessor(
+            BotConfig.TELEGRAM_CONCURRENT_UPDATES, BotConfig.TELEGRAM_MAX_PENDING_UPDATES
+        ))
+    application = builder.build()
+    shutdown_handler.register_application(application)
+    
+    # Webhook updates are served by the health server's app
+    telegram_webhook = None
+    if BotConfig.TELEGRAM_MODE == 'webhook':
+        telegram_webhook = TelegramWebhook(application, BotConfig.TELEGRAM_WEBHOOK_SECRET)
     
     health_server = HealthServer(
         state_manager,
-        lambda: signal_engine.get_deriv_ws(),
-        lambda: signal_engine
+        lambda: engine_group.get_deriv_ws(),
+        lambda: signal_engine,
+        loop_monitor=loop_monitor,
+        telegram_service_getter=lambda: telegram_service,
+        shadow_stats_getter=engine_group.get_shadow_stats,
+        telegram_webhook=telegram_webhook
     )
     shutdown_handler.register_health_server(health_server)
     await health_server.start()
     
     ping_task = asyncio.create_task(self_ping_loop())
     
-    application = Application.builder().token(BotConfig.TELEGRAM_BOT_TOKEN).build()
-    shutdown_handler.register_application(application)
-    
     # Force disconnect any old polling instances
-    try:
-        await application.bot.delete_webhook(drop_pending_updates=True)
-        bot_logger.info("🔄 Cleaned up old webhook/polling connections")
-    except Exception as e:
-        bot_logger.warning(f"⚠️ Webhook cleanup warning: {e}")
+    if not telegram_webhook:
+        try:
+            await application.bot.delete_webhook(drop_pending_updates=True)
+            bot_logger.info("🔄 Cleaned up old webhook/polling connections")
+        except Exception as e:
+            bot_logger.warning(f"⚠️ Webhook cleanup warning: {e}")
     
     application.add_handler(CommandHandler("start", telegram_service.start))
     application.add_handler(CommandHandler("subscribe", telegram_service.subscribe))
@@ -109,10 +130,12 @@ async def main():
     application.add_handler(CommandHandler("dashboard", telegram_service.dashboard))
     application.add_handler(CommandHandler("signal", telegram_service.signal))
     application.add_handler(CommandHandler("send", telegram_service.send))
+    application.add_handler(CommandHandler("symbols", telegram_service.symbols))
     application.add_handler(CallbackQueryHandler(telegram_service.button_callback))
     
     # Store signal_engine in bot_data for /send command
     application.bot_data['signal_engine'] = signal_engine
+    application.bot_data['engine_group'] = engine_group
     
     signal_task = None
     
@@ -124,7 +147,11 @@ async def main():
         retry_count = 0
         max_retries = 3
         
-        while retry_count < max_retries:
+        if telegram_webhook:
+            await telegram_webhook.register()
+            polling_started = True
+        
+        while not polling_started and retry_count < max_retries:
             try:
                 if application.updater:
                     await application.updater.start_polling(allowed_updates=['message', 'callback_query'])
@@ -148,7 +175,7 @@ async def main():
         bot_logger.info(f"🌐 Health server aktif di port {BotConfig.PORT}")
         bot_logger.info(f"📊 Unlimited Signals: {BotConfig.UNLIMITED_SIGNALS}")
         
-        signal_task = asyncio.create_task(signal_engine.run(application.bot))
+        signal_task = asyncio.create_task(engine_group.run(application.bot))
         
         try:
             done, pending = await asyncio.wait(
@@ -171,19 +198,15 @@ async def main():
                 await ping_task
             except asyncio.CancelledError:
                 pass
+            await loop_monitor.stop()
             
             if signal_task and not signal_task.done():
-                signal_engine.request_shutdown()
-                try:
-                    await asyncio.wait_for(signal_task, timeout=10)
-                except asyncio.TimeoutError:
-                    signal_task.cancel()
-                    try:
-                        await signal_task
-                    except asyncio.CancelledError:
-                        pass
+                engine_group.request_shutdown()
+                # EngineGroup bounds the engine stop itself; what remains is delivering the
+                # queued trade messages, which must not be cut off
+                await asyncio.gather(signal_task, return_exceptions=True)
             
-            if application.updater:
+            if application.updater and application.updater.running:
                 await application.updater.stop()
             await application.stop()
             await health_server.cleanup()
@@ -0,0 +1,165 @@
+import bisect
+import datetime
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+
+from config import BotConfig
+
+
+logger = logging.getLogger("MarketCalendar")
+
+REASON_WEEKEND = 'Weekend'
+REASON_HOLIDAY = 'Libur'
+REASON_EARLY_CLOSE = 'Tutup lebih awal'
+
+
+class MarketCalendar:
+    """Closed sessions of XAU/USD as precomputed [start, end) epoch intervals.
+
+    The weekly close (MARKET_CLOSE_DAY/HOUR to MARKET_OPEN_DAY/HOUR, New York time),
+    MARKET_HOLIDAYS (the session trading on that NY date: 17:00 the day before to
+    17:00 that day) and MARKET_EARLY_CLOSES (from the given NY time to the 17:00
+    roll) are localised once per build and merged, so DST is handled there and
+    nowhere else. Lookups are a comparison against the cached current interval, or a
+    bisect when the clock has moved past it; the table is rebuilt for another
+    `horizon_days` only when a lookup falls outside it.
+    """
+
+    def __init__(self, holidays: Optional[list[str]] = None, early_closes: Optional[list[str]] = None,
+                 horizon_days: int = 56):
+        self.tz = BotConfig.NY_TZ
+        self.holidays = [datetime.date.fromisoformat(day) for day in
+                         (BotConfig.MARKET_HOLIDAYS if holidays is None else holidays)]
+        self.early_closes = [datetime.datetime.strptime(value, '%Y-%m-%d %H:%M') for value in
+                             (BotConfig.MARKET_EARLY_CLOSES if early_closes is None else early_closes)]
+        self.horizon_days = horizon_days
+        self._starts: list[float] = []
+        self._ends: list[float] = []
+        self._reasons: list[str] = []
+        self._built_from = self._built_until = 0.0
+        # Current interval: [lo, hi) is open or closed as a whole
+        self._lo = self._hi = 0.0
+        self._open = True
+        self._reason = ''
+        self._change_label = ''
+
+    def _epoch(self, day: datetime.date, hour: int, minute: int = 0) -> float:
+        return self.tz.localize(datetime.datetime(day.year, day.month, day.day, hour, minute)).timestamp()
+
+    def _build(self, ts: float, until: Optional[float] = None) -> None:
+        first = datetime.datetime.fromtimestamp(ts, self.tz).date() - datetime.timedelta(days=8)
+        last = first + datetime.timedelta(days=self.horizon_days + 16)
+        if until is not None:
+            last = max(last, datetime.datetime.fromtimestamp(until, self.tz).date() + datetime.timedelta(days=8))
+        intervals = []
+        day = first
+        while day <= last:
+            if day.weekday() == BotConfig.MARKET_CLOSE_DAY:
+                reopen = day + datetime.timedelta(days=(BotConfig.MARKET_OPEN_DAY - BotConfig.MARKET_CLOSE_DAY) % 7)
+                intervals.append((self._epoch(day, BotConfig.MARKET_CLOSE_HOUR),
+                                  self._epoch(reopen, BotConfig.MARKET_OPEN_HOUR), REASON_WEEKEND))
+            day += datetime.timedelta(days=1)
+        for holiday in self.holidays:
+            if first <= holiday <= last:
+                intervals.append((self._epoch(holiday - datetime.timedelta(days=1), BotConfig.MARKET_CLOSE_HOUR),
+                                  self._epoch(holiday, BotConfig.MARKET_OPEN_HOUR), REASON_HOLIDAY))
+        for close in self.early_closes:
+            if first <= close.date() <= last and close.hour < BotConfig.MARKET_OPEN_HOUR:
+                intervals.append((self._epoch(close.date(), close.hour, close.minute),
+                                  self._epoch(close.date(), BotConfig.MARKET_OPEN_HOUR), REASON_EARLY_CLOSE))
+        intervals.sort()
+
+        starts, ends, reasons = [], [], []
+        for start, end, reason in intervals:
+            if starts and start <= ends[-1]:
+                if end > ends[-1]:
+                    ends[-1] = end
+                if reason != REASON_WEEKEND:
+                    reasons[-1] = reason
+                continue
+            starts.append(start)
+            ends.append(end)
+            reasons.append(reason)
+        self._starts, self._ends, self._reasons = starts, ends, reasons
+        self._built_from = self._epoch(first, 0) + 8 * 86400
+        self._built_until = self._epoch(last, 0) - 8 * 86400
+        self._lo = self._hi = 0.0
+        logger.debug(f"Market calendar built: {len(starts)} closed sessions until {last}")
+
+    def _locate(self, ts: float) -> None:
+        if not self._built_from <= ts < self._built_until:
+            self._build(ts)
+        i = bisect.bisect_right(self._starts, ts) - 1
+        if i >= 0 and ts < self._ends[i]:
+            self._lo, self._hi, self._open, self._reason = self._starts[i], self._ends[i], False, self._reasons[i]
+        else:
+            self._lo = self._ends[i] if i >= 0 else self._built_from
+            self._hi = self._starts[i + 1] if i + 1 < len(self._starts) else self._built_until
+            self._open, self._reason = True, ''
+        self._change_label = datetime.datetime.fromtimestamp(self._hi, self.tz).strftime('%A %H:%M NY')
+
+    def is_open(self, ts: Optional[float] = None) -> bool:
+        ts = time.time() if ts is None else ts
+        if not self._lo <= ts < self._hi:
+            self._locate(ts)
+        return self._open
+
+    def next_transition(self, ts: Optional[float] = None) -> float:
+        """Epoch at which the market next opens (if closed) or closes (if open)"""
+        ts = time.time() if ts is None else ts
+        if not self._lo <= ts < self._hi:
+            self._locate(ts)
+        return self._hi
+
+    def seconds_until_transition(self, ts: Optional[float] = None) -> float:
+        ts = time.time() if ts is None else ts
+        return self.next_transition(ts) - ts
+
+    def open_mask(self, epochs: np.ndarray) -> np.ndarray:
+        """Vectorised is_open() for backtests and replays over `epochs` (any range)"""
+        epochs = np.asarray(epochs)
+        if len(epochs) == 0:
+            return np.ones(0, dtype=bool)
+        self._build(float(epochs[0]), float(epochs[-1]))
+        starts = np.asarray(self._starts)
+        ends = np.asarray(self._ends)
+        i = np.searchsorted(starts, epochs, side='right') - 1
+        closed = (i >= 0) & (epochs < ends[np.maximum(i, 0)])
+        return ~closed
+
+    def status(self, ts: Optional[float] = None) -> dict:
+        """BotConfig.get_market_status() layout plus 'seconds_to_change'"""
+        ts = time.time() if ts is None else ts
+        is_open = self.is_open(ts)
+        seconds = self._hi - ts
+        if is_open:
+            return {
+                'is_open': True,
+                'status': '🟢 BUKA',
+                'message': 'Market XAU/USD sedang aktif',
+                'next_change': self._change_label,
+                'seconds_to_change': seconds
+            }
+        hours_left = int(seconds // 3600)
+        mins_left = int((seconds % 3600) // 60)
+        return {
+            'is_open': False,
+            'status': '🔴 TUTUP',
+            'message': f'Market tutup ({self._reason}). Buka dalam ~{hours_left}j {mins_left}m',
+            'next_open': self._change_label,
+            'hours_left': hours_left,
+            'seconds_to_change': seconds
+        }
+
+
+_calendar: Optional[MarketCalendar] = None
+
+
+def get_calendar() -> MarketCalendar:
+    global _calendar
+    if _calendar is None:
+        _calendar = MarketCalendar()
+    return _calendar
@@ -0,0 +1,166 @@
+import logging
+import random
+import sys
+import time
+from typing import Callable, Optional, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from state_manager import StateManager
+
+
+logger = logging.getLogger("MemoryStats")
+
+_ATOMIC = (int, float, bool, type(None), bytes, str)
+
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident set size (VmRSS); unlike ru_maxrss this goes back down"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+        # ru_maxrss is KiB on Linux
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except (ImportError, OSError):
+        return None
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """Approximate retained size of a container tree (shared objects counted once)"""
+    if seen is None:
+        seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            total += sys.getsizeof(item) + (item.nbytes if item.base is None else 0)
+            continue
+        if isinstance(item, pd.DataFrame):
+            total += int(item.memory_usage(deep=True).sum())
+            continue
+        if isinstance(item, pd.Series):
+            total += int(item.memory_usage(deep=True))
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, _ATOMIC):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, 'nbytes') and not hasattr(item, '__dict__'):
+            total += int(item.nbytes)
+        elif hasattr(item, '__slots__'):
+            stack.extend(getattr(item, name) for name in item.__slots__ if hasattr(item, name))
+        elif hasattr(item, '__dict__'):
+            stack.append(item.__dict__)
+    return total
+
+
+def _mb(size: int) -> float:
+    return round(size / (1024 * 1024), 3)
+
+
+class MemoryAccountant:
+    """Approximate per-structure memory footprint, cached for `ttl` seconds.
+
+    Walking every user state is O(users x history), so per-user structures are
+    extrapolated from a random sample of `sample_users`, and /health serves the cached
+    breakdown until it is older than the TTL.
+    """
+
+    def __init__(self, state_manager: 'StateManager', deriv_ws_getter: Callable,
+                 signal_engine_getter: Optional[Callable] = None,
+                 telegram_service_getter: Optional[Callable] = None, ttl: float = 300.0,
+                 sample_users: int = 500):
+        self.state_manager = state_manager
+        self.deriv_ws_getter = deriv_ws_getter
+        self.signal_engine_getter = signal_engine_getter
+        self.telegram_service_getter = telegram_service_getter
+        self.ttl = ttl
+        self.sample_users = sample_users
+        self._cached: Optional[dict] = None
+        self._cached_at = 0.0
+
+    def breakdown(self, force: bool = False) -> dict:
+        now = time.time()
+        if not force and self._cached is not None and now - self._cached_at < self.ttl:
+            return {**self._cached, "age_seconds": round(now - self._cached_at, 1)}
+        started = time.perf_counter()
+        try:
+            sizes = self._measure()
+        except Exception as e:
+            logger.error(f"Memory accounting failed: {e}")
+            return self._cached or {}
+        self._cached = {
+            "structures_mb": {name: _mb(size) for name, size in sizes.items()},
+            "total_accounted_mb": _mb(sum(sizes.values())),
+            "users": len(self.state_manager.user_states),
+            "sampled_users": min(len(self.state_manager.user_states), self.sample_users),
+            "measure_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        self._cached_at = now
+        return {**self._cached, "age_seconds": 0.0}
+
+    def _measure(self) -> dict[str, int]:
+        sm = self.state_manager
+        seen: set = set()
+        sizes: dict[str, int] = {}
+
+        # Per-user structures are estimated from a random sample so the cost stays bounded
+        # no matter how many users there are
+        user_ids = list(sm.user_states)
+        sample = random.sample(user_ids, min(len(user_ids), self.sample_users))
+        scale = len(user_ids) / len(sample) if sample else 0.0
+        history_size = state_size = 0
+        for chat_id in sample:
+            state = sm.user_states.get(chat_id)
+            if state is None:
+                continue
+            history_size += deep_sizeof(state.signal_history, seen)
+            state_size += deep_sizeof(state, seen) + deep_sizeof(chat_id, seen)
+        sizes['user_signal_history'] = int(history_size * scale)
+        sizes['user_states'] = int(state_size * scale) + sys.getsizeof(sm.user_states)
+        sizes['subscribers'] = deep_sizeof(sm.subscribers, seen)
+
+        global_history = deep_sizeof(sm.signal_history, seen)
+        signal_engine = self.signal_engine_getter() if self.signal_engine_getter else None
+        if signal_engine is not None:
+            global_history += deep_sizeof(signal_engine.signal_history, seen)
+            cached_df = getattr(signal_engine, 'cached_candles_df', None)
+            sizes['cached_dataframes'] = deep_sizeof(cached_df, seen) if cached_df is not None else 0
+            candle_frame = getattr(signal_engine, 'candle_frame', None)
+            sizes['candle_frame'] = candle_frame.nbytes if candle_frame is not None else 0
+            bar_cache = getattr(signal_engine, 'bar_cache', None)
+            sizes['bar_cache'] = bar_cache.nbytes if bar_cache is not None else 0
+        sizes['global_signal_history'] = global_history
+
+        deriv_ws = self.deriv_ws_getter() if self.deriv_ws_getter else None
+        feeds = getattr(deriv_ws, 'feeds', None) if deriv_ws else None
+        if feeds:
+            sizes['price_history'] = sum(feed.price_history.nbytes for feed in feeds.values())
+
+        telegram_service = self.telegram_service_getter() if self.telegram_service_getter else None
+        if telegram_service is not None:
+            sizes['telegram_tracking_caches'] = (
+                deep_sizeof(telegram_service._last_tracking_price, seen)
+                + deep_sizeof(telegram_service._last_tracking_signal_id, seen)
+            )
+        return sizes
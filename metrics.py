@@ -0,0 +1,282 @@
+import bisect
+import logging
+import math
+import os
+import time
+from typing import Callable, Optional
+
+
+logger = logging.getLogger("Metrics")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+DELIVERY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+INF_LABEL = 'le="+Inf"'
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (ValueError, OSError, AttributeError):
+    _PAGE_SIZE = 4096
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 registry: Optional['Registry'] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in self._children.items():
+            lines.extend(child.render(self.name, self.labelnames, key))
+        return lines
+
+
+class _ValueChild:
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def render(self, name: str, labelnames: tuple, key: tuple) -> list[str]:
+        value = self.value
+        if self.function is not None:
+            try:
+                value = float(self.function())
+            except Exception as e:
+                logger.debug(f"Gauge {name} callback failed: {e}")
+                return []
+        return [f"{name}{_format_labels(labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def render(self) -> list[str]:
+        if not self.labelnames and not self._children:
+            self._default()
+        return super().render()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().inc(-amount)
+
+    def get(self) -> float:
+        return self._default().value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Evaluate `function` at scrape time; it must be O(1)"""
+        self._default().function = function
+
+
+class _HistogramChild:
+    __slots__ = ('upper_bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, upper_bounds: tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * len(upper_bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.upper_bounds, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labelnames: tuple, key: tuple) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.upper_bounds, self.counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{name}_bucket{_format_labels(labelnames, key, le)} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(labelnames, key, INF_LABEL)} {self.count}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, key)} {self.count}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram; observe() is a bisect plus two additions"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS, registry: Optional['Registry'] = None):
+        self.buckets = tuple(sorted(b for b in buckets if b != math.inf))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self) -> '_Timer':
+        return _Timer(self._default())
+
+    def render(self) -> list[str]:
+        if not self.labelnames and not self._children:
+            self._default()
+        return super().render()
+
+
+class _Timer:
+    __slots__ = ('child', 'started')
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+        self.started = 0.0
+
+    def __enter__(self) -> '_Timer':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.child.observe(time.perf_counter() - self.started)
+
+
+class Registry:
+    """Metrics are updated from the event loop thread; rendering cost depends only on
+    the number of metric series, never on subscriber or history size."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TICKS_RECEIVED = Counter("xauusd_ticks_received_total", "Ticks received from the Deriv WebSocket")
+CANDLE_FETCH_SECONDS = Histogram("xauusd_candle_fetch_seconds", "Latency of ticks_history requests",
+                                 labelnames=("style", "outcome"))  # style: candles, ticks
+ANALYSIS_SECONDS = Histogram("xauusd_analysis_seconds", "Indicator calculation and signal evaluation time")
+ANALYSIS_LOOP_BLOCKED_SECONDS = Histogram("xauusd_analysis_loop_blocked_seconds",
+                                          "Event-loop time spent per indicator analysis", buckets=LAG_BUCKETS)
+ANALYSIS_DROPPED = Counter("xauusd_analysis_dropped_total", "Indicator analyses discarded before use",
+                           labelnames=("reason",))
+SIGNALS_GENERATED = Counter("xauusd_signals_generated_total", "Signals broadcast to subscribers",
+                            labelnames=("direction",))
+TRADES_CLOSED = Counter("xauusd_trades_closed_total", "Tracked trades closed by result", labelnames=("result",))
+SIGNAL_FIRST_DELIVERY_SECONDS = Histogram("xauusd_signal_first_delivery_seconds",
+                                          "Time from signal decision to the first successful delivery",
+                                          buckets=DELIVERY_BUCKETS)
+SIGNAL_LAST_DELIVERY_SECONDS = Histogram("xauusd_signal_last_delivery_seconds",
+                                         "Time from signal decision to the last successful delivery",
+                                         buckets=DELIVERY_BUCKETS)
+TELEGRAM_SENDS = Counter("xauusd_telegram_sends_total", "Telegram API sends by outcome", labelnames=("outcome",))
+TELEGRAM_RATE_LIMITED = Counter("xauusd_telegram_rate_limited_total", "Telegram 429 (RetryAfter) responses")
+TELEGRAM_UPDATE_SECONDS = Histogram("xauusd_telegram_update_seconds",
+                                    "Update handling time, including waits for its chat and a worker slot")
+TELEGRAM_WEBHOOK_UPDATES = Counter("xauusd_telegram_webhook_updates_total", "Webhook POSTs by outcome",
+                                   labelnames=("outcome",))
+MANUAL_SIGNAL_REQUESTS = Counter("xauusd_manual_signal_requests_total",
+                                 "Manual signal requests by how the market state was obtained", labelnames=("source",))
+TASK_RESTARTS = Counter("xauusd_task_restarts_total", "Supervised engine tasks restarted after an error",
+                        labelnames=("task",))
+EVENT_BUS_LAG_SECONDS = Histogram("xauusd_event_bus_lag_seconds", "Time from publish to handling, per consumer",
+                                  labelnames=("consumer",))
+EVENT_BUS_DROPPED = Counter("xauusd_event_bus_dropped_total", "Events dropped on a full consumer queue",
+                            labelnames=("consumer",))
+EVENT_BUS_QUEUE_DEPTH = Gauge("xauusd_event_bus_queue_depth", "Events waiting per consumer", labelnames=("consumer",))
+STATE_SAVE_SECONDS = Histogram("xauusd_state_save_seconds", "Duration of state file saves", labelnames=("file",))
+EVENT_LOOP_LAG_SECONDS = Histogram("xauusd_event_loop_lag_seconds", "Extra delay of a scheduled event-loop wakeup",
+                                   buckets=LAG_BUCKETS)
+EVENT_LOOP_LAG_MAX_SECONDS = Gauge("xauusd_event_loop_lag_max_seconds",
+                                   "Largest event-loop lag over the last LOOP_LAG_MAX_WINDOW seconds")
+SLOW_CALLBACKS = Counter("xauusd_slow_callbacks_total", "Event-loop stalls longer than SLOW_CALLBACK_THRESHOLD")
+SUBSCRIBERS = Gauge("xauusd_subscribers", "Current subscriber count")
+WEBSOCKET_CONNECTED = Gauge("xauusd_websocket_connected", "1 when the Deriv WebSocket is connected")
+TICK_AGE_SECONDS = Gauge("xauusd_tick_age_seconds", "Seconds since the last tick was received")
+ACTIVE_SIGNAL = Gauge("xauusd_active_signal", "1 while a global signal is being tracked")
+UPTIME_SECONDS = Gauge("xauusd_uptime_seconds", "Seconds since the health server started")
+PROCESS_RSS_BYTES = Gauge("process_resident_memory_bytes", "Resident memory size in bytes")
+
+
+def _read_rss_bytes() -> float:
+    """Current RSS from /proc (Linux); on other platforms the series is simply omitted"""
+    with open('/proc/self/statm', 'r') as f:
+        return int(f.read().split()[1]) * _PAGE_SIZE
+
+
+PROCESS_RSS_BYTES.set_function(_read_rss_bytes)
+
+
+def render_latest() -> str:
+    return REGISTRY.render()
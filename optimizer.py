@@ -0,0 +1,267 @@
+import argparse
+import itertools
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, fields
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from backtester import Backtester, Bars, IndicatorSet, StrategyParams
+
+
+logger = logging.getLogger("Optimizer")
+
+DEFAULT_GRID = {
+    'ema_period': [20, 50, 100],
+    'rsi_period': [3, 5],
+    'rsi_oversold': [20, 25, 30],
+    'rsi_overbought': [70, 75, 80],
+    'adx_period': [14, 28, 55],
+    'adx_threshold': [20, 25, 30],
+    'sl_usd': [2.0, 3.0, 4.0],
+    'tp_usd': [2.0, 3.0, 4.0],
+}
+
+PARAM_TYPES = {f.name: f.type for f in fields(StrategyParams)}
+BAR_FIELDS = ('epoch', 'open', 'high', 'low', 'close')
+
+
+def grid_combinations(grid: dict[str, list]) -> list[dict]:
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def random_combinations(grid: dict[str, list], n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    seen = set()
+    combos = []
+    total = int(np.prod([len(v) for v in grid.values()]))
+    while len(combos) < min(n, total):
+        combo = tuple(rng.choice(grid[name]) for name in grid)
+        if combo not in seen:
+            seen.add(combo)
+            combos.append(dict(zip(grid, combo)))
+    return combos
+
+
+def walk_forward_windows(epochs: np.ndarray, train_seconds: int, test_seconds: int) -> list[tuple[int, int, int, int]]:
+    """(train_lo, train_hi, test_lo, test_hi) bar index ranges, rolling forward by one test period"""
+    windows = []
+    if not len(epochs):
+        return windows
+    start = int(epochs[0])
+    last = int(epochs[-1])
+    while start + train_seconds + test_seconds <= last + 1:
+        bounds = np.searchsorted(epochs, [start, start + train_seconds, start + train_seconds + test_seconds])
+        windows.append((int(bounds[0]), int(bounds[1]), int(bounds[1]), int(bounds[2])))
+        start += test_seconds
+    return windows
+
+
+class SharedIndicatorBlock:
+    """Bars plus every indicator series the combos need, packed into one shared-memory block.
+
+    Workers attach to the block once in their initializer and build zero-copy NumPy
+    views, so each indicator (e.g. ADX(28)) is computed once in the parent instead of
+    once per parameter combination.
+    """
+
+    def __init__(self, bars: Bars, combos: list[dict]):
+        series = {('bar', name): getattr(bars, name).astype(np.float64) for name in BAR_FIELDS}
+        base = StrategyParams()
+        for period in sorted({c.get('ema_period', base.ema_period) for c in combos}):
+            series[('ema', period)] = indicators.ema(bars.close, period)
+        for period in sorted({c.get('rsi_period', base.rsi_period) for c in combos}):
+            series[('rsi', period)] = indicators.rsi(bars.close, period)
+        for period in sorted({c.get('adx_period', base.adx_period) for c in combos}):
+            series[('adx', period)] = indicators.adx(bars.high, bars.low, bars.close, period)
+
+        self.keys = list(series)
+        self.n_bars = len(bars)
+        self.granularity = bars.granularity
+        shape = (len(self.keys), self.n_bars)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=self.shm.buf)
+        for row, key in enumerate(self.keys):
+            matrix[row] = series[key]
+        del matrix
+
+    def spec(self) -> dict:
+        return {'name': self.shm.name, 'keys': self.keys, 'n_bars': self.n_bars, 'granularity': self.granularity}
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+
+_worker: dict = {}
+
+
+def _attach(spec: dict, combos: list[dict]) -> None:
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    matrix = np.ndarray((len(spec['keys']), spec['n_bars']), dtype=np.float64, buffer=shm.buf)
+    _worker.update({
+        'shm': shm,
+        'rows': {tuple(key): matrix[row] for row, key in enumerate(spec['keys'])},
+        'granularity': spec['granularity'],
+        'combos': combos,
+    })
+
+
+def _evaluate_range(start: int, stop: int, lo: int, hi: int) -> list[dict]:
+    rows = _worker['rows']
+    bars = Bars(
+        rows[('bar', 'epoch')][lo:hi].astype(np.int64),
+        rows[('bar', 'open')][lo:hi],
+        rows[('bar', 'high')][lo:hi],
+        rows[('bar', 'low')][lo:hi],
+        rows[('bar', 'close')][lo:hi],
+        _worker['granularity'],
+    )
+    results = []
+    for index in range(start, stop):
+        overrides = _worker['combos'][index]
+        params = StrategyParams(**{k: PARAM_TYPES[k](v) for k, v in overrides.items()})
+        ind = IndicatorSet(
+            ema=rows[('ema', params.ema_period)][lo:hi],
+            rsi=rows[('rsi', params.rsi_period)][lo:hi],
+            adx=rows[('adx', params.adx_period)][lo:hi],
+        )
+        summary = Backtester(params).run(bars, ind=ind).summary()
+        summary.pop('elapsed_seconds', None)
+        results.append({'combo': index, **asdict(params), **summary})
+    return results
+
+
+class Optimizer:
+    def __init__(self, bars: Bars, combos: list[dict], workers: Optional[int] = None,
+                 metric: str = 'expectancy_usd', min_trades: int = 30):
+        self.bars = bars
+        self.combos = combos
+        self.workers = workers or os.cpu_count() or 1
+        self.metric = metric
+        self.min_trades = min_trades
+
+    def _chunks(self, count: int) -> list[tuple[int, int]]:
+        size = max(1, count // (self.workers * 8))
+        return [(i, min(i + size, count)) for i in range(0, count, size)]
+
+    def _rank(self, rows: list[dict]) -> pd.DataFrame:
+        table = pd.DataFrame(rows)
+        if table.empty:
+            return table
+        table['eligible'] = table['trades'] >= self.min_trades
+        return table.sort_values(['eligible', self.metric], ascending=[False, False]).reset_index(drop=True)
+
+    def _evaluate(self, pool: ProcessPoolExecutor, combo_indices: Optional[list[int]], lo: int, hi: int) -> list[dict]:
+        if combo_indices is None:
+            ranges = self._chunks(len(self.combos))
+        else:
+            ranges = [(i, i + 1) for i in combo_indices]
+        futures = [pool.submit(_evaluate_range, start, stop, lo, hi) for start, stop in ranges]
+        rows = []
+        for future in as_completed(futures):
+            rows.extend(future.result())
+        return rows
+
+    def run(self, windows: Optional[list[tuple[int, int, int, int]]] = None, top_k: int = 5) -> pd.DataFrame:
+        """Rank every combo on the full range, or walk forward: rank on train, score top_k on test"""
+        started = time.perf_counter()
+        block = SharedIndicatorBlock(self.bars, self.combos)
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_attach,
+                                     initargs=(block.spec(), self.combos)) as pool:
+                if not windows:
+                    table = self._rank(self._evaluate(pool, None, 0, len(self.bars)))
+                else:
+                    out_of_sample = []
+                    for n, (train_lo, train_hi, test_lo, test_hi) in enumerate(windows):
+                        ranked = self._rank(self._evaluate(pool, None, train_lo, train_hi))
+                        best = [int(c) for c in ranked['combo'].head(top_k)]
+                        train_scores = ranked.set_index('combo')[self.metric]
+                        for row in self._evaluate(pool, best, test_lo, test_hi):
+                            row['window'] = n
+                            row['train_' + self.metric] = float(train_scores[row['combo']])
+                            out_of_sample.append(row)
+                        logger.info(f"Walk-forward window {n + 1}/{len(windows)} done")
+                    table = self._rank(out_of_sample)
+        finally:
+            block.close()
+        logger.info(f"Evaluated {len(self.combos)} combos with {self.workers} workers "
+                    f"in {time.perf_counter() - started:.1f}s")
+        return table
+
+
+def _parse_grid_overrides(values: list[str]) -> dict[str, list]:
+    grid = {}
+    for item in values:
+        name, _, raw = item.partition('=')
+        if name not in PARAM_TYPES:
+            raise SystemExit(f"Unknown parameter: {name}")
+        grid[name] = [PARAM_TYPES[name](v) for v in raw.split(',') if v]
+    return grid
+
+
+if __name__ == "__main__":
+    from deriv_ws import XAUUSD_SYMBOL
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep / walk-forward optimizer")
+    parser.add_argument("--symbol", default=XAUUSD_SYMBOL)
+    parser.add_argument("--granularity", type=int, default=60)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N random-walk bars instead of the archive")
+    parser.add_argument("--param", action="append", default=[], help="Override a grid axis, e.g. adx_threshold=20,25,30")
+    parser.add_argument("--random", type=int, default=0, help="Sample N random combos instead of the full grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--metric", default="expectancy_usd")
+    parser.add_argument("--min-trades", type=int, default=30)
+    parser.add_argument("--walk-forward", action="store_true")
+    parser.add_argument("--train-days", type=int, default=60)
+    parser.add_argument("--test-days", type=int, default=14)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--out", default="optimizer_results.csv", help="Ranked table, .csv or .json")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from backtester import synthetic_bars
+
+        bars = synthetic_bars(args.synthetic, granularity=args.granularity)
+    else:
+        from candle_archive import CandleArchive
+
+        end = int(time.time())
+        columns = CandleArchive().load(args.symbol, args.granularity, end - args.days * 86400, end)
+        bars = Bars.from_columns(columns, args.granularity)
+
+    if len(bars) == 0:
+        raise SystemExit("No bars available - run `python candle_archive.py backfill` first")
+
+    grid = {**DEFAULT_GRID, **_parse_grid_overrides(args.param)}
+    combos = random_combinations(grid, args.random, args.seed) if args.random else grid_combinations(grid)
+    windows = None
+    if args.walk_forward:
+        windows = walk_forward_windows(bars.epoch, args.train_days * 86400, args.test_days * 86400)
+        if not windows:
+            raise SystemExit("Not enough history for one walk-forward window")
+
+    optimizer = Optimizer(bars, combos, workers=args.workers, metric=args.metric, min_trades=args.min_trades)
+    table = optimizer.run(windows, top_k=args.top_k)
+    if args.out.endswith('.json'):
+        table.to_json(args.out, orient='records', indent=2)
+    else:
+        table.to_csv(args.out, index=False)
+    columns = ['combo', *DEFAULT_GRID, 'trades', 'win_rate', 'expectancy_usd', 'total_pnl_usd', 'max_drawdown_usd']
+    if args.walk_forward:
+        columns.insert(0, 'window')
+    print(table[[c for c in columns if c in table.columns]].head(20).to_string(index=False))
+    print(f"\nRanked results written to {args.out}")
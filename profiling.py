@@ -0,0 +1,217 @@
+import asyncio
+import collections
+import cProfile
+import hmac
+import io
+import logging
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Optional
+
+from aiohttp import web
+
+from config import BotConfig
+
+
+logger = logging.getLogger("Profiling")
+
+MAX_PROFILE_SECONDS = 60
+TRACEMALLOC_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+def sample_stacks(thread_id: int, seconds: float, interval: float) -> collections.Counter:
+    """Sample one thread's stack every `interval` seconds; returns collapsed-stack counts"""
+    stacks: collections.Counter = collections.Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            stacks[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def format_collapsed(stacks: collections.Counter) -> str:
+    """Brendan Gregg's collapsed format, ready for flamegraph.pl or speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class Profiler:
+    """Admin-only profiling routes for the HealthServer app.
+
+    Nothing is installed until a route is called: cProfile is enabled only for the
+    requested window, the stack sampler is a short-lived thread, and tracemalloc runs
+    only between /debug/tracemalloc/start and /stop.
+    """
+
+    def __init__(self, token: Optional[str] = None):
+        self.token = token if token is not None else BotConfig.ADMIN_API_TOKEN
+        self._profiling = asyncio.Lock()
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token)
+
+    def add_routes(self, app: web.Application) -> None:
+        if not self.enabled:
+            logger.info("ADMIN_API_TOKEN not set, profiling routes disabled")
+            return
+        app.router.add_get('/debug/profile', self.profile_handler)
+        app.router.add_post('/debug/tracemalloc/start', self.tracemalloc_start_handler)
+        app.router.add_post('/debug/tracemalloc/stop', self.tracemalloc_stop_handler)
+        app.router.add_get('/debug/tracemalloc/snapshot', self.tracemalloc_snapshot_handler)
+        app.router.add_get('/debug/tracemalloc/diff', self.tracemalloc_diff_handler)
+
+    def _authorized(self, request: web.Request) -> bool:
+        supplied = request.headers.get('X-Admin-Token', '')
+        auth = request.headers.get('Authorization', '')
+        if not supplied and auth.startswith('Bearer '):
+            supplied = auth[7:]
+        return bool(supplied) and hmac.compare_digest(supplied.encode(), self.token.encode())
+
+    def require_admin(self, request: web.Request) -> None:
+        """Raise HTTPUnauthorized unless the request carries the admin token"""
+        if not self._authorized(request):
+            raise web.HTTPUnauthorized(text="admin token required")
+
+    @staticmethod
+    def _float_param(request: web.Request, name: str, default: float, low: float, high: float) -> float:
+        try:
+            value = float(request.query.get(name, default))
+        except ValueError:
+            raise web.HTTPBadRequest(text=f"invalid {name}")
+        return min(max(value, low), high)
+
+    async def profile_handler(self, request: web.Request) -> web.Response:
+        """GET /debug/profile?seconds=10&format=text|pstats|collapsed[&interval=0.005]
+
+        text/pstats run cProfile on the event-loop thread for the window; collapsed samples
+        the loop thread's stack from a helper thread instead (lower overhead, wall-clock view).
+        """
+        self.require_admin(request)
+        seconds = self._float_param(request, 'seconds', 10, 0.1, MAX_PROFILE_SECONDS)
+        fmt = request.query.get('format', 'text')
+        if fmt not in ('text', 'pstats', 'collapsed'):
+            raise web.HTTPBadRequest(text="format must be text, pstats or collapsed")
+        if self._profiling.locked():
+            raise web.HTTPConflict(text="a profile is already running")
+
+        async with self._profiling:
+            logger.info(f"Profiling event loop for {seconds}s ({fmt})")
+            if fmt == 'collapsed':
+                interval = self._float_param(request, 'interval', 0.005, 0.001, 1.0)
+                thread_id = threading.get_ident()
+                stacks = await asyncio.to_thread(sample_stacks, thread_id, seconds, interval)
+                return web.Response(text=format_collapsed(stacks), content_type='text/plain')
+
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profile.disable()
+
+        if fmt == 'pstats':
+            profile.create_stats()
+            return web.Response(
+                body=marshal.dumps(profile.stats),
+                content_type='application/octet-stream',
+                headers={'Content-Disposition': f'attachment; filename="loop-{int(time.time())}.prof"'}
+            )
+        sort = request.query.get('sort', 'cumulative')
+        if sort not in ('cumulative', 'tottime', 'ncalls'):
+            sort = 'cumulative'
+        limit = int(self._float_param(request, 'limit', 60, 1, 1000))
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats(sort).print_stats(limit)
+        return web.Response(text=out.getvalue(), content_type='text/plain')
+
+    async def tracemalloc_start_handler(self, request: web.Request) -> web.Response:
+        self.require_admin(request)
+        frames = int(self._float_param(request, 'frames', 10, 1, 100))
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self._baseline = None
+            logger.info(f"tracemalloc started ({frames} frames)")
+        return web.json_response({"tracing": True, "frames": tracemalloc.get_traceback_limit()})
+
+    async def tracemalloc_stop_handler(self, request: web.Request) -> web.Response:
+        self.require_admin(request)
+        tracemalloc.stop()
+        self._baseline = None
+        logger.info("tracemalloc stopped")
+        return web.json_response({"tracing": False})
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            raise web.HTTPConflict(text="tracemalloc is not running; POST /debug/tracemalloc/start first")
+        return tracemalloc.take_snapshot().filter_traces(TRACEMALLOC_FILTERS)
+
+    @staticmethod
+    def _group_by(request: web.Request) -> str:
+        group_by = request.query.get('group_by', 'lineno')
+        if group_by not in ('lineno', 'filename', 'traceback'):
+            raise web.HTTPBadRequest(text="group_by must be lineno, filename or traceback")
+        return group_by
+
+    async def tracemalloc_snapshot_handler(self, request: web.Request) -> web.Response:
+        """Top allocations now; the snapshot also becomes the baseline for /diff"""
+        self.require_admin(request)
+        group_by = self._group_by(request)
+        limit = int(self._float_param(request, 'limit', 25, 1, 500))
+        snapshot = self._take_snapshot()
+        self._baseline = snapshot
+        stats = snapshot.statistics(group_by)
+        current, peak = tracemalloc.get_traced_memory()
+        return web.json_response({
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {"where": str(s.traceback), "size_bytes": s.size, "count": s.count}
+                for s in stats[:limit]
+            ],
+        })
+
+    async def tracemalloc_diff_handler(self, request: web.Request) -> web.Response:
+        """Growth since the previous snapshot (or diff), then move the baseline forward"""
+        self.require_admin(request)
+        group_by = self._group_by(request)
+        limit = int(self._float_param(request, 'limit', 25, 1, 500))
+        snapshot = self._take_snapshot()
+        if self._baseline is None:
+            self._baseline = snapshot
+            return web.json_response({"baseline": "created", "top": []})
+        stats = snapshot.compare_to(self._baseline, group_by)
+        self._baseline = snapshot
+        return web.json_response({
+            "top": [
+                {
+                    "where": str(s.traceback),
+                    "size_bytes": s.size,
+                    "size_diff_bytes": s.size_diff,
+                    "count": s.count,
+                    "count_diff": s.count_diff,
+                }
+                for s in stats[:limit]
+            ],
+        })
@@ -0,0 +1,207 @@
+import dataclasses
+import logging
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+
+from config import BotConfig
+from backtester import RESULT_BREAK_EVEN, RESULT_LOSS, RESULT_WIN, trade_pnl
+from event_bus import BarClosed, TickEvent
+from strategies import EmaRsiAdxStrategy, IndicatorCache, StrategyParams
+
+if TYPE_CHECKING:
+    from bar_cache import BarCache
+    from state_manager import StateManager
+
+
+logger = logging.getLogger("Shadow")
+
+RESULT_NAMES = (RESULT_WIN, RESULT_LOSS, RESULT_BREAK_EVEN)
+PARTIAL_CLOSE = 0.5  # fraction closed at TP1, the Backtester default
+
+
+def build_variants(spec: dict, overrides: Optional[dict[str, dict]] = None) -> list[EmaRsiAdxStrategy]:
+    """A baseline with the live parameters plus one strategy per SHADOW_VARIANTS entry"""
+    overrides = BotConfig.SHADOW_VARIANTS if overrides is None else overrides
+    base = StrategyParams(sl_usd=spec['sl'], tp_usd=spec['tp'])
+    known = {f.name for f in dataclasses.fields(StrategyParams)}
+    variants = [EmaRsiAdxStrategy(base, name='baseline')]
+    for name, params in overrides.items():
+        unknown = set(params) - known
+        if unknown:
+            raise ValueError(f"Shadow variant {name}: unknown parameters {', '.join(sorted(unknown))}")
+        variants.append(EmaRsiAdxStrategy(dataclasses.replace(base, **params), name=name))
+    return variants
+
+
+class ShadowBook:
+    """Virtual trades of N strategy variants on the live bar and tick stream.
+
+    on_bar() runs each variant without an open trade on a newly closed bar and opens
+    a virtual trade on its signal. on_tick() resolves them with the live rules: TP2 is
+    a win, TP1 moves the stop to entry, the stop is a loss or, after TP1, a break-even.
+    Each variant holds at most one trade and keeps its own cooldown, like the live
+    engine; nothing is sent to users.
+
+    Open trades are columns of NumPy arrays indexed by variant. After every open,
+    TP1 or close the book recomputes the nearest trigger level above and below the
+    market across all trades; a tick strictly between them returns after two float
+    comparisons, whatever the number of variants. Only a tick that reaches a level
+    runs the vectorised check over all trades.
+    """
+
+    def __init__(self, symbol: str, variants: list[EmaRsiAdxStrategy],
+                 state_manager: Optional['StateManager'] = None, bar_cache: Optional['BarCache'] = None):
+        self.symbol = symbol
+        # Own cache over each BarClosed frame: the engine's moves on while events wait in the queue
+        self.bars = IndicatorCache(symbol, bar_cache)
+        self.variants = variants
+        self.names = [variant.name for variant in variants]
+        self.state_manager = state_manager
+        n = len(variants)
+        self.direction = np.zeros(n, dtype=np.int8)  # +1 BUY, -1 SELL, 0 flat
+        self.entry = np.zeros(n)
+        self.tp1_dist = np.array([v.params.tp_usd for v in variants], dtype=np.float64)
+        self.tp2_dist = np.array([v.params.tp_usd * v.params.tp2_multiplier for v in variants], dtype=np.float64)
+        self.sl_base = np.array([v.params.sl_usd for v in variants], dtype=np.float64)
+        self.sl_dist = np.zeros(n)  # 0 once TP1 moved the stop to entry
+        self.tp1_hit = np.zeros(n, dtype=bool)
+        self.cooldown = np.array([v.params.cooldown_seconds for v in variants], dtype=np.float64)
+        self.next_entry_at = np.zeros(n)
+        self.counts = np.zeros((n, len(RESULT_NAMES)), dtype=np.int64)
+        self.pnl = np.zeros(n)  # USD at BotConfig.LOT_SIZE, as backtester.trade_pnl
+        self.contract_size = BotConfig.get_symbol_spec(symbol)['contract_size']
+        self.signals = np.zeros(n, dtype=np.int64)
+        self.last_bar_epoch: Optional[int] = None
+        self._upper = np.inf
+        self._lower = -np.inf
+        self.ticks_checked = 0
+        self._load()
+
+    def _load(self) -> None:
+        if self.state_manager is None:
+            return
+        saved = self.state_manager.load_shadow_stats()
+        for i, name in enumerate(self.names):
+            stats = saved.get(name)
+            if not stats:
+                continue
+            self.counts[i] = [stats.get(result.lower(), 0) for result in RESULT_NAMES]
+            self.pnl[i] = stats.get('pnl_usd', 0.0)
+            self.signals[i] = stats.get('signals', 0)
+
+    def save(self) -> None:
+        if self.state_manager is not None:
+            self.state_manager.save_shadow_stats(self.get_stats()['variants'])
+
+    def on_bar(self, bars: IndicatorCache) -> int:
+        """Let every flat variant act on the cache's closed bar once; returns trades opened"""
+        if bars.bar_epoch is None or bars.bar_epoch == self.last_bar_epoch:
+            return 0
+        self.last_bar_epoch = bar_time = bars.bar_epoch
+        opened = 0
+        for i in np.flatnonzero((self.direction == 0) & (self.next_entry_at <= bar_time)):
+            variant = self.variants[i]
+            try:
+                result = variant.on_bar(bars)
+            except Exception as e:
+                logger.error(f"Shadow variant {variant.name} failed on bar {bar_time}: {e}")
+                continue
+            if not result.signal:
+                continue
+            self.direction[i] = 1 if result.signal == 'BUY' else -1
+            self.entry[i] = result.values['price']
+            self.sl_dist[i] = self.sl_base[i]
+            self.tp1_hit[i] = False
+            self.next_entry_at[i] = bar_time + self.cooldown[i]
+            self.signals[i] += 1
+            opened += 1
+            logger.info(f"[shadow {self.symbol}] {variant.name} {result.signal} @ {self.entry[i]:.3f}")
+        if opened:
+            self._rebuild_band()
+        return opened
+
+    def on_event(self, event: TickEvent | BarClosed) -> None:
+        """Event-bus consumer for the symbol's ticks and closed bars"""
+        if isinstance(event, TickEvent):
+            self.on_tick(event.epoch, event.price)
+        else:
+            self.bars.load(event.frame)
+            self.on_bar(self.bars)
+
+    def on_tick(self, epoch: int, price: float) -> None:
+        if self._lower < price < self._upper:
+            return
+        self.ticks_checked += 1
+        open_ = self.direction != 0
+        favorable = (price - self.entry) * self.direction
+        win = open_ & (favorable >= self.tp2_dist)
+        tp1 = open_ & ~win & ~self.tp1_hit & (favorable >= self.tp1_dist)
+        stop = open_ & ~win & ~tp1 & (favorable <= -self.sl_dist)
+        if tp1.any():
+            self.tp1_hit |= tp1
+            self.sl_dist[tp1] = 0.0
+        closed = False
+        for mask, result in ((win, RESULT_WIN), (stop & self.tp1_hit, RESULT_BREAK_EVEN),
+                             (stop & ~self.tp1_hit, RESULT_LOSS)):
+            if mask.any():
+                self._close(mask, result, price)
+                closed = True
+        self._rebuild_band()
+        if closed:
+            self.save()
+
+    def _close(self, mask: np.ndarray, result: str, price: float) -> None:
+        column = RESULT_NAMES.index(result)
+        self.counts[mask, column] += 1
+        for i in np.flatnonzero(mask):
+            self.pnl[i] += trade_pnl(result, self.variants[i].params, PARTIAL_CLOSE, self.contract_size)
+            logger.info(f"[shadow {self.symbol}] {self.names[i]} {result} @ {price:.3f} (entry {self.entry[i]:.3f})")
+        self.direction[mask] = 0
+        self.tp1_hit[mask] = False
+
+    def _rebuild_band(self) -> None:
+        """Nearest trigger levels above and below the market over all open trades"""
+        open_ = self.direction != 0
+        if not open_.any():
+            self._upper, self._lower = np.inf, -np.inf
+            return
+        direction = self.direction[open_]
+        entry = self.entry[open_]
+        target = entry + direction * np.where(self.tp1_hit[open_], self.tp2_dist[open_], self.tp1_dist[open_])
+        stop = entry - direction * self.sl_dist[open_]
+        upper = np.where(direction > 0, target, stop)
+        lower = np.where(direction > 0, stop, target)
+        self._upper, self._lower = float(upper.min()), float(lower.max())
+
+    def get_stats(self) -> dict:
+        variants = {}
+        for i, name in enumerate(self.names):
+            wins, losses, break_even = (int(c) for c in self.counts[i])
+            decided = wins + losses
+            params = self.variants[i].params
+            variants[name] = {
+                'win': wins,
+                'loss': losses,
+                'break_even': break_even,
+                'signals': int(self.signals[i]),
+                'win_rate': round(100.0 * wins / decided, 1) if decided else 0.0,
+                'pnl_usd': round(float(self.pnl[i]), 2),
+                'open': None if not self.direction[i] else {
+                    'direction': 'BUY' if self.direction[i] > 0 else 'SELL',
+                    'entry': round(float(self.entry[i]), 5),
+                    'tp1_hit': bool(self.tp1_hit[i]),
+                },
+                'params': {
+                    'adx_threshold': params.adx_threshold,
+                    'rsi_exit_oversold': params.rsi_exit_oversold,
+                    'rsi_exit_overbought': params.rsi_exit_overbought,
+                    'tp2_multiplier': params.tp2_multiplier,
+                },
+            }
+        return {
+            'symbol': self.symbol,
+            'last_bar_epoch': self.last_bar_epoch,
+            'ticks_checked': self.ticks_checked,
+            'variants': variants,
+        }
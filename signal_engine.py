@@ -2,25 +2,86 @@ import asyncio
 import datetime
 import random
 import os
+import numpy as np
 import pandas as pd
 import logging
+import time
 from typing import Optional, TYPE_CHECKING
 
 from config import BotConfig
 from utils import calculate_indicators, bot_logger
-from deriv_ws import DerivWebSocket
+from deriv_ws import DerivWebSocket, XAUUSD_SYMBOL
+from candle_archive import CandleArchive, candles_to_columns, DERIV_MAX_CANDLES
+from candle_frame import CandleFrame
+from bar_cache import BarCache
+from strategies import StrategySet, BarResult
+from shadow import ShadowBook, build_variants
+from backtester import RESULT_BREAK_EVEN, RESULT_LOSS, RESULT_OPEN, RESULT_WIN, resolve_open_trade
+from analysis_worker import AnalysisWorker
+from supervisor import RestartPolicy, Supervisor, TaskHealth
+from event_bus import (DROP_OLDEST, BarClosed, EventBus, SignalOpened, TickEvent, TP1Hit, TradeClosed,
+                       TrackingUpdate, record_metrics)
+import metrics
+import tracing
+from user_state import Direction, TradeStatus
 
 if TYPE_CHECKING:
     from telegram_service import TelegramService
     from state_manager import StateManager
 
 
+RESULT_INFO = {
+    RESULT_WIN: {'type': 'WIN', 'emoji': '🏆', 'text': 'TP2 HIT - FULL WIN!'},
+    RESULT_BREAK_EVEN: {'type': 'BREAK_EVEN', 'emoji': '⚖️', 'text': 'BREAK EVEN - TP1 Hit, SL at Entry'},
+    RESULT_LOSS: {'type': 'LOSS', 'emoji': '❌', 'text': 'STOP LOSS HIT'},
+}
+
+
 class SignalEngine:
-    def __init__(self, state_manager: 'StateManager', telegram_service: Optional['TelegramService'] = None):
+    """Strategy loop for one symbol.
+
+    The connection, tick store, candle archive, bar cache and analysis worker are shared
+    between the engines of all symbols and owned by EngineGroup; everything in the StateManager
+    (subscribers, user trades, current signal) belongs to this symbol only.
+    """
+
+    def __init__(self, state_manager: 'StateManager', telegram_service: Optional['TelegramService'] = None,
+                 symbol: str = XAUUSD_SYMBOL, deriv_ws: Optional[DerivWebSocket] = None,
+                 candle_archive: Optional[CandleArchive] = None, analysis_worker: Optional[AnalysisWorker] = None,
+                 bar_cache: Optional[BarCache] = None, event_bus: Optional[EventBus] = None,
+                 is_primary: bool = True):
         self.state_manager = state_manager
         self.telegram_service: Optional['TelegramService'] = telegram_service
-        self.deriv_ws: Optional[DerivWebSocket] = None
-        self.gold_symbol: str = "frxXAUUSD"
+        self.deriv_ws: Optional[DerivWebSocket] = deriv_ws
+        self.candle_archive: Optional[CandleArchive] = candle_archive
+        self.symbol: str = symbol
+        self.spec: dict = BotConfig.get_symbol_spec(symbol)
+        self.display_name: str = self.spec['name']
+        self.is_primary = is_primary  # sends restart, market-closed and daily-summary messages
+        self.title_suffix: str = '' if is_primary else f" — {self.display_name}"
+        self.candle_frame: CandleFrame = CandleFrame(BotConfig.CANDLE_WINDOW)
+        self.bar_cache: BarCache = bar_cache or BarCache()
+        self.strategies: StrategySet = StrategySet(symbol, self.bar_cache)
+        self.shadow: Optional[ShadowBook] = None
+        if BotConfig.SHADOW_ENABLED:
+            try:
+                self.shadow = ShadowBook(symbol, build_variants(self.spec), state_manager, self.bar_cache)
+            except (AttributeError, TypeError, ValueError) as e:
+                bot_logger.error(f"[{symbol}] Shadow variants disabled: {e}")
+        self.analysis_worker: AnalysisWorker = analysis_worker or AnalysisWorker(calculate_indicators)
+        # Telegram delivery, state files, counters and the shadow book consume the engine's events
+        self.event_bus: EventBus = event_bus or EventBus()
+        trade_events = (SignalOpened, TP1Hit, TradeClosed)
+        # Tracking goes through the same consumer so it is sent after the signal and TP1/result
+        # messages published before it, never interleaved with their batched broadcasts
+        self.event_bus.subscribe(f"{symbol}.telegram", trade_events + (TrackingUpdate,), self._deliver_event,
+                                 maxsize=64, symbol=symbol)
+        self.event_bus.subscribe(f"{symbol}.persistence", trade_events, state_manager.persist_events, maxsize=64,
+                                 symbol=symbol, batch=True)
+        self.event_bus.subscribe(f"{symbol}.metrics", (SignalOpened, TradeClosed), record_metrics, symbol=symbol)
+        if self.shadow:
+            self.event_bus.subscribe(f"{symbol}.shadow", (TickEvent, BarClosed), self.shadow.on_event,
+                                     maxsize=1024, overflow=DROP_OLDEST, symbol=symbol)
         self.cached_candles_df: Optional[pd.DataFrame] = None
         self.last_candle_fetch: Optional[datetime.datetime] = None
         self.signal_history: list = []
@@ -29,10 +90,46 @@ class SignalEngine:
         self.total_signals_generated: int = 0
         self._running: bool = False
         self._shutdown_event: asyncio.Event = asyncio.Event()
+        self._bot = None
+        self.tracking_counter: int = 0
+        # Stages hand over through single-slot queues: a consumer that falls behind only
+        # ever sees the latest bar or price, and never holds up its producer
+        self._market_open: asyncio.Event = asyncio.Event()
+        self._bar_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._price_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._tracking_queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._search_resumes_at: float = 0.0
+        self._tracking_price: Optional[float] = None  # newest price for the queued TrackingUpdate
+        self._tracking_queued: bool = False
+        # Manual signals: one market read shared by concurrent requests, a cooldown per user
+        self._manual_flight: Optional[asyncio.Task] = None
+        self._manual_state: Optional[tuple[float, float, float, float]] = None  # (at, close, ema50, rsi)
+        self._manual_requested_at: dict[str, float] = {}
+        self.supervisor: Supervisor = Supervisor(symbol)
+        self.supervisor.add("scheduler", self._scheduler_task, RestartPolicy(backoff=5.0))
+        self.supervisor.add("feed", self._feed_task, RestartPolicy(max_backoff=10.0))
+        self.supervisor.add("bar_builder", self._bar_builder_task, RestartPolicy(backoff=5.0, max_backoff=120.0))
+        self.supervisor.add("analyzer", self._analyzer_task)
+        self.supervisor.add("trade_monitor", self._trade_monitor_task, RestartPolicy(max_backoff=10.0))
+        self.supervisor.add("tracker", self._tracker_task, RestartPolicy(backoff=2.0))
     
     def _has_telegram_service(self) -> bool:
         return self.telegram_service is not None
     
+    def _has_active_trades(self) -> bool:
+        """Any open trade, global or manual per-user"""
+        return bool(self.state_manager.current_signal) or any(
+            self.state_manager.get_user_state(cid).active_trade is not None
+            for cid in self.state_manager.subscribers
+        )
+    
+    @staticmethod
+    def _offer(queue: asyncio.Queue, item) -> None:
+        """Put without waiting; a full queue drops its stale item instead"""
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(item)
+    
     def _can_generate_signal(self) -> bool:
         if self.last_signal_time is None:
             return True
@@ -60,85 +157,24 @@ class SignalEngine:
         if len(self.signal_history) > 100:
             self.signal_history = self.signal_history[-100:]
         
-        self.state_manager.add_signal_to_history(signal_info)
+        self.state_manager.add_signal_to_history(signal_info, save=False)
         bot_logger.info(f"📝 Signal #{self.total_signals_generated} recorded")
     
     def get_deriv_ws(self) -> Optional[DerivWebSocket]:
         return self.deriv_ws
     
-    def get_gold_symbol(self) -> str:
-        return self.gold_symbol
+    def get_symbol(self) -> str:
+        return self.symbol
     
-    def get_strategy_status(self, latest_close: float, ema50_value: float, rsi_value: float, 
-                           prev_rsi_value: float, adx_value: float) -> dict:
-        """Determine current strategy status based on market conditions"""
-        status = "UNKNOWN"
-        emoji = "❓"
-        description = ""
-        
-        current_signal = self.state_manager.current_signal
-        has_active_trades = bool(current_signal) or any(
-            self.state_manager.get_user_state(cid).get('active_trade') 
-            for cid in self.state_manager.subscribers
-        )
-        
-        # POSITION ACTIVE
-        if has_active_trades:
-            status = "POSITION ACTIVE"
-            emoji = "🟣"
-            description = "Sinyal aktif sedang dipantau TP/SL"
-        # TREND WEAK
-        elif adx_value <= BotConfig.ADX_FILTER_THRESHOLD:
-            status = "TREND WEAK (NO TRADE)"
-            emoji = "⚠️"
-            description = "ADX lemah / sideways — tidak ada entry"
-        # BUY SETUP
-        elif latest_close > ema50_value and adx_value > BotConfig.ADX_FILTER_THRESHOLD:
-            rsi_was_oversold = prev_rsi_value < BotConfig.RSI_OVERSOLD
-            rsi_exiting_oversold = rsi_value >= BotConfig.RSI_EXIT_OVERSOLD and rsi_value > prev_rsi_value
-            
-            if rsi_was_oversold and rsi_exiting_oversold:
-                status = "BUY SETUP"
-                emoji = "🟢"
-                description = "Bullish trend valid — menunggu trigger BUY"
-            elif rsi_was_oversold:
-                status = "WAITING PULLBACK"
-                emoji = "⏳"
-                description = "Trend bullish valid — RSI pullback belum selesai"
-            else:
-                status = "WAITING PULLBACK"
-                emoji = "⏳"
-                description = "Harga > EMA50 — menunggu RSI masuk oversold"
-        # SELL SETUP
-        elif latest_close < ema50_value and adx_value > BotConfig.ADX_FILTER_THRESHOLD:
-            rsi_was_overbought = prev_rsi_value > BotConfig.RSI_OVERBOUGHT
-            rsi_exiting_overbought = rsi_value <= BotConfig.RSI_EXIT_OVERBOUGHT and rsi_value < prev_rsi_value
-            
-            if rsi_was_overbought and rsi_exiting_overbought:
-                status = "SELL SETUP"
-                emoji = "🔴"
-                description = "Bearish trend valid — menunggu trigger SELL"
-            elif rsi_was_overbought:
-                status = "WAITING PULLBACK"
-                emoji = "⏳"
-                description = "Trend bearish valid — RSI pullback belum selesai"
-            else:
-                status = "WAITING PULLBACK"
-                emoji = "⏳"
-                description = "Harga < EMA50 — menunggu RSI masuk overbought"
-        else:
-            status = "WAITING PULLBACK"
-            emoji = "⏳"
-            description = "Harga ≈ EMA50 — trend tidak jelas"
-        
+    def _strategy_status(self, result: BarResult) -> dict:
+        """The selected strategy's status, unless a trade is already being tracked"""
+        if not self._has_active_trades():
+            return result.status
         return {
-            'status': status,
-            'emoji': emoji,
-            'description': description,
-            'rsi': round(rsi_value, 1),
-            'ema': round(ema50_value, 3),
-            'adx': round(adx_value, 1),
-            'price': round(latest_close, 3)
+            **result.status,
+            'status': "POSITION ACTIVE",
+            'emoji': "🟣",
+            'description': "Sinyal aktif sedang dipantau TP/SL"
         }
     
     async def get_historical_data(self) -> Optional[pd.DataFrame]:
@@ -155,8 +191,10 @@ class SignalEngine:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                symbol = self.gold_symbol or "frxXAUUSD"
-                candles = await self.deriv_ws.get_candles(symbol=symbol, count=100, granularity=60)
+                symbol = self.symbol
+                # Only the bars since the last fetch (plus the one that was still forming)
+                count = self.candle_frame.fetch_count(time.time())
+                candles = await self.deriv_ws.get_candles(symbol=symbol, count=count, granularity=60)
                 
                 if not candles or not isinstance(candles, list):
                     if attempt < max_retries - 1:
@@ -167,18 +205,27 @@ class SignalEngine:
                     bot_logger.warning("No candle data received after retries")
                     return None
                 
-                df_data = []
-                for c in candles:
-                    df_data.append({
-                        'date': datetime.datetime.fromtimestamp(c['epoch'], tz=datetime.timezone.utc),
-                        'Open': float(c['open']),
-                        'High': float(c['high']),
-                        'Low': float(c['low']),
-                        'Close': float(c['close'])
-                    })
+                columns = candles_to_columns(candles)
+                if not self.candle_frame.update(columns):
+                    # Gap since the last fetch (reconnect, market pause): reload the whole window
+                    candles = await self.deriv_ws.get_candles(symbol=symbol, count=self.candle_frame.window, granularity=60)
+                    if not candles or not isinstance(candles, list):
+                        bot_logger.warning("No candle data received for full window reload")
+                        return None
+                    columns = candles_to_columns(candles)
+                    self.candle_frame.update(columns)
+                df = self.candle_frame.to_frame()
                 
-                df = pd.DataFrame(df_data)
-                df.set_index('date', inplace=True)
+                # The last candle is still forming; archive and roll up only closed bars
+                closed = {name: col[:-1] for name, col in columns.items()}
+                if self.candle_archive:
+                    try:
+                        await asyncio.to_thread(self.candle_archive.append_columns, symbol, 60, closed)
+                    except Exception as e:
+                        bot_logger.error(f"Candle archive error: {e}")
+                if self.bar_cache.last_epoch(symbol) is None:
+                    await self.warm_bar_cache()
+                self.bar_cache.update(symbol, closed)
                 return df
                 
             except Exception as e:
@@ -190,11 +237,196 @@ class SignalEngine:
                 bot_logger.error(f"DATA-ERROR: Failed after {max_retries} attempts: {e}")
                 return None
     
+    async def warm_bar_cache(self) -> None:
+        """Seed the higher timeframes once, from the archive or a single long fetch"""
+        needed = min(self.bar_cache.warmup_bars, DERIV_MAX_CANDLES)
+        columns = None
+        if self.candle_archive:
+            try:
+                archived = await asyncio.to_thread(self.candle_archive.load, self.symbol, 60,
+                                                   int(time.time()) - 3 * needed * 60)
+                if len(archived['epoch']) >= needed:
+                    columns = {name: col[-needed:] for name, col in archived.items()}
+            except Exception as e:
+                bot_logger.error(f"Candle archive error: {e}")
+        if columns is None:
+            candles = await self.deriv_ws.get_candles(symbol=self.symbol, count=needed + 1, granularity=60)
+            if not candles or not isinstance(candles, list):
+                bot_logger.warning(f"Bar cache warm-up fetch failed for {self.symbol}, higher timeframes fill up live")
+                return
+            columns = {name: col[:-1] for name, col in candles_to_columns(candles).items()}
+        added = self.bar_cache.update(self.symbol, columns)
+        bot_logger.info(f"📚 Bar cache warmed with {added} 1m bars ({self.symbol}, timeframes {self.bar_cache.timeframes})")
+    
+    async def analyze(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """calculate_indicators() in the analysis worker, keyed by the last closed bar"""
+        bar_epoch = int(df.index[-2].timestamp()) if len(df) > 1 else 0
+        return await self.analysis_worker.analyze(self.symbol, bar_epoch, df)
+    
+    async def _close_global_signal(self, result: str, exit_price: float,
+                                   closed_at: Optional[datetime.datetime] = None) -> None:
+        """Record the broadcast signal's result for its subscribers, clear it and publish TradeClosed"""
+        current_signal = self.state_manager.current_signal
+        
+        self.state_manager.update_trade_result(result, save=False)
+        self.state_manager.update_last_signal_result(result, save=False)
+        
+        start_time_utc = current_signal.get('start_time_utc')
+        if start_time_utc:
+            closed_at = closed_at or datetime.datetime.now(datetime.timezone.utc)
+            duration = round((closed_at - start_time_utc).total_seconds() / 60, 1)
+        else:
+            duration = 0
+        
+        if self.state_manager.last_signal_info:
+            self.state_manager.last_signal_info['status'] = RESULT_INFO[result]['text']
+        entry_price = current_signal['entry_price']
+        self.state_manager.clear_current_signal(save=False)
+        self.state_manager.clear_user_tracking_messages(save=False)
+        await self.event_bus.publish(TradeClosed(self.symbol, result, entry_price, exit_price, duration))
+    
+    async def _deliver_event(self, event: SignalOpened | TP1Hit | TradeClosed | TrackingUpdate) -> None:
+        """Event-bus consumer: the Telegram messages for new signals, TP1, closed trades and tracking"""
+        if isinstance(event, TrackingUpdate):
+            self._tracking_queued = False
+        if not self._has_telegram_service() or not self.telegram_service:
+            return
+        if isinstance(event, TrackingUpdate):
+            current_signal = self.state_manager.current_signal
+            # send_tracking_update() loops all subscribers and tracks from their active_trade
+            await self.telegram_service.send_tracking_update(self._bot, self._tracking_price or event.price,
+                                                             current_signal if current_signal else {})
+            bot_logger.debug(f"✅ Tracking update sent to all active traders")
+            return
+        if isinstance(event, SignalOpened):
+            signal = event.signal
+            direction, entry = signal['direction'], signal['entry_price']
+            tp1, tp2, sl = signal['tp1_level'], signal['tp2_level'], signal['sl_level']
+            signal_emoji = "📈" if direction == 'BUY' else "📉"
+            caption = (
+                f"{signal_emoji} *SCALPING {direction} {self.display_name}*\n"
+                f"━━━━━━━━━━━━━━━━━━━━━\n"
+                f"🌐 _Strategi: EMA50 + RSI(3) + ADX(55)_\n\n"
+                f"🕐 Waktu: *{signal['start_time_utc'].astimezone(BotConfig.WIB_TZ).strftime('%H:%M:%S WIB')}*\n"
+                f"💵 Entry: *${entry:.3f}*\n\n"
+                f"━━━━━━━━━━━━━━━━━━━━━\n"
+                f"📋 *KONDISI ENTRY*\n"
+                f"📊 EMA50: ${event.indicators['ema']:.3f}\n"
+                f"📈 RSI(3): {event.indicators['rsi']:.1f}\n"
+                f"💪 ADX(55): {event.indicators['adx']:.1f}\n\n"
+                f"━━━━━━━━━━━━━━━━━━━━━\n"
+                f"🎯 *TARGET & PROTEKSI*\n"
+                f"🎯 TP1: *${tp1:.3f}* (+${abs(tp1-entry):.2f})\n"
+                f"🏆 TP2: *${tp2:.3f}* (+${abs(tp2-entry):.2f})\n"
+                f"🛑 SL: *${sl:.3f}* (-${abs(sl-entry):.2f})\n\n"
+                f"📡 Tracking aktif hingga TP/SL tercapai"
+            )
+            # The consumer's context predates the trace: re-enter it so the broadcast spans
+            # land under the cycle's root, which ends with the last delivery
+            try:
+                with tracing.resume(event.trace):
+                    await self.telegram_service.send_to_all_subscribers(self._bot, caption,
+                                                                        signal_time=event.decided_at)
+            finally:
+                if event.trace is not None:
+                    tracing.end_trace(event.trace)
+            return
+        
+        if isinstance(event, TP1Hit):
+            text = (
+                f"🎯 *TP1 TERCAPAI!{self.title_suffix}*\n"
+                "━━━━━━━━━━━━━━━━━━━━━\n\n"
+                f"💰 Harga: *${event.price:.3f}*\n"
+                f"🎯 TP1: ${event.tp1_level:.3f}\n\n"
+                "🛡️ *SL dipindahkan ke Entry (Break Even)*\n"
+                "🏆 Target selanjutnya: TP2\n\n"
+                "💡 Profit sebagian sudah aman!"
+            )
+        else:
+            result_info = RESULT_INFO[event.result]
+            text = (
+                f"{result_info['emoji']} *{result_info['text']}{self.title_suffix}*\n"
+                f"━━━━━━━━━━━━━━━━━━━━━\n\n"
+                f"💵 Entry: *${event.entry_price:.3f}*\n"
+                f"💰 Exit: *${event.exit_price:.3f}*\n"
+                f"⏱️ Durasi: *{event.duration_minutes} menit*\n\n"
+                f"📊 Gunakan /stats untuk melihat statistik\n"
+                f"🔍 Bot kembali mencari sinyal..."
+            )
+        if event.chat_id:
+            await self.telegram_service.send_to_one_subscriber(self._bot, event.chat_id, text)
+        else:
+            await self.telegram_service.send_to_all_subscribers(self._bot, text)
+    
+    def _publish_tick(self, epoch: int, price: float) -> None:
+        self.event_bus.publish_nowait(TickEvent(self.symbol, epoch, price))
+    
     async def get_realtime_price(self) -> Optional[float]:
         if self.deriv_ws and self.deriv_ws.connected:
-            return self.deriv_ws.get_current_price()
+            return self.deriv_ws.get_current_price(self.symbol)
         return None
     
+    def reserve_manual_signal(self, chat_id: str) -> float:
+        """Start a user's manual-signal cooldown; returns the seconds still to wait (0 = go ahead)"""
+        now = time.monotonic()
+        cooldown = BotConfig.MANUAL_SIGNAL_USER_COOLDOWN
+        last = self._manual_requested_at.get(chat_id)
+        if last is not None and now - last < cooldown:
+            metrics.MANUAL_SIGNAL_REQUESTS.labels("rate_limited").inc()
+            return cooldown - (now - last)
+        if len(self._manual_requested_at) >= 1024:
+            self._manual_requested_at = {k: t for k, t in self._manual_requested_at.items() if now - t < cooldown}
+        self._manual_requested_at[chat_id] = now
+        return 0.0
+    
+    def release_manual_signal(self, chat_id: str) -> None:
+        """Undo reserve_manual_signal() after a request that produced no signal"""
+        self._manual_requested_at.pop(chat_id, None)
+    
+    async def _manual_market_state(self) -> Optional[tuple[float, float, float]]:
+        """Close, EMA50 and RSI of the last closed bar for a manual signal.
+        
+        The analyzer's bars are used until the next bar has closed, two bar lengths after the
+        last closed bar's open; otherwise the result of a fetch finished less than
+        MANUAL_SIGNAL_SHARE_SECONDS ago, or the fetch in flight, is shared, so a burst of
+        requests costs one candle fetch and one analysis.
+        """
+        bars = self.strategies.cache
+        if bars.bar_epoch and time.time() < bars.bar_epoch + 2 * bars.bar_seconds:
+            values = (bars.value('Close'), bars.value(BotConfig.get_ema_medium_col()),
+                      bars.value(BotConfig.get_rsi_col()))
+            if not any(np.isnan(values)):
+                metrics.MANUAL_SIGNAL_REQUESTS.labels("cached_bar").inc()
+                return values
+        
+        state = self._manual_state
+        if state and time.monotonic() - state[0] < BotConfig.MANUAL_SIGNAL_SHARE_SECONDS:
+            metrics.MANUAL_SIGNAL_REQUESTS.labels("shared").inc()
+            return state[1:]
+        
+        if self._manual_flight is None or self._manual_flight.done():
+            self._manual_flight = asyncio.create_task(self._fetch_manual_state(), name=f"manual-signal-{self.symbol}")
+            metrics.MANUAL_SIGNAL_REQUESTS.labels("fetched").inc()
+        else:
+            metrics.MANUAL_SIGNAL_REQUESTS.labels("shared").inc()
+        # shield: a requester that gives up does not cancel the read the others wait on
+        return await asyncio.shield(self._manual_flight)
+    
+    async def _fetch_manual_state(self) -> Optional[tuple[float, float, float]]:
+        df = await self.get_historical_data()
+        if df is None:
+            bot_logger.warning("❌ Tidak bisa ambil data pasar")
+            return None
+        
+        df = await self.analyze(df)
+        if df is None:
+            bot_logger.warning("❌ Analisis dibatalkan (superseded / deadline)")
+            return None
+        latest = df.iloc[-2]
+        values = (latest['Close'], latest[BotConfig.get_ema_medium_col()], latest[BotConfig.get_rsi_col()])
+        self._manual_state = (time.monotonic(), *values)
+        return values
+    
     async def generate_manual_signal(self, bot, target_chat_id: Optional[str] = None) -> bool:
         """Generate signal manually regardless of market conditions
         
@@ -203,20 +435,10 @@ class SignalEngine:
             target_chat_id: If provided, send only to this user. If None, broadcast to all.
         """
         try:
-            df = await self.get_historical_data()
-            if df is None:
-                bot_logger.warning("❌ Tidak bisa ambil data pasar")
+            market_state = await self._manual_market_state()
+            if market_state is None:
                 return False
-            
-            df = calculate_indicators(df)
-            latest = df.iloc[-2]
-            latest_close = latest['Close']
-            
-            ema_med_col = BotConfig.get_ema_medium_col()
-            rsi_col = BotConfig.get_rsi_col()
-            
-            ema50_value = latest[ema_med_col]
-            rsi_value = latest[rsi_col]
+            latest_close, ema50_value, rsi_value = market_state
             
             # Determine signal direction based on price vs EMA50 and RSI
             if latest_close > ema50_value:
@@ -230,9 +452,10 @@ class SignalEngine:
                 return False
             
             # Generate levels
-            sl = latest_close - BotConfig.FIXED_SL_USD if final_signal == "BUY" else latest_close + BotConfig.FIXED_SL_USD
-            tp1 = latest_close + BotConfig.FIXED_TP_USD if final_signal == "BUY" else latest_close - BotConfig.FIXED_TP_USD
-            tp2 = latest_close + (BotConfig.FIXED_TP_USD * 1.5) if final_signal == "BUY" else latest_close - (BotConfig.FIXED_TP_USD * 1.5)
+            sl_distance, tp_distance = self.spec['sl'], self.spec['tp']
+            sl = latest_close - sl_distance if final_signal == "BUY" else latest_close + sl_distance
+            tp1 = latest_close + tp_distance if final_signal == "BUY" else latest_close - tp_distance
+            tp2 = latest_close + (tp_distance * 1.5) if final_signal == "BUY" else latest_close - (tp_distance * 1.5)
             
             title = f"{signal_emoji} SCALPING {final_signal}"
             start_time_utc = datetime.datetime.now(datetime.timezone.utc)
@@ -248,7 +471,7 @@ class SignalEngine:
             }
             
             caption = (
-                f"{signal_emoji} *SCALPING {final_signal} XAU/USD*\n"
+                f"{signal_emoji} *SCALPING {final_signal} {self.display_name}*\n"
                 f"━━━━━━━━━━━━━━━━━━━━━\n"
                 f"🌐 _Strategi: EMA50 + RSI(3) + ADX(55)_\n\n"
                 f"🕐 Waktu: *{start_time_utc.astimezone(BotConfig.WIB_TZ).strftime('%H:%M:%S WIB')}*\n"
@@ -274,21 +497,7 @@ class SignalEngine:
                         parse_mode='Markdown'
                     ))
                     # Update only this user's state
-                    user_state = self.state_manager.get_user_state(target_chat_id)
-                    user_state['active_trade'] = temp_trade_info.copy()
-                    user_state['tracking_message_id'] = None
-                    if 'signal_history' not in user_state:
-                        user_state['signal_history'] = []
-                    user_state['signal_history'].append({
-                        'id': len(user_state['signal_history']) + 1,
-                        'direction': final_signal,
-                        'entry_price': latest_close,
-                        'tp1': tp1,
-                        'tp2': tp2,
-                        'sl': sl,
-                        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                        'result': 'PENDING'
-                    })
+                    self.state_manager.get_user_state(target_chat_id).start_trade(temp_trade_info)
                     self.state_manager.save_user_states()
                     # ❌ DO NOT set global signal for manual signals!
                     # Only user 1's state is updated, NOT broadcast to others
@@ -319,17 +528,135 @@ class SignalEngine:
             return False
     
     
-    async def notify_restart(self, bot) -> None:
-        if not self._has_telegram_service() or not self.telegram_service:
+    async def notify_restart(self, bot, resumed: bool = False) -> None:
+        """Tell the admins (ADMIN_CHAT_ID, comma-separated) the bot restarted; subscribers are not messaged"""
+        if BotConfig.RESTART_NOTICE == 'off':
             return
+        current_signal = self.state_manager.current_signal
+        if resumed and current_signal:
+            status = f"Sinyal {current_signal['direction']} @ ${current_signal['entry_price']:.3f} dilanjutkan."
+        else:
+            status = "Tidak ada sinyal aktif, mencari sinyal baru."
         restart_msg = (
             "🔄 *BOT RESTART NOTIFICATION*\n"
             "━━━━━━━━━━━━━━━━━━━━━\n\n"
-            "Bot telah direstart dan mencari sinyal baru.\n\n"
-            "💡 Gunakan /dashboard untuk melihat status terkini."
+            f"Bot telah direstart. {status}\n\n"
+            f"👥 Subscriber: {len(self.state_manager.subscribers)}"
         )
-        await self.telegram_service.send_to_all_subscribers(bot, restart_msg)
-        bot_logger.info("Sent restart notification to all subscribers")
+        sent = await self._notify_admins(bot, restart_msg)
+        if sent:
+            bot_logger.info(f"Sent restart notification to {sent} admin(s)")
+    
+    async def _notify_admins(self, bot, message: str) -> int:
+        """Send `message` to every ADMIN_CHAT_ID (comma-separated); returns how many were addressed"""
+        if not self._has_telegram_service() or not self.telegram_service:
+            return 0
+        admins = [chat_id.strip() for chat_id in BotConfig.ADMIN_CHAT_ID.split(',') if chat_id.strip()]
+        if not admins:
+            bot_logger.info("ADMIN_CHAT_ID not set, admin notification skipped")
+            return 0
+        for chat_id in admins:
+            await self.telegram_service.send_to_one_subscriber(bot, chat_id, message)
+        return len(admins)
+    
+    async def resume_open_signal(self, bot) -> bool:
+        """Warm restart: reload the persisted broadcast signal and replay the prices missed while down.
+
+        The path since the signal was last saved comes from Deriv's tick history for short
+        gaps (WARM_RESTART_TICK_SECONDS) and from 1m candles otherwise, and is resolved
+        with the live TP1/TP2/SL rules. Returns True if the signal is still open.
+        """
+        signal, checked_until = self.state_manager.load_current_signal()
+        if not signal:
+            return False
+        self.state_manager.current_signal = signal
+        start_time = signal.get('start_time_utc')
+        since = int(checked_until or (start_time.timestamp() if start_time else time.time()))
+        path = await self._backfill_path(since, include_partial_bar=bool(checked_until))
+        if path is None:
+            bot_logger.warning(f"⚠️ No price path since {since}, resuming {signal['direction']} signal on live prices")
+            await self._notify_admins(bot, (
+                "⚠️ *WARM RESTART*\n"
+                "━━━━━━━━━━━━━━━━━━━━━\n\n"
+                f"Riwayat harga sejak {datetime.datetime.fromtimestamp(since, datetime.timezone.utc):%Y-%m-%d %H:%M} UTC "
+                f"tidak lengkap. Sinyal {signal['direction']} @ ${signal['entry_price']:.3f} dilanjutkan dengan harga live, "
+                "TP/SL selama bot mati tidak diperiksa."
+            ))
+            return True
+        epochs, high, low, from_bars = path
+        outcome, exit_index, tp1_hit = resolve_open_trade(signal, high, low, pessimistic=from_bars)
+        if tp1_hit and signal.get('status') != 'tp1_hit':
+            bot_logger.info("✅ TP1 was hit while down, SL moved to BE")
+            self._move_signal_sl_to_entry()
+            self.state_manager.save_user_states()
+        if outcome == RESULT_OPEN:
+            self.state_manager.save_current_signal()
+            bot_logger.info(f"♻️ Resumed {signal['direction']} signal @ {signal['entry_price']:.3f} "
+                            f"({len(epochs)} {'bars' if from_bars else 'ticks'} replayed)")
+            return True
+        if from_bars:
+            exit_price = {RESULT_WIN: signal['tp2_level'], RESULT_LOSS: signal['sl_level'],
+                          RESULT_BREAK_EVEN: signal['entry_price']}[outcome]
+        else:
+            exit_price = float(high[exit_index])
+        closed_at = datetime.datetime.fromtimestamp(int(epochs[exit_index]), datetime.timezone.utc)
+        bot_logger.info(f"♻️ Signal closed while down: {outcome} @ {exit_price:.3f} ({closed_at.isoformat()})")
+        await self._close_global_signal(outcome, exit_price, closed_at)
+        return False
+    
+    async def _backfill_path(self, since: int, include_partial_bar: bool = False) -> Optional[tuple]:
+        """(epochs, high, low, from_bars) of the prices after `since`, or None if unavailable.
+        `include_partial_bar`: the bar holding `since` counts too (see below)"""
+        gap = time.time() - since
+        if gap <= BotConfig.WARM_RESTART_TICK_SECONDS:
+            count = 5000
+            history = await self.deriv_ws.get_tick_history(self.symbol, start=since, count=count)
+            # A full page may have been cut at `count`; the candles then cover the whole gap
+            if history and len(history['times']) < count:
+                epochs = np.asarray(history['times'], dtype=np.int64)
+                prices = np.asarray(history['prices'], dtype=np.float64)
+                keep = epochs > since
+                return epochs[keep], prices[keep], prices[keep], False
+        # Paged back from now like CandleArchive.backfill: a single capped request would drop
+        # the oldest bars of a long gap, which is where the trade most likely closed
+        pages = []
+        count = min(int(gap // 60) + 2, DERIV_MAX_CANDLES)
+        cursor = int(time.time())
+        while True:
+            candles = await self.deriv_ws.get_candles(symbol=self.symbol, count=count, granularity=60, end=cursor)
+            if not candles or not isinstance(candles, list):
+                if pages:
+                    bot_logger.warning(f"⚠️ Candle history incomplete before {cursor}, path since {since} unresolvable")
+                return None
+            pages.append(candles_to_columns(candles))
+            first_epoch = int(pages[-1]['epoch'][0])
+            # A short page means Deriv has nothing older (e.g. the market was closed)
+            if first_epoch <= since - 60 or len(candles) < count or first_epoch >= cursor:
+                break
+            cursor = first_epoch - 1
+            count = DERIV_MAX_CANDLES
+        columns = {name: np.concatenate([page[name] for page in reversed(pages)]) for name in pages[0]}
+        if include_partial_bar:
+            # `since` is a checked_until: the part of its bar before it was tracked live, the
+            # rest was not
+            keep = columns['epoch'] > since - 60
+        else:
+            # `since` is the signal's start; the bar holding it opened before the entry and
+            # its high/low may be prices the trade never saw
+            keep = columns['epoch'] >= since
+        return columns['epoch'][keep], columns['high'][keep], columns['low'][keep], True
+    
+    def _move_signal_sl_to_entry(self) -> None:
+        """TP1 of the broadcast signal: its stop and every subscriber's copy move to entry (in memory)"""
+        current_signal = self.state_manager.current_signal
+        entry = current_signal['entry_price']
+        current_signal['status'] = 'tp1_hit'
+        current_signal['sl_level'] = entry
+        for cid in self.state_manager.subscribers:
+            us = self.state_manager.get_user_state(cid)
+            if us.active_trade:
+                us.active_trade.status = TradeStatus.TP1_HIT
+                us.active_trade.sl_level = entry
     
     def request_shutdown(self) -> None:
         self._running = False
@@ -337,99 +664,73 @@ class SignalEngine:
         bot_logger.info("Shutdown requested for signal engine")
     
     async def run(self, bot) -> None:
-        bot_logger.info("🚀 Starting Signal Engine...")
+        bot_logger.info(f"🚀 Starting Signal Engine ({self.symbol})...")
         self._running = True
         self._shutdown_event.clear()
         
-        self.gold_symbol = 'frxXAUUSD'
-        bot_logger.info(f"Using gold symbol: {self.gold_symbol}")
-        
-        self.deriv_ws = DerivWebSocket()
-        
-        max_connect_attempts = 3
-        for attempt in range(max_connect_attempts):
-            try:
-                connected = await self.deriv_ws.connect()
-                if connected:
-                    break
-                else:
-                    if attempt < max_connect_attempts - 1:
-                        bot_logger.warning(f"Connection attempt {attempt + 1} failed, retrying...")
-                        await asyncio.sleep(3)
-            except Exception as e:
-                bot_logger.error(f"Connection attempt {attempt + 1} error: {e}")
-                if attempt < max_connect_attempts - 1:
-                    await asyncio.sleep(3)
-        
-        if not self.deriv_ws.connected:
-            bot_logger.critical("Failed to connect to Deriv WebSocket after max attempts!")
+        if not self.deriv_ws:
+            bot_logger.critical(f"[{self.symbol}] No Deriv connection attached, signal engine not started")
             return
+        bot_logger.info(f"Using symbol: {self.symbol} ({self.display_name})")
         
-        await self.deriv_ws.subscribe_ticks(self.gold_symbol)
-        
-        listen_task = asyncio.create_task(self.deriv_ws.listen())
-        
-        await asyncio.sleep(3)
-        
-        self.state_manager.current_signal = {}
         self.last_signal_time = None  # Reset to allow immediate signal search
-        for chat_id in self.state_manager.subscribers:
-            user_state = self.state_manager.get_user_state(chat_id)
-            user_state['active_trade'] = {}
-            user_state['tracking_message_id'] = None
-        self.state_manager.save_user_states()
-        bot_logger.info("🔄 Cleared all active trades - searching for fresh signals")
+        self._bot = bot
+        self.event_bus.start()
+        resumed = False
+        if BotConfig.WARM_RESTART:
+            resumed = await self.resume_open_signal(bot)
+        else:
+            # Also removes current_signal.json, or a later warm restart would resume it
+            self.state_manager.clear_current_signal()
+            for chat_id in self.state_manager.subscribers:
+                self.state_manager.get_user_state(chat_id).clear_trade()
+            self.state_manager.save_user_states()
+            bot_logger.info("🔄 Cleared all active trades - searching for fresh signals")
         
-        await self.notify_restart(bot)
+        feed = self.deriv_ws.get_feed(self.symbol)
+        if feed is not None and self.strategies.wants_ticks and self.strategies.on_tick not in feed.listeners:
+            feed.listeners.append(self.strategies.on_tick)
+        if (feed is not None and self.event_bus.has_subscribers(TickEvent, self.symbol)
+                and self._publish_tick not in feed.listeners):
+            feed.listeners.append(self._publish_tick)
         
-        tracking_counter = 0
-        last_market_closed_notify: Optional[datetime.datetime] = None
-        last_daily_summary: Optional[datetime.date] = None
+        if self.is_primary:
+            await self.notify_restart(bot, resumed)
         
-        while self._running:
-            try:
-                now = datetime.datetime.now(BotConfig.WIB_TZ)
-                if (now.hour == BotConfig.DAILY_SUMMARY_HOUR and 
-                    now.minute >= BotConfig.DAILY_SUMMARY_MINUTE and
-                    (last_daily_summary is None or last_daily_summary != now.date())):
-                    if self._has_telegram_service() and self.telegram_service:
-                        await self.telegram_service.send_daily_summary(bot)
-                        last_daily_summary = now.date()
-                
-                market_status = BotConfig.get_market_status()
-                current_signal = self.state_manager.current_signal
-                
-                # Check if there's ANY active trade (global or manual per-user)
-                has_active_trades = bool(current_signal) or any(
-                    self.state_manager.get_user_state(cid).get('active_trade') 
-                    for cid in self.state_manager.subscribers
-                )
-                
-                if not market_status['is_open']:
-                    # Market is closed - BUT STILL TRACK existing trades!
-                    if has_active_trades:
-                        # Continue tracking even when market is closed
-                        await asyncio.sleep(BotConfig.TRACKING_UPDATE_INTERVAL)
-                        rt_price = await self.get_realtime_price()
-                        if rt_price:
-                            tracking_counter += 1
-                            bot_logger.info(f"📍 Tracking #{tracking_counter} (Market Closed) - Price=${rt_price:.3f}")
-                            if self._has_telegram_service() and self.telegram_service:
-                                try:
-                                    await self.telegram_service.send_tracking_update(bot, rt_price, current_signal if current_signal else {})
-                                    bot_logger.debug(f"✅ Tracking update sent (market closed)")
-                                except Exception as e:
-                                    bot_logger.error(f"❌ Failed to send tracking update: {e}")
-                        continue
-                    
-                    # Market closed AND no active trades - show notification
-                    now_dt = datetime.datetime.now()
-                    should_notify = (
-                        last_market_closed_notify is None or 
-                        (now_dt - last_market_closed_notify).total_seconds() > 3600
-                    )
-                    
-                    if should_notify:
+        self._search_resumes_at = 0.0
+        if BotConfig.is_market_open():
+            self._market_open.set()
+        else:
+            self._market_open.clear()
+        await self.supervisor.run(self._shutdown_event)
+        bot_logger.info(f"Signal engine stopped ({self.symbol})")
+    
+    async def _scheduler_task(self, health: TaskHealth) -> None:
+        """Daily summary, market open/closed state and the hourly market-closed reminder"""
+        last_daily_summary: Optional[datetime.date] = None
+        last_market_closed_notify: Optional[float] = None
+        while True:
+            health.beat()
+            now = datetime.datetime.now(BotConfig.WIB_TZ)
+            if (self.is_primary and now.hour == BotConfig.DAILY_SUMMARY_HOUR and 
+                now.minute >= BotConfig.DAILY_SUMMARY_MINUTE and
+                (last_daily_summary is None or last_daily_summary != now.date())):
+                if self._has_telegram_service() and self.telegram_service:
+                    await self.telegram_service.send_daily_summary(self._bot)
+                    last_daily_summary = now.date()
+            
+            market_status = BotConfig.get_market_status()
+            sleep_for = min(market_status['seconds_to_change'], 3600)
+            if market_status['is_open']:
+                self._market_open.set()
+                last_market_closed_notify = None
+            else:
+                self._market_open.clear()
+                if self._has_active_trades():
+                    # Trades are still tracked while closed; remind once they are done
+                    sleep_for = min(sleep_for, BotConfig.TRACKING_UPDATE_INTERVAL)
+                elif self.is_primary:
+                    if last_market_closed_notify is None or time.time() - last_market_closed_notify >= 3600:
                         bot_logger.info(f"📅 Market tutup: {market_status['message']}")
                         market_msg = (
                             "📅 *MARKET TUTUP (WEEKEND)*\n"
@@ -439,433 +740,299 @@ class SignalEngine:
                             "📊 Gunakan /dashboard untuk cek status."
                         )
                         if self._has_telegram_service() and self.telegram_service:
-                            await self.telegram_service.send_to_all_subscribers(bot, market_msg)
-                        last_market_closed_notify = now_dt
-                    
-                    await asyncio.sleep(BotConfig.MARKET_CHECK_INTERVAL)
-                    continue
-                
-                if not self.deriv_ws.connected:
-                    bot_logger.warning("⚠️ WebSocket disconnected, reconnecting...")
-                    listen_task.cancel()
-                    try:
-                        await listen_task
-                    except asyncio.CancelledError:
-                        pass
-                    
-                    connected = await self.deriv_ws.connect()
-                    if connected:
-                        await self.deriv_ws.subscribe_ticks(self.gold_symbol)
-                        listen_task = asyncio.create_task(self.deriv_ws.listen())
-                        bot_logger.info("✅ Reconnected to WebSocket")
-                    else:
-                        await asyncio.sleep(10)
-                        continue
-                
-                if has_active_trades:
+                            await self.telegram_service.send_to_all_subscribers(self._bot, market_msg)
+                        last_market_closed_notify = time.time()
+                    sleep_for = min(sleep_for, last_market_closed_notify + 3600 - time.time())
+            
+            if self.is_primary:
+                summary_at = now.replace(hour=BotConfig.DAILY_SUMMARY_HOUR, minute=BotConfig.DAILY_SUMMARY_MINUTE,
+                                         second=0, microsecond=0)
+                if summary_at <= now:
+                    summary_at += datetime.timedelta(days=1)
+                sleep_for = min(sleep_for, (summary_at - now).total_seconds())
+            await asyncio.sleep(max(sleep_for, 1))
+    
+    async def _feed_task(self, health: TaskHealth) -> None:
+        """Sample the realtime price for the trade monitor and the tracker while any trade is open"""
+        while True:
+            await asyncio.sleep(BotConfig.TRACKING_UPDATE_INTERVAL)
+            health.beat()
+            if not self._has_active_trades():
+                continue
+            rt_price = await self.get_realtime_price()
+            if rt_price:
+                self._offer(self._price_queue, rt_price)
+                self._offer(self._tracking_queue, rt_price)
+    
+    async def _bar_builder_task(self, health: TaskHealth) -> None:
+        """Fetch closed 1m bars for the analyzer: every ANALYSIS_INTERVAL while searching,
+        once per new bar for the shadow book while a trade is tracked"""
+        while True:
+            await self._market_open.wait()
+            health.beat()
+            if not self.deriv_ws.connected:
+                # EngineGroup reconnects the shared socket and resubscribes every symbol
+                await asyncio.sleep(5)
+                continue
+            
+            resume_in = self._search_resumes_at - time.time()
+            if resume_in > 0:
+                await asyncio.sleep(resume_in)
+                continue
+            
+            tracking = self._has_active_trades()
+            if tracking:
+                last_bar = self.shadow.last_bar_epoch if self.shadow else None
+                if last_bar is None or time.time() < last_bar + 120:
                     await asyncio.sleep(BotConfig.TRACKING_UPDATE_INTERVAL)
-                    tracking_counter += 1
-                    trade_closed = False
-                    
-                    rt_price = await self.get_realtime_price()
-                    if rt_price:
-                        # Use current_signal if available (broadcast signal), otherwise None (per-user signals)
-                        direction = current_signal.get('direction') if current_signal else None
-                        entry = current_signal.get('entry_price') if current_signal else None
-                        tp1 = current_signal.get('tp1_level') if current_signal else None
-                        tp2 = current_signal.get('tp2_level') if current_signal else None
-                        sl = current_signal.get('sl_level') if current_signal else None
-                        trade_status = current_signal.get('status', 'active') if current_signal else 'active'
-                        
-                        if direction and entry and tp1 and tp2 and sl:
-                            bot_logger.info(f"📍 Tracking #{tracking_counter} {direction}: Price=${rt_price:.3f} Entry=${entry:.3f} SL=${sl:.3f}")
-                        else:
-                            # Manual per-user signals - track individual active trades
-                            bot_logger.info(f"📍 Tracking #{tracking_counter} - Per-user tracking (manual signals)")
-                        
-                        if self._has_telegram_service() and self.telegram_service:
-                            try:
-                                # ALWAYS send tracking update - works for both global AND per-user signals
-                                # send_tracking_update() loops all subscribers and tracks from their active_trade
-                                await self.telegram_service.send_tracking_update(bot, rt_price, current_signal if current_signal else {})
-                                bot_logger.debug(f"✅ Tracking update sent to all active traders")
-                            except Exception as e:
-                                bot_logger.error(f"❌ Failed to send tracking update: {e}")
-                        else:
-                            bot_logger.warning("⚠️ Telegram service not available for tracking")
-                        
-                        result_info = None
-                        users_with_closed_trades = []
-                        
-                        # GLOBAL SIGNAL result tracking
-                        if current_signal and direction == 'BUY' and tp2 and tp1:
-                            if rt_price >= tp2:
-                                result_info = {'type': 'WIN', 'emoji': '🏆', 'text': 'TP2 HIT - FULL WIN!'}
-                            elif rt_price >= tp1 and trade_status == 'active':
-                                current_signal['status'] = 'tp1_hit'
-                                current_signal['sl_level'] = entry
-                                for cid in self.state_manager.subscribers:
-                                    us = self.state_manager.get_user_state(cid)
-                                    if us.get('active_trade'):
-                                        us['active_trade']['status'] = 'tp1_hit'
-                                        us['active_trade']['sl_level'] = entry
-                                self.state_manager.save_user_states()
-                                
-                                tp1_msg = (
-                                    "🎯 *TP1 TERCAPAI!*\n"
-                                    "━━━━━━━━━━━━━━━━━━━━━\n\n"
-                                    f"💰 Harga: *${rt_price:.3f}*\n"
-                                    f"🎯 TP1: ${tp1:.3f}\n\n"
-                                    "🛡️ *SL dipindahkan ke Entry (Break Even)*\n"
-                                    "🏆 Target selanjutnya: TP2\n\n"
-                                    "💡 Profit sebagian sudah aman!"
-                                )
-                                if self._has_telegram_service() and self.telegram_service:
-                                    await self.telegram_service.send_to_all_subscribers(bot, tp1_msg)
-                                bot_logger.info(f"✅ TP1 HIT! SL moved to BE. Price: {rt_price:.3f}")
-                            
-                            elif sl and rt_price <= sl:
-                                if trade_status == 'tp1_hit':
-                                    result_info = {'type': 'BREAK_EVEN', 'emoji': '⚖️', 'text': 'BREAK EVEN - TP1 Hit, SL at Entry'}
-                                else:
-                                    result_info = {'type': 'LOSS', 'emoji': '❌', 'text': 'STOP LOSS HIT'}
-                        
-                        elif current_signal and direction == 'SELL' and tp2 and tp1:
-                            if rt_price <= tp2:
-                                result_info = {'type': 'WIN', 'emoji': '🏆', 'text': 'TP2 HIT - FULL WIN!'}
-                            elif rt_price <= tp1 and trade_status == 'active':
-                                current_signal['status'] = 'tp1_hit'
-                                current_signal['sl_level'] = entry
-                                for cid in self.state_manager.subscribers:
-                                    us = self.state_manager.get_user_state(cid)
-                                    if us.get('active_trade'):
-                                        us['active_trade']['status'] = 'tp1_hit'
-                                        us['active_trade']['sl_level'] = entry
-                                self.state_manager.save_user_states()
-                                
-                                tp1_msg = (
-                                    "🎯 *TP1 TERCAPAI!*\n"
-                                    "━━━━━━━━━━━━━━━━━━━━━\n\n"
-                                    f"💰 Harga: *${rt_price:.3f}*\n"
-                                    f"🎯 TP1: ${tp1:.3f}\n\n"
-                                    "🛡️ *SL dipindahkan ke Entry (Break Even)*\n"
-                                    "🏆 Target selanjutnya: TP2\n\n"
-                                    "💡 Profit sebagian sudah aman!"
-                                )
-                                if self._has_telegram_service() and self.telegram_service:
-                                    await self.telegram_service.send_to_all_subscribers(bot, tp1_msg)
-                                bot_logger.info(f"✅ TP1 HIT! SL moved to BE. Price: {rt_price:.3f}")
-                            
-                            elif sl and rt_price >= sl:
-                                if trade_status == 'tp1_hit':
-                                    result_info = {'type': 'BREAK_EVEN', 'emoji': '⚖️', 'text': 'BREAK EVEN - TP1 Hit, SL at Entry'}
-                                else:
-                                    result_info = {'type': 'LOSS', 'emoji': '❌', 'text': 'STOP LOSS HIT'}
-                        
-                        # PER-USER MANUAL SIGNAL SL/TP detection (if NO global signal)
-                        if not current_signal:
-                            for cid in self.state_manager.subscribers:
-                                user_state = self.state_manager.get_user_state(cid)
-                                active_trade = user_state.get('active_trade')
-                                if not active_trade:
-                                    continue
-                                
-                                u_dir = active_trade.get('direction')
-                                u_entry = active_trade.get('entry_price')
-                                u_sl = active_trade.get('sl_level')
-                                u_tp1 = active_trade.get('tp1_level')
-                                u_tp2 = active_trade.get('tp2_level')
-                                u_status = active_trade.get('status', 'active')
-                                
-                                u_result = None
-                                
-                                # BUY signal SL/TP detection
-                                if u_dir == 'BUY':
-                                    if rt_price >= u_tp2:
-                                        u_result = {'type': 'WIN', 'emoji': '🏆', 'text': 'TP2 HIT - FULL WIN!'}
-                                    elif rt_price >= u_tp1 and u_status == 'active':
-                                        active_trade['status'] = 'tp1_hit'
-                                        active_trade['sl_level'] = u_entry
-                                        self.state_manager.save_user_states()
-                                        if self._has_telegram_service() and self.telegram_service:
-                                            await self.telegram_service.send_to_one_subscriber(bot, cid, "🎯 *TP1 TERCAPAI!*\n━━━━━━━━━━━━━━━━━━━━━\n\n💰 Harga: *${rt_price:.3f}*\n🎯 TP1: ${u_tp1:.3f}\n\n🛡️ *SL dipindahkan ke Entry (Break Even)*\n🏆 Target selanjutnya: TP2\n\n💡 Profit sebagian sudah aman!")
-                                        bot_logger.info(f"✅ User {cid} TP1 HIT! SL moved to BE. Price: {rt_price:.3f}")
-                                    elif u_sl and rt_price <= u_sl:
-                                        if u_status == 'tp1_hit':
-                                            u_result = {'type': 'BREAK_EVEN', 'emoji': '⚖️', 'text': 'BREAK EVEN - TP1 Hit, SL at Entry'}
-                                        else:
-                                            u_result = {'type': 'LOSS', 'emoji': '❌', 'text': 'STOP LOSS HIT'}
-                                
-                                # SELL signal SL/TP detection
-                                elif u_dir == 'SELL':
-                                    if rt_price <= u_tp2:
-                                        u_result = {'type': 'WIN', 'emoji': '🏆', 'text': 'TP2 HIT - FULL WIN!'}
-                                    elif rt_price <= u_tp1 and u_status == 'active':
-                                        active_trade['status'] = 'tp1_hit'
-                                        active_trade['sl_level'] = u_entry
-                                        self.state_manager.save_user_states()
-                                        if self._has_telegram_service() and self.telegram_service:
-                                            await self.telegram_service.send_to_one_subscriber(bot, cid, "🎯 *TP1 TERCAPAI!*\n━━━━━━━━━━━━━━━━━━━━━\n\n💰 Harga: *${rt_price:.3f}*\n🎯 TP1: ${u_tp1:.3f}\n\n🛡️ *SL dipindahkan ke Entry (Break Even)*\n🏆 Target selanjutnya: TP2\n\n💡 Profit sebagian sudah aman!")
-                                        bot_logger.info(f"✅ User {cid} TP1 HIT! SL moved to BE. Price: {rt_price:.3f}")
-                                    elif u_sl and rt_price >= u_sl:
-                                        if u_status == 'tp1_hit':
-                                            u_result = {'type': 'BREAK_EVEN', 'emoji': '⚖️', 'text': 'BREAK EVEN - TP1 Hit, SL at Entry'}
-                                        else:
-                                            u_result = {'type': 'LOSS', 'emoji': '❌', 'text': 'STOP LOSS HIT'}
-                                
-                                # Send result to user if trade closed
-                                if u_result:
-                                    self.state_manager.update_trade_result(u_result['type'], cid)
-                                    duration = 0
-                                    if u_entry and 'start_time_utc' in active_trade:
-                                        try:
-                                            start = active_trade['start_time_utc']
-                                            if isinstance(start, str):
-                                                start = datetime.datetime.fromisoformat(start)
-                                            duration = round((datetime.datetime.now(datetime.timezone.utc) - start).total_seconds() / 60, 1)
-                                        except:
-                                            duration = 0
-                                    
-                                    result_text = f"{u_result['emoji']} *{u_result['text']}*\n━━━━━━━━━━━━━━━━━━━━━\n\n💵 Entry: *${u_entry:.3f}*\n💰 Exit: *${rt_price:.3f}*\n⏱️ Durasi: *{duration} menit*\n\n📊 Gunakan /stats untuk melihat statistik\n🔍 Bot kembali mencari sinyal..."
-                                    if self._has_telegram_service() and self.telegram_service:
-                                        await self.telegram_service.send_to_one_subscriber(bot, cid, result_text)
-                                    
-                                    active_trade.clear()
-                                    self.state_manager.save_user_states()
-                                    users_with_closed_trades.append(cid)
-                                    bot_logger.info(f"✅ User {cid} trade closed: {u_result['text']} @ ${rt_price:.3f}")
-                        
-                        trade_closed = False
-                        if result_info:
-                            result_emoji = result_info['emoji']
-                            result_text = result_info['text']
-                            
-                            self.state_manager.update_trade_result(result_info['type'])
-                            self.state_manager.update_last_signal_result(result_info['type'])
-                            
-                            start_time_utc = current_signal.get('start_time_utc')
-                            if start_time_utc:
-                                duration = round(
-                                    (datetime.datetime.now(datetime.timezone.utc) - start_time_utc).total_seconds() / 60,
-                                    1
-                                )
-                            else:
-                                duration = 0
-                            
-                            result_caption = (
-                                f"{result_emoji} *{result_text}*\n"
-                                f"━━━━━━━━━━━━━━━━━━━━━\n\n"
-                                f"💵 Entry: *${entry:.3f}*\n"
-                                f"💰 Exit: *${rt_price:.3f}*\n"
-                                f"⏱️ Durasi: *{duration} menit*\n\n"
-                                f"📊 Gunakan /stats untuk melihat statistik\n"
-                                f"🔍 Bot kembali mencari sinyal..."
-                            )
-                            if self._has_telegram_service() and self.telegram_service:
-                                await self.telegram_service.send_to_all_subscribers(bot, result_caption)
-                            
-                            if self.state_manager.last_signal_info:
-                                self.state_manager.last_signal_info['status'] = result_text
-                            self.state_manager.clear_current_signal()
-                            trade_closed = True
-                            self.state_manager.clear_user_tracking_messages()
-                    
-                    if trade_closed:
-                        cooldown_jitter = random.randint(30, 60)
-                        bot_logger.info(f"⏳ Trade closed, waiting {cooldown_jitter}s before searching new signal...")
-                        await asyncio.sleep(cooldown_jitter)
-                        continue
-                
-                else:
-                    # Double-check market is open before analysis
-                    if not BotConfig.is_market_open():
-                        bot_logger.debug("⏳ Market closed, skipping analysis...")
-                        await asyncio.sleep(30)
-                        continue
-                    
-                    df = await self.get_historical_data()
-                    
-                    if df is None:
-                        wait_time = 60 + random.randint(30, 60)
-                        bot_logger.warning(f"⏳ Failed to fetch data, long cooldown {wait_time}s before retry...")
-                        await asyncio.sleep(wait_time)
-                        continue
-                    
-                    bot_logger.info("🔍 Menganalisis data dari Deriv (Scalping Strategy)...")
-                    df = calculate_indicators(df)
-                    latest = df.iloc[-2]
-                    previous = df.iloc[-3]
-                    latest_close = latest['Close']
-                    
-                    bot_logger.info(f"💰 Data Terakhir XAU/USD: Close = {latest_close:.3f}")
-                    
-                    ema_med_col = BotConfig.get_ema_medium_col()
-                    rsi_col = BotConfig.get_rsi_col()
-                    adx_col = BotConfig.get_adx_col()
-                    
-                    required_cols = [ema_med_col, rsi_col, adx_col]
-                    if any(pd.isna(latest.get(col)) for col in required_cols):
-                        bot_logger.warning("⚠️ Core indicators NaN detected, waiting for more data...")
-                        await asyncio.sleep(BotConfig.ANALYSIS_INTERVAL)
-                        continue
-                    
-                    ema50_value = latest[ema_med_col]
-                    rsi_value = latest[rsi_col]
-                    adx_value = latest[adx_col]
-                    
-                    prev_rsi_value = previous[rsi_col] if rsi_col in previous.index else None
-                    
-                    if pd.isna(ema50_value) or pd.isna(rsi_value) or pd.isna(adx_value):
-                        bot_logger.warning("⚠️ Invalid indicator values, waiting...")
-                        await asyncio.sleep(BotConfig.ANALYSIS_INTERVAL)
-                        continue
-                    
-                    if prev_rsi_value is None or pd.isna(prev_rsi_value):
-                        bot_logger.warning("⚠️ Previous RSI not available, waiting...")
-                        await asyncio.sleep(BotConfig.ANALYSIS_INTERVAL)
-                        continue
-                    
-                    bot_logger.info(f"📊 Analysis: Price=${latest_close:.3f}, EMA50=${ema50_value:.3f}, RSI={rsi_value:.1f} (prev={prev_rsi_value:.1f}), ADX={adx_value:.1f}")
-                    # Update real-time indicators for /info command
-                    self.state_manager.update_current_indicators(rsi_value, ema50_value, adx_value)
-                    
-                    # Update strategy status
-                    strategy_status = self.get_strategy_status(latest_close, ema50_value, rsi_value, prev_rsi_value, adx_value)
-                    self.state_manager.update_strategy_status(strategy_status)
-                    
-                    final_signal = None
-                    
-                    if adx_value < BotConfig.ADX_FILTER_THRESHOLD:
-                        bot_logger.info(f"❌ ADX too low ({adx_value:.1f} < {BotConfig.ADX_FILTER_THRESHOLD}), skip")
-                    elif latest_close > ema50_value:
-                        rsi_was_oversold = prev_rsi_value < BotConfig.RSI_OVERSOLD
-                        rsi_exiting_oversold = rsi_value >= BotConfig.RSI_EXIT_OVERSOLD and rsi_value > prev_rsi_value
-                        
-                        if rsi_was_oversold and rsi_exiting_oversold:
-                            bot_logger.info(f"🟢 BUY Signal: Price > EMA50, RSI exiting oversold ({prev_rsi_value:.1f} → {rsi_value:.1f}), ADX={adx_value:.1f}")
-                            final_signal = 'BUY'
-                        elif rsi_was_oversold:
-                            bot_logger.info(f"⏳ BUY Setup: RSI oversold ({prev_rsi_value:.1f}), waiting for exit above {BotConfig.RSI_EXIT_OVERSOLD}")
-                    elif latest_close < ema50_value:
-                        rsi_was_overbought = prev_rsi_value > BotConfig.RSI_OVERBOUGHT
-                        rsi_exiting_overbought = rsi_value <= BotConfig.RSI_EXIT_OVERBOUGHT and rsi_value < prev_rsi_value
-                        
-                        if rsi_was_overbought and rsi_exiting_overbought:
-                            bot_logger.info(f"🔴 SELL Signal: Price < EMA50, RSI exiting overbought ({prev_rsi_value:.1f} → {rsi_value:.1f}), ADX={adx_value:.1f}")
-                            final_signal = 'SELL'
-                        elif rsi_was_overbought:
-                            bot_logger.info(f"⏳ SELL Setup: RSI overbought ({prev_rsi_value:.1f}), waiting for exit below {BotConfig.RSI_EXIT_OVERBOUGHT}")
-                    else:
-                        bot_logger.info(f"⚖️ Price = EMA50, no clear trend direction, skip")
-                    
-                    if final_signal and not self._can_generate_signal():
-                        if self.last_signal_time is not None:
-                            cooldown_left = self.signal_cooldown_seconds - (datetime.datetime.now(datetime.timezone.utc) - self.last_signal_time).total_seconds()
-                            bot_logger.info(f"⏳ Signal {final_signal} detected but COOLDOWN active ({cooldown_left:.0f}s remaining until next signal allowed)")
-                        final_signal = None
-                    
-                    if final_signal:
-                        bot_logger.info(f"✅ Sinyal {final_signal} valid ditemukan!")
-                        
-                        if final_signal == "BUY":
-                            sl = latest_close - BotConfig.FIXED_SL_USD
-                            tp1 = latest_close + BotConfig.FIXED_TP_USD
-                            tp2 = latest_close + (BotConfig.FIXED_TP_USD * 1.5)
-                            signal_emoji = "📈"
-                        else:
-                            sl = latest_close + BotConfig.FIXED_SL_USD
-                            tp1 = latest_close - BotConfig.FIXED_TP_USD
-                            tp2 = latest_close - (BotConfig.FIXED_TP_USD * 1.5)
-                            signal_emoji = "📉"
-                        
-                        title = f"{signal_emoji} SCALPING {final_signal}"
-                        start_time_utc = datetime.datetime.now(datetime.timezone.utc)
-                        
-                        temp_trade_info = {
-                            "direction": final_signal,
-                            "entry_price": latest_close,
-                            "tp1_level": tp1,
-                            "tp2_level": tp2,
-                            "sl_level": sl,
-                            "start_time_utc": start_time_utc,
-                            "status": "active"
-                        }
-                        
-                        caption = (
-                            f"{signal_emoji} *SCALPING {final_signal} XAU/USD*\n"
-                            f"━━━━━━━━━━━━━━━━━━━━━\n"
-                            f"🌐 _Strategi: EMA50 + RSI(3) + ADX(55)_\n\n"
-                            f"🕐 Waktu: *{start_time_utc.astimezone(BotConfig.WIB_TZ).strftime('%H:%M:%S WIB')}*\n"
-                            f"💵 Entry: *${latest_close:.3f}*\n\n"
-                            f"━━━━━━━━━━━━━━━━━━━━━\n"
-                            f"📋 *KONDISI ENTRY*\n"
-                            f"📊 EMA50: ${ema50_value:.3f}\n"
-                            f"📈 RSI(3): {rsi_value:.1f}\n"
-                            f"💪 ADX(55): {adx_value:.1f}\n\n"
-                            f"━━━━━━━━━━━━━━━━━━━━━\n"
-                            f"🎯 *TARGET & PROTEKSI*\n"
-                            f"🎯 TP1: *${tp1:.3f}* (+${abs(tp1-latest_close):.2f})\n"
-                            f"🏆 TP2: *${tp2:.3f}* (+${abs(tp2-latest_close):.2f})\n"
-                            f"🛑 SL: *${sl:.3f}* (-${abs(sl-latest_close):.2f})\n\n"
-                            f"📡 Tracking aktif hingga TP/SL tercapai"
-                        )
-                        
-                        photo_sent = False
-                        if self._has_telegram_service() and self.telegram_service:
-                            await self.telegram_service.send_to_all_subscribers(bot, caption)
-                            photo_sent = True
-                        
-                        if photo_sent:
-                            self._record_signal(temp_trade_info)
-                            self.state_manager.update_current_signal(temp_trade_info)
-                            self.state_manager.set_active_trade_for_subscribers(temp_trade_info)
-                            
-                            self.state_manager.update_last_signal_info({
-                                'direction': final_signal,
-                                'entry_price': latest_close,
-                                'tp1_level': tp1,
-                                'tp2_level': tp2,
-                                'sl_level': sl,
-                                'time': start_time_utc.astimezone(BotConfig.WIB_TZ).strftime('%H:%M:%S WIB'),
-                                'status': 'AKTIF'
-                            })
-                            self.state_manager.clear_user_tracking_messages()
-                            
-                            # Log signal distribution
-                            subscriber_count = len(self.state_manager.subscribers)
-                            bot_logger.info(f"✅ Sinyal {final_signal} dikirim ke {subscriber_count} subscribers! Mode pelacakan aktif.")
-                            for sub_id in self.state_manager.subscribers:
-                                bot_logger.debug(f"  → Sinyal dikirim ke user: {sub_id}")
-                            
-                            rt_price = await self.get_realtime_price()
-                            if rt_price and self._has_telegram_service() and self.telegram_service:
-                                await self.telegram_service.send_tracking_update(bot, rt_price, self.state_manager.current_signal)
-                    else:
-                        bot_logger.info("🔍 Belum ada kondisi entry scalping. Terus mencari...")
-                
-                if not self.state_manager.current_signal:
-                    wait_time = BotConfig.ANALYSIS_INTERVAL + random.randint(-BotConfig.ANALYSIS_JITTER, BotConfig.ANALYSIS_JITTER)
-                    bot_logger.info(f"⏳ Menunggu {wait_time} detik sebelum analisis berikutnya...")
-                    await asyncio.sleep(wait_time)
+                    continue
             
-            except asyncio.CancelledError:
-                bot_logger.info("Signal engine cancelled")
-                break
-            except asyncio.TimeoutError:
-                bot_logger.error("⚠️ TIMEOUT: Proses terlalu lama")
-                await asyncio.sleep(BotConfig.ANALYSIS_INTERVAL)
-            except Exception as e:
-                bot_logger.critical(f"❌ Error kritis: {e}", exc_info=True)
-                await asyncio.sleep(BotConfig.ANALYSIS_INTERVAL)
+            # The trace starts at the tick that closed the last candle, so the root span
+            # measures closing tick -> last subscriber delivery
+            feed = self.deriv_ws.get_feed(self.symbol)
+            closing_tick = feed.bar_close_tick if feed else None
+            fetch_started = time.time()
+            df = await self.get_historical_data()
+            if df is None:
+                wait_time = 60 + random.randint(30, 60)
+                bot_logger.warning(f"⏳ Failed to fetch data, long cooldown {wait_time}s before retry...")
+                await asyncio.sleep(wait_time)
+                continue
+            self._offer(self._bar_queue, (df, closing_tick, fetch_started, time.time()))
+            
+            if tracking:
+                await asyncio.sleep(BotConfig.TRACKING_UPDATE_INTERVAL)
+            else:
+                wait_time = BotConfig.ANALYSIS_INTERVAL + random.randint(-BotConfig.ANALYSIS_JITTER, BotConfig.ANALYSIS_JITTER)
+                bot_logger.info(f"⏳ Menunggu {wait_time} detik sebelum analisis berikutnya...")
+                await asyncio.sleep(wait_time)
+    
+    async def _analyzer_task(self, health: TaskHealth) -> None:
+        """Indicators, strategies and shadow book for each fetched bar; publishes new signals"""
+        while True:
+            df, closing_tick, fetch_started, fetched_at = await self._bar_queue.get()
+            health.beat()
+            if self._has_active_trades():
+                # Only the shadow variants act on bars while the live signal is tracked
+                df = await self.analyze(df)
+                if df is not None and self.shadow:
+                    await self.event_bus.publish(BarClosed(self.symbol, int(df.index[-2].timestamp()), df))
+                continue
+            
+            cycle = tracing.start_trace("signal_cycle", start=closing_tick[1] if closing_tick else None,
+                                        symbol=self.symbol)
+            if closing_tick:
+                tracing.record_span("tick_to_analysis", closing_tick[1], fetch_started, tick_epoch=closing_tick[0])
+            tracing.record_span("candle_fetch", fetch_started, fetched_at)
+            handed_off = False
+            try:
+                handed_off = await self._analyze_bar(df, cycle)
+            finally:
+                if handed_off:
+                    tracing.hand_off(cycle)
+                else:
+                    tracing.end_trace(cycle)
+    
+    async def _analyze_bar(self, df: pd.DataFrame, cycle) -> bool:
+        """True if a signal was published; its delivery then ends the `cycle` trace"""
+        bot_logger.info("🔍 Menganalisis data dari Deriv (Scalping Strategy)...")
+        analysis_started = time.perf_counter()
+        analysis_span = tracing.start_span("analysis")
+        df = await self.analyze(df)
+        if df is None:
+            bot_logger.warning("⚠️ Analysis dropped (superseded or past deadline), waiting...")
+            return False
+        result = self.strategies.on_bar(df)
+        await self.event_bus.publish(BarClosed(self.symbol, self.strategies.cache.bar_epoch, df))
+        if not result.ready:
+            bot_logger.warning("⚠️ Core indicators NaN detected, waiting for more data...")
+            return False
         
-        bot_logger.info("Signal engine shutting down...")
-        listen_task.cancel()
-        try:
-            await listen_task
-        except asyncio.CancelledError:
-            pass
+        bars = self.strategies.cache
+        latest_close = bars.value('Close')
+        ema50_value = bars.value(BotConfig.get_ema_medium_col())
+        rsi_value = bars.value(BotConfig.get_rsi_col())
+        prev_rsi_value = bars.value(BotConfig.get_rsi_col(), 1)
+        adx_value = bars.value(BotConfig.get_adx_col())
+        bot_logger.info(f"💰 Data Terakhir {self.display_name}: Close = {latest_close:.3f}")
+        bot_logger.info(f"📊 Analysis: Price=${latest_close:.3f}, EMA50=${ema50_value:.3f}, RSI={rsi_value:.1f} (prev={prev_rsi_value:.1f}), ADX={adx_value:.1f}")
+        # Update real-time indicators for /info command
+        self.state_manager.update_current_indicators(rsi_value, ema50_value, adx_value)
+        self.state_manager.update_strategy_status(self._strategy_status(result))
+        
+        if result.reason:
+            bot_logger.info(result.reason)
+        final_signal = result.signal
         
-        if self.deriv_ws:
-            await self.deriv_ws.close()
+        tick_signal = self.strategies.pop_tick_signal()
+        if not final_signal and tick_signal:
+            final_signal, latest_close = tick_signal
+            bot_logger.info(f"⚡ {final_signal} from {self.strategies.selected} on_tick @ {latest_close:.3f}")
         
-        bot_logger.info("Signal engine stopped")
+        if final_signal and not self._can_generate_signal():
+            if self.last_signal_time is not None:
+                cooldown_left = self.signal_cooldown_seconds - (datetime.datetime.now(datetime.timezone.utc) - self.last_signal_time).total_seconds()
+                bot_logger.info(f"⏳ Signal {final_signal} detected but COOLDOWN active ({cooldown_left:.0f}s remaining until next signal allowed)")
+            final_signal = None
+        
+        metrics.ANALYSIS_SECONDS.observe(time.perf_counter() - analysis_started)
+        analysis_span.end()
+        cycle.set("signal", final_signal)
+        
+        if final_signal:
+            return await self._publish_signal(final_signal, latest_close, ema50_value, rsi_value, adx_value, cycle)
+        bot_logger.info("🔍 Belum ada kondisi entry scalping. Terus mencari...")
+        return False
+    
+    async def _publish_signal(self, final_signal: str, latest_close: float, ema50_value: float,
+                              rsi_value: float, adx_value: float, cycle=None) -> bool:
+        bot_logger.info(f"✅ Sinyal {final_signal} valid ditemukan!")
+        signal_decided_at = time.perf_counter()
+        if not self._has_telegram_service() or not self.telegram_service:
+            return False
+        
+        sl_distance, tp_distance = self.spec['sl'], self.spec['tp']
+        if final_signal == "BUY":
+            sl = latest_close - sl_distance
+            tp1 = latest_close + tp_distance
+            tp2 = latest_close + (tp_distance * 1.5)
+        else:
+            sl = latest_close + sl_distance
+            tp1 = latest_close - tp_distance
+            tp2 = latest_close - (tp_distance * 1.5)
+        
+        start_time_utc = datetime.datetime.now(datetime.timezone.utc)
+        
+        temp_trade_info = {
+            "direction": final_signal,
+            "entry_price": latest_close,
+            "tp1_level": tp1,
+            "tp2_level": tp2,
+            "sl_level": sl,
+            "start_time_utc": start_time_utc,
+            "status": "active"
+        }
+        
+        # State changes in memory here; the persistence consumer writes the files
+        self._record_signal(temp_trade_info)
+        self.state_manager.update_current_signal(temp_trade_info, save=False)
+        self.state_manager.set_active_trade_for_subscribers(temp_trade_info, save=False)
+        self.state_manager.update_last_signal_info({
+            'direction': final_signal,
+            'entry_price': latest_close,
+            'tp1_level': tp1,
+            'tp2_level': tp2,
+            'sl_level': sl,
+            'time': start_time_utc.astimezone(BotConfig.WIB_TZ).strftime('%H:%M:%S WIB'),
+            'status': 'AKTIF'
+        })
+        self.state_manager.clear_user_tracking_messages(save=False)
+        await self.event_bus.publish(SignalOpened(
+            self.symbol, temp_trade_info, {'ema': ema50_value, 'rsi': rsi_value, 'adx': adx_value}, signal_decided_at,
+            trace=cycle
+        ))
+        
+        # Log signal distribution
+        subscriber_count = len(self.state_manager.subscribers)
+        bot_logger.info(f"✅ Sinyal {final_signal} dikirim ke {subscriber_count} subscribers! Mode pelacakan aktif.")
+        for sub_id in self.state_manager.subscribers:
+            bot_logger.debug(f"  → Sinyal dikirim ke user: {sub_id}")
+        
+        rt_price = await self.get_realtime_price()
+        if rt_price:
+            self._offer(self._tracking_queue, rt_price)
+        return True
+    
+    async def _trade_monitor_task(self, health: TaskHealth) -> None:
+        """TP/SL resolution of the global signal and of per-user manual trades"""
+        while True:
+            rt_price = await self._price_queue.get()
+            health.beat()
+            if await self._check_trades(rt_price):
+                cooldown_jitter = random.randint(30, 60)
+                bot_logger.info(f"⏳ Trade closed, waiting {cooldown_jitter}s before searching new signal...")
+                self._search_resumes_at = time.time() + cooldown_jitter
+    
+    async def _check_trades(self, rt_price: float) -> bool:
+        """Publishes TP1Hit/TradeClosed; returns True if the global signal was closed"""
+        current_signal = self.state_manager.current_signal
+        
+        # GLOBAL SIGNAL result tracking
+        if current_signal:
+            direction = current_signal.get('direction')
+            tp1 = current_signal.get('tp1_level')
+            tp2 = current_signal.get('tp2_level')
+            sl = current_signal.get('sl_level')
+            trade_status = current_signal.get('status', 'active')
+            if direction not in ('BUY', 'SELL') or not tp1 or not tp2:
+                return False
+            # Distance in the trade's favour, so BUY and SELL share the checks
+            sign = 1 if direction == 'BUY' else -1
+            result = None
+            if (rt_price - tp2) * sign >= 0:
+                result = RESULT_WIN
+            elif (rt_price - tp1) * sign >= 0 and trade_status == 'active':
+                self._move_signal_sl_to_entry()
+                await self.event_bus.publish(TP1Hit(self.symbol, rt_price, tp1))
+                bot_logger.info(f"✅ TP1 HIT! SL moved to BE. Price: {rt_price:.3f}")
+            elif sl and (rt_price - sl) * sign <= 0:
+                result = RESULT_BREAK_EVEN if trade_status == 'tp1_hit' else RESULT_LOSS
+            if result is None:
+                return False
+            await self._close_global_signal(result, rt_price)
+            return True
+        
+        # PER-USER MANUAL SIGNAL SL/TP detection (if NO global signal)
+        for cid in self.state_manager.subscribers:
+            user_state = self.state_manager.get_user_state(cid)
+            active_trade = user_state.active_trade
+            if not active_trade or active_trade.direction == Direction.NONE:
+                continue
+            
+            sign = 1 if active_trade.direction == Direction.BUY else -1
+            u_result = None
+            if (rt_price - active_trade.tp2_level) * sign >= 0:
+                u_result = RESULT_WIN
+            elif (rt_price - active_trade.tp1_level) * sign >= 0 and active_trade.status == TradeStatus.ACTIVE:
+                active_trade.move_sl_to_entry()
+                await self.event_bus.publish(TP1Hit(self.symbol, rt_price, active_trade.tp1_level, chat_id=cid))
+                bot_logger.info(f"✅ User {cid} TP1 HIT! SL moved to BE. Price: {rt_price:.3f}")
+            elif active_trade.sl_level and (rt_price - active_trade.sl_level) * sign <= 0:
+                u_result = RESULT_BREAK_EVEN if active_trade.status == TradeStatus.TP1_HIT else RESULT_LOSS
+            
+            # Send result to user if trade closed
+            if u_result:
+                entry_price = active_trade.entry_price
+                duration = 0
+                if entry_price and active_trade.start_time is not None:
+                    duration = round((time.time() - active_trade.start_time) / 60, 1)
+                self.state_manager.update_trade_result(u_result, cid, save=False)
+                await self.event_bus.publish(TradeClosed(self.symbol, u_result, entry_price, rt_price, duration,
+                                                         chat_id=cid))
+                bot_logger.info(f"✅ User {cid} trade closed: {RESULT_INFO[u_result]['text']} @ ${rt_price:.3f}")
+        return False
+    
+    async def _tracker_task(self, health: TaskHealth) -> None:
+        """Queue live tracking messages on the telegram consumer, at most one at a time; while
+        one waits, newer prices only replace the price it will be sent with"""
+        while True:
+            rt_price = await self._tracking_queue.get()
+            health.beat()
+            current_signal = self.state_manager.current_signal
+            self.tracking_counter += 1
+            market_note = "" if self._market_open.is_set() else " (Market Closed)"
+            if current_signal:
+                bot_logger.info(f"📍 Tracking #{self.tracking_counter}{market_note} {current_signal.get('direction')}: "
+                                f"Price=${rt_price:.3f} Entry=${current_signal.get('entry_price'):.3f} "
+                                f"SL=${current_signal.get('sl_level'):.3f}")
+            else:
+                # Manual per-user signals - track individual active trades
+                bot_logger.info(f"📍 Tracking #{self.tracking_counter}{market_note} - Per-user tracking (manual signals)")
+            
+            if not (self._has_telegram_service() and self.telegram_service):
+                bot_logger.warning("⚠️ Telegram service not available for tracking")
+                continue
+            self._tracking_price = rt_price
+            if not self._tracking_queued:
+                self._tracking_queued = True
+                await self.event_bus.publish(TrackingUpdate(self.symbol, rt_price))
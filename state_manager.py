@@ -1,108 +1,113 @@
+import asyncio
+import itertools
 import json
 import os
 import datetime
 import logging
+import threading
+import time
 from typing import Optional, Any, Union
 
 from config import BotConfig
+from user_state import UserState, Result, ActiveTrade
+from event_bus import SignalOpened, TP1Hit, TradeClosed
+import metrics
 
 
 logger = logging.getLogger("StateManager")
 
 
 class StateManager:
-    def __init__(self):
-        self.user_states: dict[str, dict] = {}
+    def __init__(self, file_suffix: str = ''):
+        # Secondary symbols keep their own files, e.g. user_states_frxXAGUSD.json
+        self.file_suffix = file_suffix
+        self.user_states: dict[str, UserState] = {}
         self.subscribers: set[str] = set()
         self.current_signal: dict = {}
         self.last_signal_info: dict = {}
         self.current_indicators: dict = {}  # Real-time RSI, EMA, ADX
         self.strategy_status: dict = {}  # Current strategy status
         self.signal_history: list[dict] = []
+        # Trade-event saves are written from a worker thread while other saves run on the
+        # loop: writes are serialized, and an older snapshot never replaces a newer one
+        self._write_lock = threading.Lock()
+        self._snapshots = itertools.count()
+        self._written: dict[str, int] = {}
         self._load_signal_history()
     
+    def _path(self, filename: str) -> str:
+        if not self.file_suffix:
+            return filename
+        root, ext = os.path.splitext(filename)
+        return f"{root}_{self.file_suffix}{ext}"
+    
     @staticmethod
-    def get_default_user_state() -> dict:
-        return {
-            'win_count': 0,
-            'loss_count': 0,
-            'be_count': 0,
-            'active_trade': {},
-            'tracking_message_id': None,
-            'last_signal_time': None,
-            'signal_history': []
-        }
+    def get_default_user_state() -> UserState:
+        return UserState()
     
-    def get_user_state(self, chat_id: str | int) -> dict:
+    def get_user_state(self, chat_id: str | int) -> UserState:
         chat_id = str(chat_id)
         if chat_id not in self.user_states:
             self.user_states[chat_id] = self.get_default_user_state()
         return self.user_states[chat_id]
     
+    def _write_json(self, filename: str, data: Any, snapshot: int, indent: Optional[int] = None) -> None:
+        """Atomically replace `filename` with `data`, taken as snapshot number `snapshot`"""
+        path = self._path(filename)
+        with self._write_lock:
+            if self._written.get(path, -1) > snapshot:
+                return
+            temp_file = f"{path}.tmp"
+            with open(temp_file, 'w') as f:
+                f.write(json.dumps(data, indent=indent))
+            os.replace(temp_file, path)
+            self._written[path] = snapshot
+    
+    def _user_states_snapshot(self) -> dict:
+        # Subscribers of the same broadcast signal hold identical history records; the
+        # memo builds each record's dict once per save instead of once per user
+        history_memo = {}
+        return {chat_id: state.to_dict(history_memo) for chat_id, state in self.user_states.items()}
+    
     def save_user_states(self) -> None:
+        started = time.perf_counter()
         try:
-            states_to_save = {}
-            for chat_id, state in self.user_states.items():
-                state_copy = state.copy()
-                if state_copy.get('active_trade') and 'start_time_utc' in state_copy['active_trade']:
-                    trade = state_copy['active_trade'].copy()
-                    if isinstance(trade.get('start_time_utc'), datetime.datetime):
-                        trade['start_time_utc'] = trade['start_time_utc'].isoformat()
-                    state_copy['active_trade'] = trade
-                # Ensure signal_history timestamps are serialized
-                if state_copy.get('signal_history'):
-                    sig_history = []
-                    for sig in state_copy['signal_history']:
-                        sig_copy = sig.copy()
-                        if isinstance(sig_copy.get('timestamp'), datetime.datetime):
-                            sig_copy['timestamp'] = sig_copy['timestamp'].isoformat()
-                        if isinstance(sig_copy.get('closed_at'), datetime.datetime):
-                            sig_copy['closed_at'] = sig_copy['closed_at'].isoformat()
-                        sig_history.append(sig_copy)
-                    state_copy['signal_history'] = sig_history
-                states_to_save[chat_id] = state_copy
-            
-            temp_file = f"{BotConfig.USER_STATES_FILENAME}.tmp"
-            with open(temp_file, 'w') as f:
-                json.dump(states_to_save, f, indent=2)
-            os.replace(temp_file, BotConfig.USER_STATES_FILENAME)
+            # json.dumps without indent runs entirely in the C encoder; indent=2 falls back to
+            # the pure-Python one and is ~4x slower at tens of thousands of users
+            self._write_json(BotConfig.USER_STATES_FILENAME, self._user_states_snapshot(), next(self._snapshots))
+            metrics.STATE_SAVE_SECONDS.labels("user_states").observe(time.perf_counter() - started)
         except Exception as e:
             logger.error(f"Failed to save user states: {e}")
     
     def load_user_states(self) -> None:
         try:
-            if os.path.exists(BotConfig.USER_STATES_FILENAME):
-                with open(BotConfig.USER_STATES_FILENAME, 'r') as f:
+            if os.path.exists(self._path(BotConfig.USER_STATES_FILENAME)):
+                with open(self._path(BotConfig.USER_STATES_FILENAME), 'r') as f:
                     loaded = json.load(f)
                 for chat_id, state in loaded.items():
-                    if state.get('active_trade') and 'start_time_utc' in state['active_trade']:
-                        try:
-                            state['active_trade']['start_time_utc'] = datetime.datetime.fromisoformat(
-                                state['active_trade']['start_time_utc']
-                            )
-                        except (ValueError, TypeError):
-                            pass
-                    # Migration: ensure signal_history field exists
-                    if 'signal_history' not in state:
-                        state['signal_history'] = []
-                    self.user_states[chat_id] = state
+                    try:
+                        self.user_states[chat_id] = UserState.from_dict(state)
+                    except (KeyError, ValueError, TypeError) as e:
+                        logger.error(f"Skipping unreadable state for {chat_id}: {e}")
                 logger.info(f"Loaded states for {len(self.user_states)} users")
         except Exception as e:
             logger.error(f"Failed to load user states: {e}")
     
     def save_subscribers(self) -> None:
+        started = time.perf_counter()
         try:
-            temp_file = f"{BotConfig.SUBSCRIBERS_FILENAME}.tmp"
+            temp_file = f"{self._path(BotConfig.SUBSCRIBERS_FILENAME)}.tmp"
             with open(temp_file, 'w') as f:
                 json.dump(list(self.subscribers), f)
-            os.replace(temp_file, BotConfig.SUBSCRIBERS_FILENAME)
+            os.replace(temp_file, self._path(BotConfig.SUBSCRIBERS_FILENAME))
+            metrics.STATE_SAVE_SECONDS.labels("subscribers").observe(time.perf_counter() - started)
         except Exception as e:
             logger.error(f"Failed to save subscribers: {e}")
     
     def load_subscribers(self) -> None:
         try:
-            if os.path.exists(BotConfig.SUBSCRIBERS_FILENAME):
-                with open(BotConfig.SUBSCRIBERS_FILENAME, 'r') as f:
+            if os.path.exists(self._path(BotConfig.SUBSCRIBERS_FILENAME)):
+                with open(self._path(BotConfig.SUBSCRIBERS_FILENAME), 'r') as f:
                     self.subscribers = set(json.load(f))
                 logger.info(f"Loaded {len(self.subscribers)} subscribers")
         except Exception as e:
@@ -124,73 +129,45 @@ class StateManager:
     def reset_user_data(self, chat_id: str | int) -> str:
         chat_id = str(chat_id)
         user_state = self.get_user_state(chat_id)
-        old_stats = f"W:{user_state['win_count']} L:{user_state['loss_count']} BE:{user_state['be_count']}"
+        old_stats = f"W:{user_state.win_count} L:{user_state.loss_count} BE:{user_state.be_count}"
         
-        user_state['win_count'] = 0
-        user_state['loss_count'] = 0
-        user_state['be_count'] = 0
-        user_state['active_trade'] = {}
-        user_state['tracking_message_id'] = None
-        user_state['signal_history'] = []
+        user_state.reset()
         
         self.save_user_states()
         
         return old_stats
     
-    def update_trade_result(self, result_type: str, chat_id: Optional[Union[str, int]] = None) -> None:
+    def update_trade_result(self, result_type: str, chat_id: Optional[Union[str, int]] = None,
+                            save: bool = True) -> None:
         # If specific chat_id provided, update only that user; otherwise update all
         cids_to_update = [str(chat_id)] if chat_id else self.subscribers
         
+        result = Result[result_type]
+        closed_at = datetime.datetime.now(datetime.timezone.utc).timestamp()
         for cid in cids_to_update:
             us = self.get_user_state(cid)
-            if us.get('active_trade'):
-                if result_type == 'WIN':
-                    us['win_count'] += 1
-                elif result_type == 'LOSS':
-                    us['loss_count'] += 1
-                elif result_type == 'BREAK_EVEN':
-                    us['be_count'] += 1
-                us['active_trade'] = {}
-                us['tracking_message_id'] = None
-                
-                # Update last signal in user's signal history
-                if us.get('signal_history'):
-                    us['signal_history'][-1]['result'] = result_type
-                    us['signal_history'][-1]['closed_at'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
-        self.save_user_states()
+            if us.active_trade:
+                us.record_result(result, closed_at)
+        if save:
+            self.save_user_states()
     
-    def set_active_trade_for_subscribers(self, trade_info: dict) -> None:
+    def set_active_trade_for_subscribers(self, trade_info: dict, save: bool = True) -> None:
+        timestamp = datetime.datetime.now(datetime.timezone.utc).timestamp()
         for cid in self.subscribers:
-            us = self.get_user_state(cid)
-            us['active_trade'] = trade_info.copy()
-            us['tracking_message_id'] = None
-            
-            # Add signal to user's signal history
-            signal_entry = {
-                'id': len(us.get('signal_history', [])) + 1,
-                'direction': trade_info.get('direction'),
-                'entry_price': trade_info.get('entry_price'),
-                'tp1': trade_info.get('tp1_level'),
-                'tp2': trade_info.get('tp2_level'),
-                'sl': trade_info.get('sl_level'),
-                'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
-                'result': 'PENDING'
-            }
-            if 'signal_history' not in us:
-                us['signal_history'] = []
-            us['signal_history'].append(signal_entry)
-            if len(us['signal_history']) > 500:
-                us['signal_history'] = us['signal_history'][-500:]
-        self.save_user_states()
+            self.get_user_state(cid).start_trade(trade_info, timestamp=timestamp)
+        if save:
+            self.save_user_states()
     
-    def clear_user_tracking_messages(self) -> None:
+    def clear_user_tracking_messages(self, save: bool = True) -> None:
         for chat_id in self.subscribers:
-            user_state = self.get_user_state(chat_id)
-            user_state['tracking_message_id'] = None
-        self.save_user_states()
+            self.get_user_state(chat_id).tracking_message_id = None
+        if save:
+            self.save_user_states()
     
-    def update_current_signal(self, signal_info: dict) -> None:
+    def update_current_signal(self, signal_info: dict, save: bool = True) -> None:
         self.current_signal = signal_info
+        if save:
+            self.save_current_signal()
     
     def update_current_indicators(self, rsi: float, ema: float, adx: float) -> None:
         """Store current indicator values for real-time display"""
@@ -205,71 +182,41 @@ class StateManager:
         """Update strategy status from signal engine"""
         self.strategy_status = status_info
     
-    def determine_strategy_status(self, price: float, rsi: float, prev_rsi: float, ema: float, adx: float) -> dict:
-        """Determine current strategy status based on market conditions"""
-        status_key = "TREND WEAK"
-        status_display = "⚠️ NO TRADE — Trend Lemah (ADX < 25)"
-        condition_text = f"Trend lemah / sideways — ADX: {adx:.1f}"
-        emoji = "⚠️"
-        
-        if adx > 25:  # ADX threshold = 25 (same as filter)
-            has_active_position = bool(getattr(self, 'current_signal', {}))
-            
-            if has_active_position:
-                status_key = "POSITION ACTIVE"
-                status_display = "🔥 POSITION ACTIVE"
-                condition_text = "Ada sinyal aktif yang dipantau TP / SL"
-                emoji = "🔥"
-            else:
-                price_above_ema = price > ema
-                price_below_ema = price < ema
-                
-                rsi_oversold = rsi < 30
-                rsi_overbought = rsi > 70
-                prev_rsi_oversold = prev_rsi < 30
-                prev_rsi_overbought = prev_rsi > 70
-                
-                # BUY SETUP: Price > EMA, RSI exiting oversold, ADX strong
-                if price_above_ema:
-                    if prev_rsi_oversold and rsi >= 30 and rsi > prev_rsi:
-                        status_key = "BUY SETUP"
-                        status_display = "🟢 BUY SETUP (Bullish Trend Valid)"
-                        condition_text = "Pullback selesai — menunggu trigger BUY"
-                        emoji = "🟢"
-                    else:
-                        status_key = "WAITING PULLBACK"
-                        status_display = "⏳ WAITING PULLBACK"
-                        condition_text = "Bullish tapi RSI belum oversold — menunggu koreksi"
-                        emoji = "⏳"
-                
-                # SELL SETUP: Price < EMA, RSI exiting overbought, ADX strong
-                elif price_below_ema:
-                    if prev_rsi_overbought and rsi <= 70 and rsi < prev_rsi:
-                        status_key = "SELL SETUP"
-                        status_display = "🔴 SELL SETUP (Bearish Trend Valid)"
-                        condition_text = "Momentum turun — menunggu trigger SELL"
-                        emoji = "🔴"
-                    else:
-                        status_key = "WAITING PULLBACK"
-                        status_display = "⏳ WAITING PULLBACK"
-                        condition_text = "Bearish tapi RSI belum overbought — menunggu koreksi"
-                        emoji = "⏳"
-                else:
-                    # Price = EMA
-                    status_key = "WAITING PULLBACK"
-                    status_display = "⏳ WAITING PULLBACK"
-                    condition_text = "Harga = EMA — menunggu break direction"
-                    emoji = "⏳"
-        
+    def clear_current_signal(self, save: bool = True) -> None:
+        self.current_signal = {}
+        if save:
+            self.save_current_signal()
+    
+    def _current_signal_snapshot(self, checked_until: Optional[float] = None) -> dict:
+        if not self.current_signal:
+            return {}
         return {
-            'key': status_key,
-            'display': status_display,
-            'condition': condition_text,
-            'emoji': emoji
+            'signal': ActiveTrade.from_dict(self.current_signal).to_dict(),
+            'checked_until': checked_until or time.time(),
         }
     
-    def clear_current_signal(self) -> None:
-        self.current_signal = {}
+    def save_current_signal(self, checked_until: Optional[float] = None) -> None:
+        """Persist the open global signal; `checked_until` is the epoch its path was tracked to"""
+        try:
+            self._write_json(BotConfig.CURRENT_SIGNAL_FILENAME, self._current_signal_snapshot(checked_until),
+                             next(self._snapshots))
+        except Exception as e:
+            logger.error(f"Failed to save current signal: {e}")
+    
+    def load_current_signal(self) -> tuple[dict, Optional[float]]:
+        """(signal_info, checked_until) as saved by save_current_signal(); ({}, None) if none is open"""
+        try:
+            if os.path.exists(self._path(BotConfig.CURRENT_SIGNAL_FILENAME)):
+                with open(self._path(BotConfig.CURRENT_SIGNAL_FILENAME), 'r') as f:
+                    data = json.load(f)
+                if data.get('signal'):
+                    trade = ActiveTrade.from_dict(data['signal'])
+                    signal = trade.to_dict()
+                    signal['start_time_utc'] = trade.start_time_utc
+                    return signal, data.get('checked_until')
+        except Exception as e:
+            logger.error(f"Failed to load current signal: {e}")
+        return {}, None
     
     def update_last_signal_info(self, info: dict) -> None:
         self.last_signal_info.clear()
@@ -277,8 +224,8 @@ class StateManager:
     
     def _load_signal_history(self) -> None:
         try:
-            if os.path.exists(BotConfig.SIGNAL_HISTORY_FILENAME):
-                with open(BotConfig.SIGNAL_HISTORY_FILENAME, 'r') as f:
+            if os.path.exists(self._path(BotConfig.SIGNAL_HISTORY_FILENAME)):
+                with open(self._path(BotConfig.SIGNAL_HISTORY_FILENAME), 'r') as f:
                     self.signal_history = json.load(f)
                 logger.info(f"Loaded {len(self.signal_history)} signals from history")
         except Exception as e:
@@ -286,15 +233,33 @@ class StateManager:
             self.signal_history = []
     
     def save_signal_history(self) -> None:
+        started = time.perf_counter()
         try:
-            temp_file = f"{BotConfig.SIGNAL_HISTORY_FILENAME}.tmp"
-            with open(temp_file, 'w') as f:
-                json.dump(self.signal_history[-500:], f, indent=2)
-            os.replace(temp_file, BotConfig.SIGNAL_HISTORY_FILENAME)
+            self._write_json(BotConfig.SIGNAL_HISTORY_FILENAME, self.signal_history[-500:], next(self._snapshots),
+                             indent=2)
+            metrics.STATE_SAVE_SECONDS.labels("signal_history").observe(time.perf_counter() - started)
         except Exception as e:
             logger.error(f"Failed to save signal history: {e}")
     
-    def add_signal_to_history(self, signal_info: dict) -> None:
+    def load_shadow_stats(self) -> dict:
+        try:
+            if os.path.exists(self._path(BotConfig.SHADOW_STATS_FILENAME)):
+                with open(self._path(BotConfig.SHADOW_STATS_FILENAME), 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load shadow stats: {e}")
+        return {}
+    
+    def save_shadow_stats(self, stats: dict) -> None:
+        try:
+            temp_file = f"{self._path(BotConfig.SHADOW_STATS_FILENAME)}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(stats, f)
+            os.replace(temp_file, self._path(BotConfig.SHADOW_STATS_FILENAME))
+        except Exception as e:
+            logger.error(f"Failed to save shadow stats: {e}")
+    
+    def add_signal_to_history(self, signal_info: dict, save: bool = True) -> None:
         entry = {
             'id': len(self.signal_history) + 1,
             'direction': signal_info.get('direction'),
@@ -308,13 +273,39 @@ class StateManager:
         self.signal_history.append(entry)
         if len(self.signal_history) > 500:
             self.signal_history = self.signal_history[-500:]
-        self.save_signal_history()
+        if save:
+            self.save_signal_history()
     
-    def update_last_signal_result(self, result: str) -> None:
+    def update_last_signal_result(self, result: str, save: bool = True) -> None:
         if self.signal_history:
             self.signal_history[-1]['result'] = result
             self.signal_history[-1]['closed_at'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
-            self.save_signal_history()
+            if save:
+                self.save_signal_history()
+    
+    async def persist_events(self, events: list[Union[SignalOpened, TP1Hit, TradeClosed]]) -> None:
+        """Batched event-bus consumer: write the files the trade events changed (the engine
+        updates state in memory with save=False and publishes the events). Each file is
+        written once per batch, from a snapshot taken here, in a worker thread; events
+        published meanwhile make up the next batch."""
+        started = time.perf_counter()
+        snapshot = next(self._snapshots)
+        writes = [(BotConfig.USER_STATES_FILENAME, self._user_states_snapshot(), None)]
+        global_events = [event for event in events if event.chat_id is None]
+        if global_events:
+            writes.append((BotConfig.CURRENT_SIGNAL_FILENAME, self._current_signal_snapshot(), None))
+            if not all(isinstance(event, TP1Hit) for event in global_events):
+                history = [dict(entry) for entry in self.signal_history[-500:]]
+                writes.append((BotConfig.SIGNAL_HISTORY_FILENAME, history, 2))
+        await asyncio.to_thread(self._write_files, writes, snapshot)
+        metrics.STATE_SAVE_SECONDS.labels("trade_events").observe(time.perf_counter() - started)
+    
+    def _write_files(self, writes: list[tuple[str, Any, Optional[int]]], snapshot: int) -> None:
+        for filename, data, indent in writes:
+            try:
+                self._write_json(filename, data, snapshot, indent)
+            except Exception as e:
+                logger.error(f"Failed to save {self._path(filename)}: {e}")
     
     def get_trade_stats(self) -> dict:
         total_wins = 0
@@ -323,9 +314,9 @@ class StateManager:
         
         for chat_id in self.subscribers:
             us = self.get_user_state(chat_id)
-            total_wins += us.get('win_count', 0)
-            total_losses += us.get('loss_count', 0)
-            total_be += us.get('be_count', 0)
+            total_wins += us.win_count
+            total_losses += us.loss_count
+            total_be += us.be_count
         
         total_trades = total_wins + total_losses + total_be
         win_rate = (total_wins / total_trades * 100) if total_trades > 0 else 0
@@ -343,21 +334,20 @@ class StateManager:
         
         # If chat_id provided, get per-user stats; otherwise global
         if chat_id:
-            chat_id = str(chat_id)
-            user_state = self.get_user_state(chat_id)
-            today_signals = [s for s in user_state.get('signal_history', [])
-                            if datetime.datetime.fromisoformat(s['timestamp']).date() == today]
+            midnight = datetime.datetime.combine(today, datetime.time(), datetime.timezone.utc)
+            counts = self.get_user_state(chat_id).signal_history.result_counts(since=midnight.timestamp())
         else:
             today_signals = [s for s in self.signal_history 
                             if datetime.datetime.fromisoformat(s['timestamp']).date() == today]
+            counts = {result: sum(1 for s in today_signals if s.get('result') == result.name) for result in Result}
         
-        wins = sum(1 for s in today_signals if s.get('result') == 'WIN')
-        losses = sum(1 for s in today_signals if s.get('result') == 'LOSS')
-        be = sum(1 for s in today_signals if s.get('result') == 'BREAK_EVEN')
-        pending = sum(1 for s in today_signals if s.get('result') == 'PENDING')
+        wins = counts[Result.WIN]
+        losses = counts[Result.LOSS]
+        be = counts[Result.BREAK_EVEN]
+        pending = counts[Result.PENDING]
         
         return {
-            'total': len(today_signals),
+            'total': sum(counts.values()),
             'wins': wins,
             'losses': losses,
             'break_evens': be,
@@ -0,0 +1,293 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Optional, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from config import BotConfig
+
+if TYPE_CHECKING:
+    from bar_cache import BarCache
+
+
+logger = logging.getLogger("Strategies")
+
+
+@dataclass(frozen=True)
+class StrategyParams:
+    ema_period: int = BotConfig.MA_MEDIUM_PERIOD
+    rsi_period: int = BotConfig.RSI_PERIOD
+    rsi_oversold: float = BotConfig.RSI_OVERSOLD
+    rsi_overbought: float = BotConfig.RSI_OVERBOUGHT
+    rsi_exit_oversold: float = BotConfig.RSI_EXIT_OVERSOLD
+    rsi_exit_overbought: float = BotConfig.RSI_EXIT_OVERBOUGHT
+    adx_period: int = BotConfig.ADX_FILTER_PERIOD
+    adx_threshold: float = BotConfig.ADX_FILTER_THRESHOLD
+    sl_usd: float = BotConfig.FIXED_SL_USD
+    tp_usd: float = BotConfig.FIXED_TP_USD
+    tp2_multiplier: float = 1.5
+    cooldown_seconds: int = BotConfig.SIGNAL_COOLDOWN_SECONDS
+
+
+@dataclass
+class BarResult:
+    """What a strategy made of one closed bar"""
+    status: dict = field(default_factory=dict)  # status/emoji/description + rounded values, for /info and /dashboard
+    signal: Optional[str] = None  # 'BUY' or 'SELL'
+    reason: str = ''  # one log line explaining the decision
+    values: dict = field(default_factory=dict)  # raw indicator values of the bar
+    ready: bool = True  # False while an indicator the strategy needs is still NaN
+
+
+class IndicatorCache:
+    """Price and indicator columns of the analysed bar window, each computed once per bar.
+
+    load() takes the frame the analysis worker returned; its last row is the bar still
+    forming, so value(column) reads the row before it. A column the frame already
+    holds is used as is. Any other column a strategy declares (RSI_5 for a variant,
+    say) is computed with indicators.py the first time it is asked for and shared
+    with every other strategy until the next bar.
+    """
+
+    def __init__(self, symbol: str, bar_cache: Optional['BarCache'] = None):
+        self.symbol = symbol
+        self.bar_cache = bar_cache
+        self.bar_epoch: Optional[int] = None
+        self.bar_seconds = 0  # spacing of the analysed bars, from the frame's index
+        self._frame: Optional[pd.DataFrame] = None
+        self._series: dict[str, np.ndarray] = {}
+        self.computed = 0
+
+    def load(self, frame: pd.DataFrame) -> bool:
+        """Point the cache at `frame`; True if it closes a bar not seen before"""
+        bar_epoch = int(frame.index[-2].timestamp()) if len(frame) > 1 else 0
+        self._frame = frame
+        if bar_epoch == self.bar_epoch:
+            return False
+        self.bar_epoch = bar_epoch
+        self.bar_seconds = int((frame.index[-1] - frame.index[-2]).total_seconds()) if len(frame) > 1 else 0
+        self._series = {}
+        return True
+
+    def series(self, column: str) -> np.ndarray:
+        series = self._series.get(column)
+        if series is None:
+            frame = self._frame
+            if column in frame.columns:
+                series = frame[column].to_numpy(dtype=np.float64)
+            else:
+                series = indicators.compute_column(column, frame['High'].to_numpy(), frame['Low'].to_numpy(),
+                                                   frame['Close'].to_numpy())
+                self.computed += 1
+            self._series[column] = series
+        return series
+
+    def value(self, column: str, ago: int = 0) -> float:
+        """`column` of the closed bar `ago` bars back (0 = the last closed bar)"""
+        series = self.series(column)
+        i = len(series) - 2 - ago
+        return float(series[i]) if i >= 0 else np.nan
+
+    def higher(self, timeframe: int, column: str, ago: int = 0) -> float:
+        """`column` of a closed bar on a higher timeframe, from the shared BarCache"""
+        if self.bar_cache is None:
+            return np.nan
+        return self.bar_cache.get(self.symbol, timeframe, column, ago)
+
+
+class Strategy:
+    """Base class for strategy plugins.
+
+    `indicators` declares the columns on_bar reads. on_bar sees every analysed closed
+    bar and on_tick every tick of the symbol; both can return a signal. Override only
+    the hooks you need: on_tick is only called for strategies that override it.
+    """
+
+    name: str = 'strategy'
+    indicators: tuple[str, ...] = ()
+
+    def on_bar(self, bars: IndicatorCache) -> BarResult:
+        return BarResult()
+
+    def on_tick(self, epoch: int, price: float) -> Optional[str]:
+        return None
+
+
+STRATEGY_REGISTRY: dict[str, Callable[[], Strategy]] = {}
+
+
+def register_strategy(name: str):
+    """Class decorator making a Strategy selectable by name in STRATEGIES"""
+    def decorator(cls):
+        STRATEGY_REGISTRY[name] = cls
+        cls.name = name
+        return cls
+    return decorator
+
+
+@register_strategy('ema_rsi_adx')
+class EmaRsiAdxStrategy(Strategy):
+    """EMA50 trend + RSI(3) pullback exit + ADX(55) filter, the bot's scalping rules.
+
+    With a trend timeframe (MTF_TREND_TIMEFRAME by default) a signal must also agree
+    with that timeframe's last closed bar: BUY above its EMA, SELL below.
+    """
+
+    def __init__(self, params: Optional[StrategyParams] = None, trend_timeframe: Optional[int] = None,
+                 name: Optional[str] = None):
+        self.params = params or StrategyParams()
+        self.trend_timeframe = BotConfig.MTF_TREND_TIMEFRAME if trend_timeframe is None else trend_timeframe
+        if name:
+            self.name = name
+        p = self.params
+        self.ema_col = f'EMA_{p.ema_period}'
+        self.rsi_col = f'RSI_{p.rsi_period}'
+        self.adx_col = f'ADX_{p.adx_period}'
+        self.indicators = (self.ema_col, self.rsi_col, self.adx_col)
+
+    def on_bar(self, bars: IndicatorCache) -> BarResult:
+        p = self.params
+        close = bars.value('Close')
+        ema = bars.value(self.ema_col)
+        rsi = bars.value(self.rsi_col)
+        prev_rsi = bars.value(self.rsi_col, 1)
+        adx = bars.value(self.adx_col)
+        values = {'price': close, 'ema': ema, 'rsi': rsi, 'prev_rsi': prev_rsi, 'adx': adx}
+        if any(pd.isna(v) for v in values.values()):
+            return BarResult(values=values, ready=False)
+
+        signal = None
+        reason = ''
+        if adx < p.adx_threshold:
+            status, emoji, description = "TREND WEAK (NO TRADE)", "⚠️", "ADX lemah / sideways — tidak ada entry"
+            reason = f"❌ ADX too low ({adx:.1f} < {p.adx_threshold}), skip"
+        elif close > ema:
+            rsi_was_oversold = prev_rsi < p.rsi_oversold
+            rsi_exiting_oversold = rsi >= p.rsi_exit_oversold and rsi > prev_rsi
+            if rsi_was_oversold and rsi_exiting_oversold:
+                status, emoji, description = "BUY SETUP", "🟢", "Bullish trend valid — menunggu trigger BUY"
+                signal = 'BUY'
+                reason = f"🟢 BUY Signal: Price > EMA50, RSI exiting oversold ({prev_rsi:.1f} → {rsi:.1f}), ADX={adx:.1f}"
+            elif rsi_was_oversold:
+                status, emoji, description = "WAITING PULLBACK", "⏳", "Trend bullish valid — RSI pullback belum selesai"
+                reason = f"⏳ BUY Setup: RSI oversold ({prev_rsi:.1f}), waiting for exit above {p.rsi_exit_oversold}"
+            else:
+                status, emoji, description = "WAITING PULLBACK", "⏳", "Harga > EMA50 — menunggu RSI masuk oversold"
+        elif close < ema:
+            rsi_was_overbought = prev_rsi > p.rsi_overbought
+            rsi_exiting_overbought = rsi <= p.rsi_exit_overbought and rsi < prev_rsi
+            if rsi_was_overbought and rsi_exiting_overbought:
+                status, emoji, description = "SELL SETUP", "🔴", "Bearish trend valid — menunggu trigger SELL"
+                signal = 'SELL'
+                reason = f"🔴 SELL Signal: Price < EMA50, RSI exiting overbought ({prev_rsi:.1f} → {rsi:.1f}), ADX={adx:.1f}"
+            elif rsi_was_overbought:
+                status, emoji, description = "WAITING PULLBACK", "⏳", "Trend bearish valid — RSI pullback belum selesai"
+                reason = f"⏳ SELL Setup: RSI overbought ({prev_rsi:.1f}), waiting for exit below {p.rsi_exit_overbought}"
+            else:
+                status, emoji, description = "WAITING PULLBACK", "⏳", "Harga < EMA50 — menunggu RSI masuk overbought"
+        else:
+            status, emoji, description = "WAITING PULLBACK", "⏳", "Harga ≈ EMA50 — trend tidak jelas"
+            reason = "⚖️ Price = EMA50, no clear trend direction, skip"
+
+        if signal and self.trend_timeframe:
+            trend_reason = self._against_trend(bars, signal)
+            if trend_reason:
+                signal, reason = None, trend_reason
+
+        return BarResult(
+            status={
+                'status': status,
+                'emoji': emoji,
+                'description': description,
+                'rsi': round(rsi, 1),
+                'ema': round(ema, 3),
+                'adx': round(adx, 1),
+                'price': round(close, 3)
+            },
+            signal=signal,
+            reason=reason,
+            values=values,
+        )
+
+    def _against_trend(self, bars: IndicatorCache, direction: str) -> str:
+        """Why `direction` fails the trend timeframe filter, or '' if it passes"""
+        timeframe = self.trend_timeframe
+        close = bars.higher(timeframe, 'Close')
+        ema = bars.higher(timeframe, self.ema_col)
+        if pd.isna(close) or pd.isna(ema):
+            return f"⏳ {timeframe}m trend not available yet, {direction} skipped"
+        if (close > ema) if direction == 'BUY' else (close < ema):
+            return ''
+        return f"❌ {direction} against the {timeframe}m trend (Close={close:.3f}, EMA={ema:.3f}), skip"
+
+
+class StrategySet:
+    """The strategies one engine runs on its symbol.
+
+    All of them see the same bars through one IndicatorCache, so a column several
+    strategies use is computed once. Only the `selected` strategy's signals are
+    broadcast; the others are logged. A signal the selected strategy returns from
+    on_tick is held until the engine's next analysis cycle picks it up.
+    """
+
+    def __init__(self, symbol: str, bar_cache: Optional['BarCache'] = None, names: Optional[list[str]] = None,
+                 selected: Optional[str] = None):
+        names = list(names or BotConfig.STRATEGIES)
+        unknown = [name for name in names if name not in STRATEGY_REGISTRY]
+        if unknown:
+            raise ValueError(f"Unknown strategies: {', '.join(unknown)} (known: {', '.join(STRATEGY_REGISTRY)})")
+        self.strategies: dict[str, Strategy] = {name: STRATEGY_REGISTRY[name]() for name in names}
+        self.selected = selected or BotConfig.ACTIVE_STRATEGY or names[0]
+        if self.selected not in self.strategies:
+            raise ValueError(f"ACTIVE_STRATEGY {self.selected} is not in STRATEGIES")
+        self.cache = IndicatorCache(symbol, bar_cache)
+        self.last_results: dict[str, BarResult] = {}
+        self._tick_strategies: list[Strategy] = []
+        self._tick_signal: Optional[tuple[str, float]] = None
+        self._index_tick_strategies()
+
+    def _index_tick_strategies(self) -> None:
+        self._tick_strategies = [s for s in self.strategies.values() if type(s).on_tick is not Strategy.on_tick]
+
+    def add(self, strategy: Strategy) -> None:
+        self.strategies[strategy.name] = strategy
+        self._index_tick_strategies()
+
+    @property
+    def wants_ticks(self) -> bool:
+        return bool(self._tick_strategies)
+
+    def on_bar(self, frame: pd.DataFrame) -> BarResult:
+        """Run every strategy on the closed bar of `frame`; returns the selected one's result"""
+        self.cache.load(frame)
+        results = {}
+        for name, strategy in self.strategies.items():
+            if name == self.selected:
+                results[name] = strategy.on_bar(self.cache)
+                continue
+            try:
+                results[name] = result = strategy.on_bar(self.cache)
+            except Exception as e:
+                logger.error(f"Strategy {name} failed on bar {self.cache.bar_epoch}: {e}")
+                continue
+            if result.signal:
+                logger.info(f"[{name}] {result.signal} signal (not broadcast)")
+        self.last_results = results
+        return results[self.selected]
+
+    def on_tick(self, epoch: int, price: float) -> None:
+        for strategy in self._tick_strategies:
+            try:
+                signal = strategy.on_tick(epoch, price)
+            except Exception as e:
+                logger.error(f"Strategy {strategy.name} failed on tick {epoch}: {e}")
+                continue
+            if signal and strategy.name == self.selected:
+                self._tick_signal = (signal, price)
+
+    def pop_tick_signal(self) -> Optional[tuple[str, float]]:
+        """(direction, tick price) of a pending on_tick signal of the selected strategy"""
+        signal, self._tick_signal = self._tick_signal, None
+        return signal
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import metrics
+
+
+logger = logging.getLogger("Supervisor")
+
+
+@dataclass(frozen=True)
+class RestartPolicy:
+    """Restart delay after a task raises: `backoff`, doubled per consecutive failure up
+    to `max_backoff`. A run that lasted `reset_after` seconds starts the count over.
+    With `max_restarts` set, the task is left failed once it is used up."""
+    backoff: float = 1.0
+    max_backoff: float = 60.0
+    reset_after: float = 300.0
+    max_restarts: Optional[int] = None
+
+
+class TaskHealth:
+    """State of one supervised task; the task calls beat() each time it makes progress"""
+
+    __slots__ = ('name', 'state', 'restarts', 'failures', 'last_error', 'last_error_at', 'started_at', 'last_beat')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = 'pending'  # pending, running, backoff, failed, stopped
+        self.restarts = 0
+        self.failures = 0  # consecutive
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+        self.started_at: Optional[float] = None
+        self.last_beat: Optional[float] = None
+
+    def beat(self) -> None:
+        self.last_beat = time.time()
+
+    def to_dict(self) -> dict:
+        now = time.time()
+        return {
+            'state': self.state,
+            'restarts': self.restarts,
+            'last_error': self.last_error,
+            'last_error_age': round(now - self.last_error_at, 1) if self.last_error_at else None,
+            'last_beat_age': round(now - self.last_beat, 1) if self.last_beat else None,
+        }
+
+
+class Supervisor:
+    """Runs a set of long-lived coroutines side by side and restarts each one on its own.
+
+    Every task is `run(health)`. An exception restarts only that task, after its
+    RestartPolicy backoff, so one failing stage neither stops nor delays the others.
+    A task that returns is considered finished. run() returns once `stop_event` is
+    set, cancelling whatever is still running.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._specs: dict[str, tuple[Callable[[TaskHealth], Awaitable[None]], RestartPolicy]] = {}
+        self.health: dict[str, TaskHealth] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    def add(self, name: str, run: Callable[[TaskHealth], Awaitable[None]],
+            policy: Optional[RestartPolicy] = None) -> None:
+        self._specs[name] = (run, policy or RestartPolicy())
+        self.health[name] = TaskHealth(name)
+
+    async def _supervise(self, health: TaskHealth, run: Callable[[TaskHealth], Awaitable[None]],
+                         policy: RestartPolicy) -> None:
+        while True:
+            health.state = 'running'
+            health.started_at = time.time()
+            try:
+                await run(health)
+                health.state = 'stopped'
+                return
+            except asyncio.CancelledError:
+                health.state = 'stopped'
+                raise
+            except Exception as e:
+                health.last_error = f"{type(e).__name__}: {e}"
+                health.last_error_at = time.time()
+                if health.last_error_at - health.started_at >= policy.reset_after:
+                    health.failures = 0
+                health.failures += 1
+                logger.error(f"[{self.name}] Task {health.name} failed: {e}", exc_info=True)
+            if policy.max_restarts is not None and health.restarts >= policy.max_restarts:
+                health.state = 'failed'
+                logger.critical(f"[{self.name}] Task {health.name} failed {health.restarts + 1} times, giving up")
+                return
+            delay = min(policy.backoff * 2 ** (health.failures - 1), policy.max_backoff)
+            health.state = 'backoff'
+            health.restarts += 1
+            metrics.TASK_RESTARTS.labels(f"{self.name}.{health.name}").inc()
+            await asyncio.sleep(delay)
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        self._tasks = [
+            asyncio.create_task(self._supervise(self.health[name], run, policy), name=f"{self.name}-{name}")
+            for name, (run, policy) in self._specs.items()
+        ]
+        stop_waiter = asyncio.create_task(stop_event.wait())
+        try:
+            pending = set(self._tasks)
+            while pending and not stop_event.is_set():
+                _, pending = await asyncio.wait({stop_waiter, *pending}, return_when=asyncio.FIRST_COMPLETED)
+                pending.discard(stop_waiter)
+        finally:
+            stop_waiter.cancel()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @property
+    def healthy(self) -> bool:
+        return all(health.state in ('pending', 'running') for health in self.health.values())
+
+    def get_stats(self) -> dict:
+        return {name: health.to_dict() for name, health in self.health.items()}
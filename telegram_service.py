@@ -3,6 +3,8 @@ import datetime
 import io
 import os
 import logging
+import math
+import time
 from typing import Optional, TYPE_CHECKING
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -10,7 +12,11 @@ from telegram.error import TelegramError, RetryAfter, TimedOut
 from telegram.ext import ContextTypes
 
 from config import BotConfig
+import metrics
+import tracing
 from utils import format_pnl, get_win_rate_emoji, calculate_win_rate
+from user_state import ActiveTrade, TradeStatus, UserState
+from view_cache import MarketSnapshot, ViewCache
 
 if TYPE_CHECKING:
     from state_manager import StateManager
@@ -18,36 +24,210 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger("TelegramService")
 
+# Refresh edits the dashboard in place; "dashboard" (the /start menu button) sends a new one
+DASHBOARD_MARKUP = InlineKeyboardMarkup([[InlineKeyboardButton("🔄 Refresh", callback_data="dashboard_refresh")]])
+
+
+def _send_outcome(error: Exception, error_msg: str) -> str:
+    if isinstance(error, RetryAfter):
+        return "rate_limited"
+    if isinstance(error, TimedOut):
+        return "timeout"
+    if "message is not modified" in error_msg:
+        return "not_modified"
+    if "blocked" in error_msg or "deactivated" in error_msg or "not found" in error_msg:
+        return "unreachable"
+    return "error"
+
+
+def _manual_cooldown_text(wait: float) -> str:
+    return (
+        f"⏳ *Signal Manual Baru Saja Dibuat*\n\n"
+        f"Coba lagi dalam {math.ceil(wait)} detik."
+    )
+
+
+def _ws_status(snapshot: MarketSnapshot) -> str:
+    return "🟢 Terhubung" if snapshot.connected else "🔴 Terputus"
+
+
+def _price_str(snapshot: MarketSnapshot) -> str:
+    return f"${snapshot.price:.3f}" if snapshot.price else "N/A"
+
+
+def _indicator_strs(snapshot: MarketSnapshot) -> tuple[str, str, str]:
+    indicators = snapshot.indicators
+    if not indicators:
+        return "N/A", "N/A", "N/A"
+    return (f"{indicators.get('rsi', 0):.1f}", f"${indicators.get('ema', 0):.3f}",
+            f"{indicators.get('adx', 0):.1f}")
+
+
+def _dashboard_header(snapshot: MarketSnapshot) -> str:
+    market_status = snapshot.market_status
+    text = (
+        f"📊 *DASHBOARD XAU/USD*\n"
+        f"━━━━━━━━━━━━━━━━━━━━━\n"
+        f"🕐 _{snapshot.clock}_\n\n"
+        f"📡 Status: {_ws_status(snapshot)}\n"
+        f"📅 Market: *{market_status['status']}*\n"
+        f"💰 Harga: *{_price_str(snapshot)}*\n"
+        f"🏷️ Symbol: {snapshot.symbol}\n\n"
+    )
+    if not market_status['is_open']:
+        text += f"⏰ _{market_status['message']}_\n\n"
+    strat_status = snapshot.strategy_status
+    if strat_status:
+        text += (
+            f"📊 Status Strategi:\n"
+            f"└ {strat_status.get('emoji', '❓')} *{strat_status.get('status', 'UNKNOWN')}*\n"
+            f"   RSI: {strat_status.get('rsi', 0):.1f} | EMA50: ${strat_status.get('ema', 0):.3f} | ADX: {strat_status.get('adx', 0):.1f}\n"
+            f"   _{strat_status.get('description', '')}_\n\n"
+        )
+    return text
+
+
+def _dashboard_trade(trade: ActiveTrade) -> str:
+    """Active trade block of the dashboard, up to the P&L line (which follows the price)"""
+    direction = trade.direction.name
+    dir_emoji = "📈" if direction == 'BUY' else "📉"
+    status_display = "🛡️ BE Mode" if trade.status == TradeStatus.TP1_HIT else "🔥 Aktif"
+    return (
+        f"━━━━━━━━━━━━━━━━━━━━━\n"
+        f"{dir_emoji} *POSISI AKTIF ANDA*\n\n"
+        f"📍 Arah: *{direction}*\n"
+        f"💵 Entry: *${trade.entry_price:.3f}*\n\n"
+        f"🎯 TP1: ${trade.tp1_level:.3f}\n"
+        f"🏆 TP2: ${trade.tp2_level:.3f}\n"
+        f"🛑 SL: ${trade.sl_level:.3f}\n\n"
+        f"📊 Status: *{status_display}*\n"
+    )
+
+
+def _dashboard_stats(user_state: UserState) -> str:
+    win_count = user_state.win_count
+    loss_count = user_state.loss_count
+    be_count = user_state.be_count
+    total = win_count + loss_count + be_count
+    win_rate = calculate_win_rate(win_count, loss_count)
+    return (
+        f"━━━━━━━━━━━━━━━━━━━━━\n"
+        f"📈 *STATISTIK ANDA*\n"
+        f"Total: {total} | ✅ {win_count} | ❌ {loss_count} | ⚖️ {be_count}\n"
+        f"Win Rate: {win_rate:.1f}%"
+    )
+
+
+def _info_header(snapshot: MarketSnapshot) -> str:
+    market_status = snapshot.market_status
+    market_info = f"📅 Market: *{market_status['status']}*"
+    if not market_status['is_open']:
+        market_info += f"\n   _{market_status['message']}_"
+    rsi_str, ema_str, adx_str = _indicator_strs(snapshot)
+    strat_status = snapshot.strategy_status
+    status_emoji = strat_status.get('emoji', '❓')
+    status_name = strat_status.get('status', 'UNKNOWN')
+    status_desc = strat_status.get('description', '')
+    status_section = f"📊 Status Strategi:\n└ {status_emoji} *{status_name}*\n   _{status_desc}_\n\n" if strat_status else ""
+    return (
+        f"⚙️ *Info Sistem Bot V2.0 Pro*\n"
+        f"━━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"📡 WebSocket: {_ws_status(snapshot)}\n"
+        f"🏷️ Symbol: {snapshot.symbol}\n"
+        f"💰 Harga Terakhir: {_price_str(snapshot)}\n"
+        f"👥 Total Subscriber: {snapshot.subscriber_count}\n\n"
+        f"{status_section}"
+        f"📊 *Indikator Real-Time (EMA50 + RSI(3) + ADX(55)):*\n"
+        f"├ 📈 RSI: *{rsi_str}*\n"
+        f"├ 💹 EMA50: *{ema_str}*\n"
+        f"└ 💪 ADX: *{adx_str}*\n\n"
+        f"{market_info}\n\n"
+    )
+
+
+def _info_button_header(snapshot: MarketSnapshot) -> str:
+    rsi_str, ema_str, adx_str = _indicator_strs(snapshot)
+    strat_status = snapshot.strategy_status
+    status_emoji = strat_status.get('emoji', '❓')
+    status_name = strat_status.get('status', 'UNKNOWN')
+
+    # Determine BUY/SELL/NO TRADE indicator
+    trade_signal = "⚠️ NO TRADE"
+    if "BUY SETUP" in status_name:
+        trade_signal = "🟢 BUY READY"
+    elif "SELL SETUP" in status_name:
+        trade_signal = "🔴 SELL READY"
+    elif "POSITION ACTIVE" in status_name:
+        trade_signal = "🟣 POSITION ACTIVE"
+
+    status_section = f"📊 Status: {status_emoji} *{status_name}*\n└ {trade_signal}\n" if strat_status else ""
+    return (
+        f"⚙️ *Info Sistem Bot V2.0 Pro*\n"
+        f"━━━━━━━━━━━━━━━━━━━━━\n\n"
+        f"📡 WebSocket: {_ws_status(snapshot)}\n"
+        f"🏷️ Symbol: {snapshot.symbol}\n"
+        f"💰 Harga: {_price_str(snapshot)}\n"
+        f"👥 Subscribers: {snapshot.subscriber_count}\n\n"
+        f"{status_section}"
+        f"📊 *Indikator Real-Time:*\n"
+        f"├ 📈 RSI: *{rsi_str}*\n"
+        f"├ 💹 EMA50: *{ema_str}*\n"
+        f"└ 💪 ADX: *{adx_str}*\n\n"
+        f"📅 Market: *{snapshot.market_status['status']}*\n\n"
+    )
+
+
+class SendPacer:
+    """Spacing between Bot API calls; shared by every TelegramService using the same bot"""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.last_send_time = 0.0
+
 
 class TelegramService:
-    def __init__(self, state_manager: 'StateManager', deriv_ws_getter, gold_symbol_getter):
+    def __init__(self, state_manager: 'StateManager', deriv_ws_getter, gold_symbol_getter,
+                 pacer: Optional[SendPacer] = None):
         self.state_manager = state_manager
         self.deriv_ws_getter = deriv_ws_getter
         self.gold_symbol_getter = gold_symbol_getter
-        self._rate_limit_lock = asyncio.Lock()
-        self._last_send_time = 0.0
+        self.pacer = pacer or SendPacer()
+        self.tracking_price_delta: float = BotConfig.TRACKING_PRICE_DELTA
+        self.title_suffix: str = ''  # e.g. " — XAG/USD" on services of secondary symbols
         self._last_tracking_price = {}  # Track last price per user
         self._last_tracking_signal_id = {}  # Track which signal is being followed
         self._tracking_update_counter = 0  # Force update every N calls
+        self.views = ViewCache(self._take_snapshot)
     
     async def _safe_send(self, coro):
-        try:
-            async with self._rate_limit_lock:
-                now = asyncio.get_event_loop().time()
-                time_since_last = now - self._last_send_time
-                if time_since_last < BotConfig.TELEGRAM_RATE_LIMIT_DELAY:
-                    await asyncio.sleep(BotConfig.TELEGRAM_RATE_LIMIT_DELAY - time_since_last)
-                self._last_send_time = asyncio.get_event_loop().time()
-                return await coro
-        except (RetryAfter, TimedOut, TelegramError) as e:
-            error_msg = str(e).lower()
-            if "chat not found" in error_msg or "not found" in error_msg:
-                logger.debug(f"Chat not found, will be removed: {e}")
-            elif "message is not modified" in error_msg:
-                logger.debug(f"Message unchanged, skipping: {e}")
-            else:
-                logger.error(f"Failed to send message: {e}")
-            return None
+        with tracing.span("telegram_send") as send_span:
+            try:
+                async with self.pacer.lock:
+                    now = asyncio.get_event_loop().time()
+                    time_since_last = now - self.pacer.last_send_time
+                    if time_since_last < BotConfig.TELEGRAM_RATE_LIMIT_DELAY:
+                        await asyncio.sleep(BotConfig.TELEGRAM_RATE_LIMIT_DELAY - time_since_last)
+                    self.pacer.last_send_time = asyncio.get_event_loop().time()
+                    api_started = time.time()
+                    result = await coro
+                    tracing.record_span("bot_api", api_started, time.time())
+                metrics.TELEGRAM_SENDS.labels("ok").inc()
+                send_span.set("outcome", "ok")
+                return result
+            except (RetryAfter, TimedOut, TelegramError) as e:
+                error_msg = str(e).lower()
+                if isinstance(e, RetryAfter):
+                    metrics.TELEGRAM_RATE_LIMITED.inc()
+                outcome = _send_outcome(e, error_msg)
+                metrics.TELEGRAM_SENDS.labels(outcome).inc()
+                send_span.set("outcome", outcome)
+                if "chat not found" in error_msg or "not found" in error_msg:
+                    logger.debug(f"Chat not found, will be removed: {e}")
+                elif "message is not modified" in error_msg:
+                    logger.debug(f"Message unchanged, skipping: {e}")
+                else:
+                    logger.error(f"Failed to send message: {e}")
+                return None
     
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         if not update.message:
@@ -62,8 +242,7 @@ class TelegramService:
             self.state_manager.add_subscriber(chat_id)
             user_state = self.state_manager.get_user_state(chat_id)
             if self.state_manager.current_signal:
-                user_state['active_trade'] = self.state_manager.current_signal.copy()
-                user_state['tracking_message_id'] = None
+                user_state.start_trade(self.state_manager.current_signal, record_history=False)
             self.state_manager.save_user_states()
         
         keyboard = [
@@ -92,6 +271,7 @@ class TelegramService:
                 f"├ /stats - Statistik trading Anda\n"
                 f"├ /today - Statistik hari ini\n"
                 f"├ /send - Signal manual\n"
+                f"├ /symbols - Pilih simbol lain\n"
                 f"└ /info - Info sistem\n\n"
                 f"🚀 Selamat trading!",
                 parse_mode='Markdown',
@@ -109,6 +289,7 @@ class TelegramService:
                 f"├ /dashboard - Lihat posisi aktif\n"
                 f"├ /stats - Statistik trading\n"
                 f"├ /send - Signal manual\n"
+                f"├ /symbols - Pilih simbol lain\n"
                 f"└ /info - Info sistem",
                 parse_mode='Markdown',
                 reply_markup=reply_markup
@@ -139,8 +320,7 @@ class TelegramService:
             
             user_state = self.state_manager.get_user_state(chat_id)
             if self.state_manager.current_signal:
-                user_state['active_trade'] = self.state_manager.current_signal.copy()
-                user_state['tracking_message_id'] = None
+                user_state.start_trade(self.state_manager.current_signal, record_history=False)
                 self.state_manager.save_user_states()
             
             await update.message.reply_text(
@@ -182,9 +362,9 @@ class TelegramService:
         chat_id = str(update.message.chat_id)
         user_state = self.state_manager.get_user_state(chat_id)
         
-        win_count = user_state['win_count']
-        loss_count = user_state['loss_count']
-        be_count = user_state['be_count']
+        win_count = user_state.win_count
+        loss_count = user_state.loss_count
+        be_count = user_state.be_count
         
         total = win_count + loss_count + be_count
         win_rate = calculate_win_rate(win_count, loss_count)
@@ -245,55 +425,7 @@ class TelegramService:
     async def info(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         if not update.message:
             return
-        chat_id = str(update.message.chat_id)
-        deriv_ws = self.deriv_ws_getter()
-        gold_symbol = self.gold_symbol_getter()
-        
-        status = "🟢 Terhubung" if (deriv_ws and deriv_ws.connected) else "🔴 Terputus"
-        current_price = deriv_ws.get_current_price() if deriv_ws else None
-        price_str = f"${current_price:.3f}" if current_price else "N/A"
-        subscriber_count = len(self.state_manager.subscribers)
-        
-        market_status = BotConfig.get_market_status()
-        market_info = f"📅 Market: *{market_status['status']}*"
-        if not market_status['is_open']:
-            market_info += f"\n   _{market_status['message']}_"
-        
-        today_stats = self.state_manager.get_today_stats(chat_id)
-        
-        # Real-time indicators
-        indicators = self.state_manager.current_indicators
-        rsi_str = f"{indicators.get('rsi', 0):.1f}" if indicators else "N/A"
-        ema_str = f"${indicators.get('ema', 0):.3f}" if indicators else "N/A"
-        adx_str = f"{indicators.get('adx', 0):.1f}" if indicators else "N/A"
-        
-        # Strategy status
-        strat_status = self.state_manager.strategy_status
-        status_emoji = strat_status.get('emoji', '❓')
-        status_name = strat_status.get('status', 'UNKNOWN')
-        status_desc = strat_status.get('description', '')
-        status_section = f"📊 Status Strategi:\n└ {status_emoji} *{status_name}*\n   _{status_desc}_\n\n" if strat_status else ""
-        
-        await update.message.reply_text(
-            f"⚙️ *Info Sistem Bot V2.0 Pro*\n"
-            f"━━━━━━━━━━━━━━━━━━━━━\n\n"
-            f"📡 WebSocket: {status}\n"
-            f"🏷️ Symbol: {gold_symbol or 'frxXAUUSD'}\n"
-            f"💰 Harga Terakhir: {price_str}\n"
-            f"👥 Total Subscriber: {subscriber_count}\n\n"
-            f"{status_section}"
-            f"📊 *Indikator Real-Time (EMA50 + RSI(3) + ADX(55)):*\n"
-            f"├ 📈 RSI: *{rsi_str}*\n"
-            f"├ 💹 EMA50: *{ema_str}*\n"
-            f"└ 💪 ADX: *{adx_str}*\n\n"
-            f"{market_info}\n\n"
-            f"📊 *Statistik Hari Ini (Anda):*\n"
-            f"├ Sinyal: {today_stats['total']}\n"
-            f"├ Win: {today_stats['wins']} | Loss: {today_stats['losses']}\n"
-            f"└ Win Rate: {today_stats['win_rate']:.1f}%\n\n"
-            f"🤖 Bot berjalan 24 jam non-stop!",
-            parse_mode='Markdown'
-        )
+        await update.message.reply_text(self.render_info(str(update.message.chat_id)), parse_mode='Markdown')
     
     async def dashboard(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         if update.message:
@@ -342,14 +474,6 @@ class TelegramService:
             return
         
         chat_id = str(update.message.chat_id)
-        
-        await update.message.reply_text(
-            "🔄 *Generating manual signal...*\n\n"
-            "Tunggu sebentar, bot sedang menganalisis pasar dan membuat signal.",
-            parse_mode='Markdown'
-        )
-        
-        from signal_engine import SignalEngine
         signal_engine = context.bot_data.get('signal_engine')
         
         if not signal_engine:
@@ -360,8 +484,25 @@ class TelegramService:
             )
             return
         
-        # Pass chat_id so signal only goes to this user
-        success = await signal_engine.generate_manual_signal(context.bot, target_chat_id=chat_id)
+        wait = signal_engine.reserve_manual_signal(chat_id)
+        if wait:
+            await update.message.reply_text(_manual_cooldown_text(wait), parse_mode='Markdown')
+            return
+        
+        success = False
+        try:
+            await update.message.reply_text(
+                "🔄 *Generating manual signal...*\n\n"
+                "Tunggu sebentar, bot sedang menganalisis pasar dan membuat signal.",
+                parse_mode='Markdown'
+            )
+            
+            # Pass chat_id so signal only goes to this user
+            success = await signal_engine.generate_manual_signal(context.bot, target_chat_id=chat_id)
+        finally:
+            if not success:
+                # A failed attempt does not start the user's cooldown
+                signal_engine.release_manual_signal(chat_id)
         
         if success:
             await update.message.reply_text(
@@ -378,98 +519,109 @@ class TelegramService:
                 parse_mode='Markdown'
             )
     
-    async def send_dashboard(self, chat_id, bot) -> None:
-        chat_id = str(chat_id)
-        user_state = self.state_manager.get_user_state(chat_id)
-        deriv_ws = self.deriv_ws_getter()
-        gold_symbol = self.gold_symbol_getter()
-        
-        ws_status = "🟢 Terhubung" if (deriv_ws and deriv_ws.connected) else "🔴 Terputus"
-        current_price = deriv_ws.get_current_price() if deriv_ws else None
-        price_str = f"${current_price:.3f}" if current_price else "N/A"
+    async def symbols(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        if not update.message:
+            return
+        chat_id = str(update.message.chat_id)
+        engine_group = context.bot_data.get('engine_group')
         
-        market_status = BotConfig.get_market_status()
+        if not engine_group:
+            await update.message.reply_text("❌ Daftar simbol tidak tersedia.", parse_mode='Markdown')
+            return
         
-        now = datetime.datetime.now(BotConfig.WIB_TZ)
+        if context.args:
+            engine = engine_group.find_engine(context.args[0])
+            if engine is None:
+                await update.message.reply_text(
+                    f"❌ Simbol `{context.args[0]}` tidak dikenal.\n\n"
+                    f"💡 Gunakan /symbols untuk melihat daftar simbol.",
+                    parse_mode='Markdown'
+                )
+                return
+            if engine_group.toggle_subscription(engine.symbol, chat_id):
+                text = f"✅ Anda sekarang menerima sinyal *{engine.display_name}*."
+            else:
+                text = f"🔕 Sinyal *{engine.display_name}* dimatikan."
+            await update.message.reply_text(text, parse_mode='Markdown')
+            logger.info(f"Symbol opt-in toggled: {chat_id} {engine.symbol}")
+            return
         
-        dashboard_text = (
-            f"📊 *DASHBOARD XAU/USD*\n"
-            f"━━━━━━━━━━━━━━━━━━━━━\n"
-            f"🕐 _{now.strftime('%H:%M:%S WIB')}_\n\n"
-            f"📡 Status: {ws_status}\n"
-            f"📅 Market: *{market_status['status']}*\n"
-            f"💰 Harga: *{price_str}*\n"
-            f"🏷️ Symbol: {gold_symbol or 'frxXAUUSD'}\n\n"
+        lines = []
+        for symbol, engine in engine_group.engines.items():
+            mark = "✅" if engine.state_manager.is_subscriber(chat_id) else "⬜"
+            lines.append(f"{mark} *{engine.display_name}* (`{symbol}`)")
+        await update.message.reply_text(
+            "📋 *Simbol Tersedia*\n"
+            "━━━━━━━━━━━━━━━━━━━━━\n"
+            + "\n".join(lines) + "\n\n"
+            "💡 Ketik /symbols <simbol> untuk mengaktifkan atau mematikan sinyal, contoh: /symbols XAGUSD",
+            parse_mode='Markdown'
         )
-        
-        if not market_status['is_open']:
-            dashboard_text += f"⏰ _{market_status['message']}_\n\n"
-        
-        # Strategy status
-        strat_status = self.state_manager.strategy_status
-        if strat_status:
-            dashboard_text += (
-                f"📊 Status Strategi:\n"
-                f"└ {strat_status.get('emoji', '❓')} *{strat_status.get('status', 'UNKNOWN')}*\n"
-                f"   RSI: {strat_status.get('rsi', 0):.1f} | EMA50: ${strat_status.get('ema', 0):.3f} | ADX: {strat_status.get('adx', 0):.1f}\n"
-                f"   _{strat_status.get('description', '')}_\n\n"
-            )
-        
-        active_trade = user_state.get('active_trade', {})
-        
-        if active_trade:
-            direction = active_trade['direction']
-            entry = active_trade['entry_price']
-            tp1 = active_trade['tp1_level']
-            tp2 = active_trade['tp2_level']
-            sl = active_trade['sl_level']
-            trade_status = active_trade.get('status', 'active')
-            
-            dir_emoji = "📈" if direction == 'BUY' else "📉"
-            pnl_str = format_pnl(direction, entry, current_price)
-            status_display = "🛡️ BE Mode" if trade_status == 'tp1_hit' else "🔥 Aktif"
-            
-            dashboard_text += (
-                f"━━━━━━━━━━━━━━━━━━━━━\n"
-                f"{dir_emoji} *POSISI AKTIF ANDA*\n\n"
-                f"📍 Arah: *{direction}*\n"
-                f"💵 Entry: *${entry:.3f}*\n\n"
-                f"🎯 TP1: ${tp1:.3f}\n"
-                f"🏆 TP2: ${tp2:.3f}\n"
-                f"🛑 SL: ${sl:.3f}\n\n"
-                f"📊 Status: *{status_display}*\n"
-                f"💹 P&L: *{pnl_str}*\n\n"
-            )
+    
+    def _take_snapshot(self, taken_at: float) -> MarketSnapshot:
+        deriv_ws = self.deriv_ws_getter()
+        return MarketSnapshot(
+            taken_at=taken_at,
+            clock=datetime.datetime.now(BotConfig.WIB_TZ).strftime('%H:%M:%S WIB'),
+            connected=bool(deriv_ws and deriv_ws.connected),
+            price=deriv_ws.get_current_price() if deriv_ws else None,
+            symbol=self.gold_symbol_getter() or 'frxXAUUSD',
+            subscriber_count=len(self.state_manager.subscribers),
+            market_status=BotConfig.get_market_status(),
+            strategy_status=dict(self.state_manager.strategy_status or {}),
+            indicators=dict(self.state_manager.current_indicators or {}),
+        )
+    
+    def render_dashboard(self, chat_id: str) -> str:
+        """Dashboard text: the shared snapshot header, then this user's position and statistics"""
+        user_state = self.state_manager.get_user_state(chat_id)
+        snapshot = self.views.snapshot()
+        text = self.views.section(snapshot, 'dashboard', _dashboard_header)
+        trade = user_state.active_trade
+        if trade:
+            text += self.views.fragment(chat_id, user_state, 'trade', lambda: _dashboard_trade(trade))
+            text += f"💹 P&L: *{format_pnl(trade.direction.name, trade.entry_price, snapshot.price)}*\n\n"
         else:
-            dashboard_text += (
+            text += (
                 f"━━━━━━━━━━━━━━━━━━━━━\n"
                 f"🔍 *Tidak Ada Posisi Aktif*\n\n"
                 f"💡 Bot sedang mencari sinyal terbaik...\n\n"
             )
-        
-        win_count = user_state['win_count']
-        loss_count = user_state['loss_count']
-        be_count = user_state['be_count']
-        total = win_count + loss_count + be_count
-        win_rate = calculate_win_rate(win_count, loss_count)
-        
-        dashboard_text += (
-            f"━━━━━━━━━━━━━━━━━━━━━\n"
-            f"📈 *STATISTIK ANDA*\n"
-            f"Total: {total} | ✅ {win_count} | ❌ {loss_count} | ⚖️ {be_count}\n"
-            f"Win Rate: {win_rate:.1f}%"
+        return text + self.views.fragment(chat_id, user_state, 'stats', lambda: _dashboard_stats(user_state))
+    
+    def render_info(self, chat_id: str, button: bool = False) -> str:
+        """/info text (or the shorter one of the Info button) for one user"""
+        user_state = self.state_manager.get_user_state(chat_id)
+        snapshot = self.views.snapshot()
+        today_stats = self.views.fragment(chat_id, user_state, 'today',
+                                          lambda: self.state_manager.get_today_stats(chat_id))
+        if button:
+            return self.views.section(snapshot, 'info_button', _info_button_header) + (
+                f"📊 *Hari Ini:*\n"
+                f"├ Sinyal: {today_stats['total']}\n"
+                f"├ Win: {today_stats['wins']} | Loss: {today_stats['losses']}\n"
+                f"└ Win Rate: {today_stats['win_rate']:.1f}%"
+            )
+        return self.views.section(snapshot, 'info', _info_header) + (
+            f"📊 *Statistik Hari Ini (Anda):*\n"
+            f"├ Sinyal: {today_stats['total']}\n"
+            f"├ Win: {today_stats['wins']} | Loss: {today_stats['losses']}\n"
+            f"└ Win Rate: {today_stats['win_rate']:.1f}%\n\n"
+            f"🤖 Bot berjalan 24 jam non-stop!"
         )
-        
-        keyboard = [[InlineKeyboardButton("🔄 Refresh", callback_data="dashboard")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
+    
+    async def send_dashboard(self, chat_id, bot) -> None:
+        chat_id = str(chat_id)
+        text = self.render_dashboard(chat_id)
         try:
-            await self._safe_send(bot.send_message(
+            message = await self._safe_send(bot.send_message(
                 chat_id=chat_id,
-                text=dashboard_text,
+                text=text,
                 parse_mode='Markdown',
-                reply_markup=reply_markup
+                reply_markup=DASHBOARD_MARKUP
             ))
+            if message:
+                self.views.changed(chat_id, message.message_id, text)
         except Exception as e:
             logger.error(f"Failed to send dashboard: {e}")
     
@@ -496,8 +648,7 @@ class TelegramService:
                 
                 user_state = self.state_manager.get_user_state(chat_id)
                 if self.state_manager.current_signal:
-                    user_state['active_trade'] = self.state_manager.current_signal.copy()
-                    user_state['tracking_message_id'] = None
+                    user_state.start_trade(self.state_manager.current_signal, record_history=False)
                     self.state_manager.save_user_states()
                 
                 await query.edit_message_text(
@@ -526,6 +677,15 @@ class TelegramService:
         elif query.data == "dashboard":
             await self.send_dashboard(chat_id, context.bot)
         
+        elif query.data == "dashboard_refresh":
+            # Within the snapshot TTL nothing has changed: the answer() above is the whole reply
+            text = self.render_dashboard(chat_id)
+            if self.views.changed(chat_id, query.message.message_id, text):
+                edited = await self._safe_send(query.edit_message_text(text, parse_mode='Markdown',
+                                                                       reply_markup=DASHBOARD_MARKUP))
+                if edited is None:
+                    self.views.invalidate(chat_id)
+        
         elif query.data == "riset":
             old_stats = self.state_manager.reset_user_data(chat_id)
             
@@ -541,9 +701,9 @@ class TelegramService:
         
         elif query.data == "stats":
             user_state = self.state_manager.get_user_state(chat_id)
-            win_count = user_state['win_count']
-            loss_count = user_state['loss_count']
-            be_count = user_state['be_count']
+            win_count = user_state.win_count
+            loss_count = user_state.loss_count
+            be_count = user_state.be_count
             total = win_count + loss_count + be_count
             win_rate = calculate_win_rate(win_count, loss_count)
             rate_emoji = get_win_rate_emoji(win_rate)
@@ -571,8 +731,18 @@ class TelegramService:
                 )
                 return
             
+            wait = signal_engine.reserve_manual_signal(chat_id)
+            if wait:
+                await query.edit_message_text(_manual_cooldown_text(wait), parse_mode='Markdown')
+                return
+            
             # Generate manual signal for this user only
-            success = await signal_engine.generate_manual_signal(context.bot, target_chat_id=chat_id)
+            success = False
+            try:
+                success = await signal_engine.generate_manual_signal(context.bot, target_chat_id=chat_id)
+            finally:
+                if not success:
+                    signal_engine.release_manual_signal(chat_id)
             
             if success:
                 await query.edit_message_text(
@@ -590,61 +760,7 @@ class TelegramService:
                 )
         
         elif query.data == "info":
-            deriv_ws = self.deriv_ws_getter()
-            gold_symbol = self.gold_symbol_getter()
-            
-            status = "🟢 Terhubung" if (deriv_ws and deriv_ws.connected) else "🔴 Terputus"
-            current_price = deriv_ws.get_current_price() if deriv_ws else None
-            price_str = f"${current_price:.3f}" if current_price else "N/A"
-            subscriber_count = len(self.state_manager.subscribers)
-            
-            market_status = BotConfig.get_market_status()
-            market_info = f"📅 Market: *{market_status['status']}*"
-            
-            today_stats = self.state_manager.get_today_stats(chat_id)
-            
-            # Real-time indicators
-            indicators = self.state_manager.current_indicators
-            rsi_str = f"{indicators.get('rsi', 0):.1f}" if indicators else "N/A"
-            ema_str = f"${indicators.get('ema', 0):.3f}" if indicators else "N/A"
-            adx_str = f"{indicators.get('adx', 0):.1f}" if indicators else "N/A"
-            
-            # Strategy status
-            strat_status = self.state_manager.strategy_status
-            status_emoji = strat_status.get('emoji', '❓')
-            status_name = strat_status.get('status', 'UNKNOWN')
-            status_desc = strat_status.get('description', '')
-            
-            # Determine BUY/SELL/NO TRADE indicator
-            trade_signal = "⚠️ NO TRADE"
-            if "BUY SETUP" in status_name:
-                trade_signal = "🟢 BUY READY"
-            elif "SELL SETUP" in status_name:
-                trade_signal = "🔴 SELL READY"
-            elif "POSITION ACTIVE" in status_name:
-                trade_signal = "🟣 POSITION ACTIVE"
-            
-            status_section = f"📊 Status: {status_emoji} *{status_name}*\n└ {trade_signal}\n" if strat_status else ""
-            
-            await query.edit_message_text(
-                f"⚙️ *Info Sistem Bot V2.0 Pro*\n"
-                f"━━━━━━━━━━━━━━━━━━━━━\n\n"
-                f"📡 WebSocket: {status}\n"
-                f"🏷️ Symbol: {gold_symbol or 'frxXAUUSD'}\n"
-                f"💰 Harga: {price_str}\n"
-                f"👥 Subscribers: {subscriber_count}\n\n"
-                f"{status_section}"
-                f"📊 *Indikator Real-Time:*\n"
-                f"├ 📈 RSI: *{rsi_str}*\n"
-                f"├ 💹 EMA50: *{ema_str}*\n"
-                f"└ 💪 ADX: *{adx_str}*\n\n"
-                f"{market_info}\n\n"
-                f"📊 *Hari Ini:*\n"
-                f"├ Sinyal: {today_stats['total']}\n"
-                f"├ Win: {today_stats['wins']} | Loss: {today_stats['losses']}\n"
-                f"└ Win Rate: {today_stats['win_rate']:.1f}%",
-                parse_mode='Markdown'
-            )
+            await query.edit_message_text(self.render_info(chat_id, button=True), parse_mode='Markdown')
     
     async def send_to_one_subscriber(self, bot, chat_id: str | int, text: str) -> bool:
         """Send message to ONE specific subscriber (per-user tracking/results)"""
@@ -668,8 +784,12 @@ class TelegramService:
                 logger.info(f"Removed inactive subscriber: {chat_id}")
             return False
     
-    async def send_to_all_subscribers(self, bot, text: str, photo_path: Optional[str] = None) -> None:
+    async def send_to_all_subscribers(self, bot, text: str, photo_path: Optional[str] = None,
+                                      signal_time: Optional[float] = None) -> None:
+        """Broadcast to every subscriber; pass signal_time (time.perf_counter() at the signal
+        decision) to record first/last delivery latency"""
         photo_bytes = None
+        last_delivery: Optional[float] = None
         if photo_path and os.path.exists(photo_path):
             try:
                 with open(photo_path, 'rb') as f:
@@ -678,6 +798,7 @@ class TelegramService:
                 logger.error(f"Failed to read photo {photo_path}: {e}")
         
         async def send_to_one(chat_id: str, photo_data: Optional[bytes]):
+            nonlocal last_delivery
             # Validate chat_id is numeric (not placeholder)
             if not str(chat_id).isdigit():
                 logger.warning(f"⚠️ Skipping invalid subscriber ID: {chat_id}")
@@ -686,18 +807,22 @@ class TelegramService:
             
             try:
                 if photo_data:
-                    await self._safe_send(bot.send_photo(
+                    sent = await self._safe_send(bot.send_photo(
                         chat_id=chat_id, 
                         photo=io.BytesIO(photo_data), 
                         caption=text, 
                         parse_mode='Markdown'
                     ))
                 else:
-                    await self._safe_send(bot.send_message(
+                    sent = await self._safe_send(bot.send_message(
                         chat_id=chat_id, 
                         text=text, 
                         parse_mode='Markdown'
                     ))
+                if sent is not None and signal_time is not None:
+                    if last_delivery is None:
+                        metrics.SIGNAL_FIRST_DELIVERY_SECONDS.observe(time.perf_counter() - signal_time)
+                    last_delivery = time.perf_counter()
                 return (chat_id, True, None)
             except TelegramError as e:
                 error_str = str(e).lower()
@@ -709,24 +834,29 @@ class TelegramService:
         if not subscribers_list:
             return
         
-        batch_size = BotConfig.TELEGRAM_BATCH_SIZE
-        for i in range(0, len(subscribers_list), batch_size):
-            batch = subscribers_list[i:i+batch_size]
-            results = await asyncio.gather(
-                *[send_to_one(cid, photo_bytes) for cid in batch], 
-                return_exceptions=True
-            )
+        with tracing.span("broadcast", subscribers=len(subscribers_list)):
+            batch_size = BotConfig.TELEGRAM_BATCH_SIZE
+            for i in range(0, len(subscribers_list), batch_size):
+                batch = subscribers_list[i:i+batch_size]
+                with tracing.span("broadcast_batch", batch=i // batch_size, size=len(batch)):
+                    results = await asyncio.gather(
+                        *[send_to_one(cid, photo_bytes) for cid in batch], 
+                        return_exceptions=True
+                    )
             
-            for result in results:
-                if isinstance(result, tuple):
-                    chat_id, success, error = result
-                    if not success and error:
-                        if "blocked" in error or "not found" in error or "deactivated" in error:
-                            self.state_manager.remove_subscriber(chat_id)
-                            logger.info(f"Removed inactive subscriber: {chat_id}")
+                for result in results:
+                    if isinstance(result, tuple):
+                        chat_id, success, error = result
+                        if not success and error:
+                            if "blocked" in error or "not found" in error or "deactivated" in error:
+                                self.state_manager.remove_subscriber(chat_id)
+                                logger.info(f"Removed inactive subscriber: {chat_id}")
             
-            if i + batch_size < len(subscribers_list):
-                await asyncio.sleep(0.5)
+                if i + batch_size < len(subscribers_list):
+                    await asyncio.sleep(0.5)
+        
+        if last_delivery is not None and signal_time is not None:
+            metrics.SIGNAL_LAST_DELIVERY_SECONDS.observe(last_delivery - signal_time)
     
     async def send_tracking_update(self, bot, current_price: float, signal_info: dict) -> None:
         """Send tracking updates for ALL active trades (manual OR global signals)
@@ -755,7 +885,7 @@ class TelegramService:
                 continue
             
             user_state = self.state_manager.get_user_state(chat_id)
-            active_trade = user_state.get('active_trade')
+            active_trade = user_state.active_trade
             if not active_trade:
                 # Clear tracking data when trade ends
                 self._last_tracking_price.pop(chat_id, None)
@@ -763,7 +893,7 @@ class TelegramService:
                 continue
             
             # Get signal ID to detect when new trade starts (use entry price + direction)
-            current_signal_id = f"{active_trade.get('entry_price'):.3f}-{active_trade.get('direction')}"
+            current_signal_id = f"{active_trade.entry_price:.3f}-{active_trade.direction.name}"
             last_signal_id = self._last_tracking_signal_id.get(chat_id)
             is_new_signal = current_signal_id != last_signal_id
             
@@ -776,19 +906,19 @@ class TelegramService:
                 # Debounce: Skip if price hasn't changed much and not time for forced update
                 last_price = self._last_tracking_price.get(chat_id)
                 price_delta = abs(current_price - last_price) if last_price else float('inf')
-                should_update = force_update or price_delta >= BotConfig.TRACKING_PRICE_DELTA
+                should_update = force_update or price_delta >= self.tracking_price_delta
                 
                 if last_price is not None and not should_update:
                     continue  # Skip this user, price hasn't changed enough
                 
                 self._last_tracking_price[chat_id] = current_price  # Update last price
             
-            direction = active_trade['direction']
-            entry = active_trade['entry_price']
-            tp1 = active_trade['tp1_level']
-            tp2 = active_trade['tp2_level']
-            sl = active_trade['sl_level']
-            trade_status = active_trade.get('status', 'active')
+            direction = active_trade.direction.name
+            entry = active_trade.entry_price
+            tp1 = active_trade.tp1_level
+            tp2 = active_trade.tp2_level
+            sl = active_trade.sl_level
+            trade_status = active_trade.status
             
             pnl_str = format_pnl(direction, entry, current_price)
             
@@ -807,12 +937,12 @@ class TelegramService:
             
             dir_emoji = "📈" if direction == 'BUY' else "📉"
             
-            if trade_status == 'tp1_hit':
+            if trade_status == TradeStatus.TP1_HIT:
                 filled = int(tp2_progress / 10)
                 empty = 10 - filled
                 progress_bar = "█" * filled + "░" * empty
                 tracking_text = (
-                    f"📍 *TRACKING - AWAITING TP2*\n"
+                    f"📍 *TRACKING - AWAITING TP2{self.title_suffix}*\n"
                     f"━━━━━━━━━━━━━━━━━━━━━\n\n"
                     f"{dir_emoji} Arah: *{direction}*\n"
                     f"💰 Harga Sekarang: *${current_price:.3f}*\n"
@@ -829,7 +959,7 @@ class TelegramService:
                 )
             else:
                 tracking_text = (
-                    f"📍 *TRACKING UPDATE*\n"
+                    f"📍 *TRACKING UPDATE{self.title_suffix}*\n"
                     f"━━━━━━━━━━━━━━━━━━━━━\n\n"
                     f"{dir_emoji} Arah: *{direction}*\n"
                     f"💰 Harga Sekarang: *${current_price:.3f}*\n"
@@ -843,7 +973,7 @@ class TelegramService:
                 )
             
             try:
-                tracking_msg_id = user_state.get('tracking_message_id')
+                tracking_msg_id = user_state.tracking_message_id
                 sent = False
                 
                 if tracking_msg_id:
@@ -871,7 +1001,7 @@ class TelegramService:
                             parse_mode='Markdown'
                         ))
                         if msg:
-                            user_state['tracking_message_id'] = msg.message_id
+                            user_state.tracking_message_id = msg.message_id
                             self.state_manager.save_user_states()
                             sent = True
                             sent_count += 1
@@ -0,0 +1,119 @@
+import asyncio
+import hmac
+import logging
+import time
+from typing import Any, Awaitable, Optional
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application, BaseUpdateProcessor
+
+from config import BotConfig
+import metrics
+
+
+logger = logging.getLogger("TelegramWebhook")
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Concurrent handler processing that keeps each chat's updates in arrival order.
+
+    Up to `max_concurrent_updates` handlers run at once, so a slow /signal (candle fetch)
+    or /dashboard only holds up its own chat. An update waits for the previous update of
+    its chat *before* it takes a worker slot, so one busy chat cannot fill the pool with
+    waiting updates. PTB's own semaphore bounds the updates admitted (waiting or running)
+    to `max_pending_updates`; beyond that the update queue backs up.
+    """
+
+    def __init__(self, max_concurrent_updates: int, max_pending_updates: int):
+        super().__init__(max(max_pending_updates, max_concurrent_updates, 2))
+        self.workers = max_concurrent_updates
+        self._worker_slots = asyncio.Semaphore(max_concurrent_updates)
+        self._chats: dict[int, list] = {}  # chat_id -> [lock, updates waiting or running]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        received = time.perf_counter()
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            async with self._worker_slots:
+                await coroutine
+            metrics.TELEGRAM_UPDATE_SECONDS.observe(time.perf_counter() - received)
+            return
+        entry = self._chats.get(chat.id)
+        if entry is None:
+            entry = self._chats[chat.id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0], self._worker_slots:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._chats[chat.id]
+        metrics.TELEGRAM_UPDATE_SECONDS.observe(time.perf_counter() - received)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def get_stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'in_flight': self.current_concurrent_updates,
+            'chats_busy': len(self._chats),
+        }
+
+
+class TelegramWebhook:
+    """Telegram update endpoint on the health server's aiohttp app.
+
+    A POST is checked against the secret token Telegram echoes back in
+    X-Telegram-Bot-Api-Secret-Token, decoded and put on the Application's update queue;
+    the response is sent immediately and the handlers run in the update processor.
+    """
+
+    def __init__(self, application: Application, secret_token: str, path: Optional[str] = None):
+        self.application = application
+        self.secret_token = secret_token
+        self.path = path or BotConfig.TELEGRAM_WEBHOOK_PATH
+        self.received = 0
+        self.rejected = 0
+
+    def add_routes(self, app: web.Application) -> None:
+        app.router.add_post(self.path, self.handle)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ''), self.secret_token):
+            self.rejected += 1
+            metrics.TELEGRAM_WEBHOOK_UPDATES.labels("rejected").inc()
+            return web.Response(status=403)
+        try:
+            update = Update.de_json(await request.json(), self.application.bot)
+        except (ValueError, TypeError, KeyError) as e:
+            metrics.TELEGRAM_WEBHOOK_UPDATES.labels("invalid").inc()
+            logger.warning(f"Unreadable webhook update: {e}")
+            return web.Response(status=400)
+        self.received += 1
+        metrics.TELEGRAM_WEBHOOK_UPDATES.labels("accepted").inc()
+        await self.application.update_queue.put(update)
+        return web.Response()
+
+    async def register(self, base_url: Optional[str] = None) -> None:
+        url = (base_url or BotConfig.TELEGRAM_WEBHOOK_URL).rstrip('/') + self.path
+        await self.application.bot.set_webhook(url=url, secret_token=self.secret_token,
+                                               allowed_updates=['message', 'callback_query'],
+                                               max_connections=min(BotConfig.TELEGRAM_CONCURRENT_UPDATES, 100))
+        logger.info(f"Webhook registered: {url}")
+
+    def get_stats(self) -> dict:
+        processor = self.application.update_processor
+        return {
+            'received': self.received,
+            'rejected': self.rejected,
+            'queued': self.application.update_queue.qsize(),
+            **(processor.get_stats() if isinstance(processor, ChatOrderedUpdateProcessor) else {}),
+        }
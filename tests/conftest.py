@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# The bot's modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# utils opens its log file at import time; keep it out of the working tree
+os.environ.setdefault('LOG_FILENAME', os.path.join(tempfile.mkdtemp(prefix='bot-tests-'), 'bot_scalping.log'))
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from analysis_worker import AnalysisWorker
+
+
+def test_close_cancels_the_running_and_the_queued_jobs():
+    release = threading.Event()
+
+    def compute(df):
+        release.wait(5)
+        return df
+
+    async def scenario():
+        worker = AnalysisWorker(compute, executor='thread', queue_size=4, deadline=10)
+        running = asyncio.create_task(worker.analyze('frxXAUUSD', 60, 'running'))
+        await asyncio.sleep(0.05)  # the consumer has handed it to the thread
+        queued = asyncio.create_task(worker.analyze('frxEURUSD', 60, 'queued'))
+        await asyncio.sleep(0)
+
+        await asyncio.wait_for(worker.close(), 1)
+        release.set()
+        return await asyncio.wait_for(asyncio.gather(running, queued, return_exceptions=True), 1)
+
+    results = asyncio.run(scenario())
+
+    assert [type(result) for result in results] == [asyncio.CancelledError, asyncio.CancelledError]
+
+
+def test_jobs_complete_in_order():
+    async def scenario():
+        worker = AnalysisWorker(lambda df: df * 2, executor='thread', queue_size=4, deadline=10)
+        results = await asyncio.gather(worker.analyze('frxXAUUSD', 60, 1), worker.analyze('frxEURUSD', 60, 2))
+        await worker.close()
+        return results, worker.completed
+
+    assert asyncio.run(scenario()) == ([2, 4], 2)
+
+
+def test_a_stale_bar_is_superseded():
+    async def scenario():
+        worker = AnalysisWorker(lambda df: df, executor='inline', queue_size=4, deadline=10)
+        assert await worker.analyze('frxXAUUSD', 120, 'new') == 'new'
+        result = await worker.analyze('frxXAUUSD', 60, 'old')
+        await worker.close()
+        return result, worker.dropped['superseded']
+
+    assert asyncio.run(scenario()) == (None, 1)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from backtester import RESULT_BREAK_EVEN, RESULT_LOSS, RESULT_OPEN, RESULT_WIN, resolve_open_trade
+
+
+BUY = {'direction': 'BUY', 'entry_price': 2000.0, 'tp1_level': 2003.0, 'tp2_level': 2004.5, 'sl_level': 1997.0,
+       'status': 'active'}
+SELL = {'direction': 'SELL', 'entry_price': 2000.0, 'tp1_level': 1997.0, 'tp2_level': 1995.5, 'sl_level': 2003.0,
+        'status': 'active'}
+
+
+def _ticks(trade: dict, prices: list[float]) -> tuple[str, int, bool]:
+    prices = np.asarray(prices, dtype=np.float64)
+    return resolve_open_trade(trade, prices, prices, pessimistic=False)
+
+
+@pytest.mark.parametrize("trade, prices, expected", [
+    (BUY, [2001.0, 2003.2, 1999.9], (RESULT_BREAK_EVEN, 2, True)),
+    (BUY, [2001.0, 2003.5], (RESULT_OPEN, -1, True)),
+    (BUY, [1999.0, 1996.9, 2010.0], (RESULT_LOSS, 1, False)),
+    (BUY, [2003.1, 2004.6], (RESULT_WIN, 1, True)),
+    (SELL, [1999.0, 1995.4], (RESULT_WIN, 1, True)),
+    (SELL, [2001.0, 2003.0], (RESULT_LOSS, 1, False)),
+    (BUY, [], (RESULT_OPEN, -1, False)),
+])
+def test_tick_paths(trade, prices, expected):
+    assert _ticks(trade, prices) == expected
+
+
+def test_trade_past_tp1_only_has_tp2_or_break_even_left():
+    trade = {**BUY, 'status': 'tp1_hit', 'sl_level': BUY['entry_price']}
+
+    assert _ticks(trade, [2001.0, 2000.0, 2005.0]) == (RESULT_BREAK_EVEN, 1, True)
+    assert _ticks(trade, [2001.0, 2004.6]) == (RESULT_WIN, 1, True)
+    assert _ticks(trade, [2001.0, 2002.0]) == (RESULT_OPEN, -1, True)
+
+
+def test_bar_holding_stop_and_target_resolves_against_the_trade():
+    high = np.array([2001.0, 2003.5])
+    low = np.array([1999.0, 1996.5])
+
+    assert resolve_open_trade(BUY, high, low, pessimistic=True) == (RESULT_LOSS, 1, False)
+    assert resolve_open_trade(SELL, 4000.0 - low, 4000.0 - high, pessimistic=True) == (RESULT_LOSS, 1, False)
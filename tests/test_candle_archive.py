@@ -0,0 +1,86 @@
+import asyncio
+
+import numpy as np
+
+from candle_archive import CandleArchive, _dedupe, candles_to_columns
+
+
+NEW_YEAR = 1767225600  # 2026-01-01 00:00 UTC, a month boundary
+
+
+def _candles(epochs, close_offset: float = 0.0) -> list[dict]:
+    return [{'epoch': epoch, 'open': 2000.0, 'high': 2001.0, 'low': 1999.0, 'close': 2000.0 + i + close_offset}
+            for i, epoch in enumerate(epochs)]
+
+
+def _bars(start: int, count: int) -> list[int]:
+    return [start + 60 * i for i in range(count)]
+
+
+def test_dedupe_sorts_and_keeps_the_last_value_of_an_epoch():
+    columns = candles_to_columns([{'epoch': 120, 'open': 1, 'high': 1, 'low': 1, 'close': 1},
+                                  {'epoch': 60, 'open': 2, 'high': 2, 'low': 2, 'close': 2},
+                                  {'epoch': 120, 'open': 3, 'high': 3, 'low': 3, 'close': 3}])
+
+    deduped = _dedupe(columns)
+
+    assert deduped['epoch'].tolist() == [60, 120]
+    assert deduped['close'].tolist() == [2.0, 3.0]
+
+
+def test_merge_splits_bars_into_monthly_partitions(tmp_path):
+    archive = CandleArchive(str(tmp_path), flush_bars=1000)
+    epochs = _bars(NEW_YEAR - 180, 6)
+
+    archive.merge('frxXAUUSD', 60, candles_to_columns(_candles(epochs)))
+
+    assert archive.months('frxXAUUSD', 60) == ['2025-12', '2026-01']
+    assert archive.load('frxXAUUSD', 60, NEW_YEAR, NEW_YEAR + 3600)['epoch'].tolist() == epochs[3:]
+    assert archive.load('frxXAUUSD', 60)['epoch'].tolist() == epochs
+
+
+def test_remerging_overlapping_bars_replaces_them(tmp_path):
+    archive = CandleArchive(str(tmp_path), flush_bars=1000)
+    archive.merge('frxXAUUSD', 60, candles_to_columns(_candles(_bars(NEW_YEAR - 120, 4))))
+
+    # A refetch that overlaps the archive across the boundary, with revised closes
+    archive.merge('frxXAUUSD', 60, candles_to_columns(_candles(_bars(NEW_YEAR - 60, 4), close_offset=0.5)))
+
+    columns = archive.load('frxXAUUSD', 60)
+    assert columns['epoch'].tolist() == _bars(NEW_YEAR - 120, 5)
+    assert columns['close'].tolist() == [2000.0, 2000.5, 2001.5, 2002.5, 2003.5]
+    assert np.all(np.diff(columns['epoch']) > 0)
+
+
+def test_appends_are_buffered_and_only_count_new_bars(tmp_path):
+    archive = CandleArchive(str(tmp_path), flush_bars=5)
+    epochs = _bars(NEW_YEAR, 8)
+
+    assert archive.append_candles('frxXAUUSD', 60, _candles(epochs[:3])) == 3
+    assert archive.months('frxXAUUSD', 60) == []  # still buffered
+    # Each poll returns the whole window again; only bars past the last append are new
+    assert archive.append_candles('frxXAUUSD', 60, _candles(epochs[:4])) == 1
+    assert archive.append_candles('frxXAUUSD', 60, _candles(epochs[:4])) == 0
+    assert archive.append_candles('frxXAUUSD', 60, _candles(epochs[:6])) == 2
+    assert archive.months('frxXAUUSD', 60) == ['2026-01']  # flush_bars reached
+
+    archive.append_candles('frxXAUUSD', 60, _candles(epochs))
+    assert archive.load('frxXAUUSD', 60)['epoch'].tolist() == epochs  # load flushes the rest
+
+
+def test_backfill_pages_backwards_until_the_start(tmp_path):
+    archive = CandleArchive(str(tmp_path), flush_bars=1000)
+    available = _bars(NEW_YEAR - 600, 30)
+    requests = []
+
+    class FakeDeriv:
+        async def get_candles(self, symbol, count, granularity, end):
+            requests.append(end)
+            return _candles([epoch for epoch in available if epoch <= end][-count:])
+
+    total = asyncio.run(archive.backfill(FakeDeriv(), 'frxXAUUSD', 60, available[5], available[-1],
+                                         batch_size=10, delay=0))
+
+    assert total == 25
+    assert archive.load('frxXAUUSD', 60)['epoch'].tolist() == available[5:]
+    assert requests == [available[-1], available[20] - 1, available[10] - 1]
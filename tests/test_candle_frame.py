@@ -0,0 +1,91 @@
+import numpy as np
+
+from candle_archive import candles_to_columns
+from candle_frame import CandleFrame
+
+
+START = 1_790_000_040  # a bar open time (multiple of 60)
+
+
+def _payload(first: int, count: int, close_offset: float = 0.0) -> dict[str, np.ndarray]:
+    return candles_to_columns([
+        {'epoch': START + 60 * i, 'open': 100.0 + i, 'high': 101.0 + i, 'low': 99.0 + i,
+         'close': 100.5 + i + close_offset}
+        for i in range(first, first + count)
+    ])
+
+
+def _epochs(frame: CandleFrame) -> list[int]:
+    return [int(ts.timestamp()) for ts in frame.to_frame().index]
+
+
+def test_first_update_fills_the_window():
+    frame = CandleFrame(window=5)
+
+    assert frame.update(_payload(0, 8))
+
+    assert len(frame) == 5
+    assert _epochs(frame) == [START + 60 * i for i in range(3, 8)]
+    assert frame.last_epoch == START + 60 * 7
+
+
+def test_overlapping_update_finalises_the_forming_bar_and_appends():
+    frame = CandleFrame(window=5)
+    frame.update(_payload(0, 5))
+
+    # The previous fetch saw bar 4 still forming; this one has its final close and two new bars
+    assert frame.update(_payload(4, 3, close_offset=0.25))
+
+    df = frame.to_frame()
+    assert _epochs(frame) == [START + 60 * i for i in range(2, 7)]
+    assert df['Close'].tolist() == [102.5, 103.5, 104.75, 105.75, 106.75]
+
+
+def test_shifting_out_old_bars_keeps_the_newest_window():
+    frame = CandleFrame(window=5)
+    frame.update(_payload(0, 5))
+
+    # Well past the 2x storage: each poll re-sends the last bar and adds one
+    for last in range(5, 40):
+        assert frame.update(_payload(last - 1, 2))
+        assert len(frame) == 5
+    reference = _payload(35, 5)
+
+    df = frame.to_frame()
+    assert _epochs(frame) == reference['epoch'].tolist()
+    assert df['Close'].tolist() == reference['close'].tolist()
+    assert df['Open'].tolist() == reference['open'].tolist()
+
+
+def test_a_gap_is_refused_until_a_full_window_is_fetched():
+    frame = CandleFrame(window=5)
+    frame.update(_payload(0, 5))
+
+    assert not frame.update(_payload(10, 2))  # bars 5..9 are missing
+    assert frame.fetch_count(START + 60 * 11) == 5
+    assert frame.update(_payload(7, 5))
+
+    assert _epochs(frame) == [START + 60 * i for i in range(7, 12)]
+
+
+def test_fetch_count_asks_for_the_missing_bars_plus_overlap():
+    frame = CandleFrame(window=100)
+    assert frame.fetch_count(START) == 100  # empty
+
+    frame.update(_payload(0, 100))
+    last = frame.last_epoch
+
+    assert frame.fetch_count(last + 30) == 2
+    assert frame.fetch_count(last + 60 * 3 + 5) == 5
+    assert frame.fetch_count(last + 60 * 1000) == 100
+
+
+def test_to_frame_is_a_copy():
+    frame = CandleFrame(window=5)
+    frame.update(_payload(0, 5))
+    df = frame.to_frame()
+
+    frame.update(_payload(4, 1, close_offset=10.0))
+
+    assert df['Close'].iloc[-1] == 104.5
+    assert frame.to_frame()['Close'].iloc[-1] == 114.5
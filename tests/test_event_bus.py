@@ -0,0 +1,186 @@
+import asyncio
+import logging
+
+import pytest
+
+from event_bus import BLOCK, DROP_OLDEST, EventBus, SignalOpened, TickEvent, TradeClosed, TrackingUpdate
+
+
+def _opened(symbol: str = 'frxXAUUSD', n: int = 0) -> SignalOpened:
+    return SignalOpened(symbol, {'direction': 'BUY', 'n': n}, {}, 0.0)
+
+
+def _closed(symbol: str = 'frxXAUUSD') -> TradeClosed:
+    return TradeClosed(symbol, 'WIN', 2000.0, 2004.5, 3.0)
+
+
+def test_each_consumer_sees_its_events_in_publish_order():
+    async def main():
+        bus = EventBus()
+        seen, other = [], []
+        bus.subscribe('telegram', (SignalOpened, TradeClosed, TrackingUpdate), seen.append, symbol='frxXAUUSD')
+        bus.subscribe('other', (SignalOpened,), other.append, symbol='frxEURUSD')
+        bus.start()
+        events = [_opened(n=1), TrackingUpdate('frxXAUUSD', 2001.0), _opened('frxEURUSD'), _closed(),
+                  TrackingUpdate('frxXAUUSD', 2002.0)]
+        for event in events:
+            await bus.publish(event)
+        await bus.close()
+        return events, seen, other
+
+    events, seen, other = asyncio.run(main())
+    assert seen == [e for e in events if e.symbol == 'frxXAUUSD']
+    assert other == [events[2]]
+
+
+def test_slow_consumer_only_delays_itself():
+    async def main():
+        bus = EventBus()
+        fast, slow = [], []
+        release = asyncio.Event()
+
+        async def slow_handler(event):
+            await release.wait()
+            slow.append(event)
+
+        bus.subscribe('slow', (TradeClosed,), slow_handler)
+        bus.subscribe('fast', (TradeClosed,), fast.append)
+        bus.start()
+        for _ in range(3):
+            await bus.publish(_closed())
+        await asyncio.sleep(0.01)
+        delivered_before_release = (len(fast), len(slow))
+        release.set()
+        await bus.close()
+        return delivered_before_release, len(slow)
+
+    before, slow_total = asyncio.run(main())
+    assert before == (3, 0)
+    assert slow_total == 3
+
+
+def test_drop_oldest_keeps_the_newest_ticks():
+    async def main():
+        bus = EventBus()
+        seen = []
+        subscription = bus.subscribe('ticks', (TickEvent,), seen.append, maxsize=3, overflow=DROP_OLDEST)
+        for epoch in range(5):
+            bus.publish_nowait(TickEvent('frxXAUUSD', epoch, 2000.0))
+        bus.start()
+        await bus.close()
+        return [tick.epoch for tick in seen], subscription.dropped
+
+    epochs, dropped = asyncio.run(main())
+    assert epochs == [2, 3, 4]
+    assert dropped == 2
+
+
+def test_block_publish_waits_for_room():
+    async def main():
+        bus = EventBus()
+        seen = []
+        bus.subscribe('results', (TradeClosed,), seen.append, maxsize=1, overflow=BLOCK)
+        await bus.publish(_closed())
+        blocked = asyncio.create_task(bus.publish(_closed()))
+        await asyncio.sleep(0.01)
+        waiting = not blocked.done()
+        bus.start()
+        await blocked
+        await bus.close()
+        return waiting, len(seen)
+
+    assert asyncio.run(main()) == (True, 2)
+
+
+def test_close_drains_every_queued_event():
+    async def main():
+        bus = EventBus()
+        seen = []
+
+        async def handler(event):
+            await asyncio.sleep(0.01)
+            seen.append(event)
+
+        bus.subscribe('telegram', (SignalOpened,), handler)
+        bus.start()
+        for n in range(10):
+            await bus.publish(_opened(n=n))
+        await bus.close()
+        return [event.signal['n'] for event in seen]
+
+    assert asyncio.run(main()) == list(range(10))
+
+
+def test_close_timeout_reports_undelivered_events(caplog):
+    async def main():
+        bus = EventBus()
+
+        async def stuck(event):
+            await asyncio.sleep(3600)
+
+        bus.subscribe('telegram', (SignalOpened, TradeClosed), stuck)
+        bus.start()
+        await bus.publish(_opened())
+        await bus.publish(_closed())
+        await asyncio.sleep(0)
+        await bus.close(timeout=0.05)
+        return bus.get_stats()['telegram']
+
+    with caplog.at_level(logging.ERROR, logger="EventBus"):
+        stats = asyncio.run(main())
+    assert stats['delivered'] == 0
+    assert any('1 undelivered events: TradeClosed' in record.message for record in caplog.records)
+
+
+def test_failing_handler_does_not_stop_the_consumer():
+    async def main():
+        bus = EventBus()
+        seen = []
+
+        def handler(event):
+            if event.signal['n'] == 0:
+                raise RuntimeError("boom")
+            seen.append(event)
+
+        bus.subscribe('flaky', (SignalOpened,), handler)
+        bus.start()
+        await bus.publish(_opened(n=0))
+        await bus.publish(_opened(n=1))
+        await bus.close()
+        return len(seen), bus.get_stats()['flaky']['errors']
+
+    assert asyncio.run(main()) == (1, 1)
+
+
+def test_batch_consumer_gets_what_queued_during_the_previous_call():
+    async def main():
+        bus = EventBus()
+        batches = []
+        release = asyncio.Event()
+
+        async def handler(events):
+            batches.append([event.signal['n'] for event in events])
+            await release.wait()
+
+        bus.subscribe('persistence', (SignalOpened,), handler, batch=True)
+        bus.start()
+        await bus.publish(_opened(n=0))
+        await asyncio.sleep(0)
+        for n in range(1, 4):
+            await bus.publish(_opened(n=n))
+        release.set()
+        await bus.close()
+        return batches, bus.get_stats()['persistence']['delivered']
+
+    batches, delivered = asyncio.run(main())
+    assert batches == [[0], [1, 2, 3]]
+    assert delivered == 4
+
+
+def test_subscribe_rejects_duplicates_and_unknown_policies():
+    bus = EventBus()
+    bus.subscribe('a', (TickEvent,), print)
+    with pytest.raises(ValueError):
+        bus.subscribe('a', (TickEvent,), print)
+    with pytest.raises(ValueError):
+        bus.subscribe('b', (TickEvent,), print, overflow='drop_newest')
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import indicators
+
+
+def _bars(n: int = 400, seed: int = 7) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    close = 2000.0 + np.cumsum(rng.normal(0.0, 0.8, n))
+    high = close + rng.uniform(0.0, 1.5, n)
+    low = close - rng.uniform(0.0, 1.5, n)
+    return high, low, close
+
+
+@pytest.mark.parametrize("column", ['EMA_50', 'EMA_9', 'RSI_3', 'RSI_14', 'ATRr_14', 'ADX_14', 'ADX_55'])
+def test_streaming_matches_array_version(column):
+    high, low, close = _bars()
+    expected = indicators.compute_column(column, high, low, close)
+
+    state = indicators.streaming_indicator(column)
+    streamed = np.array([state.update(h, l, c) for h, l, c in zip(high, low, close)])
+
+    np.testing.assert_array_equal(np.isnan(streamed), np.isnan(expected))
+    np.testing.assert_allclose(streamed, expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_streaming_rma_ages_over_missing_values():
+    values = np.array([1.0, 2.0, np.nan, 4.0, 5.0, np.nan, np.nan, 8.0])
+    expected = indicators.rma(values, 3)
+
+    state = indicators.StreamingRMA(3)
+    streamed = np.array([state.update(v) for v in values])
+
+    np.testing.assert_allclose(streamed, expected, equal_nan=True)
+
+
+def test_unknown_column_is_rejected():
+    with pytest.raises(ValueError):
+        indicators.streaming_indicator('MACD_12')
+    with pytest.raises(ValueError):
+        indicators.compute_column('EMA_x', [1.0], [1.0], [1.0])
@@ -0,0 +1,31 @@
+import loop_monitor
+import metrics
+from loop_monitor import LoopMonitor
+
+
+def _scraped_max() -> float:
+    line = next(line for line in metrics.render_latest().splitlines()
+                if line.startswith('xauusd_event_loop_lag_max_seconds '))
+    return float(line.split()[1])
+
+
+def test_lag_max_gauge_is_a_windowed_max_that_scrapes_do_not_reset(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(loop_monitor.time, 'monotonic', lambda: clock[0])
+    monitor = LoopMonitor(interval=0.5, threshold=10.0, max_window=60.0)
+    monkeypatch.setattr(metrics.EVENT_LOOP_LAG_MAX_SECONDS._default(), 'function', monitor.window_max_lag)
+
+    for lag in (0.01, 0.30, 0.02):
+        monitor._record_lag(lag)
+        clock[0] += 10
+    assert _scraped_max() == 0.30
+    assert _scraped_max() == 0.30  # a scrape changes nothing
+
+    clock[0] = 1000.0 + 10 + 60.5  # the 0.30 sample has left the window
+    assert monitor.window_max_lag() == 0.02
+    monitor._record_lag(0.05)
+    assert monitor.window_max_lag() == 0.05
+    assert len(monitor._window_lags) == 1
+
+    clock[0] += 61
+    assert monitor.window_max_lag() == 0.0
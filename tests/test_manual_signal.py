@@ -0,0 +1,145 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas_ta")
+
+from config import BotConfig
+from signal_engine import SignalEngine
+from state_manager import StateManager
+from telegram_service import TelegramService
+
+
+class FakeDerivWS:
+    connected = True
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.fetches = 0
+        rng = np.random.default_rng(3)
+        self.close = 2000.0 + np.cumsum(rng.normal(0.0, 0.8, 400))
+
+    async def get_candles(self, symbol, count, granularity, **kwargs):
+        self.fetches += 1
+        await asyncio.sleep(self.delay)
+        now = int(time.time() // 60 * 60)
+        n = min(count, len(self.close))
+        close = self.close[-n:]
+        return [{'epoch': now - 60 * (n - 1 - i), 'open': float(c), 'high': float(c) + 0.5,
+                 'low': float(c) - 0.5, 'close': float(c)} for i, c in enumerate(close)]
+
+    def get_feed(self, symbol):
+        return None
+
+
+class FakeTelegram:
+    def __init__(self):
+        self.sent = 0
+
+    async def _safe_send(self, coro):
+        self.sent += 1
+        return await coro
+
+
+class FakeBot:
+    async def send_message(self, **kwargs):
+        return True
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(BotConfig, 'MANUAL_SIGNAL_USER_COOLDOWN', 30)
+    engine = SignalEngine(StateManager(), FakeTelegram(), deriv_ws=FakeDerivWS())
+    engine.shadow = None
+    return engine
+
+
+def test_reserve_rate_limits_per_user_and_release_undoes_it(engine):
+    assert engine.reserve_manual_signal('1') == 0
+    assert 29 < engine.reserve_manual_signal('1') <= 30
+    assert engine.reserve_manual_signal('2') == 0
+
+    engine.release_manual_signal('1')
+    assert engine.reserve_manual_signal('1') == 0
+    engine.release_manual_signal('unknown')
+
+
+def test_a_burst_of_requests_shares_one_fetch(engine):
+    async def main():
+        # The first request also warms the bar cache; afterwards a fetch is one candle request
+        await engine.generate_manual_signal(FakeBot(), 'warm-up')
+        engine._manual_state = None
+        engine.strategies.cache.bar_epoch = None
+        engine.deriv_ws.fetches = 0
+        results = await asyncio.gather(*(engine.generate_manual_signal(FakeBot(), str(i)) for i in range(10)))
+        return engine.deriv_ws.fetches, results
+
+    fetches, results = asyncio.run(main())
+    assert all(results)
+    assert fetches == 1
+    assert engine.telegram_service.sent == 11
+    assert all(engine.state_manager.get_user_state(str(i)).active_trade for i in range(10))
+
+
+def test_analyzer_bars_are_reused_until_the_next_bar_closes(engine, monkeypatch):
+    monkeypatch.setattr(BotConfig, 'MANUAL_SIGNAL_SHARE_SECONDS', 0.0)
+
+    async def main():
+        df = await engine.analyze(await engine.get_historical_data())
+        engine.strategies.cache.load(df)
+        fetches = engine.deriv_ws.fetches
+        assert await engine.generate_manual_signal(FakeBot(), '1')
+        reused = engine.deriv_ws.fetches == fetches
+        engine.strategies.cache.bar_epoch -= 2 * engine.strategies.cache.bar_seconds
+        assert await engine.generate_manual_signal(FakeBot(), '2')
+        return reused, engine.deriv_ws.fetches > fetches
+
+    assert engine.strategies.cache.bar_seconds == 0
+    assert asyncio.run(main()) == (True, True)
+    assert engine.strategies.cache.bar_seconds == 60
+
+
+@pytest.mark.parametrize("outcome", [False, RuntimeError("network")])
+def test_failed_send_command_releases_the_cooldown(engine, outcome):
+    async def generate(bot, target_chat_id=None):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    engine.generate_manual_signal = generate
+
+    async def reply_text(text, **kwargs):
+        pass
+
+    service = TelegramService(engine.state_manager, lambda: None, lambda: 'frxXAUUSD')
+    update = SimpleNamespace(message=SimpleNamespace(chat_id=7, reply_text=reply_text))
+    context = SimpleNamespace(bot=FakeBot(), bot_data={'signal_engine': engine})
+
+    async def main():
+        try:
+            await service.send(update, context)
+        except RuntimeError:
+            pass
+
+    asyncio.run(main())
+    assert engine.reserve_manual_signal('7') == 0
+
+
+def test_successful_send_command_keeps_the_cooldown(engine):
+    async def generate(bot, target_chat_id=None):
+        return True
+
+    engine.generate_manual_signal = generate
+
+    async def reply_text(text, **kwargs):
+        pass
+
+    service = TelegramService(engine.state_manager, lambda: None, lambda: 'frxXAUUSD')
+    update = SimpleNamespace(message=SimpleNamespace(chat_id=7, reply_text=reply_text))
+    asyncio.run(service.send(update, SimpleNamespace(bot=FakeBot(), bot_data={'signal_engine': engine})))
+
+    assert engine.reserve_manual_signal('7') > 0
@@ -0,0 +1,75 @@
+import datetime
+
+import numpy as np
+
+from config import BotConfig
+from market_calendar import REASON_EARLY_CLOSE, REASON_HOLIDAY, MarketCalendar
+
+
+def legacy_is_open(ts: float) -> bool:
+    """BotConfig.is_market_open() before the calendar: weekly close only, evaluated at `ts`"""
+    now_ny = datetime.datetime.fromtimestamp(ts, BotConfig.NY_TZ)
+    weekday, hour = now_ny.weekday(), now_ny.hour
+    if weekday == BotConfig.MARKET_CLOSE_DAY and hour >= BotConfig.MARKET_CLOSE_HOUR:
+        return False
+    if weekday == 5:
+        return False
+    if weekday == BotConfig.MARKET_OPEN_DAY and hour < BotConfig.MARKET_OPEN_HOUR:
+        return False
+    return True
+
+
+def _ny(*args) -> float:
+    return BotConfig.NY_TZ.localize(datetime.datetime(*args)).timestamp()
+
+
+def test_matches_legacy_is_open_across_dst_changes():
+    calendar = MarketCalendar(holidays=[], early_closes=[])
+    # Both 2026 DST switches, every 15 minutes, walking forward and then backward
+    epochs = np.arange(_ny(2026, 2, 20, 0, 0), _ny(2026, 11, 20, 0, 0), 900)
+
+    expected = np.array([legacy_is_open(ts) for ts in epochs])
+    assert [calendar.is_open(ts) for ts in epochs] == expected.tolist()
+    assert [calendar.is_open(ts) for ts in epochs[::-1]] == expected[::-1].tolist()
+    np.testing.assert_array_equal(calendar.open_mask(epochs), expected)
+
+
+def test_next_transition_is_the_weekly_close_and_reopen():
+    calendar = MarketCalendar(holidays=[], early_closes=[])
+    wednesday = _ny(2026, 10, 14, 12, 0)
+
+    close = calendar.next_transition(wednesday)
+    reopen = calendar.next_transition(close)
+
+    assert close == _ny(2026, 10, 16, 17, 0)
+    assert reopen == _ny(2026, 10, 18, 17, 0)
+    assert not calendar.is_open(close) and calendar.is_open(reopen)
+    assert calendar.seconds_until_transition(wednesday) == close - wednesday
+
+
+def test_holiday_closes_the_session_trading_on_that_date():
+    calendar = MarketCalendar(holidays=['2026-11-26'], early_closes=[])
+
+    assert calendar.is_open(_ny(2026, 11, 25, 16, 59))
+    assert not calendar.is_open(_ny(2026, 11, 25, 17, 0))
+    assert not calendar.is_open(_ny(2026, 11, 26, 16, 59))
+    assert calendar.is_open(_ny(2026, 11, 26, 17, 0))
+    assert REASON_HOLIDAY in calendar.status(_ny(2026, 11, 26, 9, 0))['message']
+
+
+def test_early_close_runs_until_the_daily_roll():
+    calendar = MarketCalendar(holidays=[], early_closes=['2026-11-27 13:45'])
+
+    assert calendar.is_open(_ny(2026, 11, 27, 13, 44))
+    status = calendar.status(_ny(2026, 11, 27, 13, 45))
+    assert not status['is_open']
+    assert REASON_EARLY_CLOSE in status['message']
+    # The early close runs straight into the weekend
+    assert calendar.next_transition(_ny(2026, 11, 27, 13, 45)) == _ny(2026, 11, 29, 17, 0)
+
+
+def test_lookups_far_outside_the_built_horizon_rebuild():
+    calendar = MarketCalendar(holidays=[], early_closes=[], horizon_days=7)
+
+    for ts in (_ny(2026, 1, 7, 12, 0), _ny(2030, 6, 8, 12, 0), _ny(2026, 1, 10, 12, 0)):
+        assert calendar.is_open(ts) == legacy_is_open(ts)
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+
+from backtester import RESULT_BREAK_EVEN, RESULT_LOSS, RESULT_WIN, trade_pnl
+from shadow import PARTIAL_CLOSE, ShadowBook
+from strategies import BarResult, EmaRsiAdxStrategy, StrategyParams
+
+
+class ScriptedVariant(EmaRsiAdxStrategy):
+    """Signals `signal` at `price` on every bar"""
+
+    def __init__(self, name: str, signal: str, sl_usd: float, tp_usd: float, cooldown_seconds: int = 300):
+        super().__init__(StrategyParams(sl_usd=sl_usd, tp_usd=tp_usd, tp2_multiplier=1.5,
+                                        cooldown_seconds=cooldown_seconds), name=name)
+        self.signal = signal
+        self.price = 2000.0
+
+    def on_bar(self, bars) -> BarResult:
+        return BarResult(signal=self.signal, values={'price': self.price})
+
+
+def _book(*variants) -> tuple[ShadowBook, list[dict]]:
+    saved = []
+    state_manager = SimpleNamespace(load_shadow_stats=dict, save_shadow_stats=saved.append)
+    book = ShadowBook('frxXAUUSD', list(variants), state_manager)
+    return book, saved
+
+
+def _bar(epoch: int) -> SimpleNamespace:
+    return SimpleNamespace(bar_epoch=epoch)
+
+
+def _results(book: ShadowBook, name: str) -> tuple[int, int, int]:
+    stats = book.get_stats()['variants'][name]
+    return stats['win'], stats['loss'], stats['break_even']
+
+
+def test_ticks_inside_the_band_are_not_checked():
+    # BUY: TP1 2003 / SL 1997; SELL: TP1 1998 / SL 2002 -> band (1998, 2002)
+    book, _ = _book(ScriptedVariant('buy', 'BUY', 3.0, 3.0), ScriptedVariant('sell', 'SELL', 2.0, 2.0))
+
+    assert book.on_bar(_bar(60)) == 2
+    for price in (2001.99, 1998.01, 2000.0):
+        book.on_tick(61, price)
+
+    assert book.ticks_checked == 0
+    assert book.get_stats()['variants']['buy']['open'] == {'direction': 'BUY', 'entry': 2000.0, 'tp1_hit': False}
+
+    book.on_tick(62, 2002.0)  # the SELL stop
+    assert book.ticks_checked == 1
+    assert _results(book, 'sell') == (0, 1, 0)
+    assert book.get_stats()['variants']['sell']['open'] is None
+    assert book.get_stats()['variants']['buy']['open'] is not None
+
+
+def test_tp1_moves_the_stop_to_entry_and_a_return_is_break_even():
+    variant = ScriptedVariant('buy', 'BUY', 3.0, 3.0)
+    book, saved = _book(variant)
+    book.on_bar(_bar(60))
+
+    book.on_tick(61, 2003.0)
+
+    assert book.get_stats()['variants']['buy']['open']['tp1_hit']
+    assert (book._lower, book._upper) == (2000.0, 2004.5)
+    assert saved == []  # nothing closed yet
+
+    book.on_tick(62, 2001.0)
+    assert book.ticks_checked == 1  # inside the new band
+    book.on_tick(63, 2000.0)
+
+    assert _results(book, 'buy') == (0, 0, 1)
+    assert book.pnl[0] == pytest.approx(trade_pnl(RESULT_BREAK_EVEN, variant.params, PARTIAL_CLOSE,
+                                                  book.contract_size))
+    assert saved[-1]['buy']['break_even'] == 1
+
+
+def test_a_gap_through_tp2_is_a_win_and_a_gap_through_the_stop_a_loss():
+    buy, sell = ScriptedVariant('buy', 'BUY', 3.0, 3.0), ScriptedVariant('sell', 'SELL', 3.0, 3.0)
+    book, saved = _book(buy, sell)
+    book.on_bar(_bar(60))
+
+    book.on_tick(61, 2010.0)
+
+    assert _results(book, 'buy') == (1, 0, 0)
+    assert _results(book, 'sell') == (0, 1, 0)
+    assert book.pnl.tolist() == pytest.approx([trade_pnl(RESULT_WIN, buy.params, PARTIAL_CLOSE, book.contract_size),
+                                               trade_pnl(RESULT_LOSS, sell.params, PARTIAL_CLOSE, book.contract_size)])
+    assert (book._lower, book._upper) == (float('-inf'), float('inf'))
+    assert len(saved) == 1
+
+
+def test_a_variant_reopens_only_after_its_cooldown_and_once_per_bar():
+    book, _ = _book(ScriptedVariant('buy', 'BUY', 3.0, 3.0, cooldown_seconds=300))
+    book.on_bar(_bar(60))
+    book.on_tick(61, 2010.0)
+
+    assert book.on_bar(_bar(120)) == 0  # cooling down until 360
+    assert book.on_bar(_bar(360)) == 1
+    assert book.on_bar(_bar(360)) == 0  # the same bar again
+    assert book.get_stats()['variants']['buy']['signals'] == 2
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+from config import BotConfig
+from event_bus import SignalOpened, TP1Hit, TradeClosed
+from state_manager import StateManager
+
+
+SIGNAL = {'direction': 'BUY', 'entry_price': 2000.0, 'tp1_level': 2003.0, 'tp2_level': 2004.5, 'sl_level': 1997.0}
+
+
+def _manager(monkeypatch, tmp_path) -> tuple[StateManager, list[str]]:
+    monkeypatch.chdir(tmp_path)
+    manager = StateManager()
+    written = []
+    write_json = manager._write_json
+
+    def counting_write(filename, data, snapshot, indent=None):
+        written.append(filename)
+        write_json(filename, data, snapshot, indent)
+
+    monkeypatch.setattr(manager, '_write_json', counting_write)
+    return manager, written
+
+
+def test_a_batch_of_trade_events_writes_each_file_once(monkeypatch, tmp_path):
+    manager, written = _manager(monkeypatch, tmp_path)
+    manager.update_current_signal(SIGNAL, save=False)
+    manager.set_active_trade_for_subscribers(SIGNAL, save=False)
+    manager.get_user_state('101').start_trade(SIGNAL)
+    manager.add_signal_to_history(SIGNAL, save=False)
+    events = [SignalOpened('frxXAUUSD', SIGNAL, {}, 0.0), TP1Hit('frxXAUUSD', 2003.0, 3.0, chat_id='101'),
+              TradeClosed('frxXAUUSD', 'WIN', 2000.0, 2004.5, 4.5, chat_id='101')]
+
+    asyncio.run(manager.persist_events(events))
+
+    assert sorted(written) == sorted([BotConfig.USER_STATES_FILENAME, BotConfig.CURRENT_SIGNAL_FILENAME,
+                                      BotConfig.SIGNAL_HISTORY_FILENAME])
+    with open(tmp_path / BotConfig.USER_STATES_FILENAME) as f:
+        assert json.load(f)['101']['active_trade']['direction'] == 'BUY'
+    with open(tmp_path / BotConfig.SIGNAL_HISTORY_FILENAME) as f:
+        assert [entry['result'] for entry in json.load(f)] == ['PENDING']
+
+
+def test_per_user_events_only_write_the_user_states(monkeypatch, tmp_path):
+    manager, written = _manager(monkeypatch, tmp_path)
+
+    asyncio.run(manager.persist_events([TP1Hit('frxXAUUSD', 2003.0, 3.0, chat_id='101')]))
+
+    assert written == [BotConfig.USER_STATES_FILENAME]
+
+
+def test_an_older_snapshot_never_replaces_a_newer_file(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    manager = StateManager()
+    manager.get_user_state('101').win_count = 1
+    stale = manager._user_states_snapshot(), next(manager._snapshots)
+    manager.get_user_state('101').win_count = 2
+    manager.save_user_states()
+
+    manager._write_json(BotConfig.USER_STATES_FILENAME, *stale)
+
+    with open(tmp_path / BotConfig.USER_STATES_FILENAME) as f:
+        assert json.load(f)['101']['win_count'] == 2
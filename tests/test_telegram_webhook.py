@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from telegram import Update
+
+from telegram_webhook import ChatOrderedUpdateProcessor
+
+
+def _update(update_id: int, chat_id: int) -> Update:
+    return Update.de_json({"update_id": update_id, "message": {
+        "message_id": update_id, "date": int(time.time()), "text": "/dashboard",
+        "chat": {"id": chat_id, "type": "private"},
+        "from": {"id": chat_id, "is_bot": False, "first_name": "user"}}}, None)
+
+
+async def _run(processor: ChatOrderedUpdateProcessor, updates: list[tuple[Update, float]]) -> list[tuple[int, int]]:
+    """Feed updates as PTB does (one task each, in arrival order); returns (chat, update_id) completion order"""
+    done = []
+
+    async def handler(update: Update, delay: float):
+        await asyncio.sleep(delay)
+        done.append((update.effective_chat.id, update.update_id))
+
+    async with processor:
+        tasks = []
+        for update, delay in updates:
+            tasks.append(asyncio.create_task(processor.process_update(update, handler(update, delay))))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+    return done
+
+
+def test_updates_of_one_chat_complete_in_arrival_order():
+    # The first update of each chat is the slowest; a plain concurrent processor finishes it last
+    updates = [(_update(chat * 10 + seq, chat), 0.05 if seq == 0 else 0.0) for chat in (1, 2, 3) for seq in range(4)]
+
+    done = asyncio.run(_run(ChatOrderedUpdateProcessor(8, 64), updates))
+
+    for chat in (1, 2, 3):
+        assert [update_id for c, update_id in done if c == chat] == [chat * 10 + seq for seq in range(4)]
+    assert len(done) == 12
+
+
+def test_a_slow_chat_does_not_hold_up_the_others():
+    updates = [(_update(1, 1), 0.2), (_update(2, 1), 0.0)] + [(_update(10 + i, 100 + i), 0.0) for i in range(5)]
+
+    async def main():
+        processor = ChatOrderedUpdateProcessor(2, 64)
+        started = time.perf_counter()
+        done = await _run(processor, updates)
+        return done, time.perf_counter() - started, processor.get_stats()
+
+    done, elapsed, stats = asyncio.run(main())
+    assert done[-2:] == [(1, 1), (1, 2)]
+    assert elapsed < 0.4
+    assert stats == {'workers': 2, 'in_flight': 0, 'chats_busy': 0}
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+
+from tick_store import SECONDS_PER_DAY, TickStore
+
+
+# Days in the future, so the compression scheduled on a day change (against the wall
+# clock) leaves them alone; the tests compress with an explicit now_epoch instead
+DAY = 2_000_000_000 // SECONDS_PER_DAY
+DAY_START = DAY * SECONDS_PER_DAY
+
+
+def _store(tmp_path, flush_every: int = 4) -> TickStore:
+    return TickStore(str(tmp_path), flush_every=flush_every, flush_seconds=3600, compress_after_days=1)
+
+
+def _append(store: TickStore, epochs, symbol: str = 'frxXAUUSD') -> None:
+    for epoch in epochs:
+        price = 2000.0 + (epoch - DAY_START) / 100
+        store.append(symbol, epoch, price, price)  # received now: flush_seconds does not kick in
+
+
+def test_query_within_a_day_is_a_view_of_the_day_file(tmp_path):
+    store = _store(tmp_path)
+    _append(store, range(DAY_START, DAY_START + 10))
+
+    ticks = store.query('frxXAUUSD', DAY_START + 2, DAY_START + 5)
+
+    assert ticks['epoch'].tolist() == [DAY_START + 2, DAY_START + 3, DAY_START + 4, DAY_START + 5]
+    assert isinstance(ticks, np.memmap)
+    assert ticks['quote'][0] == 2000.02
+    store.close()
+
+
+def test_buffered_ticks_are_flushed_before_a_query(tmp_path):
+    store = _store(tmp_path, flush_every=100)
+    _append(store, range(DAY_START, DAY_START + 3))
+
+    assert store.get_stats()['buffered'] == 3
+    assert len(store.query('frxXAUUSD', DAY_START, DAY_START + 60)) == 3
+    assert store.get_stats()['buffered'] == 0
+    assert os.path.getsize(store.day_path('frxXAUUSD', DAY)) == 3 * 32
+    store.close()
+
+
+def test_a_query_across_days_concatenates_them(tmp_path):
+    store = _store(tmp_path)
+    _append(store, [DAY_START + SECONDS_PER_DAY - 2, DAY_START + SECONDS_PER_DAY - 1,
+                    DAY_START + SECONDS_PER_DAY, DAY_START + SECONDS_PER_DAY + 1])
+
+    ticks = store.query('frxXAUUSD', DAY_START, DAY_START + 2 * SECONDS_PER_DAY)
+
+    assert len(ticks) == 4
+    assert store.available_days('frxXAUUSD') == [DAY, DAY + 1]
+    store.close()
+
+
+def test_closed_days_are_compressed_and_still_readable(tmp_path):
+    store = _store(tmp_path)
+    _append(store, range(DAY_START, DAY_START + 8))
+    _append(store, [DAY_START + SECONDS_PER_DAY])
+    store.flush()
+
+    compressed = store.compress_closed_days('frxXAUUSD', now_epoch=DAY_START + SECONDS_PER_DAY)
+
+    path = store.day_path('frxXAUUSD', DAY)
+    assert compressed == [path]
+    assert not os.path.exists(path) and os.path.exists(f"{path}.gz")
+    assert os.path.exists(store.day_path('frxXAUUSD', DAY + 1))  # today stays raw
+    assert store.query('frxXAUUSD', DAY_START, DAY_START + 7)['epoch'].tolist() == list(range(DAY_START, DAY_START + 8))
+    store.close()
+
+
+def test_late_ticks_for_a_compressed_day_are_kept(tmp_path):
+    store = _store(tmp_path, flush_every=1)
+    _append(store, range(DAY_START, DAY_START + 4))
+    store.compress_closed_days('frxXAUUSD', now_epoch=DAY_START + SECONDS_PER_DAY)
+
+    _append(store, [DAY_START + 100, DAY_START + 101])  # e.g. replayed after a reconnect
+
+    path = store.day_path('frxXAUUSD', DAY)
+    assert os.path.exists(path) and os.path.exists(f"{path}.gz")
+    expected = list(range(DAY_START, DAY_START + 4)) + [DAY_START + 100, DAY_START + 101]
+    assert store.load_day('frxXAUUSD', DAY)['epoch'].tolist() == expected
+
+    # Compressing again appends a second gzip member instead of overwriting the first
+    store.compress_closed_days('frxXAUUSD', now_epoch=DAY_START + SECONDS_PER_DAY)
+    assert not os.path.exists(path)
+    assert store.load_day('frxXAUUSD', DAY)['epoch'].tolist() == expected
+    store.close()
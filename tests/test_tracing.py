@@ -0,0 +1,175 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import tracing
+from config import BotConfig
+from event_bus import EventBus, SignalOpened
+
+
+def _telegram_service(subscribers: set[str]):
+    pytest.importorskip("pandas_ta")  # telegram_service -> utils
+    from telegram_service import TelegramService
+    return TelegramService(SimpleNamespace(subscribers=subscribers), None, None)
+
+
+class _Bot:
+    async def send_message(self, chat_id, text, parse_mode=None):
+        return SimpleNamespace(chat_id=chat_id, message_id=1)
+
+
+def _spans(path) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def _end(span: dict) -> float:
+    return span['start'] + span['duration_ms'] / 1000
+
+
+def _enable(monkeypatch, tmp_path):
+    path = tmp_path / 'traces.jsonl'
+    monkeypatch.setattr(tracing.tracer, 'enabled', True)
+    monkeypatch.setattr(tracing.tracer, 'path', str(path))
+    monkeypatch.setattr(BotConfig, 'TELEGRAM_RATE_LIMIT_DELAY', 0)
+    monkeypatch.setattr(BotConfig, 'TELEGRAM_BATCH_SIZE', 2)
+    return path
+
+
+def test_spans_nest_and_gathered_tasks_inherit_their_parent(tmp_path):
+    tracer = tracing.Tracer(enabled=True, path=str(tmp_path / 'traces.jsonl'))
+
+    async def child(name: str):
+        with tracer.span(name):
+            await asyncio.sleep(0)
+
+    async def main():
+        root = tracer.start_trace('signal_cycle', symbol='frxXAUUSD')
+        tracer.record_span('candle_fetch', root.start - 0.5, root.start, bars=100)
+        with tracer.span('broadcast'):
+            await asyncio.gather(child('send_a'), child('send_b'))
+        tracer.end_trace(root)
+        return root
+
+    root = asyncio.run(main())
+
+    spans = {span['name']: span for span in _spans(tracer.path)}
+    assert set(spans) == {'signal_cycle', 'candle_fetch', 'broadcast', 'send_a', 'send_b'}
+    assert {span['trace_id'] for span in spans.values()} == {root.trace_id}
+    assert spans['signal_cycle']['attrs'] == {'symbol': 'frxXAUUSD'}
+    assert spans['candle_fetch']['parent_id'] == spans['broadcast']['parent_id'] == root.span_id
+    assert spans['candle_fetch']['duration_ms'] == 500.0
+    assert spans['send_a']['parent_id'] == spans['send_b']['parent_id'] == spans['broadcast']['span_id']
+    assert tracer.traces_written == 1
+
+
+def test_a_failing_span_records_the_error(tmp_path):
+    tracer = tracing.Tracer(enabled=True, path=str(tmp_path / 'traces.jsonl'))
+
+    async def main():
+        root = tracer.start_trace('signal_cycle')
+        with pytest.raises(ValueError):
+            with tracer.span('analysis'):
+                raise ValueError("bad bar")
+        tracer.end_trace(root)
+
+    asyncio.run(main())
+
+    assert [span['attrs'] for span in _spans(tracer.path) if span['name'] == 'analysis'] == [{'error': 'ValueError'}]
+
+
+def test_a_trace_that_is_never_ended_is_dropped(tmp_path):
+    tracer = tracing.Tracer(enabled=True, path=str(tmp_path / 'traces.jsonl'))
+
+    async def main():
+        abandoned = tracer.start_trace('signal_cycle')
+        tracer.start_span('analysis')
+        root = tracer.start_trace('signal_cycle')  # the next cycle: the first one bailed out
+        tracer.end_trace(root)
+        return abandoned, root
+
+    abandoned, root = asyncio.run(main())
+
+    assert {span['trace_id'] for span in _spans(tracer.path)} == {root.trace_id}
+    assert abandoned.trace_id not in tracer._traces
+
+
+def test_spans_outside_a_trace_and_a_disabled_tracer_are_no_ops(tmp_path):
+    path = tmp_path / 'traces.jsonl'
+    disabled = tracing.Tracer(enabled=False, path=str(path))
+    enabled = tracing.Tracer(enabled=True, path=str(path))
+
+    async def main():
+        assert enabled.start_span('orphan') is tracing.NOOP_SPAN
+        root = disabled.start_trace('signal_cycle')
+        with disabled.span('analysis') as span:
+            span.set('signal', 'BUY')
+        disabled.end_trace(root)
+        return root
+
+    assert asyncio.run(main()) is tracing.NOOP_SPAN
+    assert not path.exists()
+
+
+def test_broadcast_on_the_bus_consumer_joins_the_signal_trace(monkeypatch, tmp_path):
+    path = _enable(monkeypatch, tmp_path)
+    service = _telegram_service({'101', '102', '103'})
+
+    async def deliver(event: SignalOpened):
+        # What SignalEngine._deliver_event does for a SignalOpened
+        try:
+            with tracing.resume(event.trace):
+                await service.send_to_all_subscribers(_Bot(), 'signal', signal_time=event.decided_at)
+        finally:
+            tracing.end_trace(event.trace)
+
+    async def main():
+        bus = EventBus()
+        bus.subscribe('telegram', (SignalOpened,), deliver)
+        bus.start()  # the consumer's context is copied here, before any trace exists
+        cycle = tracing.start_trace('signal_cycle', symbol='frxXAUUSD')
+        with tracing.span('analysis'):
+            pass
+        await bus.publish(SignalOpened('frxXAUUSD', {'direction': 'BUY'}, {}, 0.0, trace=cycle))
+        tracing.hand_off(cycle)
+        # The next cycle in the analyzer must not discard the one still being delivered
+        tracing.end_trace(tracing.start_trace('signal_cycle', symbol='frxXAUUSD'))
+        await bus.close()
+        return cycle
+
+    cycle = asyncio.run(main())
+
+    spans = [s for s in _spans(path) if s['trace_id'] == cycle.trace_id]
+    by_id = {s['span_id']: s for s in spans}
+    names = [s['name'] for s in spans]
+    assert names.count('broadcast') == 1
+    assert names.count('broadcast_batch') == 2
+    assert names.count('telegram_send') == 3
+    assert names.count('bot_api') == 3
+    root = by_id[cycle.span_id]
+    assert root['parent_id'] is None
+    for s in spans:
+        if s is root:
+            continue
+        ancestor = s
+        while ancestor['parent_id'] is not None:
+            ancestor = by_id[ancestor['parent_id']]
+        assert ancestor is root, s['name']
+    broadcast = next(s for s in spans if s['name'] == 'broadcast')
+    assert broadcast['parent_id'] == root['span_id']
+    assert _end(root) >= max(_end(s) for s in spans if s['name'] == 'telegram_send') - 1e-6
+
+
+def test_resume_without_a_trace_records_nothing(monkeypatch, tmp_path):
+    path = _enable(monkeypatch, tmp_path)
+    service = _telegram_service({'101'})
+
+    async def main():
+        with tracing.resume(None):
+            await service.send_to_all_subscribers(_Bot(), 'signal')
+
+    asyncio.run(main())
+
+    assert not path.exists()
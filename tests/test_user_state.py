@@ -0,0 +1,130 @@
+import datetime
+import json
+import logging
+
+from user_state import MAX_USER_HISTORY, ActiveTrade, Direction, Result, SignalHistory, TradeStatus, UserState
+
+
+SIGNAL = {
+    'direction': 'BUY',
+    'entry_price': 2000.0,
+    'tp1_level': 2003.0,
+    'tp2_level': 2004.5,
+    'sl_level': 1997.0,
+    'start_time_utc': datetime.datetime(2026, 10, 19, 8, 30, tzinfo=datetime.timezone.utc),
+    'status': 'active',
+}
+
+
+def test_user_state_round_trip():
+    state = UserState()
+    state.start_trade(SIGNAL, timestamp=1_792_000_000.0)
+    state.record_result(Result.WIN, closed_at=1_792_000_600.0)
+    state.start_trade({**SIGNAL, 'direction': 'SELL', 'extra_field': 1}, timestamp=1_792_001_000.0)
+    state.active_trade.move_sl_to_entry()
+    state.tracking_message_id = 42
+
+    data = json.loads(json.dumps(state.to_dict()))
+    loaded = UserState.from_dict(data)
+
+    assert loaded.to_dict() == data
+    assert loaded.active_trade == state.active_trade
+    assert loaded.active_trade.status == TradeStatus.TP1_HIT
+    assert loaded.active_trade.extra == {'extra_field': 1}
+    assert [entry['result'] for entry in loaded.signal_history] == ['WIN', 'PENDING']
+
+
+def test_active_trade_accepts_signal_info_and_json_forms():
+    from_signal = ActiveTrade.from_dict(SIGNAL)
+    from_json = ActiveTrade.from_dict(from_signal.to_dict())
+
+    assert from_json == from_signal
+    assert from_json.start_time_utc == SIGNAL['start_time_utc']
+
+
+def test_unknown_direction_and_status_load_with_defaults(caplog):
+    data = {**SIGNAL, 'start_time_utc': None, 'direction': 'LONG', 'status': 'partial'}
+
+    with caplog.at_level(logging.WARNING, logger="UserState"):
+        trade = ActiveTrade.from_dict(data)
+
+    assert trade.direction == Direction.NONE
+    assert trade.status == TradeStatus.ACTIVE
+    assert trade.to_dict()['direction'] == 'LONG'
+    assert trade.to_dict()['status'] == 'partial'
+    assert len(caplog.records) == 2
+    trade.move_sl_to_entry()
+    assert trade.to_dict()['status'] == 'tp1_hit'
+
+
+def test_direction_and_status_are_case_insensitive():
+    trade = ActiveTrade.from_dict({**SIGNAL, 'direction': 'sell', 'status': 'TP1_HIT'})
+
+    assert trade.direction == Direction.SELL
+    assert trade.status == TradeStatus.TP1_HIT
+
+
+def test_unknown_values_do_not_drop_the_user():
+    data = UserState(win_count=3).to_dict()
+    data['active_trade'] = {**SIGNAL, 'start_time_utc': None, 'status': 'closed'}
+    data['signal_history'] = [
+        {'id': 1, 'direction': 'LONG', 'entry_price': 1.0, 'result': 'WIN'},
+        {'id': 2, 'direction': 'BUY', 'entry_price': 2.0, 'result': 'SCRATCH'},
+    ]
+
+    state = UserState.from_dict(data)
+
+    assert state.win_count == 3
+    assert state.active_trade.status == TradeStatus.ACTIVE
+    assert state.signal_history.to_list() == data['signal_history']
+    assert state.signal_history.result_counts() == {
+        Result.PENDING: 1, Result.WIN: 1, Result.LOSS: 0, Result.BREAK_EVEN: 0}
+
+
+def test_history_entries_outside_the_record_layout_are_exported_unchanged():
+    canonical = SignalHistory()
+    canonical.append('SELL', 2001.0, 1998.0, 1996.5, 2004.0, timestamp=1_792_000_000.0)
+    canonical.close_last(Result.LOSS, 1_792_000_600.0)
+    entries = canonical.to_list() + [
+        {**canonical.to_list()[0], 'id': 2, 'note': 'manual'},
+        {**canonical.to_list()[0], 'id': 3, 'direction': 'buy', 'result': 'win'},
+        {**canonical.to_list()[0], 'id': 4, 'entry_price': '2001.5', 'timestamp': '2026-10-19T08:30:00Z'},
+        {'id': 5, 'direction': 'SELL', 'result': 'PENDING'},
+    ]
+
+    history = SignalHistory.from_list(json.loads(json.dumps(entries)))
+
+    assert history.to_list() == entries
+    assert history.result_counts()[Result.WIN] == 1  # the lower-case 'win' still counts
+    history.close_last(Result.BREAK_EVEN, 1_792_001_200.0)
+    closed = {**entries[-1], 'result': 'BREAK_EVEN', 'closed_at': '2026-10-14T18:06:40+00:00'}
+    assert history.to_list()[-1] == closed
+
+    for _ in range(MAX_USER_HISTORY - 2):  # pushes the first three entries out
+        history.append('BUY', 2000.0, None, None, None, timestamp=1_792_002_000.0)
+    exported = history.to_list()
+    assert exported[:2] == [entries[3], closed]
+    assert exported[2]['id'] == 6
+
+
+def test_save_memo_shares_identical_records_without_changing_the_output():
+    states = [UserState() for _ in range(3)]
+    for state in states:
+        state.start_trade(SIGNAL, timestamp=1_792_000_000.0)
+    memo = {}
+
+    exported = [state.to_dict(memo) for state in states]
+
+    assert exported == [state.to_dict() for state in states]
+    assert exported[0]['signal_history'][0] is exported[2]['signal_history'][0]
+    assert len(memo) == 1
+
+
+def test_signal_history_keeps_the_newest_entries():
+    history = SignalHistory()
+    for i in range(MAX_USER_HISTORY + 5):
+        history.append('BUY', float(i), None, None, None, timestamp=float(i))
+
+    assert len(history) == MAX_USER_HISTORY
+    assert next(iter(history))['entry_price'] == 5.0
+    assert SignalHistory.from_list(history.to_list()).to_list() == history.to_list()
@@ -0,0 +1,92 @@
+from user_state import Result, UserState
+from view_cache import MarketSnapshot, ViewCache
+
+
+SIGNAL = {'direction': 'BUY', 'entry_price': 2000.0, 'tp1_level': 2003.0, 'tp2_level': 2004.5, 'sl_level': 1997.0,
+          'start_time_utc': '2026-10-19T08:30:00+00:00', 'status': 'active'}
+
+
+def _cache(ttl: float = 60.0) -> ViewCache:
+    def build(now: float) -> MarketSnapshot:
+        return MarketSnapshot(now, '15:30:00 WIB', True, 2001.0, 'frxXAUUSD', 1, {}, {}, {})
+    return ViewCache(build, ttl)
+
+
+def _render(cache: ViewCache, chat_id: str, state: UserState) -> int:
+    """Fragment value as a build counter: the number changes exactly when it is rebuilt"""
+    return cache.fragment(chat_id, state, 'trade', lambda: cache.fragments_built)
+
+
+def test_snapshot_and_sections_are_shared_until_the_ttl():
+    cache = _cache()
+    renders = []
+
+    first = cache.snapshot()
+    text = cache.section(first, 'dashboard', lambda s: renders.append(s) or 'header')
+    again = cache.snapshot()
+
+    assert again is first
+    assert cache.section(again, 'dashboard', lambda s: renders.append(s) or 'other') == text
+    assert len(renders) == 1
+
+    cache.ttl = 0.0
+    assert cache.snapshot() is not first
+    assert cache.section(cache.snapshot(), 'dashboard', lambda s: 'rebuilt') == 'rebuilt'
+
+
+def test_fragment_is_rebuilt_when_the_user_changes():
+    cache = _cache()
+    state = UserState()
+    state.start_trade(SIGNAL, timestamp=1_792_000_000.0)
+
+    built = _render(cache, '1', state)
+    assert _render(cache, '1', state) == built
+
+    state.active_trade.move_sl_to_entry()
+    after_tp1 = _render(cache, '1', state)
+    assert after_tp1 != built
+
+    state.record_result(Result.WIN, closed_at=1_792_000_600.0)
+    assert _render(cache, '1', state) != after_tp1
+
+
+def test_a_new_trade_with_the_same_levels_is_a_new_fragment():
+    cache = _cache()
+    state = UserState()
+    state.start_trade(SIGNAL, timestamp=1_792_000_000.0)
+    built = _render(cache, '1', state)
+
+    # Same levels and counters; only the start time tells the trades apart
+    state.clear_trade()
+    state.start_trade({**SIGNAL, 'start_time_utc': '2026-10-19T09:00:00+00:00'}, record_history=False)
+
+    assert _render(cache, '1', state) != built
+
+
+def test_fragments_are_per_chat():
+    cache = _cache()
+    state = UserState()
+
+    assert _render(cache, '1', state) != _render(cache, '2', state)
+    assert cache.get_stats()['users_cached'] == 2
+
+
+def test_invalidate_drops_one_chat_or_everything():
+    cache = _cache()
+    state = UserState()
+    first = cache.snapshot()
+    built = _render(cache, '1', state)
+    other = _render(cache, '2', state)
+    assert cache.changed('1', 10, 'text')
+    assert not cache.changed('1', 10, 'text')
+
+    cache.invalidate('1')
+    assert _render(cache, '1', state) != built
+    assert _render(cache, '2', state) == other
+    assert cache.changed('1', 10, 'text')
+    assert cache.snapshot() is first
+
+    cache.invalidate()
+    assert cache.snapshot() is not first
+    assert _render(cache, '2', state) != other
+    assert cache.changed('1', 10, 'text')
@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("pandas_ta")
+
+from config import BotConfig
+from signal_engine import SignalEngine
+from state_manager import StateManager
+
+
+class FakeDerivWS:
+    """1m candles of the last two hours; only the bar opening at `dip` dips"""
+    connected = True
+
+    def __init__(self, dip: int):
+        now = int(time.time() // 60 * 60)
+        self.candles = [{'epoch': epoch, 'open': 2000.0, 'high': 2001.0,
+                         'low': 1990.0 if epoch == dip else 1999.0, 'close': 2000.0}
+                        for epoch in range(now - 7200, now + 60, 60)]
+
+    async def get_candles(self, symbol, count, granularity, end):
+        return [c for c in self.candles if c['epoch'] <= end][-count:]
+
+    def get_feed(self, symbol):
+        return None
+
+
+def _engine(tmp_path, monkeypatch, deriv_ws) -> SignalEngine:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(BotConfig, 'WARM_RESTART_TICK_SECONDS', 0)  # always the candle path
+    engine = SignalEngine(StateManager(), None, deriv_ws=deriv_ws)
+    engine.shadow = None
+    return engine
+
+
+def test_the_signal_start_bar_is_not_replayed(tmp_path, monkeypatch):
+    bar = int(time.time() // 60 * 60) - 3600
+    engine = _engine(tmp_path, monkeypatch, FakeDerivWS(bar))
+
+    # The signal started mid-bar: the bar's low of 1990 may predate the entry
+    epochs, high, low, from_bars = asyncio.run(engine._backfill_path(bar + 30))
+
+    assert from_bars
+    assert int(epochs[0]) == bar + 60
+    assert low.min() == 1999.0
+
+
+def test_the_bar_holding_checked_until_is_replayed(tmp_path, monkeypatch):
+    bar = int(time.time() // 60 * 60) - 3600
+    engine = _engine(tmp_path, monkeypatch, FakeDerivWS(bar))
+
+    # Tracked live until mid-bar: the rest of that bar was missed
+    epochs, high, low, _ = asyncio.run(engine._backfill_path(bar + 30, include_partial_bar=True))
+
+    assert int(epochs[0]) == bar
+    assert low.min() == 1990.0
+
+
+def test_a_signal_starting_on_a_bar_open_keeps_that_bar(tmp_path, monkeypatch):
+    bar = int(time.time() // 60 * 60) - 3600
+    engine = _engine(tmp_path, monkeypatch, FakeDerivWS(bar))
+
+    epochs, _, _, _ = asyncio.run(engine._backfill_path(bar))
+
+    assert int(epochs[0]) == bar
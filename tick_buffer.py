@@ -0,0 +1,57 @@
+from typing import Optional
+
+import numpy as np
+
+
+class TickRingBuffer:
+    """Fixed-capacity (epoch, price) ring buffer backed by preallocated NumPy arrays"""
+
+    __slots__ = ('capacity', '_epochs', '_prices', '_next', '_size')
+
+    def __init__(self, capacity: int = 200):
+        if capacity < 1:
+            raise ValueError("capacity harus >= 1")
+        self.capacity = capacity
+        self._epochs = np.zeros(capacity, dtype=np.int64)
+        self._prices = np.zeros(capacity, dtype=np.float64)
+        self._next = 0
+        self._size = 0
+
+    def append(self, epoch: int, price: float) -> None:
+        i = self._next
+        self._epochs[i] = epoch
+        self._prices[i] = price
+        self._next = (i + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return self._epochs.nbytes + self._prices.nbytes
+
+    def clear(self) -> None:
+        self._next = 0
+        self._size = 0
+
+    def last(self) -> Optional[tuple[int, float]]:
+        if not self._size:
+            return None
+        i = self._next - 1
+        return int(self._epochs[i]), float(self._prices[i])
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return (epochs, prices) in arrival order, oldest first (copies)"""
+        if self._size < self.capacity:
+            return self._epochs[:self._size].copy(), self._prices[:self._size].copy()
+        order = np.r_[self._next:self.capacity, 0:self._next]
+        return self._epochs[order], self._prices[order]
+
+    def to_dicts(self, symbol: str) -> list[dict]:
+        epochs, prices = self.arrays()
+        return [
+            {"price": float(p), "epoch": int(e), "symbol": symbol}
+            for e, p in zip(epochs, prices)
+        ]
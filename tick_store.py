@@ -0,0 +1,215 @@
+import datetime
+import gzip
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
+
+from config import BotConfig
+
+
+logger = logging.getLogger("TickStore")
+
+TICK_DTYPE = np.dtype([
+    ('epoch', '<i8'),
+    ('bid', '<f8'),
+    ('quote', '<f8'),
+    ('recv_ts', '<f8'),
+])
+
+SECONDS_PER_DAY = 86400
+
+
+def _day_of(epoch: int) -> int:
+    return int(epoch) // SECONDS_PER_DAY
+
+
+def _day_name(day: int) -> str:
+    return datetime.datetime.fromtimestamp(day * SECONDS_PER_DAY, tz=datetime.timezone.utc).strftime('%Y%m%d')
+
+
+class _SymbolWriter:
+    __slots__ = ('day', 'buffer', 'count', 'last_flush')
+
+    def __init__(self, capacity: int):
+        self.day: Optional[int] = None
+        self.buffer = np.zeros(capacity, dtype=TICK_DTYPE)
+        self.count = 0
+        self.last_flush = time.time()
+
+
+class TickStore:
+    """Append-only tick recorder with one fixed-width binary file per symbol per UTC day.
+
+    Raw day files are read back through numpy.memmap, so range queries inside a day
+    return views into the page cache instead of copies. Days older than
+    TICK_STORE_COMPRESS_AFTER_DAYS are gzip-compressed in a background thread.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None, flush_every: Optional[int] = None,
+                 flush_seconds: Optional[float] = None, compress_after_days: Optional[int] = None):
+        self.base_dir = base_dir or BotConfig.TICK_STORE_DIR
+        self.flush_every = flush_every or BotConfig.TICK_STORE_FLUSH_EVERY
+        self.flush_seconds = flush_seconds if flush_seconds is not None else BotConfig.TICK_STORE_FLUSH_SECONDS
+        self.compress_after_days = (compress_after_days if compress_after_days is not None
+                                    else BotConfig.TICK_STORE_COMPRESS_AFTER_DAYS)
+        self._writers: dict[str, _SymbolWriter] = {}
+        self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tick-compress")
+        self._compress_lock = threading.Lock()
+        self.total_ticks_written = 0
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def _symbol_dir(self, symbol: str) -> str:
+        return os.path.join(self.base_dir, symbol)
+
+    def day_path(self, symbol: str, day: int) -> str:
+        return os.path.join(self._symbol_dir(symbol), f"{_day_name(day)}.bin")
+
+    def append(self, symbol: str, epoch: int, bid: Optional[float], quote: float,
+               recv_ts: Optional[float] = None) -> None:
+        writer = self._writers.get(symbol)
+        if writer is None:
+            writer = self._writers[symbol] = _SymbolWriter(self.flush_every)
+            os.makedirs(self._symbol_dir(symbol), exist_ok=True)
+
+        day = _day_of(epoch)
+        if writer.day is not None and day != writer.day:
+            self._flush_writer(symbol, writer)
+            self.schedule_compression(symbol)
+        writer.day = day
+
+        if recv_ts is None:
+            recv_ts = time.time()
+        writer.buffer[writer.count] = (epoch, np.nan if bid is None else bid, quote, recv_ts)
+        writer.count += 1
+
+        if writer.count >= self.flush_every or recv_ts - writer.last_flush >= self.flush_seconds:
+            self._flush_writer(symbol, writer)
+
+    def _flush_writer(self, symbol: str, writer: _SymbolWriter) -> None:
+        if writer.count and writer.day is not None:
+            try:
+                with open(self.day_path(symbol, writer.day), 'ab') as f:
+                    f.write(writer.buffer[:writer.count].tobytes())
+                self.total_ticks_written += writer.count
+            except OSError as e:
+                logger.error(f"Failed to write ticks for {symbol}: {e}")
+            writer.count = 0
+        writer.last_flush = time.time()
+
+    def flush(self) -> None:
+        for symbol, writer in self._writers.items():
+            self._flush_writer(symbol, writer)
+
+    def close(self) -> None:
+        self.flush()
+        self._compressor.shutdown(wait=True)
+
+    def available_days(self, symbol: str) -> list[int]:
+        days = set()
+        try:
+            names = os.listdir(self._symbol_dir(symbol))
+        except FileNotFoundError:
+            return []
+        for name in names:
+            stem = name.split('.', 1)[0]
+            try:
+                date = datetime.datetime.strptime(stem, '%Y%m%d').replace(tzinfo=datetime.timezone.utc)
+            except ValueError:
+                continue
+            days.add(int(date.timestamp()) // SECONDS_PER_DAY)
+        return sorted(days)
+
+    def load_day(self, symbol: str, day: int) -> np.ndarray:
+        """Ticks for one UTC day: a read-only memmap for raw days, an in-memory array for compressed ones"""
+        path = self.day_path(symbol, day)
+        gz_path = f"{path}.gz"
+        raw = np.empty(0, dtype=TICK_DTYPE)
+        if os.path.exists(path):
+            size = os.path.getsize(path) // TICK_DTYPE.itemsize
+            if size:
+                raw = np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(size,))
+        if not os.path.exists(gz_path):
+            return raw
+        with gzip.open(gz_path, 'rb') as f:
+            compressed = np.frombuffer(f.read(), dtype=TICK_DTYPE)
+        # Ticks written to a day after it was compressed follow the compressed ones
+        return np.concatenate([compressed, raw]) if len(raw) else compressed
+
+    def iter_range(self, symbol: str, start_epoch: int, end_epoch: int) -> Iterator[np.ndarray]:
+        """Yield per-day slices with start_epoch <= epoch <= end_epoch (views, no copies)"""
+        if symbol in self._writers:
+            self._flush_writer(symbol, self._writers[symbol])
+        for day in range(_day_of(start_epoch), _day_of(end_epoch) + 1):
+            ticks = self.load_day(symbol, day)
+            if not len(ticks):
+                continue
+            epochs = ticks['epoch']
+            lo = np.searchsorted(epochs, start_epoch, side='left')
+            hi = np.searchsorted(epochs, end_epoch, side='right')
+            if hi > lo:
+                yield ticks[lo:hi]
+
+    def query(self, symbol: str, start_epoch: int, end_epoch: int) -> np.ndarray:
+        """Ticks in [start_epoch, end_epoch]; zero-copy when the range falls within one day"""
+        parts = list(self.iter_range(symbol, start_epoch, end_epoch))
+        if not parts:
+            return np.empty(0, dtype=TICK_DTYPE)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
+
+    def schedule_compression(self, symbol: str) -> None:
+        try:
+            self._compressor.submit(self.compress_closed_days, symbol)
+        except RuntimeError:
+            pass
+
+    def compress_closed_days(self, symbol: str, now_epoch: Optional[float] = None) -> list[str]:
+        today = _day_of(now_epoch if now_epoch is not None else time.time())
+        compressed = []
+        with self._compress_lock:
+            for day in self.available_days(symbol):
+                if today - day >= self.compress_after_days and self._compress_day(symbol, day):
+                    compressed.append(self.day_path(symbol, day))
+        return compressed
+
+    def _compress_day(self, symbol: str, day: int) -> bool:
+        path = self.day_path(symbol, day)
+        if not os.path.exists(path):
+            return False
+        gz_path = f"{path}.gz"
+        temp_file = f"{gz_path}.tmp"
+        try:
+            # A day already compressed once (late ticks) gets a second gzip member appended;
+            # gzip readers return the members concatenated
+            if os.path.exists(gz_path):
+                shutil.copyfile(gz_path, temp_file)
+            elif os.path.exists(temp_file):
+                os.remove(temp_file)  # left by an interrupted run
+            with open(path, 'rb') as src, gzip.open(temp_file, 'ab', compresslevel=6) as dst:
+                while True:
+                    chunk = src.read(1 << 20)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+            os.replace(temp_file, gz_path)
+            os.remove(path)
+            logger.info(f"Compressed tick file {path}")
+            return True
+        except OSError as e:
+            logger.error(f"Failed to compress {path}: {e}")
+            return False
+
+    def get_stats(self) -> dict:
+        return {
+            "base_dir": self.base_dir,
+            "symbols": sorted(self._writers),
+            "ticks_written": self.total_ticks_written,
+            "buffered": sum(w.count for w in self._writers.values()),
+        }
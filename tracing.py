@@ -0,0 +1,234 @@
+"""Lightweight span tracing from the closing tick to the last Telegram delivery.
+
+A trace is started per analysis cycle with start_trace(); span() opens child spans
+under whatever span is current in the contextvars context, so tasks created by
+asyncio.gather() inside a span inherit it as their parent. A task started before the
+trace (an event-bus consumer) joins it with resume() after the producer hand_off()s it.
+Spans of a trace are kept with the root and written to a JSONL file when the root ends;
+cycles that bail out early are simply dropped. With TRACING_ENABLED off every call is a
+no-op.
+"""
+import argparse
+import contextvars
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import numpy as np
+
+from config import BotConfig
+
+
+logger = logging.getLogger("Tracing")
+
+
+class Span:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start', 'end_time', 'attrs', 'root')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], root: Optional['Span'],
+                 start: Optional[float] = None, attrs: Optional[dict] = None):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start = start if start is not None else time.time()
+        self.end_time: Optional[float] = None
+        self.attrs = attrs or {}
+        self.root = root
+
+    def set(self, key: str, value) -> None:
+        self.attrs[key] = value
+
+    def end(self, end_time: Optional[float] = None) -> None:
+        if self.end_time is None:
+            self.end_time = end_time if end_time is not None else time.time()
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end_time is None else self.end_time - self.start
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attrs": self.attrs,
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+    span_id = None
+
+    def set(self, key: str, value) -> None:
+        pass
+
+    def end(self, end_time: Optional[float] = None) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('current_span', default=None)
+
+
+class Tracer:
+    def __init__(self, enabled: Optional[bool] = None, path: Optional[str] = None):
+        self.enabled = BotConfig.TRACING_ENABLED if enabled is None else enabled
+        self.path = path or BotConfig.TRACE_FILE
+        self._traces: dict[str, list[Span]] = {}
+        self.traces_written = 0
+
+    def start_trace(self, name: str, start: Optional[float] = None, **attrs):
+        """Begin a new trace and make its root the current span (replacing any stale one)"""
+        if not self.enabled:
+            return NOOP_SPAN
+        root = Span(name, f"{random.getrandbits(128):032x}", None, None, start, attrs)
+        root.root = root
+        self._traces[root.trace_id] = [root]
+        stale = _current.get()
+        if stale is not None and stale.root is not None and stale.root.end_time is None:
+            self._traces.pop(stale.trace_id, None)
+        _current.set(root)
+        return root
+
+    def start_span(self, name: str, start: Optional[float] = None, **attrs):
+        parent = _current.get() if self.enabled else None
+        if parent is None or parent.trace_id not in self._traces:
+            return NOOP_SPAN
+        span = Span(name, parent.trace_id, parent.span_id, parent.root, start, attrs)
+        self._traces[parent.trace_id].append(span)
+        return span
+
+    def record_span(self, name: str, start: float, end: float, **attrs) -> None:
+        """Add an already-finished span, e.g. for time spent before the trace began"""
+        span = self.start_span(name, start, **attrs)
+        span.end(end)
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator:
+        span = self.start_span(name, **attrs)
+        if span is NOOP_SPAN:
+            yield span
+            return
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set("error", type(e).__name__)
+            raise
+        finally:
+            span.end()
+            _current.reset(token)
+
+    def hand_off(self, root) -> None:
+        """`root` lives on in another task (see resume()); it stops being current here, so the
+        next start_trace() in this context does not drop it as stale"""
+        if root is not NOOP_SPAN and _current.get() is root:
+            _current.set(None)
+
+    @contextmanager
+    def resume(self, root) -> Iterator:
+        """Make a handed-off root the current span, e.g. in an event-bus consumer, whose
+        context was captured before the trace began"""
+        if root is None or root is NOOP_SPAN or root.trace_id not in self._traces:
+            yield
+            return
+        token = _current.set(root)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    def end_trace(self, root) -> None:
+        if root is NOOP_SPAN:
+            return
+        root.end()
+        spans = self._traces.pop(root.trace_id, None)
+        if _current.get() is root:
+            _current.set(None)
+        if not spans:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a') as f:
+                for span in spans:
+                    span.end(root.end_time)
+                    f.write(json.dumps(span.to_dict(), default=str) + "\n")
+            self.traces_written += 1
+        except OSError as e:
+            logger.error(f"Failed to export trace {root.trace_id}: {e}")
+
+
+tracer = Tracer()
+start_trace = tracer.start_trace
+start_span = tracer.start_span
+record_span = tracer.record_span
+span = tracer.span
+hand_off = tracer.hand_off
+resume = tracer.resume
+end_trace = tracer.end_trace
+
+
+def load_spans(path: str, since: Optional[float] = None) -> list[dict]:
+    spans = []
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if since is None or record.get('start', 0) >= since:
+                spans.append(record)
+    return spans
+
+
+def summarize(spans: list[dict], percentiles=(50, 90, 99)) -> list[dict]:
+    """Per-stage latency percentiles in milliseconds, in order of first appearance"""
+    by_name: dict[str, list[float]] = {}
+    for record in spans:
+        if record.get('duration_ms') is not None:
+            by_name.setdefault(record['name'], []).append(record['duration_ms'])
+    rows = []
+    for name, durations in by_name.items():
+        values = np.asarray(durations)
+        row = {'stage': name, 'count': len(values)}
+        for p, v in zip(percentiles, np.percentile(values, percentiles)):
+            row[f'p{p}'] = round(float(v), 2)
+        row['max'] = round(float(values.max()), 2)
+        rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trace file tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary_parser = sub.add_parser("summary", help="Per-stage latency percentiles (ms)")
+    summary_parser.add_argument("--file", default=BotConfig.TRACE_FILE)
+    summary_parser.add_argument("--hours", type=float, default=None, help="Only spans from the last N hours")
+    summary_parser.add_argument("--signals-only", action="store_true", help="Only traces that produced a signal")
+    args = parser.parse_args()
+
+    since = time.time() - args.hours * 3600 if args.hours else None
+    if not os.path.exists(args.file):
+        raise SystemExit(f"Trace file not found: {args.file} (set TRACING_ENABLED=true)")
+    spans = load_spans(args.file, since)
+    if args.signals_only:
+        keep = {s['trace_id'] for s in spans if s['parent_id'] is None and s['attrs'].get('signal')}
+        spans = [s for s in spans if s['trace_id'] in keep]
+    rows = summarize(spans)
+    if not rows:
+        raise SystemExit(f"No spans in {args.file}")
+    header = f"{'stage':<24}{'count':>8}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['stage']:<24}{row['count']:>8}{row['p50']:>10.2f}{row['p90']:>10.2f}"
+              f"{row['p99']:>10.2f}{row['max']:>10.2f}")
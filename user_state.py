@@ -0,0 +1,522 @@
+"""Compact per-user state.
+
+A UserState is a slotted dataclass instead of a dict; direction/result/status are stored
+as small integer enums, times as epoch floats, and the per-user signal history as one
+flat array('d') of fixed-width records. to_dict()/from_dict() convert to and from the
+user_states.json layout (ISO timestamps, 'BUY'/'WIN'/'tp1_hit' strings) without loss;
+keys this module does not model are carried along in `extra`, and history entries that
+do not fit the record layout are kept as loaded and written back unchanged.
+"""
+import datetime
+import functools
+import logging
+import operator
+import struct
+from array import array
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, ClassVar, Iterator, Optional
+
+import numpy as np
+
+
+logger = logging.getLogger("UserState")
+
+MAX_USER_HISTORY = 500
+
+_NAN = float('nan')
+
+
+class Direction(IntEnum):
+    NONE = 0
+    BUY = 1
+    SELL = 2
+
+
+class Result(IntEnum):
+    PENDING = 0
+    WIN = 1
+    LOSS = 2
+    BREAK_EVEN = 3
+
+
+class TradeStatus(IntEnum):
+    ACTIVE = 0
+    TP1_HIT = 1
+
+
+# TradeStatus values are lower-case in the JSON files ('active', 'tp1_hit')
+_STATUS_TEXT = {TradeStatus.ACTIVE: 'active', TradeStatus.TP1_HIT: 'tp1_hit'}
+_STATUS_CODES = {text: code for code, text in _STATUS_TEXT.items()}
+
+# Plain lookup tables for the hot (de)serialization paths; Enum construction is slow
+_DIRECTION_TEXT = (None, 'BUY', 'SELL')
+_DIRECTION_CODES = {None: 0, 'BUY': 1, 'SELL': 2}
+_RESULT_TEXT = tuple(result.name for result in Result)
+_RESULT_CODES = {result.name: result.value for result in Result}
+_UTC = datetime.timezone.utc
+
+
+def to_epoch(value) -> Optional[float]:
+    """datetime / ISO string / number -> epoch seconds (naive values are taken as UTC)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return _parse_iso(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+def to_datetime(epoch: Optional[float]) -> Optional[datetime.datetime]:
+    if epoch is None:
+        return None
+    return datetime.datetime.fromtimestamp(epoch, _UTC)
+
+
+def to_iso(epoch: Optional[float]) -> Optional[str]:
+    if epoch is None or epoch != epoch:  # None or NaN
+        return None
+    return _format_iso(epoch)
+
+
+# Broadcast signals give every subscriber the same timestamps, so a save or load of N
+# users converts only a handful of distinct values; isoformat() alone is ~2.5us a call
+@functools.lru_cache(maxsize=4096)
+def _format_iso(epoch: float) -> str:
+    return datetime.datetime.fromtimestamp(epoch, _UTC).isoformat()
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_iso(text: str) -> float:
+    value = datetime.datetime.fromisoformat(text)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=_UTC)
+    return value.timestamp()
+
+
+def _direction_code(value) -> Direction:
+    """Unknown values (legacy files, typos) load as NONE instead of failing the whole user"""
+    code = _DIRECTION_CODES.get(value.upper() if isinstance(value, str) else value)
+    if code is None:
+        logger.warning(f"Unknown trade direction {value!r}, loaded as NONE")
+        return Direction.NONE
+    return Direction(code)
+
+
+def _status_code(value) -> TradeStatus:
+    code = _STATUS_CODES.get(value.lower() if isinstance(value, str) else value)
+    if code is None:
+        logger.warning(f"Unknown trade status {value!r}, loaded as active")
+        return TradeStatus.ACTIVE
+    return code
+
+
+class _CanonicalEpochs(dict):
+    """ISO text -> epoch for texts that to_iso() writes back unchanged; KeyError for any
+    other value, so the caller can keep that entry verbatim"""
+
+    def __missing__(self, text) -> float:
+        if not isinstance(text, str):
+            raise KeyError(text)
+        try:
+            epoch = _parse_iso(text)
+        except ValueError:
+            raise KeyError(text) from None
+        if _format_iso(epoch) != text:
+            raise KeyError(text)
+        if len(self) >= 4096:
+            self.clear()
+        self[text] = epoch
+        return epoch
+
+
+_EPOCHS = _CanonicalEpochs()
+
+
+def _direction_text(code: int) -> Optional[str]:
+    return _DIRECTION_TEXT[code]
+
+
+def _float_or_nan(value) -> float:
+    return _NAN if value is None else float(value)
+
+
+@dataclass(slots=True)
+class ActiveTrade:
+    direction: Direction
+    entry_price: float
+    tp1_level: float
+    tp2_level: float
+    sl_level: float
+    start_time: Optional[float] = None  # epoch seconds
+    status: TradeStatus = TradeStatus.ACTIVE
+    extra: Optional[dict] = None
+
+    _KEYS: ClassVar[tuple[str, ...]] = ('direction', 'entry_price', 'tp1_level', 'tp2_level', 'sl_level',
+                                         'start_time_utc', 'status')
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ActiveTrade':
+        """Accepts both a signal_info dict (datetime start) and its JSON form (ISO start)"""
+        extra = {k: v for k, v in data.items() if k not in cls._KEYS}
+        direction = _direction_code(data.get('direction'))
+        if direction == Direction.NONE and data.get('direction') is not None:
+            extra['direction'] = data['direction']  # written back unchanged by to_dict()
+        status = _status_code(data.get('status', 'active'))
+        if status == TradeStatus.ACTIVE and str(data.get('status', 'active')).lower() != 'active':
+            extra['status'] = data['status']  # likewise; move_sl_to_entry() drops it
+        return cls(
+            direction=direction,
+            entry_price=data.get('entry_price'),
+            tp1_level=data.get('tp1_level'),
+            tp2_level=data.get('tp2_level'),
+            sl_level=data.get('sl_level'),
+            start_time=to_epoch(data.get('start_time_utc')),
+            status=status,
+            extra=extra or None,
+        )
+
+    def to_dict(self) -> dict:
+        data = {
+            'direction': _direction_text(self.direction),
+            'entry_price': self.entry_price,
+            'tp1_level': self.tp1_level,
+            'tp2_level': self.tp2_level,
+            'sl_level': self.sl_level,
+        }
+        if self.start_time is not None:
+            data['start_time_utc'] = to_iso(self.start_time)
+        data['status'] = _STATUS_TEXT[self.status]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @property
+    def start_time_utc(self) -> Optional[datetime.datetime]:
+        return to_datetime(self.start_time)
+
+    def move_sl_to_entry(self) -> None:
+        self.status = TradeStatus.TP1_HIT
+        self.sl_level = self.entry_price
+        if self.extra:
+            self.extra.pop('status', None)
+
+
+# Column layout of one history record inside SignalHistory's flat array.
+# Codes are stored as doubles (exact for small ints); NaN means "missing".
+_ID, _DIRECTION, _ENTRY, _TP1, _TP2, _SL, _TIMESTAMP, _RESULT, _CLOSED_AT = range(9)
+RECORD_WIDTH = 9
+_RECORD_BYTES = RECORD_WIDTH * 8
+_unpack_record = struct.Struct(f'{RECORD_WIDTH}d').unpack
+
+# The keys of a history entry as SignalHistory.__iter__ writes it, plus 'closed_at' once closed
+_ENTRY_FIELDS = operator.itemgetter('id', 'direction', 'entry_price', 'tp1', 'tp2', 'sl', 'timestamp', 'result')
+
+
+class SignalHistory:
+    """A user's last MAX_USER_HISTORY signals as fixed-width records in one array('d').
+
+    Entries loaded from JSON that the record cannot reproduce (extra keys, unknown or
+    differently cased direction/result, non-numeric prices, ...) still get a record for
+    the stats, and the entry itself is kept in `_raw` (record index -> entry) for export.
+    """
+
+    __slots__ = ('_data', '_raw')
+
+    def __init__(self, data: Optional[array] = None, raw: Optional[dict[int, Any]] = None):
+        self._data = data if data is not None else array('d')
+        self._raw = raw or None
+
+    def __len__(self) -> int:
+        return len(self._data) // RECORD_WIDTH
+
+    def __bool__(self) -> bool:
+        return len(self._data) > 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.buffer_info()[1] * self._data.itemsize
+
+    def append(self, direction: Optional[str], entry_price, tp1, tp2, sl,
+               timestamp: Optional[float] = None, result: Result = Result.PENDING,
+               signal_id: Optional[int] = None, closed_at: Optional[float] = None) -> None:
+        if signal_id is None:
+            signal_id = int(self._data[-RECORD_WIDTH + _ID]) + 1 if self._data else 1
+        self._data.extend(_encode_record(signal_id, direction, entry_price, tp1, tp2, sl,
+                                         timestamp, result, closed_at))
+        excess = len(self) - MAX_USER_HISTORY
+        if excess > 0:
+            del self._data[:excess * RECORD_WIDTH]
+            if self._raw:
+                self._raw = {index - excess: entry for index, entry in self._raw.items() if index >= excess} or None
+
+    def close_last(self, result: Result, closed_at: float) -> None:
+        if not self._data:
+            return
+        base = len(self._data) - RECORD_WIDTH
+        self._data[base + _RESULT] = float(result)
+        self._data[base + _CLOSED_AT] = closed_at
+        last = len(self) - 1
+        if self._raw and isinstance(self._raw.get(last), dict):
+            self._raw[last] = {**self._raw[last], 'result': _RESULT_TEXT[result], 'closed_at': to_iso(closed_at)}
+
+    def as_matrix(self) -> np.ndarray:
+        """Zero-copy (n, RECORD_WIDTH) view; drop it before appending (an exported array cannot grow)"""
+        if not self._data:
+            return np.empty((0, RECORD_WIDTH))
+        return np.frombuffer(self._data, dtype=np.float64).reshape(-1, RECORD_WIDTH)
+
+    def result_counts(self, since: Optional[float] = None) -> dict[Result, int]:
+        """Signals per result, optionally only those with timestamp >= since"""
+        records = self.as_matrix()
+        if since is not None:
+            records = records[records[:, _TIMESTAMP] >= since]
+        codes = np.bincount(records[:, _RESULT].astype(np.int64), minlength=len(Result))
+        return {result: int(codes[result]) for result in Result}
+
+    def __iter__(self) -> Iterator[dict]:
+        return self._export(None)
+
+    def to_list(self, memo: Optional[dict] = None) -> list[dict]:
+        """`memo` (a dict kept for one save) shares the exported dict of a record across all
+        histories holding the same record, as every subscriber of a broadcast signal does;
+        such dicts must be treated as read-only"""
+        return list(self._export(memo))
+
+    def _export(self, memo: Optional[dict]) -> Iterator[dict]:
+        blob = self._data.tobytes()
+        raw = self._raw or {}
+        for index, base in enumerate(range(0, len(blob), _RECORD_BYTES)):
+            if index in raw:
+                yield raw[index]
+                continue
+            key = blob[base:base + _RECORD_BYTES]
+            record = memo.get(key) if memo is not None else None
+            if record is None:
+                signal_id, direction, entry, tp1, tp2, sl, timestamp, result, closed_at = _unpack_record(key)
+                record = {
+                    'id': int(signal_id),
+                    'direction': _DIRECTION_TEXT[int(direction)],
+                    'entry_price': None if entry != entry else entry,
+                    'tp1': None if tp1 != tp1 else tp1,
+                    'tp2': None if tp2 != tp2 else tp2,
+                    'sl': None if sl != sl else sl,
+                    'timestamp': to_iso(timestamp),
+                    'result': _RESULT_TEXT[int(result)],
+                }
+                if closed_at == closed_at:
+                    record['closed_at'] = to_iso(closed_at)
+                if memo is not None:
+                    memo[key] = record
+            yield record
+
+    @classmethod
+    def from_list(cls, entries: list) -> 'SignalHistory':
+        # Inlined rather than going through append(): this runs for every history entry
+        # of every user at startup. Entries in exactly the layout __iter__ writes take this
+        # path; anything else (missing prices included) goes through _from_irregular()
+        entries = entries[-MAX_USER_HISTORY:]
+        values: list[float] = []
+        extend = values.extend
+        try:
+            for entry in entries:
+                # _ENTRY_FIELDS raises KeyError unless all eight keys are there, so the
+                # length alone tells the two layouts apart from entries with extra keys
+                size = len(entry)
+                if size == 8:
+                    closed_at = _NAN
+                elif size == 9:
+                    closed_at = _EPOCHS[entry['closed_at']]
+                else:
+                    raise KeyError(size)
+                signal_id, direction, entry_price, tp1, tp2, sl, timestamp, result = _ENTRY_FIELDS(entry)
+                if type(signal_id) is not int:
+                    raise TypeError(signal_id)
+                extend((signal_id, _DIRECTION_CODES[direction], entry_price, tp1, tp2, sl,
+                        _NAN if timestamp is None else _EPOCHS[timestamp], _RESULT_CODES[result], closed_at))
+            return cls(array('d', values))
+        except (KeyError, TypeError, AttributeError):
+            return cls._from_irregular(entries)
+
+    @classmethod
+    def _from_irregular(cls, entries: list) -> 'SignalHistory':
+        values: list[float] = []
+        raw = {}
+        last_id = 0
+        for index, entry in enumerate(entries):
+            try:
+                record = _encode_entry(entry)
+            except (KeyError, TypeError, AttributeError):
+                record = _encode_loosely(entry, last_id)
+                raw[index] = entry
+            last_id = int(record[_ID])
+            values.extend(record)
+        if raw:
+            logger.warning(f"{len(raw)} history entries do not fit the record layout; kept as loaded")
+        return cls(array('d', values), raw)
+
+
+def _encode_entry(entry: dict) -> tuple:
+    """Record for an entry in the layout __iter__ writes; KeyError/TypeError for anything else"""
+    size = len(entry)
+    if size == 8:
+        closed_at = _NAN
+    elif size == 9:
+        closed_at = _EPOCHS[entry['closed_at']]
+    else:
+        raise KeyError(size)
+    signal_id, direction, entry_price, tp1, tp2, sl, timestamp, result = _ENTRY_FIELDS(entry)
+    if type(signal_id) is not int:
+        raise TypeError(signal_id)
+    return (
+        float(signal_id),
+        float(_DIRECTION_CODES[direction]),
+        _price(entry_price),
+        _price(tp1),
+        _price(tp2),
+        _price(sl),
+        _NAN if timestamp is None else _EPOCHS[timestamp],
+        float(_RESULT_CODES[result]),
+        closed_at,
+    )
+
+
+def _price(value) -> float:
+    if value is None:
+        return _NAN
+    if type(value) is not float and type(value) is not int:
+        raise TypeError(value)
+    return float(value)
+
+
+def _encode_loosely(entry, last_id: int) -> tuple:
+    """Best-effort record of an entry _encode_entry() rejects; the stats see unknown
+    directions/results as NONE/PENDING, while the entry itself is exported unchanged"""
+    get = entry.get if isinstance(entry, dict) else {}.get
+    signal_id = get('id')
+    if type(signal_id) is not int:
+        signal_id = last_id + 1
+    direction, result = get('direction'), get('result')
+    return (
+        float(signal_id),
+        float(_DIRECTION_CODES.get(direction.upper(), 0) if isinstance(direction, str) else 0),
+        _float_or_nan_loosely(get('entry_price')),
+        _float_or_nan_loosely(get('tp1')),
+        _float_or_nan_loosely(get('tp2')),
+        _float_or_nan_loosely(get('sl')),
+        _epoch_or_nan_loosely(get('timestamp')),
+        float(_RESULT_CODES.get(result.upper(), 0) if isinstance(result, str) else 0),
+        _epoch_or_nan_loosely(get('closed_at')),
+    )
+
+
+def _float_or_nan_loosely(value) -> float:
+    try:
+        return _float_or_nan(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def _epoch_or_nan_loosely(value) -> float:
+    try:
+        epoch = to_epoch(value)
+    except (TypeError, ValueError, AttributeError):
+        return _NAN
+    return _NAN if epoch is None else epoch
+
+
+def _encode_record(signal_id, direction, entry_price, tp1, tp2, sl, timestamp, result, closed_at) -> tuple:
+    return (
+        float(signal_id),
+        float(_DIRECTION_CODES[direction]),
+        _float_or_nan(entry_price),
+        _float_or_nan(tp1),
+        _float_or_nan(tp2),
+        _float_or_nan(sl),
+        _float_or_nan(timestamp),
+        float(result),
+        _float_or_nan(closed_at),
+    )
+
+
+@dataclass(slots=True)
+class UserState:
+    win_count: int = 0
+    loss_count: int = 0
+    be_count: int = 0
+    active_trade: Optional[ActiveTrade] = None
+    tracking_message_id: Optional[int] = None
+    last_signal_time: Optional[float] = None  # epoch seconds
+    signal_history: SignalHistory = field(default_factory=SignalHistory)
+    extra: Optional[dict] = None
+
+    _KEYS: ClassVar[tuple[str, ...]] = ('win_count', 'loss_count', 'be_count', 'active_trade',
+                                         'tracking_message_id', 'last_signal_time', 'signal_history')
+
+    def start_trade(self, trade_info: dict, record_history: bool = True,
+                    timestamp: Optional[float] = None) -> None:
+        """Make `trade_info` (a signal_info dict) this user's active trade"""
+        self.active_trade = ActiveTrade.from_dict(trade_info)
+        self.tracking_message_id = None
+        if record_history:
+            if timestamp is None:
+                timestamp = datetime.datetime.now(datetime.timezone.utc).timestamp()
+            self.signal_history.append(
+                trade_info.get('direction'), trade_info.get('entry_price'),
+                trade_info.get('tp1_level'), trade_info.get('tp2_level'), trade_info.get('sl_level'),
+                timestamp=timestamp,
+            )
+
+    def clear_trade(self) -> None:
+        self.active_trade = None
+        self.tracking_message_id = None
+
+    def record_result(self, result: Result, closed_at: Optional[float] = None) -> None:
+        if result == Result.WIN:
+            self.win_count += 1
+        elif result == Result.LOSS:
+            self.loss_count += 1
+        elif result == Result.BREAK_EVEN:
+            self.be_count += 1
+        self.clear_trade()
+        if closed_at is None:
+            closed_at = datetime.datetime.now(datetime.timezone.utc).timestamp()
+        self.signal_history.close_last(result, closed_at)
+
+    def reset(self) -> None:
+        self.win_count = self.loss_count = self.be_count = 0
+        self.clear_trade()
+        self.signal_history = SignalHistory()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'UserState':
+        extra = {k: v for k, v in data.items() if k not in cls._KEYS}
+        trade = data.get('active_trade')
+        return cls(
+            win_count=data.get('win_count', 0),
+            loss_count=data.get('loss_count', 0),
+            be_count=data.get('be_count', 0),
+            active_trade=ActiveTrade.from_dict(trade) if trade else None,
+            tracking_message_id=data.get('tracking_message_id'),
+            last_signal_time=to_epoch(data.get('last_signal_time')),
+            signal_history=SignalHistory.from_list(data.get('signal_history') or []),
+            extra=extra or None,
+        )
+
+    def to_dict(self, history_memo: Optional[dict] = None) -> dict[str, Any]:
+        """`history_memo`: see SignalHistory.to_list()"""
+        data = {
+            'win_count': self.win_count,
+            'loss_count': self.loss_count,
+            'be_count': self.be_count,
+            'active_trade': self.active_trade.to_dict() if self.active_trade else {},
+            'tracking_message_id': self.tracking_message_id,
+            'last_signal_time': to_iso(self.last_signal_time),
+            'signal_history': self.signal_history.to_list(history_memo),
+        }
+        if self.extra:
+            data.update(self.extra)
+        return data
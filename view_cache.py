@@ -0,0 +1,115 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from config import BotConfig
+from user_state import UserState
+
+
+@dataclass(frozen=True, slots=True)
+class MarketSnapshot:
+    """What every /dashboard and /info shows alike, as of `taken_at`"""
+    taken_at: float  # time.monotonic()
+    clock: str  # '%H:%M:%S WIB' at taken_at
+    connected: bool
+    price: Optional[float]
+    symbol: str
+    subscriber_count: int
+    market_status: dict
+    strategy_status: dict
+    indicators: dict
+
+
+def _user_key(chat_id: str, user_state: UserState) -> tuple:
+    """Changes whenever anything a user fragment shows can change.
+
+    Values only, no id(): CPython reuses the id of a freed trade for the next one. The
+    history length stops growing at MAX_USER_HISTORY, hence last_signal_time.
+    """
+    trade = user_state.active_trade
+    trade_key = (trade.start_time, trade.direction, trade.status, trade.entry_price, trade.tp1_level,
+                 trade.tp2_level, trade.sl_level) if trade else None
+    return (chat_id, user_state.win_count, user_state.loss_count, user_state.be_count,
+            len(user_state.signal_history), user_state.last_signal_time, trade_key, int(time.time() // 86400))
+
+
+class ViewCache:
+    """Shared market snapshot, rebuilt at most once per `ttl` seconds, and per-user fragments.
+
+    Rendering stays with the caller: a shared section (a dashboard or info header) is
+    rendered once per snapshot, a user fragment (trade block, statistics) once per change
+    of that user's trade, counters or UTC day. changed() remembers the last text shown in
+    each chat's message, so a refresh that would produce the same text can skip the edit.
+    """
+
+    def __init__(self, build_snapshot: Callable[[float], MarketSnapshot],
+                 ttl: float = BotConfig.DASHBOARD_SNAPSHOT_TTL):
+        self._build = build_snapshot
+        self.ttl = ttl
+        self._snapshot: Optional[MarketSnapshot] = None
+        self._sections: dict[str, Any] = {}
+        self._fragments: dict[str, tuple[tuple, dict]] = {}  # chat_id -> (user key, {name: value})
+        self._shown: dict[str, tuple[int, str]] = {}  # chat_id -> (message_id, text)
+        self.snapshots_built = 0
+        self.snapshot_hits = 0
+        self.fragments_built = 0
+        self.fragment_hits = 0
+        self.edits_skipped = 0
+
+    def snapshot(self) -> MarketSnapshot:
+        now = time.monotonic()
+        if self._snapshot is None or now - self._snapshot.taken_at >= self.ttl:
+            self._snapshot = self._build(now)
+            self._sections.clear()
+            self.snapshots_built += 1
+        else:
+            self.snapshot_hits += 1
+        return self._snapshot
+
+    def section(self, snapshot: MarketSnapshot, name: str, render: Callable[[MarketSnapshot], Any]) -> Any:
+        """`render(snapshot)`, computed once per snapshot"""
+        if snapshot is not self._snapshot:
+            return render(snapshot)
+        if name not in self._sections:
+            self._sections[name] = render(snapshot)
+        return self._sections[name]
+
+    def fragment(self, chat_id: str, user_state: UserState, name: str, render: Callable[[], Any]) -> Any:
+        key = _user_key(chat_id, user_state)
+        cached = self._fragments.get(chat_id)
+        if cached is None or cached[0] != key:
+            cached = self._fragments[chat_id] = (key, {})
+        values = cached[1]
+        if name in values:
+            self.fragment_hits += 1
+        else:
+            values[name] = render()
+            self.fragments_built += 1
+        return values[name]
+
+    def changed(self, chat_id: str, message_id: int, text: str) -> bool:
+        """Record `text` as shown in the message; False if it already shows exactly that"""
+        if self._shown.get(chat_id) == (message_id, text):
+            self.edits_skipped += 1
+            return False
+        self._shown[chat_id] = (message_id, text)
+        return True
+
+    def invalidate(self, chat_id: Optional[str] = None) -> None:
+        if chat_id is None:
+            self._snapshot = None
+            self._fragments.clear()
+            self._shown.clear()
+        else:
+            self._fragments.pop(chat_id, None)
+            self._shown.pop(chat_id, None)
+
+    def get_stats(self) -> dict:
+        return {
+            'snapshots_built': self.snapshots_built,
+            'snapshot_hits': self.snapshot_hits,
+            'fragments_built': self.fragments_built,
+            'fragment_hits': self.fragment_hits,
+            'edits_skipped': self.edits_skipped,
+            'users_cached': len(self._fragments),
+        }
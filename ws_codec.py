@@ -0,0 +1,112 @@
+import json
+import logging
+from typing import Any, Optional
+
+from config import BotConfig
+
+
+logger = logging.getLogger("WSCodec")
+
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _select_backend() -> str:
+    requested = BotConfig.JSON_DECODER
+    available = {
+        'msgspec': msgspec is not None,
+        'orjson': orjson is not None,
+        'json': True,
+    }
+    if requested != 'auto':
+        if available.get(requested):
+            return requested
+        logger.warning(f"JSON decoder '{requested}' not available, falling back to auto")
+    for name in ('msgspec', 'orjson', 'json'):
+        if available[name]:
+            return name
+    return 'json'
+
+
+JSON_BACKEND = _select_backend()
+
+# Every backend raises a ValueError subclass on malformed input
+# (json.JSONDecodeError, orjson.JSONDecodeError, msgspec.DecodeError).
+DecodeError = ValueError
+
+
+if JSON_BACKEND == 'msgspec':
+    class Tick(msgspec.Struct):
+        epoch: int
+        quote: float
+        symbol: str = ""
+        bid: Optional[float] = None
+        ask: Optional[float] = None
+
+    class DerivMessage(msgspec.Struct):
+        msg_type: str = ""
+        tick: Optional[Tick] = None
+        candles: Optional[list[dict[str, Any]]] = None
+        history: Optional[dict[str, Any]] = None
+        error: Optional[dict[str, Any]] = None
+        echo_req: Optional[dict[str, Any]] = None
+        req_id: Optional[int] = None
+
+    _decoder = msgspec.json.Decoder(DerivMessage)
+
+    def decode_message(raw: str | bytes) -> DerivMessage:
+        return _decoder.decode(raw)
+
+else:
+    from dataclasses import dataclass
+
+    @dataclass(slots=True)
+    class Tick:
+        epoch: int
+        quote: float
+        symbol: str = ""
+        bid: Optional[float] = None
+        ask: Optional[float] = None
+
+    @dataclass(slots=True)
+    class DerivMessage:
+        msg_type: str = ""
+        tick: Optional[Tick] = None
+        candles: Optional[list] = None
+        history: Optional[dict] = None
+        error: Optional[dict] = None
+        echo_req: Optional[dict] = None
+        req_id: Optional[int] = None
+
+    _loads = orjson.loads if JSON_BACKEND == 'orjson' else json.loads
+
+    def decode_message(raw: str | bytes) -> DerivMessage:
+        data = _loads(raw)
+        if not isinstance(data, dict):
+            raise DecodeError(f"Expected JSON object, got {type(data).__name__}")
+        tick = data.get('tick')
+        if tick is not None:
+            tick = Tick(
+                int(tick['epoch']),
+                float(tick['quote']),
+                tick.get('symbol', ''),
+                tick.get('bid'),
+                tick.get('ask'),
+            )
+        return DerivMessage(
+            data.get('msg_type', ''),
+            tick,
+            data.get('candles'),
+            data.get('history'),
+            data.get('error'),
+            data.get('echo_req'),
+            data.get('req_id'),
+        )